@@ -1,9 +1,15 @@
 import sys
 import logging # Add logging import
-from PyQt6.QtWidgets import QApplication
-from src.main_window import MainWindow # Import MainWindow from the src package
+from src.startup_profiler import startup_profiler
+
+PROFILE_STARTUP_OPTION = "--profile-startup"
 
 if __name__ == "__main__":
+    # ★★★ 追加: --profile-startup で import と初期化の所要時間をログに出力する ★★★
+    if PROFILE_STARTUP_OPTION in sys.argv:
+        sys.argv.remove(PROFILE_STARTUP_OPTION)
+        startup_profiler.enable()
+
     logging.basicConfig(
         level=logging.INFO, # Revert to INFO
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -36,11 +42,18 @@ if __name__ == "__main__":
     # logging.getLogger('src.thumbnail_loader').setLevel(logging.DEBUG)
     # logging.getLogger('src.main_window').setLevel(logging.DEBUG)
 
+    with startup_profiler.measure("import (PyQt6, MainWindow)"):
+        from PyQt6.QtWidgets import QApplication
+        from src.main_window import MainWindow # Import MainWindow from the src package
+
     app = QApplication(sys.argv)
+    startup_profiler.mark("QApplication 作成")
     try:
         logger.info("アプリケーションを起動します...")
-        window = MainWindow()
+        with startup_profiler.measure("MainWindow 作成"):
+            window = MainWindow()
         window.show()
+        startup_profiler.mark("show")
         sys.exit(app.exec())
     except Exception as e:
         logger.critical(f"アプリケーションの起動中に致命的なエラーが発生しました: {e}", exc_info=True)
@@ -0,0 +1,143 @@
+# src/animation_player.py
+import logging
+import threading
+from collections import deque
+
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QPixmap
+
+from PIL import Image
+try:
+    from PIL import ImageQt
+except ImportError:
+    ImageQt = None
+
+from .image_probe import probe_image
+
+logger = logging.getLogger(__name__)
+
+
+def is_animated_webp(file_path):
+    """WebPファイルのヘッダー (RIFF + VP8Xチャンクのフラグ) だけを読み、アニメーションかどうかを判定する。
+    フレームのデコードやPillowでのオープンは行わない。
+    """
+    probe = probe_image(file_path)
+    return probe.format == 'WEBP' and probe.is_animated
+
+
+class FrameDecoderThread(QThread):
+    """アニメーションのフレームを再生位置より先行してデコードし、上限付きのリングバッファに積むスレッド。
+    バッファが満杯の間は待機するため、保持されるフレーム数は常に buffer_size 以下になる。
+    """
+    decodeFailed = pyqtSignal(str)
+
+    def __init__(self, file_path, buffer_size, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.buffer_size = max(1, buffer_size)
+        self._frames = deque() # (frame_index, QImage, duration_ms)
+        self._condition = threading.Condition()
+        self._is_running = True
+
+    def run(self):
+        try:
+            with Image.open(self.file_path) as img:
+                n_frames = getattr(img, 'n_frames', 1)
+                frame_index = 0
+                while self._is_running:
+                    img.seek(frame_index)
+                    q_image = ImageQt.ImageQt(img.convert("RGBA")).copy() # Pillowのバッファから切り離す
+                    duration = int(img.info.get('duration', 100) or 100) # フレームのロード後に確定する
+                    with self._condition:
+                        while self._is_running and len(self._frames) >= self.buffer_size:
+                            self._condition.wait()
+                        if not self._is_running:
+                            break
+                        self._frames.append((frame_index, q_image, duration))
+                    frame_index = (frame_index + 1) % n_frames
+        except Exception as e:
+            logger.error(f"アニメーションフレームのデコードに失敗: {self.file_path}: {e}", exc_info=True)
+            self.decodeFailed.emit(str(e))
+
+    def take_frame(self):
+        """次のフレームを取り出す。まだデコードされていなければ None を返す。"""
+        with self._condition:
+            if not self._frames:
+                return None
+            frame = self._frames.popleft()
+            self._condition.notify()
+            return frame
+
+    def buffered_count(self):
+        with self._condition:
+            return len(self._frames)
+
+    def stop(self):
+        with self._condition:
+            self._is_running = False
+            self._condition.notify_all()
+
+
+class AnimationPlayer(QObject):
+    """QMovie (CacheAll) の代わりに使うアニメーションWebPプレイヤー。
+    デコードはワーカースレッドで行い、GUIスレッドはバッファからフレームを取り出して表示するだけにする。
+    """
+    frameChanged = pyqtSignal(int)
+    FRAME_BUFFER_SIZE = 8 # 先読みして保持するフレーム数の上限
+    UNDERRUN_RETRY_MS = 10 # デコードが追いついていない場合の再試行間隔
+
+    def __init__(self, file_path, parent=None, buffer_size=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self._buffer_size = buffer_size or self.FRAME_BUFFER_SIZE
+        self._current_pixmap = QPixmap()
+        self._current_frame_index = -1
+        self._decoder = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._advance_frame)
+        self._valid = ImageQt is not None and is_animated_webp(file_path)
+
+    def isValid(self):
+        return self._valid
+
+    def is_running(self):
+        return self._decoder is not None
+
+    def start(self):
+        if not self._valid or self._decoder is not None:
+            return
+        self._decoder = FrameDecoderThread(self.file_path, self._buffer_size)
+        self._decoder.decodeFailed.connect(self._on_decode_failed)
+        self._decoder.start()
+        self._timer.start(0)
+
+    def stop(self):
+        self._timer.stop()
+        if self._decoder is not None:
+            self._decoder.stop()
+            self._decoder.wait()
+            self._decoder = None
+
+    def currentPixmap(self):
+        return self._current_pixmap
+
+    def current_frame_index(self):
+        return self._current_frame_index
+
+    def _advance_frame(self):
+        if self._decoder is None:
+            return
+        frame = self._decoder.take_frame()
+        if frame is None:
+            self._timer.start(self.UNDERRUN_RETRY_MS)
+            return
+        frame_index, q_image, duration = frame
+        self._current_pixmap = QPixmap.fromImage(q_image)
+        self._current_frame_index = frame_index
+        self.frameChanged.emit(frame_index)
+        self._timer.start(max(10, duration))
+
+    def _on_decode_failed(self, message):
+        self._valid = False
+        self.stop()
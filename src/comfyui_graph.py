@@ -0,0 +1,231 @@
+# src/comfyui_graph.py
+"""ComfyUI の埋め込み JSON (API 形式の 'prompt' / UI 形式の 'workflow') からプロンプトと生成設定を取り出す。
+
+JSON は1回だけ解析し (orjson があれば使う)、サンプラーのノードから positive / negative の入力をたどって
+CLIPTextEncode 系のノードのテキストを集める。生成設定は A1111 形式の generation_info
+("Steps: 20, Sampler: euler, ...") にまとめるので、フィルタや列ストアは WebUI の画像と同じように扱える。
+元の JSON は保持しない (表示するときに metadata_utils.load_comfyui_json でファイルから読み直す)。
+"""
+import json
+import logging
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+COMFYUI_JSON_KEYS = ('prompt', 'workflow') # 解析する順 (API 形式のほうが入力名が揃っていて確実)
+COMFYUI_GRAPH_MAX_DEPTH = 32 # リンクをたどる深さの上限 (循環や巨大なグラフ対策)
+
+# UI 形式 (workflow) では widgets_values が名前なしの配列なので、主なノードについて入力名を対応させる
+WORKFLOW_WIDGET_NAMES = {
+    'CLIPTextEncode': ('text',),
+    'KSampler': ('seed', 'control_after_generate', 'steps', 'cfg', 'sampler_name', 'scheduler', 'denoise'),
+    'KSamplerAdvanced': ('add_noise', 'noise_seed', 'control_after_generate', 'steps', 'cfg', 'sampler_name',
+                         'scheduler', 'start_at_step', 'end_at_step', 'return_with_leftover_noise'),
+    'CheckpointLoaderSimple': ('ckpt_name',),
+    'UNETLoader': ('unet_name', 'weight_dtype'),
+    'LoraLoader': ('lora_name', 'strength_model', 'strength_clip'),
+    'LoraLoaderModelOnly': ('lora_name', 'strength_model'),
+    'EmptyLatentImage': ('width', 'height', 'batch_size'),
+    'PrimitiveNode': ('value',),
+}
+
+_TEXT_INPUTS = ('text', 'text_g', 'text_l', 'prompt', 'string', 'value')
+_SCALAR_INPUTS = ('value', 'seed', 'noise_seed', 'int', 'float', 'number', 'string', 'text')
+_CONDITIONING_INPUTS = ('conditioning', 'positive', 'negative', 'conditioning_1', 'conditioning_2',
+                        'conditioning_to', 'conditioning_from')
+_SAMPLER_HELPER_INPUTS = ('sampler', 'sigmas', 'noise', 'guider') # SamplerCustom 系は設定を別ノードに持つ
+_MODEL_NAME_INPUTS = ('ckpt_name', 'unet_name', 'model_name')
+
+
+def load_json(text):
+    """JSON 文字列を解析する。不正な場合は ValueError (json.JSONDecodeError / orjson.JSONDecodeError)。"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _is_link(value):
+    return isinstance(value, list) and len(value) == 2 and isinstance(value[0], (str, int)) and isinstance(value[1], int)
+
+
+def _api_nodes(graph):
+    """API 形式・UI 形式のどちらでも {ノードID(str): {'class_type': ..., 'inputs': {...}}} にそろえる。
+    リンクは API 形式と同じ [ノードID, 出力番号]。
+    """
+    if not isinstance(graph, dict):
+        return {}
+    if isinstance(graph.get('nodes'), list): # UI 形式
+        links = {}
+        for link in graph.get('links') or []:
+            if isinstance(link, list) and len(link) >= 3:
+                links[link[0]] = [str(link[1]), link[2]]
+        nodes = {}
+        for node in graph['nodes']:
+            if not isinstance(node, dict) or 'id' not in node:
+                continue
+            class_type = node.get('type', '')
+            inputs = {}
+            widgets = node.get('widgets_values')
+            if isinstance(widgets, list):
+                inputs.update(zip(WORKFLOW_WIDGET_NAMES.get(class_type, ()), widgets))
+            for node_input in node.get('inputs') or []:
+                if isinstance(node_input, dict) and node_input.get('link') in links:
+                    inputs[node_input.get('name')] = links[node_input['link']]
+            nodes[str(node['id'])] = {'class_type': class_type, 'inputs': inputs}
+        return nodes
+    return {str(node_id): node for node_id, node in graph.items()
+            if isinstance(node, dict) and isinstance(node.get('inputs'), dict)}
+
+
+def _resolve(nodes, value, depth=0):
+    """入力値がリンクなら、リンク先 (Primitive ノードなど) の値までたどる。"""
+    while _is_link(value) and depth < COMFYUI_GRAPH_MAX_DEPTH:
+        node = nodes.get(str(value[0]))
+        if node is None:
+            return None
+        inputs = node['inputs']
+        value = next((inputs[key] for key in _SCALAR_INPUTS if key in inputs), None)
+        depth += 1
+    return None if _is_link(value) else value
+
+
+def _collect_texts(nodes, link, texts, depth=0):
+    """conditioning のリンク先をたどり、テキストエンコードのノードのテキストを texts に集める。"""
+    if not _is_link(link) or depth >= COMFYUI_GRAPH_MAX_DEPTH:
+        return
+    node = nodes.get(str(link[0]))
+    if node is None:
+        return
+    inputs = node['inputs']
+    found = False
+    for key in _TEXT_INPUTS:
+        text = _resolve(nodes, inputs.get(key), depth + 1)
+        if isinstance(text, str) and text.strip():
+            found = True
+            if text.strip() not in texts: # SDXL の text_g / text_l は同じ内容のことが多い
+                texts.append(text.strip())
+    if found:
+        return
+    if 'positive' in inputs and 'negative' in inputs: # ControlNetApplyAdvanced など: 出力0が positive、1が negative
+        _collect_texts(nodes, inputs['negative' if link[1] == 1 else 'positive'], texts, depth + 1)
+        return
+    for key in _CONDITIONING_INPUTS:
+        _collect_texts(nodes, inputs.get(key), texts, depth + 1)
+
+
+def _sampler_setting(nodes, inputs, keys):
+    """サンプラーの設定値。SamplerCustom 系のように別ノード (KSamplerSelect, BasicScheduler など) にあればそちらを見る。"""
+    for key in keys:
+        if key in inputs:
+            return _resolve(nodes, inputs[key])
+    for helper_key in _SAMPLER_HELPER_INPUTS:
+        helper = inputs.get(helper_key)
+        if _is_link(helper) and str(helper[0]) in nodes:
+            helper_inputs = nodes[str(helper[0])]['inputs']
+            for key in keys:
+                if key in helper_inputs:
+                    return _resolve(nodes, helper_inputs[key])
+    return None
+
+
+def _file_stem(name):
+    return os.path.splitext(os.path.basename(name.replace('\\', '/')))[0]
+
+
+def _model_chain(nodes, link):
+    """model 入力をたどり、(モデル名, LoRA 名のリスト) を返す。"""
+    model_name = None
+    loras = []
+    depth = 0
+    while _is_link(link) and depth < COMFYUI_GRAPH_MAX_DEPTH:
+        node = nodes.get(str(link[0]))
+        if node is None:
+            break
+        inputs = node['inputs']
+        lora_name = _resolve(nodes, inputs.get('lora_name'))
+        if isinstance(lora_name, str) and lora_name:
+            loras.append(_file_stem(lora_name))
+        name = next((_resolve(nodes, inputs[key]) for key in _MODEL_NAME_INPUTS if key in inputs), None)
+        if isinstance(name, str) and name:
+            model_name = _file_stem(name)
+            break
+        link = inputs.get('model')
+        depth += 1
+    return model_name, loras
+
+
+def _latent_size(nodes, link):
+    depth = 0
+    while _is_link(link) and depth < COMFYUI_GRAPH_MAX_DEPTH:
+        node = nodes.get(str(link[0]))
+        if node is None:
+            break
+        inputs = node['inputs']
+        width, height = _resolve(nodes, inputs.get('width')), _resolve(nodes, inputs.get('height'))
+        if isinstance(width, int) and isinstance(height, int):
+            return width, height
+        link = inputs.get('samples', inputs.get('latent'))
+        depth += 1
+    return None
+
+
+def _sampler_nodes(nodes):
+    """positive / negative をリンクで受け取るノード (KSampler, SamplerCustom, ...)。ID 順 (最初のパスが先)。"""
+    samplers = [(node_id, node) for node_id, node in nodes.items()
+                if _is_link(node['inputs'].get('positive')) and _is_link(node['inputs'].get('negative'))
+                and (_is_link(node['inputs'].get('model')) or 'steps' in node['inputs'] or 'cfg' in node['inputs'])]
+    return [node for _, node in sorted(samplers, key=lambda pair: (len(pair[0]), pair[0]))]
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return f"{value:g}"
+    return str(value)
+
+
+def extract_comfyui_metadata(graph):
+    """解析済みの ComfyUI の JSON から positive_prompt / negative_prompt / generation_info の辞書を返す。
+    サンプラーが見つからなければ None。
+    """
+    nodes = _api_nodes(graph)
+    samplers = _sampler_nodes(nodes)
+    if not samplers:
+        return None
+    sampler = samplers[0]
+    inputs = sampler['inputs']
+    positive_texts = []
+    negative_texts = []
+    _collect_texts(nodes, inputs['positive'], positive_texts)
+    _collect_texts(nodes, inputs['negative'], negative_texts)
+
+    settings = [
+        ('Steps', _sampler_setting(nodes, inputs, ('steps',))),
+        ('Sampler', _sampler_setting(nodes, inputs, ('sampler_name',))),
+        ('Schedule type', _sampler_setting(nodes, inputs, ('scheduler',))),
+        ('CFG scale', _sampler_setting(nodes, inputs, ('cfg',))),
+        ('Seed', _sampler_setting(nodes, inputs, ('seed', 'noise_seed'))),
+    ]
+    size = _latent_size(nodes, inputs.get('latent_image'))
+    if size:
+        settings.append(('Size', f"{size[0]}x{size[1]}"))
+    model_name, loras = _model_chain(nodes, inputs.get('model'))
+    settings.append(('Model', model_name))
+    # img2img (最初のサンプラー) か Hires のパス (2つ目以降) の denoise が 1 未満なら記録する
+    denoise_values = (_resolve(nodes, node['inputs'].get('denoise')) for node in samplers)
+    denoise = next((value for value in denoise_values if isinstance(value, (int, float)) and value < 1), None)
+    if denoise is not None:
+        settings.append(('Denoising strength', denoise))
+    if loras:
+        settings.append(('Loras', '"' + ', '.join(loras) + '"'))
+    generation_info = ", ".join(f"{key}: {_format_value(value)}" for key, value in settings
+                                if value is not None and value != '' and not _is_link(value))
+    return {
+        'positive_prompt': ", ".join(positive_texts),
+        'negative_prompt': ", ".join(negative_texts),
+        'generation_info': generation_info,
+    }
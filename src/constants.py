@@ -6,6 +6,7 @@ APP_SETTINGS_FILE = "app_settings.json"
 
 METADATA_ROLE = Qt.ItemDataRole.UserRole + 1
 SELECTION_ORDER_ROLE = Qt.ItemDataRole.UserRole + 2
+GENERATION_SLOT_ROLE = Qt.ItemDataRole.UserRole + 3 # ★★★ 追加: GenerationInfoColumns の行番号 ★★★
 
 # Thumbnail right-click action settings
 THUMBNAIL_RIGHT_CLICK_ACTION = "thumbnail_right_click_action"
@@ -35,6 +36,22 @@ DOUBLE_CLICK_ACTION = "double_click_action"
 DOUBLE_CLICK_ACTION_VIEWER = "viewer_only" # 画像ビューアのみ (従来)
 DOUBLE_CLICK_ACTION_VIEWER_METADATA = "viewer_metadata" # 画像とメタデータ
 
+# --- ★★★ 追加: コピーモードの複製方法 ★★★ ---
+COPY_STRATEGY = "copy_strategy"
+COPY_STRATEGY_AUTO = "auto" # reflink -> copy_file_range -> 通常コピー の順に自動で切り替え
+COPY_STRATEGY_HARDLINK = "hardlink" # ハードリンク優先 (ディスクを消費しないが、元ファイルと内容を共有する)
+COPY_STRATEGY_FULL = "full_copy" # 常に通常コピー (従来)
+
+# --- ★★★ 追加: ファイル操作のジャーナル (中断された移動/コピーの再開・取り消し用) ★★★ ---
+FILE_OPERATION_JOURNAL_DIR = "file_operation_journal"
+
+# --- ★★★ 追加: セッションスナップショット (前回終了時の表示を起動直後に復元する) ★★★ ---
+SESSION_SNAPSHOT_FILE = "session_snapshot.bin"
+SESSION_SNAPSHOT_MAX_THUMBNAILS = 300 # サムネイルを保存する行数 (表示位置の前後。残りはパスだけ保存し、復元後に読み込む)
+
+# --- ★★★ 追加: ライブラリ全体の検索用の索引 (SQLite FTS5) ★★★ ---
+LIBRARY_INDEX_FILE = "library_index.sqlite3"
+
 
 # --- ★★★ 追加終わり ★★★ ---
 
@@ -4,18 +4,14 @@ import os
 from PyQt6.QtCore import Qt, QByteArray
 from PyQt6.QtWidgets import QMessageBox, QApplication, QDialog
 
-from .settings_dialog import SettingsDialog
-from .full_image_dialog import FullImageDialog
-from .image_metadata_dialog import ImageMetadataDialog
-from .image_with_metadata_dialog import ImageWithMetadataDialog # ★★★ 追加 ★★★
-from .wc_creator_dialog import WCCreatorDialog
-from .drop_window import DropWindow
+# ★★★ 変更: 各ダイアログのモジュールは起動を速くするため、初めて開くときに各メソッド内で import する ★★★
 from .constants import (
     APP_SETTINGS_FILE,
     THUMBNAIL_RIGHT_CLICK_ACTION,
     DOUBLE_CLICK_ACTION, DOUBLE_CLICK_ACTION_VIEWER, DOUBLE_CLICK_ACTION_VIEWER_METADATA, # ★★★ 追加 ★★★
     WC_COMMENT_OUTPUT_FORMAT, METADATA_ROLE, DELETE_EMPTY_FOLDERS_ENABLED,
     INITIAL_SORT_ORDER_ON_FOLDER_SELECT, # ★★★ 初期ソート設定キーを追加 ★★★
+    COPY_STRATEGY, # ★★★ 追加 ★★★
     Qt as ConstantsQt # Renamed Qt from constants to avoid clash
 )
 # Qt from QtCore is used for Qt.ItemDataRole etc.
@@ -36,6 +32,7 @@ class DialogManager:
     def open_settings_dialog(self):
         """設定ダイアログを開き、変更を適用する。"""
         if self.settings_dialog_instance is None:
+            from .settings_dialog import SettingsDialog
             self.settings_dialog_instance = SettingsDialog(
                 current_thumbnail_size=self.main_window.current_thumbnail_size,
                 available_thumbnail_sizes=self.main_window.available_sizes,
@@ -45,6 +42,7 @@ class DialogManager:
                 current_delete_empty_folders_setting=self.main_window.delete_empty_folders_enabled, # ★★★ 追加 ★★★
                 current_initial_folder_sort_setting=self.main_window.initial_folder_sort_setting, # ★★★ 追加: 初期ソート設定を渡す ★★★
                 current_double_click_action=self.main_window.double_click_action, # ★★★ 追加 ★★★
+                current_copy_strategy=self.main_window.copy_strategy, # ★★★ 追加 ★★★
                 parent=self.main_window
             )
 
@@ -81,6 +79,13 @@ class DialogManager:
                 self.main_window.double_click_action = new_double_click_action
                 logger.info(f"ダブルクリック動作設定が変更されました: {self.main_window.double_click_action}")
 
+            # ★★★ 追加: コピーモードの複製方法 ★★★
+            new_copy_strategy = self.settings_dialog_instance.get_selected_copy_strategy()
+            if self.main_window.copy_strategy != new_copy_strategy:
+                self.main_window.copy_strategy = new_copy_strategy
+                self.main_window.file_operations.copy_strategy = new_copy_strategy
+                logger.info(f"コピー方式設定が変更されました: {self.main_window.copy_strategy}")
+
             new_size = self.settings_dialog_instance.get_selected_thumbnail_size()
             reply_ok_for_size_change = True # Assume OK if no confirmation needed or confirmed
             if self.main_window.current_thumbnail_size != new_size:
@@ -114,6 +119,7 @@ class DialogManager:
             self.main_window.app_settings[DELETE_EMPTY_FOLDERS_ENABLED] = self.main_window.delete_empty_folders_enabled # ★★★ 追加 ★★★
             self.main_window.app_settings[INITIAL_SORT_ORDER_ON_FOLDER_SELECT] = self.main_window.initial_folder_sort_setting # ★★★ 追加 ★★★
             self.main_window.app_settings[DOUBLE_CLICK_ACTION] = self.main_window.double_click_action # ★★★ 追加 ★★★
+            self.main_window.app_settings[COPY_STRATEGY] = self.main_window.copy_strategy # ★★★ 追加 ★★★
             self.main_window._write_app_settings_file()
         self.settings_dialog_instance = None
 
@@ -129,26 +135,16 @@ class DialogManager:
 
         logger.info(f"FullImageDialog表示要求: {file_path}")
 
-        visible_image_paths = []
-        for row in range(self.main_window.ui_manager.filter_proxy_model.rowCount()): # ★★★ UIManager経由 ★★★
-            proxy_idx_loop = self.main_window.ui_manager.filter_proxy_model.index(row, 0) # ★★★ UIManager経由 ★★★
-            source_idx_loop = self.main_window.ui_manager.filter_proxy_model.mapToSource(proxy_idx_loop) # ★★★ UIManager経由 ★★★
-            item_loop = self.main_window.ui_manager.source_thumbnail_model.itemFromIndex(source_idx_loop) # ★★★ UIManager経由 ★★★
-            if item_loop:
-                visible_image_paths.append(item_loop.data(Qt.ItemDataRole.UserRole))
-
-        current_idx_in_visible_list = -1
-        if file_path in visible_image_paths:
-            current_idx_in_visible_list = visible_image_paths.index(file_path)
-        else:
-             logger.error(f"ダブルクリックされたファイルパス {file_path} が表示中のアイテムリストに見つかりません。")
-             return
+        # ★★★ 変更: 表示中パスのリストを毎回作らず、プロキシモデルを直接参照するシーケンスを渡す ★★★
+        visible_image_paths = self.main_window.ui_manager.visible_path_sequence()
+        current_idx_in_visible_list = proxy_index.row()
 
         try:
             # ★★★ 追加: 設定に基づいてダイアログを切り替え ★★★
             if self.main_window.double_click_action == DOUBLE_CLICK_ACTION_VIEWER_METADATA:
                 if self.image_with_metadata_dialog_instance is None:
                     logger.debug(f"ImageWithMetadataDialogの新規インスタンスを作成します。")
+                    from .image_with_metadata_dialog import ImageWithMetadataDialog
                     self.image_with_metadata_dialog_instance = ImageWithMetadataDialog(
                         visible_image_paths, current_idx_in_visible_list, self.main_window,
                         preview_mode=self.main_window.image_preview_mode, parent=self.main_window
@@ -163,6 +159,7 @@ class DialogManager:
             else: # DOUBLE_CLICK_ACTION_VIEWER (Default)
                 if self.full_image_dialog_instance is None:
                     logger.debug(f"FullImageDialogの新規インスタンスを作成します。モード: {self.main_window.image_preview_mode}")
+                    from .full_image_dialog import FullImageDialog
                     self.full_image_dialog_instance = FullImageDialog(
                         visible_image_paths, current_idx_in_visible_list,
                         preview_mode=self.main_window.image_preview_mode, parent=self.main_window,
@@ -230,7 +227,12 @@ class DialogManager:
 
     def _show_specific_metadata_dialog(self, metadata_dict, item_file_path_for_debug=None):
         """実際にImageMetadataDialogを表示または更新する内部メソッド。"""
+        # ★★★ 追加: ComfyUI の元の JSON は保持していないので、表示するときにファイルから読み込む ★★★
+        if isinstance(metadata_dict, dict) and metadata_dict.get('comfyui_json_key'):
+            from .metadata_utils import with_comfyui_json
+            metadata_dict = with_comfyui_json(metadata_dict, item_file_path_for_debug)
         if self.metadata_dialog_instance is None:
+            from .image_metadata_dialog import ImageMetadataDialog
             self.metadata_dialog_instance = ImageMetadataDialog(metadata_dict, self.main_window, item_file_path_for_debug)
             self.metadata_dialog_instance.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose, True)
             self.metadata_dialog_instance.finished.connect(self._on_metadata_dialog_finished)
@@ -260,11 +262,32 @@ class DialogManager:
                 logger.debug(f"メタデータダイアログが閉じられました。ジオメトリ(QByteArray)を保存しました。")
             self.metadata_dialog_instance = None
 
+    def show_memory_stats_dialog(self):
+        """プロンプトの共有テーブルによるメモリの節約量などを表示する (デバッグ用)。"""
+        intern_table = self.main_window.ui_manager.prompt_intern_table
+        if intern_table is None:
+            QMessageBox.information(self.main_window, "メモリ統計", "統計はまだありません。")
+            return
+        stats = intern_table.stats()
+        lines = [
+            f"メタデータ (キャッシュ): {len(self.main_window.metadata_cache)} 件",
+            f"プロンプトの参照数: {stats['references']} / 一意な文字列: {stats['unique_strings']}",
+            f"一意な文字列のサイズ: {stats['unique_bytes'] / 1024:.1f} KB (小文字化済み: {stats['lower_bytes'] / 1024:.1f} KB)",
+            f"共有により節約したサイズ: {stats['saved_bytes'] / 1024:.1f} KB",
+        ]
+        metadata_store = self.main_window.ui_manager.metadata_store
+        if metadata_store is not None:
+            store_stats = metadata_store.stats()
+            lines.append(f"generation_info の圧縮 ({store_stats['codec']}, {store_stats['blocks']} ブロック): "
+                         f"{store_stats['raw_bytes'] / 1024:.1f} KB → {store_stats['compressed_bytes'] / 1024:.1f} KB")
+        logger.debug("メモリ統計: " + " / ".join(lines))
+        QMessageBox.information(self.main_window, "メモリ統計", "\n".join(lines))
 
     def toggle_drop_window(self):
         """ドラッグアンドドロップウィンドウの表示/非表示を切り替える。"""
         if self.drop_window_instance is None:
             logger.info("DropWindowのインスタンスを初めて作成します。")
+            from .drop_window import DropWindow
             self.drop_window_instance = DropWindow(dialog_manager=self)
 
         if self.drop_window_instance.isVisible():
@@ -282,16 +305,12 @@ class DialogManager:
             QMessageBox.warning(self.main_window, "エラー", f"指定されたパスはファイルではありません:\n{file_path}")
             return
 
-        metadata_to_show = self.main_window.metadata_cache.get(file_path)
-
-        if metadata_to_show is None:
+        if file_path not in self.main_window.metadata_cache:
             logger.info(f"メタデータキャッシュにないため、 '{file_path}' から抽出します。")
-            from .metadata_utils import extract_image_metadata
-            metadata_to_show = extract_image_metadata(file_path)
-            self.main_window.metadata_cache[file_path] = metadata_to_show
-            logger.debug(f"ファイル '{file_path}' からメタデータを抽出し、キャッシュしました。")
+            self._extract_missing_metadata([file_path])
         else:
             logger.debug(f"ファイル '{file_path}' のメタデータをキャッシュから使用します。")
+        metadata_to_show = self.main_window.metadata_cache.get(file_path)
 
         if not isinstance(metadata_to_show, dict):
              logger.error(f"表示すべきメタデータが辞書型ではありません (型: {type(metadata_to_show)})。ファイル: {file_path}")
@@ -299,6 +318,15 @@ class DialogManager:
 
         self._show_specific_metadata_dialog(metadata_to_show, item_file_path_for_debug=file_path)
 
+    def _extract_missing_metadata(self, file_paths):
+        """metadata_cache にないファイルのメタデータを並列で抽出し、キャッシュに追加する。"""
+        from .metadata_utils import extract_image_metadata_batch
+        metadata_cache = self.main_window.metadata_cache
+        # skip_paths にはキャッシュをそのまま渡す (in で調べるだけなので、抽出中に追加したパスがあっても問題ない)
+        for file_path, metadata in extract_image_metadata_batch(file_paths, skip_paths=metadata_cache):
+            metadata_cache[file_path] = metadata
+            logger.debug(f"ファイル '{file_path}' からメタデータを抽出し、キャッシュしました。")
+
     def open_wc_creator_dialog(self):
         """ワイルドカード作成ダイアログを開く。"""
         logger.info("ワイルドカード作成ツールを起動します。")
@@ -312,34 +340,41 @@ class DialogManager:
         metadata_for_wc = []
         processed_paths = set() # 選択されたアイテムの重複処理を避ける
         
+        # ★★★ 変更: キャッシュにないファイルは1件ずつ抽出せず、先にまとめて並列で抽出する ★★★
+        selected_items = []
         for proxy_idx in selected_proxy_indexes:
             if proxy_idx.column() == 0:
                 source_idx = self.main_window.ui_manager.filter_proxy_model.mapToSource(proxy_idx) # ★★★ UIManager経由 ★★★
                 item = self.main_window.ui_manager.source_thumbnail_model.itemFromIndex(source_idx) # ★★★ UIManager経由 ★★★
                 if item:
-                    file_path = item.data(Qt.ItemDataRole.UserRole)
-                    if file_path and file_path not in processed_paths:
-                        metadata = item.data(METADATA_ROLE)
-                        if not isinstance(metadata, dict):
-                            metadata = self.main_window.metadata_cache.get(file_path)
-                        if not isinstance(metadata, dict):
-                            logger.warning(f"WC Creator用メタデータ: {file_path} のキャッシュが見つからないため、再抽出します。")
-                            from .metadata_utils import extract_image_metadata
-                            metadata = extract_image_metadata(file_path)
-                            self.main_window.metadata_cache[file_path] = metadata
-                        
-                        if isinstance(metadata, dict):
-                            selected_files_for_wc.append(file_path)
-                            metadata_for_wc.append(metadata)
-                            processed_paths.add(file_path)
-                        else:
-                            logger.error(f"WC Creator: {file_path} のメタデータ取得に失敗しました。スキップします。")
+                    selected_items.append(item)
+        missing_paths = [item.data(Qt.ItemDataRole.UserRole) for item in selected_items
+                         if item.data(Qt.ItemDataRole.UserRole) and not isinstance(item.data(METADATA_ROLE), dict)
+                         and not isinstance(self.main_window.metadata_cache.get(item.data(Qt.ItemDataRole.UserRole)), dict)]
+        if missing_paths:
+            logger.warning(f"WC Creator用メタデータ: キャッシュが見つからない {len(missing_paths)} 件を再抽出します。")
+            self._extract_missing_metadata(missing_paths)
+
+        for item in selected_items:
+            file_path = item.data(Qt.ItemDataRole.UserRole)
+            if file_path and file_path not in processed_paths:
+                metadata = item.data(METADATA_ROLE)
+                if not isinstance(metadata, dict):
+                    metadata = self.main_window.metadata_cache.get(file_path)
+                
+                if isinstance(metadata, dict):
+                    selected_files_for_wc.append(file_path)
+                    metadata_for_wc.append(metadata)
+                    processed_paths.add(file_path)
+                else:
+                    logger.error(f"WC Creator: {file_path} のメタデータ取得に失敗しました。スキップします。")
 
         if not selected_files_for_wc:
             QMessageBox.warning(self.main_window, "エラー", "有効な画像データが見つかりませんでした。")
             return
 
         logger.info(f"{len(selected_files_for_wc)} 個の画像をWC Creatorに渡します。")
+        from .wc_creator_dialog import WCCreatorDialog
         wc_dialog = WCCreatorDialog(selected_files_for_wc, metadata_for_wc, self.main_window.wc_creator_comment_format, self.main_window)
         wc_dialog.exec()
         logger.info("プロンプト整形ツールを閉じました。")
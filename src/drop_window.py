@@ -8,6 +8,7 @@ from PyQt6.QtCore import Qt, QTimer, QUrl  # QUrl を明示的にインポート
 from PyQt6.QtGui import QDragEnterEvent, QDropEvent, QDragMoveEvent, QScreen # QScreenもインポート
 
 from .constants import IMAGE_EXTENSIONS # Import from constants
+from .image_probe import PROBE_EXTENSIONS, probe_image
 
 logger = logging.getLogger(__name__)
 
@@ -88,6 +89,8 @@ class DropWindow(QWidget):
             return False
         if os.path.isfile(file_path):
             _, ext = os.path.splitext(file_path)
+            if ext.lower() in PROBE_EXTENSIONS: # ★★★ 追加: ヘッダーを解析できる形式は中身も確認する ★★★
+                return probe_image(file_path).is_valid
             if ext.lower() in IMAGE_EXTENSIONS:
                 return True
         return False
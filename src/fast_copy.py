@@ -0,0 +1,114 @@
+# src/fast_copy.py
+"""コピーモードで使うファイル複製処理。
+
+同じファイルシステム上では、データ自体を複製しない方法 (reflink / ハードリンク) や
+カーネル内コピー (copy_file_range) を優先し、使えない場合はファイルごとに次の方法へ自動で切り替える。
+最終的には必ず shutil.copy2 (Linux では内部で sendfile を使う) にフォールバックする。
+"""
+import errno
+import logging
+import os
+import shutil
+import threading
+
+from .constants import COPY_STRATEGY_AUTO, COPY_STRATEGY_HARDLINK, COPY_STRATEGY_FULL
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+COPY_METHOD_REFLINK = "reflink"
+COPY_METHOD_HARDLINK = "hardlink"
+COPY_METHOD_COPY_FILE_RANGE = "copy_file_range"
+COPY_METHOD_FULL = "full_copy"
+
+FICLONE = 0x40049409 # linux/fs.h: _IOW(0x94, 9, int)
+COPY_FILE_RANGE_CHUNK = 64 * 1024 * 1024
+
+# この errno の場合は「この組み合わせのデバイスでは非対応」とみなし、以降のファイルでは試さない
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EPERM, errno.EBADF,
+                       getattr(errno, 'EOPNOTSUPP', errno.EINVAL), getattr(errno, 'ENOTSUP', errno.EINVAL),
+                       getattr(errno, 'ENOTTY', errno.EINVAL)}
+_unsupported_methods = set() # (method, src_dev, dest_dev_folder)
+_unsupported_lock = threading.Lock()
+
+
+def _reflink(src_path, dest_path):
+    if fcntl is None:
+        raise OSError(errno.ENOTSUP, "reflink is not supported on this platform")
+    with open(src_path, 'rb') as src_file, open(dest_path, 'wb') as dest_file:
+        fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+    shutil.copystat(src_path, dest_path)
+
+
+def _hardlink(src_path, dest_path):
+    if os.path.lexists(dest_path): # copy2 と同じく既存ファイルは置き換える
+        os.unlink(dest_path)
+    os.link(src_path, dest_path)
+
+
+def _copy_file_range(src_path, dest_path):
+    if not hasattr(os, 'copy_file_range'):
+        raise OSError(errno.ENOSYS, "copy_file_range is not available")
+    with open(src_path, 'rb') as src_file, open(dest_path, 'wb') as dest_file:
+        remaining = os.fstat(src_file.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src_file.fileno(), dest_file.fileno(), min(remaining, COPY_FILE_RANGE_CHUNK))
+            if copied == 0:
+                break
+            remaining -= copied
+        if remaining > 0:
+            raise OSError(errno.EIO, f"copy_file_range stopped early ({remaining} bytes left)")
+    shutil.copystat(src_path, dest_path)
+
+
+def _full_copy(src_path, dest_path):
+    shutil.copy2(src_path, dest_path)
+
+
+_METHOD_FUNCTIONS = {
+    COPY_METHOD_REFLINK: _reflink,
+    COPY_METHOD_HARDLINK: _hardlink,
+    COPY_METHOD_COPY_FILE_RANGE: _copy_file_range,
+    COPY_METHOD_FULL: _full_copy,
+}
+
+_STRATEGY_METHODS = {
+    COPY_STRATEGY_AUTO: (COPY_METHOD_REFLINK, COPY_METHOD_COPY_FILE_RANGE, COPY_METHOD_FULL),
+    COPY_STRATEGY_HARDLINK: (COPY_METHOD_HARDLINK, COPY_METHOD_REFLINK, COPY_METHOD_COPY_FILE_RANGE, COPY_METHOD_FULL),
+    COPY_STRATEGY_FULL: (COPY_METHOD_FULL,),
+}
+
+
+def methods_for_strategy(strategy):
+    """設定値に対応する試行順の複製方法を返す。不明な値は自動 (COPY_STRATEGY_AUTO) として扱う。"""
+    return _STRATEGY_METHODS.get(strategy, _STRATEGY_METHODS[COPY_STRATEGY_AUTO])
+
+
+def copy_file(src_path, dest_path, strategy=COPY_STRATEGY_AUTO):
+    """src_path を dest_path に複製し、実際に使われた方法 (COPY_METHOD_*) を返す。
+    失敗した方法は次の方法にフォールバックし、最後の方法 (full_copy) の例外だけを呼び出し元に送出する。
+    """
+    methods = methods_for_strategy(strategy)
+    try:
+        device_key = (os.stat(src_path).st_dev, os.stat(os.path.dirname(dest_path) or ".").st_dev)
+    except OSError:
+        device_key = None
+    for method in methods:
+        is_last = method == methods[-1]
+        if not is_last and device_key is not None and (method, *device_key) in _unsupported_methods:
+            continue
+        try:
+            _METHOD_FUNCTIONS[method](src_path, dest_path)
+            return method
+        except OSError as e:
+            if is_last:
+                raise
+            if device_key is not None and e.errno in _UNSUPPORTED_ERRNOS:
+                with _unsupported_lock:
+                    _unsupported_methods.add((method, *device_key))
+            logger.debug(f"{method} での複製に失敗したため次の方法を試します: {src_path}: {e}")
+    raise OSError(errno.EIO, f"No copy method succeeded for {src_path}") # methods が空になることはない
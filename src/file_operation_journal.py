@@ -0,0 +1,288 @@
+# src/file_operation_journal.py
+"""移動/コピー操作の先行書き込みジャーナル。
+
+操作を始める前に予定している (移動元, 移動先) の組をすべて書き出して fsync し、
+1件完了するごとに完了記録を追記する。操作が最後まで (またはキャンセルで) 終わればファイルを削除するので、
+起動時に残っているジャーナルはクラッシュ等で中断された操作を表す。
+残ったジャーナルからは、フォルダを再走査せずに未完了分の再開 (resume_journal) か、
+完了分の取り消し (rollback_journal) ができる。
+計画には移動元の情報 (サイズ・更新日時) も記録し、再開・取り消しで移動先を上書き・削除するのは
+実ファイルがこの情報と一致する場合だけにする (中断後に同じパスに作られた別のファイルは壊さず、エラーとして報告する)。
+
+形式は1行1レコードのJSON:
+    {"type": "plan", "version": 1, "operation_type": "move", "destination_folder": ...,
+     "entries": [[src, dst, [size, mtime]], ...]}
+    {"type": "done", "index": 0}
+    {"type": "update", "destinations": [[index, dst], ...]} (コピーの失敗で後続の番号を詰めたときの新しい移動先)
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from .constants import COPY_STRATEGY_AUTO
+from .fast_copy import copy_file
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_VERSION = 1
+JOURNAL_SUFFIX = ".journal"
+FINGERPRINT_MTIME_TOLERANCE = 2.0 # コピー先の更新日時の誤差 (秒)。FAT などは2秒単位でしか保持しない
+
+
+def _file_fingerprint(path):
+    """[サイズ, 更新日時]。ファイルがなければ None。"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime]
+
+
+def _matches_fingerprint(path, fingerprint):
+    """path が計画時の移動元と同じ内容のファイルか (サイズと更新日時が同じ)。
+    移動・コピーはどの方法でもサイズと更新日時を保つので、途中まで書かれたファイルや別のファイルとは区別できる
+    (inode は移動元の削除後に別のファイルで再利用されることがあるので使わない)。
+    """
+    current = _file_fingerprint(path)
+    if current is None or not fingerprint:
+        return False
+    size, mtime = fingerprint
+    return current[0] == size and abs(current[1] - mtime) <= FINGERPRINT_MTIME_TOLERANCE
+
+
+class FileOperationJournal:
+    """1件の移動/コピー操作のジャーナル (書き込み側)。ワーカースレッドから使う。"""
+
+    def __init__(self, path, operation_type, destination_folder, entries):
+        self.path = path
+        self.operation_type = operation_type
+        self.destination_folder = destination_folder
+        self.entries = [(src, dst) for src, dst in entries]
+        self.fingerprints = [_file_fingerprint(src) for src, _ in self.entries] # 計画時の移動元
+        self._file = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, journal_dir, operation_type, destination_folder, entries):
+        """予定の組をすべて書き出して fsync したジャーナルを返す (以降の操作はこの記録の後に行う)。"""
+        os.makedirs(journal_dir, exist_ok=True)
+        file_name = f"{time.strftime('%Y%m%d-%H%M%S')}-{operation_type}-{uuid.uuid4().hex[:8]}{JOURNAL_SUFFIX}"
+        journal = cls(os.path.join(journal_dir, file_name), operation_type, destination_folder, entries)
+        journal._file = open(journal.path, 'w', encoding='utf-8', newline='\n')
+        journal._write({'type': 'plan', 'version': JOURNAL_VERSION, 'operation_type': operation_type,
+                        'destination_folder': destination_folder, 'created': time.time(),
+                        'entries': [[src, dst, fingerprint] for (src, dst), fingerprint
+                                    in zip(journal.entries, journal.fingerprints)]}, sync=True)
+        return journal
+
+    def _write(self, record, sync=False):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(json.dumps(record, ensure_ascii=False))
+            self._file.write("\n")
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+
+    def update_destinations(self, destinations):
+        """{index: 新しい移動先} を記録して fsync する (記録してから、その組の操作を行うこと)。"""
+        for index, dst in destinations.items():
+            self.entries[index] = (self.entries[index][0], dst)
+        self._write({'type': 'update', 'destinations': [[index, dst] for index, dst in destinations.items()]}, sync=True)
+
+    def mark_done(self, index):
+        """index 番目の組の完了を記録する (クラッシュ時に失われても、再開時に実ファイルの状態から判定できる)。"""
+        self._write({'type': 'done', 'index': index})
+
+    def close(self):
+        """操作が終わったのでジャーナルを削除する。"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        try:
+            os.remove(self.path)
+        except OSError as e:
+            logger.warning(f"ジャーナルの削除に失敗: {self.path}: {e}")
+
+
+class PendingJournal:
+    """起動時に見つかった、中断された操作のジャーナル (読み込み側)。"""
+
+    def __init__(self, path, operation_type, destination_folder, entries, done_indices, created=0.0, fingerprints=None):
+        self.path = path
+        self.operation_type = operation_type
+        self.destination_folder = destination_folder
+        self.entries = entries
+        self.done_indices = done_indices
+        self.created = created
+        self.fingerprints = fingerprints or [None] * len(entries) # 計画時の移動元 (_file_fingerprint)
+
+    def pending_entries(self):
+        return [(i, src, dst) for i, (src, dst) in enumerate(self.entries) if i not in self.done_indices]
+
+    def summary(self):
+        operation_label = "移動" if self.operation_type == "move" else "コピー"
+        return (f"{operation_label} {len(self.entries)}件中 {len(self.done_indices)}件完了 "
+                f"→ {self.destination_folder}")
+
+    def discard(self):
+        try:
+            os.remove(self.path)
+        except OSError as e:
+            logger.warning(f"ジャーナルの削除に失敗: {self.path}: {e}")
+
+
+def read_journal(path):
+    """ジャーナルを読み込んで PendingJournal を返す。計画レコードが読めない場合は None。
+    最後の行が書き込み途中で壊れている場合は無視する。
+    """
+    plan = None
+    done_indices = set()
+    updated_destinations = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"ジャーナルの壊れた行を無視します: {path}")
+                continue
+            if record.get('type') == 'plan':
+                plan = record
+            elif record.get('type') == 'done' and isinstance(record.get('index'), int):
+                done_indices.add(record['index'])
+            elif record.get('type') == 'update':
+                updated_destinations.update((index, dst) for index, dst in record.get('destinations', []))
+    if plan is None or plan.get('version') != JOURNAL_VERSION:
+        return None
+    plan_entries = plan.get('entries', [])
+    entries = [(entry[0], updated_destinations.get(i, entry[1])) for i, entry in enumerate(plan_entries)]
+    fingerprints = [entry[2] if len(entry) > 2 else None for entry in plan_entries]
+    return PendingJournal(path, plan.get('operation_type'), plan.get('destination_folder'), entries,
+                          done_indices, plan.get('created', 0.0), fingerprints)
+
+
+def load_pending_journals(journal_dir):
+    """journal_dir に残っている (=中断された) ジャーナルを古い順に返す。"""
+    if not journal_dir or not os.path.isdir(journal_dir):
+        return []
+    try:
+        names = sorted(os.listdir(journal_dir))
+    except OSError as e:
+        logger.warning(f"ジャーナルフォルダの読み込みに失敗: {journal_dir}: {e}")
+        return []
+    journals = []
+    for name in names:
+        if not name.endswith(JOURNAL_SUFFIX):
+            continue
+        path = os.path.join(journal_dir, name)
+        try:
+            journal = read_journal(path)
+        except OSError as e:
+            logger.warning(f"ジャーナルの読み込みに失敗: {path}: {e}")
+            continue
+        if journal is None:
+            logger.warning(f"計画が記録されていないジャーナルを削除します: {path}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        journals.append(journal)
+    return journals
+
+
+def _move_file(src_path, dest_path):
+    from .file_operations import _rename_or_move # file_operations がこのモジュールを import するため関数内で読み込む
+    _rename_or_move(src_path, dest_path)
+
+
+def resume_journal(journal, copy_strategy=COPY_STRATEGY_AUTO):
+    """未完了の組を実行し、{'completed_files': [(src, dst), ...], 'errors': [...]} を返す。
+    完了記録がなくても実ファイルの状態から完了済みと判断できる組 (移動先が計画時の移動元と一致する) は完了扱いにする。
+    移動先に一致しないファイルがある組は、上書きせずにエラーとして報告する。
+    成功・失敗に関わらず最後にジャーナルを削除する。
+    """
+    completed_files = [journal.entries[i] for i in sorted(journal.done_indices) if i < len(journal.entries)]
+    errors = []
+    for i, src, dst in journal.pending_entries():
+        fingerprint = journal.fingerprints[i]
+        src_exists = os.path.lexists(src)
+        dst_exists = os.path.lexists(dst)
+        try:
+            if journal.operation_type not in ("move", "copy"):
+                errors.append(f"Unknown operation type: {journal.operation_type}")
+                break
+            if not src_exists:
+                if journal.operation_type == "move" and dst_exists and _matches_fingerprint(dst, fingerprint):
+                    completed_files.append((src, dst)) # rename は完了していた
+                elif dst_exists and journal.operation_type == "move":
+                    errors.append(f"Skipped {os.path.basename(dst)}: the destination does not match the moved file")
+                else:
+                    errors.append(f"Source file not found: {os.path.basename(src)}")
+                continue
+            if not _matches_fingerprint(src, fingerprint):
+                errors.append(f"Skipped {os.path.basename(src)}: the source was changed after the operation was interrupted")
+                continue
+            if dst_exists:
+                if not _matches_fingerprint(dst, fingerprint): # 途中まで書かれた複製か、中断後に作られた別のファイル
+                    errors.append(f"Skipped {os.path.basename(dst)}: a different file exists at the destination")
+                    continue
+                if journal.operation_type == "move":
+                    os.remove(src) # 別デバイスへの複製は完了していて、移動元の削除前に中断された
+                completed_files.append((src, dst))
+                continue
+            if journal.operation_type == "move":
+                _move_file(src, dst)
+            else:
+                copy_file(src, dst, copy_strategy)
+            completed_files.append((src, dst))
+        except Exception as e:
+            error_msg = f"Error resuming {os.path.basename(src)}: {e}"
+            logger.error(error_msg, exc_info=True)
+            errors.append(error_msg)
+    journal.discard()
+    logger.info(f"中断されたファイル操作を再開しました: {journal.path} (完了 {len(completed_files)}件, エラー {len(errors)}件)")
+    return {'completed_files': completed_files, 'errors': errors}
+
+
+def rollback_journal(journal):
+    """操作前の状態に戻し、{'restored_files': [(dst, src), ...], 'errors': [...]} を返す。
+    移動は移動先から移動元へ戻し、コピーは作成されたファイルを削除する。
+    戻す・削除するのは、移動先が計画時の移動元と一致するファイルだけ (途中まで書かれたファイルや、
+    中断後に同じパスに作られた別のファイルはそのまま残してエラーとして報告する)。
+    """
+    restored_files = []
+    errors = []
+    for i, (src, dst) in reversed(list(enumerate(journal.entries))): # 後に行った操作から戻す
+        if not os.path.lexists(dst):
+            continue
+        fingerprint = journal.fingerprints[i]
+        if not _matches_fingerprint(dst, fingerprint):
+            errors.append(f"Skipped {os.path.basename(dst)}: it does not match the file that was "
+                          f"{'moved' if journal.operation_type == 'move' else 'copied'}")
+            continue
+        try:
+            if journal.operation_type == "move":
+                if os.path.lexists(src):
+                    if i in journal.done_indices or not _matches_fingerprint(src, fingerprint):
+                        errors.append(f"Cannot restore {os.path.basename(dst)}: {src} already exists")
+                        continue
+                    os.remove(dst) # 別デバイスへの複製は完了していて、移動元の削除前に中断された
+                else:
+                    _move_file(dst, src)
+                    restored_files.append((dst, src))
+            elif journal.operation_type == "copy":
+                os.remove(dst)
+                restored_files.append((dst, src))
+        except Exception as e:
+            error_msg = f"Error rolling back {os.path.basename(dst)}: {e}"
+            logger.error(error_msg, exc_info=True)
+            errors.append(error_msg)
+    journal.discard()
+    logger.info(f"中断されたファイル操作を元に戻しました: {journal.path} (復元 {len(restored_files)}件, エラー {len(errors)}件)")
+    return {'restored_files': restored_files, 'errors': errors}
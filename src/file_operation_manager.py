@@ -1,10 +1,12 @@
 # src/file_operation_manager.py
 import logging
 import os
-from PyQt6.QtWidgets import QFileDialog, QProgressDialog, QMessageBox
+from PyQt6.QtWidgets import QFileDialog, QMessageBox
 from PyQt6.QtCore import Qt
 
-from .renamed_files_dialog import RenamedFilesDialog
+from .file_operation_queue_dialog import FileOperationQueueDialog
+from .file_operation_journal import load_pending_journals, resume_journal, rollback_journal
+from .progress_reporter import ETA_UNKNOWN
 from .constants import SELECTION_ORDER_ROLE # SELECTION_ORDER_ROLE をインポート
 
 logger = logging.getLogger(__name__)
@@ -12,7 +14,7 @@ logger = logging.getLogger(__name__)
 class FileOperationManager:
     def __init__(self, main_window):
         self.main_window = main_window
-        self.progress_dialog = None
+        self.queue_dialog = None # ★★★ 変更: モーダルな進捗ダイアログの代わりに、ジョブごとの進捗を表示する非モーダルなキュー表示 ★★★
 
     def _handle_move_files_button_clicked(self):
         logger.debug(f"Move files button clicked. Selected files: {self.main_window.selected_file_paths}")
@@ -32,19 +34,9 @@ class FileOperationManager:
             logger.info(f"移動先フォルダが選択されました: {destination_folder}")
             logger.info(f"移動対象ファイル: {self.main_window.selected_file_paths}")
             if self.main_window.file_operations.start_operation("move", self.main_window.selected_file_paths, destination_folder):
-                self.main_window.ui_manager.set_file_op_buttons_enabled_ui(False) # ★★★ UIManager経由 ★★★
-                total_files_to_move = len(self.main_window.selected_file_paths)
-                self.progress_dialog = QProgressDialog(
-                    f"ファイルを移動中... (0/{total_files_to_move})",
-                    "キャンセル", 0, total_files_to_move, self.main_window
-                )
-                self.progress_dialog.setWindowTitle("ファイル移動")
-                self.progress_dialog.setMinimumDuration(0)
-                self.progress_dialog.canceled.connect(self.main_window.file_operations.stop_operation)
-                self.progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
-                self.progress_dialog.setValue(0)
-            else:
-                self.main_window.statusBar.showMessage("別のファイル操作が実行中です。", 3000)
+                # ★★★ 変更: 操作はキューで実行されるため、選択を解除してすぐに次の操作を選べるようにする ★★★
+                self.main_window.deselect_all_thumbnails()
+                self.main_window.statusBar.showMessage("ファイルの移動をキューに追加しました。", 3000)
         else:
             logger.info("移動先フォルダの選択がキャンセルされました。")
 
@@ -64,19 +56,11 @@ class FileOperationManager:
         destination_folder = QFileDialog.getExistingDirectory(self.main_window, "コピー先フォルダを選択", initial_copy_dir)
         if destination_folder:
             if self.main_window.file_operations.start_operation("copy", None, destination_folder, copy_selection_order=self.main_window.copy_selection_order):
-                self.main_window.ui_manager.set_file_op_buttons_enabled_ui(False) # ★★★ UIManager経由 ★★★
-                total_files_to_copy = len(self.main_window.copy_selection_order)
-                self.progress_dialog = QProgressDialog(
-                    f"ファイルをコピー中... (0/{total_files_to_copy})",
-                    "キャンセル", 0, total_files_to_copy, self.main_window
-                )
-                self.progress_dialog.setWindowTitle("ファイルコピー")
-                self.progress_dialog.setMinimumDuration(0)
-                self.progress_dialog.canceled.connect(self.main_window.file_operations.stop_operation)
-                self.progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
-                self.progress_dialog.setValue(0)
-            else:
-                self.main_window.statusBar.showMessage("別のファイル操作が実行中です。", 3000)
+                # ★★★ 変更: ジョブはコピー元のパスを保持しているので、選択順をリセットして次の操作を選べるようにする ★★★
+                self._clear_copy_selection_marks(self.main_window.copy_selection_order)
+                self.main_window.copy_selection_order.clear()
+                self.main_window.deselect_all_thumbnails()
+                self.main_window.statusBar.showMessage("ファイルのコピーをキューに追加しました。", 3000)
         else:
             logger.info("コピー先フォルダの選択がキャンセルされました。")
 
@@ -108,46 +92,84 @@ class FileOperationManager:
     # def _set_file_op_buttons_enabled(self, enabled): # このメソッドは UIManager に移管される想定
     #     self.main_window.ui_manager.set_file_op_buttons_enabled_ui(enabled)
 
-    def _handle_file_op_progress(self, processed_count, total_count):
-        dialog = self.progress_dialog
-        if dialog:
-            if dialog.wasCanceled():
-                logger.debug(f"Progress update ({processed_count}/{total_count}) received but progress_dialog was canceled by user.")
-                return
-            try:
-                dialog.setMaximum(total_count)
-                dialog.setValue(processed_count)
-                dialog.setLabelText(f"処理中: {processed_count}/{total_count} ファイル...")
-            except RuntimeError as e:
-                logger.warning(f"Error updating progress dialog (likely already closed or invalid): {e}")
+    def _clear_copy_selection_marks(self, items):
+        """コピー選択順の番号表示を消す。"""
+        for item in items:
+            if item and item.data(SELECTION_ORDER_ROLE) is not None:
+                item.setData(None, SELECTION_ORDER_ROLE)
+                source_idx = self.main_window.ui_manager.source_thumbnail_model.indexFromItem(item)
+                proxy_idx = self.main_window.ui_manager.filter_proxy_model.mapFromSource(source_idx)
+                if proxy_idx.isValid():
+                    self.main_window.ui_manager.thumbnail_view.update(proxy_idx) # ★★★ UIManager経由 ★★★
+
+    def _ensure_queue_dialog(self):
+        if self.queue_dialog is None:
+            self.queue_dialog = FileOperationQueueDialog(self.main_window)
+            self.queue_dialog.cancelRequested.connect(self.main_window.file_operations.cancel_job)
+        return self.queue_dialog
+
+    def _handle_job_queued(self, job_id):
+        job = self.main_window.file_operations.job(job_id)
+        if job is None:
+            return
+        dialog = self._ensure_queue_dialog()
+        dialog.add_job(job_id, job.operation_type, job.total_count, job.destination_folder)
+        dialog.show()
+
+    def _handle_job_started(self, job_id):
+        if self.queue_dialog:
+            self.queue_dialog.set_job_running(job_id)
+
+    def _handle_job_progress(self, job_id, processed_count, total_count, items_per_second=0.0, eta_seconds=ETA_UNKNOWN):
+        if self.queue_dialog:
+            self.queue_dialog.set_job_progress(job_id, processed_count, total_count, items_per_second, eta_seconds)
         else:
-            logger.debug(f"Progress update ({processed_count}/{total_count}) received but self.progress_dialog was already None.")
+            logger.debug(f"Progress update for job #{job_id} ({processed_count}/{total_count}) received but queue_dialog is None.")
 
     def _handle_file_op_error(self, error_message):
         logger.error(f"File operation error: {error_message}")
-        if self.progress_dialog:
-            self.progress_dialog.close()
-            self.progress_dialog = None
         QMessageBox.critical(self.main_window, "ファイル操作エラー", f"エラーが発生しました:\n{error_message}")
         self.main_window.statusBar.showMessage("ファイル操作中にエラーが発生しました。", 5000)
-        self.main_window.ui_manager.set_file_op_buttons_enabled_ui(True) # ★★★ UIManager経由 ★★★
-
-    def _handle_file_op_finished(self, result):
-        logger.info(f"File operation finished. Result: {result}")
-        if self.progress_dialog:
-            try:
-                # プログレスダイアログを閉じる前に、canceledシグナルを切断
-                self.progress_dialog.canceled.disconnect(self.main_window.file_operations.stop_operation)
-            except TypeError:
-                logger.debug("Progress dialog canceled signal was not connected or already disconnected.")
-            self.progress_dialog.close()
-            self.progress_dialog = None
-        self.main_window.ui_manager.set_file_op_buttons_enabled_ui(True) # ★★★ UIManager経由 ★★★
-        # status = result.get('status', 'unknown') # No longer directly used here
-        # operation_type = result.get('operation_type', 'unknown') # No longer directly used here
-
-        # Call MainWindow's method to process the completion details
-        self.main_window._process_file_op_completion(result)
+
+    def _handle_job_finished(self, job_id, result):
+        logger.info(f"File operation #{job_id} finished. Result: {result}")
+        if self.queue_dialog:
+            self.queue_dialog.remove_job(job_id)
+            if self.queue_dialog.job_count() == 0: # すべてのジョブが完了したら閉じる
+                self.queue_dialog.close()
+                self.queue_dialog.deleteLater()
+                self.queue_dialog = None
+        # ジョブごとにサムネイル一覧へ反映する。選択はキュー追加時に解除済みなので、現在の選択は維持する
+        self.main_window._process_file_op_completion(result, clear_selection=False)
+
+    def check_interrupted_operations(self):
+        """前回の起動で中断されたファイル操作のジャーナルが残っていれば、再開・取り消し・破棄を確認する。"""
+        journals = load_pending_journals(self.main_window.file_operations.journal_dir)
+        for journal in journals:
+            logger.info(f"中断されたファイル操作が見つかりました: {journal.path} ({journal.summary()})")
+            message_box = QMessageBox(self.main_window)
+            message_box.setIcon(QMessageBox.Icon.Warning)
+            message_box.setWindowTitle("中断されたファイル操作")
+            message_box.setText("前回のファイル操作が完了前に中断されています。\n\n" + journal.summary())
+            message_box.setInformativeText("「再開」で残りを実行し、「元に戻す」で操作前の状態に戻します。「破棄」は記録だけを削除します。")
+            resume_button = message_box.addButton("再開", QMessageBox.ButtonRole.AcceptRole)
+            rollback_button = message_box.addButton("元に戻す", QMessageBox.ButtonRole.DestructiveRole)
+            message_box.addButton("破棄", QMessageBox.ButtonRole.RejectRole)
+            message_box.setDefaultButton(resume_button)
+            message_box.exec()
+            clicked_button = message_box.clickedButton()
+            if clicked_button == resume_button:
+                result = resume_journal(journal, self.main_window.file_operations.copy_strategy)
+                self.main_window.statusBar.showMessage(f"中断されたファイル操作を再開しました ({len(result['completed_files'])}個完了)。", 5000)
+            elif clicked_button == rollback_button:
+                result = rollback_journal(journal)
+                self.main_window.statusBar.showMessage(f"中断されたファイル操作を元に戻しました ({len(result['restored_files'])}個)。", 5000)
+            else:
+                journal.discard()
+                logger.info(f"中断されたファイル操作の記録を破棄しました: {journal.path}")
+                continue
+            if result['errors']:
+                QMessageBox.warning(self.main_window, "ファイル操作エラー", "以下のエラーが発生しました:\n" + "\n".join(result['errors']))
 
     def _handle_cancel_op_button_clicked(self): # Not directly used by FileOperations, but for completeness if UI had explicit cancel
         logger.info("Cancel button clicked. Requesting to stop file operation.")
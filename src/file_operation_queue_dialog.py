@@ -0,0 +1,106 @@
+# src/file_operation_queue_dialog.py
+import os
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QProgressBar, QPushButton, QWidget, QScrollArea
+)
+from PyQt6.QtCore import Qt, pyqtSignal
+
+from .progress_reporter import ETA_UNKNOWN, format_rate_and_eta
+
+
+class FileOperationJobRow(QWidget):
+    """キュー内の1ジョブ分の表示 (内容・進捗・キャンセルボタン)。"""
+    cancelRequested = pyqtSignal(int) # job_id
+
+    def __init__(self, job_id, operation_type, total_count, destination_folder, parent=None):
+        super().__init__(parent)
+        self.job_id = job_id
+        operation_label = "移動" if operation_type == "move" else "コピー"
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(4, 2, 4, 2)
+        self.description_label = QLabel(f"#{job_id} {operation_label} {total_count}件 → {os.path.basename(destination_folder) or destination_folder}")
+        self.description_label.setToolTip(destination_folder)
+        layout.addWidget(self.description_label, 1)
+        self.status_label = QLabel("待機中")
+        layout.addWidget(self.status_label)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, max(1, total_count))
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFixedWidth(160)
+        layout.addWidget(self.progress_bar)
+        self.cancel_button = QPushButton("キャンセル")
+        self.cancel_button.clicked.connect(self._on_cancel_clicked)
+        layout.addWidget(self.cancel_button)
+
+    def set_running(self):
+        self.status_label.setText("実行中")
+
+    def set_progress(self, processed_count, total_count, items_per_second=0.0, eta_seconds=ETA_UNKNOWN):
+        self.progress_bar.setMaximum(max(1, total_count))
+        self.progress_bar.setValue(processed_count)
+        self.status_label.setText(f"{processed_count}/{total_count}{format_rate_and_eta(items_per_second, eta_seconds)}")
+
+    def _on_cancel_clicked(self):
+        self.cancel_button.setEnabled(False)
+        self.status_label.setText("キャンセル中")
+        self.cancelRequested.emit(self.job_id)
+
+
+class FileOperationQueueDialog(QDialog):
+    """ファイル操作キューの一覧 (非モーダル)。操作中も別の移動/コピーを追加できるようにするため、
+    従来のモーダルな進捗ダイアログの代わりに使う。
+    """
+    cancelRequested = pyqtSignal(int) # job_id
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("ファイル操作")
+        self.setMinimumWidth(520)
+        self.setWindowModality(Qt.WindowModality.NonModal)
+        self._rows = {} # job_id -> FileOperationJobRow
+
+        layout = QVBoxLayout(self)
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        self._rows_container = QWidget()
+        self._rows_layout = QVBoxLayout(self._rows_container)
+        self._rows_layout.setContentsMargins(0, 0, 0, 0)
+        self._rows_layout.addStretch(1)
+        scroll_area.setWidget(self._rows_container)
+        layout.addWidget(scroll_area)
+        self.cancel_all_button = QPushButton("すべてキャンセル")
+        self.cancel_all_button.clicked.connect(self._cancel_all)
+        layout.addWidget(self.cancel_all_button, alignment=Qt.AlignmentFlag.AlignRight)
+
+    def add_job(self, job_id, operation_type, total_count, destination_folder):
+        row = FileOperationJobRow(job_id, operation_type, total_count, destination_folder, self._rows_container)
+        row.cancelRequested.connect(self.cancelRequested)
+        self._rows_layout.insertWidget(self._rows_layout.count() - 1, row) # 末尾の stretch の前に追加
+        self._rows[job_id] = row
+        return row
+
+    def row(self, job_id):
+        return self._rows.get(job_id)
+
+    def set_job_running(self, job_id):
+        if row := self._rows.get(job_id):
+            row.set_running()
+
+    def set_job_progress(self, job_id, processed_count, total_count, items_per_second=0.0, eta_seconds=ETA_UNKNOWN):
+        if row := self._rows.get(job_id):
+            row.set_progress(processed_count, total_count, items_per_second, eta_seconds)
+
+    def remove_job(self, job_id):
+        row = self._rows.pop(job_id, None)
+        if row is not None:
+            self._rows_layout.removeWidget(row)
+            row.deleteLater()
+
+    def job_count(self):
+        return len(self._rows)
+
+    def _cancel_all(self):
+        for job_id, row in list(self._rows.items()):
+            if row.cancel_button.isEnabled():
+                row._on_cancel_clicked()
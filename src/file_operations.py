@@ -1,26 +1,77 @@
 import os
+import errno
 import shutil
 import logging
 import re # For copy filename parsing
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed, CancelledError
 from PyQt6.QtCore import QObject, QThread, pyqtSignal, Qt # Import Qt
-from .constants import SELECTION_ORDER_ROLE # Import SELECTION_ORDER_ROLE
+from .constants import SELECTION_ORDER_ROLE, COPY_STRATEGY_AUTO # Import SELECTION_ORDER_ROLE
+from .fast_copy import copy_file
+from .file_operation_journal import FileOperationJournal
+from .progress_reporter import ProgressReporter, ETA_UNKNOWN
 
 logger = logging.getLogger(__name__)
 
+MOVE_WORKER_COUNT = 4 # 別デバイスへの移動 (コピー+削除) を並列に行うスレッド数
+
+
+class DestinationListing:
+    """移動先フォルダのファイル名一覧のスナップショット。
+    名前の重複チェックをファイルごとの os.path.exists ではなくメモリ上の集合で行う。
+    予約した名前も集合に追加するため、同じ操作内の後続ファイルとも重複しない。
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._names = {os.path.normcase(name) for name in os.listdir(folder)}
+
+    def __contains__(self, name):
+        return os.path.normcase(name) in self._names
+
+    def reserve(self, name):
+        self._names.add(os.path.normcase(name))
+
+    def reserve_unique_name(self, basename):
+        """basename が使用済みなら name_1.ext, name_2.ext ... の形で空いている名前を予約して返す。"""
+        base_name, ext = os.path.splitext(basename)
+        candidate = basename
+        counter = 1
+        while candidate in self:
+            candidate = f"{base_name}_{counter}{ext}"
+            counter += 1
+        self.reserve(candidate)
+        return candidate
+
+
+def _rename_or_move(src_path, dest_path):
+    """同一デバイス内の移動は os.rename (アトミック、データのコピーなし)。
+    バインドマウント等で rename できない場合 (EXDEV) は shutil.move にフォールバックする。
+    """
+    try:
+        os.rename(src_path, dest_path)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(src_path, dest_path)
+
+
 class FileOperationSignals(QObject):
-    progress = pyqtSignal(int, int) # processed_count, total_count
+    progress = pyqtSignal(int, int, float, float) # processed_count, total_count, items_per_second, eta_seconds (ProgressReporter で間引き)
     finished = pyqtSignal(dict) # result_summary
     error = pyqtSignal(str)
 
 class FileOperationsWorker(QObject):
-    def __init__(self, operation_type, source_paths, destination_folder, copy_selection_order=None):
+    def __init__(self, operation_type, source_paths, destination_folder, copy_selection_order=None, copy_strategy=COPY_STRATEGY_AUTO,
+                 journal_dir=None):
         super().__init__()
         self.signals = FileOperationSignals()
         self.operation_type = operation_type # "move" or "copy"
         self.source_paths = source_paths
         self.destination_folder = destination_folder
         self.copy_selection_order = copy_selection_order # Only for copy, list of QStandardItem
+        self.copy_strategy = copy_strategy # Only for copy, COPY_STRATEGY_* (fast_copy.copy_file に渡す)
+        self.journal_dir = journal_dir # 指定時のみ先行書き込みジャーナルを残す (中断時の再開/取り消し用)
         self._is_running = True
 
     def run(self):
@@ -36,11 +87,37 @@ class FileOperationsWorker(QObject):
         self._is_running = False
         logger.info(f"{self.operation_type} operation requested to stop.")
 
+    def _copy_source_entries(self):
+        """コピー元の (パス, エラー表示用の名前) のリストを返す。
+        copy_selection_order (QStandardItem のリスト) がない場合は、GUIスレッドで取得済みの source_paths を使う
+        (キューから実行されるジョブは、待機中にモデルの行が削除されてもよいようにパスで受け取る)。
+        """
+        if self.copy_selection_order is None:
+            return [(path, os.path.basename(path) if path else 'UnknownItem') for path in (self.source_paths or [])]
+        # UserRole stores the original file path
+        return [(item.data(Qt.ItemDataRole.UserRole), item.text() if item else 'UnknownItem') for item in self.copy_selection_order]
+
+    def _open_journal(self, entries):
+        """journal_dir が指定されていれば、予定の (移動元, 移動先) を書き出したジャーナルを返す。
+        ジャーナルを作成できなくても操作自体は続行する。
+        """
+        if not self.journal_dir or not entries:
+            return None
+        try:
+            return FileOperationJournal.create(self.journal_dir, self.operation_type, self.destination_folder, entries)
+        except OSError as e:
+            logger.warning(f"ファイル操作のジャーナルを作成できませんでした (ジャーナルなしで続行します): {e}")
+            return None
+
     def _move_files(self):
+        """移動先の名前を先にすべて決めてジャーナルに記録してから、
+        同一ファイルシステム内の移動は os.rename でまとめて処理し、
+        別デバイスへの移動 (コピー+削除) はスレッドプールで並列に処理する。
+        移動先の名前の重複は、事前に取得した移動先一覧 (メモリ上) で解決する。
+        renamed_files / successfully_moved_src_paths / moved_files は元の順序 (source_paths の順) で返す。
+        """
         moved_count = 0
-        renamed_files_info = [] # List of tuples (original_basename, new_basename)
         errors = []
-        successfully_moved_src_paths = [] # Store successfully moved source paths
         total_files = len(self.source_paths)
 
         if not os.path.isdir(self.destination_folder):
@@ -48,41 +125,109 @@ class FileOperationsWorker(QObject):
             self.signals.finished.emit({'operation_type': 'move', 'moved_count': 0, 'renamed_files': [], 'errors': errors, 'successfully_moved_src_paths': []})
             return
 
-        for i, src_path in enumerate(self.source_paths):
-            if not self._is_running:
-                self.signals.finished.emit({'status': 'cancelled', 'moved_count': moved_count, 'renamed_files': renamed_files_info, 'errors': errors})
-                return
+        try:
+            dest_listing = DestinationListing(self.destination_folder)
+            dest_device = os.stat(self.destination_folder).st_dev
+        except OSError as e:
+            errors.append(f"Could not read destination folder: {e}")
+            self.signals.finished.emit({'operation_type': 'move', 'moved_count': 0, 'renamed_files': [], 'errors': errors, 'successfully_moved_src_paths': []})
+            return
 
-            if not os.path.exists(src_path):
-                errors.append(f"Source file not found: {os.path.basename(src_path)}")
-                self.signals.progress.emit(i + 1, total_files)
-                continue
+        moved_dest_paths = [None] * total_files # index -> 実際の移動先 (成功した場合のみ)
+        progress = ProgressReporter(self.signals.progress.emit, total_files)
+        journal = None
 
-            original_basename = os.path.basename(src_path)
-            base_name, ext = os.path.splitext(original_basename)
-            dest_path_candidate = os.path.join(self.destination_folder, original_basename)
-            
-            actual_dest_path = dest_path_candidate
-            counter = 1
-            while os.path.exists(actual_dest_path):
-                actual_dest_path = os.path.join(self.destination_folder, f"{base_name}_{counter}{ext}")
-                counter += 1
-            
-            try:
-                shutil.move(src_path, actual_dest_path)
+        def finish_one(index, dest_path, error_msg=None, journal_index=None):
+            nonlocal moved_count
+            if error_msg:
+                errors.append(error_msg)
+            elif dest_path:
+                moved_dest_paths[index] = dest_path
                 moved_count += 1
-                successfully_moved_src_paths.append(src_path) # Add to successful list
-                new_basename = os.path.basename(actual_dest_path)
+                if journal is not None:
+                    journal.mark_done(journal_index)
+            progress.advance()
+
+        def collect_results():
+            renamed_files_info = [] # List of dicts (original basename, new basename)
+            successfully_moved_src_paths = []
+            moved_files = [] # (移動元, 移動先) の組 (メタデータ・サムネイルの引き継ぎ用)
+            for src_path, dest_path in zip(self.source_paths, moved_dest_paths):
+                if dest_path is None:
+                    continue
+                successfully_moved_src_paths.append(src_path)
+                moved_files.append((src_path, dest_path))
+                original_basename = os.path.basename(src_path)
+                new_basename = os.path.basename(dest_path)
                 if new_basename != original_basename: # Renamed_files_info is used to show a dialog
                     renamed_files_info.append({'original': original_basename, 'new': new_basename})
-                # logger.info(f"Moved: {src_path} -> {actual_dest_path}") # コメントアウト
+            return renamed_files_info, successfully_moved_src_paths, moved_files
+
+        def finish_cancelled():
+            progress.finish()
+            if journal is not None:
+                journal.close()
+            renamed_files_info, successfully_moved_src_paths, moved_files = collect_results()
+            # 移動済みのファイルも返し、呼び出し側で一覧から取り除けるようにする
+            self.signals.finished.emit({'status': 'cancelled', 'moved_count': moved_count, 'renamed_files': renamed_files_info, 'errors': errors,
+                                        'successfully_moved_src_paths': successfully_moved_src_paths, 'moved_files': moved_files})
+
+        planned_moves = [] # (journal_index, index, src_path, dest_path, is_cross_device)
+        for i, src_path in enumerate(self.source_paths):
+            original_basename = os.path.basename(src_path)
+            try:
+                src_device = os.stat(src_path).st_dev
+            except OSError:
+                finish_one(i, None, f"Source file not found: {original_basename}")
+                continue
+            actual_dest_path = os.path.join(self.destination_folder, dest_listing.reserve_unique_name(original_basename))
+            planned_moves.append((len(planned_moves), i, src_path, actual_dest_path, src_device != dest_device))
+
+        journal = self._open_journal([(src_path, dest_path) for _, _, src_path, dest_path, _ in planned_moves])
+
+        cross_device_jobs = []
+        for journal_index, i, src_path, actual_dest_path, is_cross_device in planned_moves:
+            if not self._is_running:
+                finish_cancelled()
+                return
+            if is_cross_device:
+                cross_device_jobs.append((journal_index, i, src_path, actual_dest_path))
+                continue
+            try:
+                _rename_or_move(src_path, actual_dest_path)
+                finish_one(i, actual_dest_path, journal_index=journal_index)
             except Exception as e:
-                error_msg = f"Error moving {original_basename}: {e}"
+                error_msg = f"Error moving {os.path.basename(src_path)}: {e}"
                 logger.error(error_msg, exc_info=True)
-                errors.append(error_msg)
-            
-            self.signals.progress.emit(i + 1, total_files)
+                finish_one(i, None, error_msg)
+
+        if cross_device_jobs:
+            cancelled = False
+            with ThreadPoolExecutor(max_workers=min(MOVE_WORKER_COUNT, len(cross_device_jobs))) as executor:
+                future_to_job = {executor.submit(shutil.move, src_path, dest_path): (journal_index, i, src_path, dest_path)
+                                 for journal_index, i, src_path, dest_path in cross_device_jobs}
+                for future in as_completed(future_to_job):
+                    journal_index, i, src_path, dest_path = future_to_job[future]
+                    try:
+                        future.result()
+                        finish_one(i, dest_path, journal_index=journal_index)
+                    except CancelledError:
+                        continue
+                    except Exception as e:
+                        error_msg = f"Error moving {os.path.basename(src_path)}: {e}"
+                        logger.error(error_msg, exc_info=True)
+                        finish_one(i, None, error_msg)
+                    if not self._is_running and not cancelled:
+                        cancelled = True
+                        for pending_future in future_to_job:
+                            pending_future.cancel() # 実行中のコピーは完了を待つ (途中のファイルを残さない)
+            if cancelled:
+                finish_cancelled()
+                return
 
+        if journal is not None:
+            journal.close()
+        renamed_files_info, successfully_moved_src_paths, moved_files = collect_results()
         self.signals.finished.emit({
             'operation_type': 'move',
             'moved_count': moved_count,
@@ -90,15 +235,22 @@ class FileOperationsWorker(QObject):
             'errors': errors,
             'status': 'completed',
             'successfully_moved_src_paths': successfully_moved_src_paths,
+            'moved_files': moved_files,
             'destination_folder': self.destination_folder # Add destination_folder
         })
 
+    def _numbered_copy_path(self, copy_number, src_path):
+        return os.path.join(self.destination_folder, f"{copy_number:03}_{os.path.basename(src_path)}")
+
     def _copy_files(self):
-        # self.source_paths here are the QStandardItems from copy_selection_order
-        # We need to extract file paths from them.
+        # コピー元は copy_selection_order (QStandardItem) または source_paths (パス) から取得する
         copied_count = 0
         errors = []
-        total_files = len(self.copy_selection_order)
+        copy_entries = self._copy_source_entries()
+        total_files = len(copy_entries)
+        copy_method_counts = {} # 実際に使われた複製方法ごとの件数 (ログ用)
+        copied_files = [] # (コピー元, コピー先) の組 (メタデータ・サムネイルの引き継ぎ用)
+        progress = ProgressReporter(self.signals.progress.emit, total_files)
         
         if not os.path.isdir(self.destination_folder):
             errors.append(f"Destination folder does not exist: {self.destination_folder}")
@@ -125,146 +277,261 @@ class FileOperationsWorker(QObject):
             errors.append(f"Could not read destination folder contents for numbering: {e}")
             # Continue with next_copy_number = 1 if error occurs
 
-        for i, item in enumerate(self.copy_selection_order):
+        # ★★★ 変更: コピー先の名前を先にすべて決めてジャーナルに記録する ★★★
+        # New filename based on the determined next_copy_number. The check for existing_numbers avoids
+        # direct collisions for the *numbered* part, so no _1, _2 suffix is needed (unlike move).
+        # 失敗したファイルの番号は後続のファイルに詰める (従来どおり番号は成功したコピーだけが使う)
+        planned_dest_paths = [None] * total_files # index -> コピー先 (コピー元が見つからない場合は None)
+        planned_copy_numbers = [None] * total_files
+        journal_entries = []
+        journal_indices = {} # index -> ジャーナル内の番号
+        for i, (src_path, _) in enumerate(copy_entries):
+            if not src_path or not os.path.exists(src_path):
+                continue
+            planned_copy_numbers[i] = next_copy_number
+            planned_dest_paths[i] = self._numbered_copy_path(next_copy_number, src_path)
+            journal_indices[i] = len(journal_entries)
+            journal_entries.append((src_path, planned_dest_paths[i]))
+            next_copy_number += 1 # Increment for the next file
+        journal = self._open_journal(journal_entries)
+
+        for i, (src_path, display_name) in enumerate(copy_entries):
             if not self._is_running:
-                self.signals.finished.emit({'status': 'cancelled', 'copied_count': copied_count, 'errors': errors})
+                progress.finish()
+                if journal is not None:
+                    journal.close()
+                self.signals.finished.emit({'status': 'cancelled', 'copied_count': copied_count, 'errors': errors, 'copied_files': copied_files})
                 return
 
-            # Assuming SELECTION_ORDER_ROLE and UserRole are accessible or defined
-            # For simplicity, directly use UserRole for file path if SELECTION_ORDER_ROLE is not found on item
-            # This part needs to align with how MainWindow stores data in items.
-            # Let's assume UserRole stores the file path.
-            src_path = item.data(Qt.ItemDataRole.UserRole) # UserRole should store the original file path
-            selection_num = item.data(SELECTION_ORDER_ROLE) # This is the 1-based order from UI
-
-            if not src_path or not os.path.exists(src_path):
-                errors.append(f"Source file not found or path invalid for item: {item.text() if item else 'UnknownItem'}")
-                self.signals.progress.emit(i + 1, total_files)
+            actual_dest_path = planned_dest_paths[i]
+            if actual_dest_path is None:
+                errors.append(f"Source file not found or path invalid for item: {display_name}")
+                progress.update(i + 1)
                 continue
 
-            original_basename = os.path.basename(src_path)
-            # New filename based on the determined next_copy_number
-            new_filename = f"{next_copy_number:03}_{original_basename}"
-            dest_path_candidate = os.path.join(self.destination_folder, new_filename)
-
-            # Handle potential name collisions for the *newly constructed* filename (e.g., if user manually created 001_file.jpg)
-            # This is different from move, where collision is on original_basename.
-            actual_dest_path = dest_path_candidate
-            # No need for _1, _2 suffix for copy as per requirements, numbers should be unique.
-            # If 001_file.jpg exists, next should be 002_otherfile.jpg.
-            # The check for existing_numbers should handle this.
-            # However, if by some chance a file like "001_somefile.jpg" already exists and we are trying to create it again
-            # (e.g. if the numbering logic had a flaw or manual intervention), we might need a fallback.
-            # For now, we assume next_copy_number logic correctly avoids direct collision for the *numbered* part.
-
             try:
-                shutil.copy2(src_path, actual_dest_path) # copy2 preserves metadata
+                copy_method = copy_file(src_path, actual_dest_path, self.copy_strategy) # 失敗時は copy2 まで自動でフォールバック
+                copy_method_counts[copy_method] = copy_method_counts.get(copy_method, 0) + 1
                 copied_count += 1
+                copied_files.append((src_path, actual_dest_path))
+                if journal is not None:
+                    journal.mark_done(journal_indices[i])
                 # logger.info(f"Copied: {src_path} -> {actual_dest_path} (UI order: {selection_num})") # コメントアウト
-                next_copy_number += 1 # Increment for the next file
             except Exception as e:
-                error_msg = f"Error copying {original_basename}: {e}"
+                error_msg = f"Error copying {os.path.basename(src_path)}: {e}"
                 logger.error(error_msg, exc_info=True)
                 errors.append(error_msg)
+                # ★★★ 追加: 使われなかった番号を後続のファイルに詰め、次のコピーの前にジャーナルへ記録する ★★★
+                renumbered = {}
+                copy_number = planned_copy_numbers[i]
+                for j in range(i + 1, total_files):
+                    if planned_dest_paths[j] is None:
+                        continue
+                    planned_copy_numbers[j] = copy_number
+                    planned_dest_paths[j] = self._numbered_copy_path(copy_number, copy_entries[j][0])
+                    renumbered[journal_indices[j]] = planned_dest_paths[j]
+                    copy_number += 1
+                if journal is not None and renumbered:
+                    journal.update_destinations(renumbered)
             
-            self.signals.progress.emit(i + 1, total_files)
-            
+            progress.update(i + 1)
+
+        if journal is not None:
+            journal.close()
+        if copy_method_counts:
+            logger.info(f"コピー完了 (方式: {self.copy_strategy}, 内訳: {copy_method_counts})")
         self.signals.finished.emit({
             'operation_type': 'copy',
             'copied_count': copied_count,
             'errors': errors,
             'status': 'completed',
+            'copied_files': copied_files,
             'destination_folder': self.destination_folder # Add destination_folder
         })
 
 
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_FINISHED = "finished"
+
+
+class FileOperationJob(QObject):
+    """キューに積まれた1件の移動/コピー操作。
+    GUIスレッドに属するQObjectなので、ワーカーからのシグナルはGUIスレッドで受け取ってジョブIDを付けて中継する。
+    """
+    progress = pyqtSignal(int, int, int, float, float) # job_id, processed_count, total_count, items_per_second, eta_seconds
+    finished = pyqtSignal(int, dict) # job_id, result_summary
+
+    def __init__(self, job_id, operation_type, source_paths, destination_folder, copy_strategy=COPY_STRATEGY_AUTO, parent=None):
+        super().__init__(parent)
+        self.job_id = job_id
+        self.operation_type = operation_type
+        self.source_paths = list(source_paths or []) # 実行開始までにモデルが変わってもよいようにパスで保持
+        self.destination_folder = destination_folder
+        self.copy_strategy = copy_strategy
+        self.status = JOB_STATUS_QUEUED
+        self.processed_count = 0
+        self.total_count = len(self.source_paths)
+        self.cancel_requested = False
+        self.thread = None
+        self.worker = None
+        self._source_files = {os.path.normcase(os.path.abspath(path)) for path in self.source_paths if path}
+        self._source_folders = {os.path.dirname(path) for path in self._source_files}
+        self._destination = os.path.normcase(os.path.abspath(destination_folder)) if destination_folder else ""
+
+    def conflicts_with(self, other):
+        """同時に実行すると結果が変わりうる組み合わせかどうか。
+        同じ宛先 (名前の重複解決・連番がずれる)、一方の宛先が他方の移動元フォルダ、同じファイルを扱う場合は競合とする。
+        """
+        return (self._destination == other._destination
+                or self._destination in other._source_folders
+                or other._destination in self._source_folders
+                or not self._source_files.isdisjoint(other._source_files))
+
+    def is_active(self):
+        return self.status in (JOB_STATUS_QUEUED, JOB_STATUS_RUNNING)
+
+    def _on_worker_progress(self, processed_count, total_count, items_per_second=0.0, eta_seconds=ETA_UNKNOWN):
+        self.processed_count = processed_count
+        self.total_count = total_count
+        self.progress.emit(self.job_id, processed_count, total_count, items_per_second, eta_seconds)
+
+    def _on_worker_finished(self, result):
+        result = dict(result)
+        result.setdefault('operation_type', self.operation_type)
+        result['job_id'] = self.job_id
+        self.finished.emit(self.job_id, result)
+
+
 class FileOperations(QObject):
+    """移動/コピー操作のキューとスケジューラ。
+    実行中の操作があっても新しい操作はキューに積まれ、宛先・移動元が競合しないジョブは並行して実行される
+    (競合するジョブは追加された順に実行)。進捗・完了はジョブごとにシグナルで通知する。
+    """
+    jobQueued = pyqtSignal(int) # job_id
+    jobStarted = pyqtSignal(int) # job_id
+    jobProgress = pyqtSignal(int, int, int, float, float) # job_id, processed_count, total_count, items_per_second, eta_seconds
+    jobFinished = pyqtSignal(int, dict) # job_id, result_summary
+    MAX_CONCURRENT_JOBS = 2 # 同時に実行するジョブ数の上限 (I/Oの並行度)
+    journal_dir = None # ★★★ 追加: ジャーナルの保存先 (MainWindowが設定。None ならジャーナルを残さない) ★★★
+
     def __init__(self, parent=None, file_op_manager=None): # file_op_manager を追加
         super().__init__(parent)
-        self._thread = None # Use a private attribute
-        self._worker = None # Use a private attribute
         self.file_op_manager = file_op_manager # file_op_manager を保持
+        self.copy_strategy = COPY_STRATEGY_AUTO # ★★★ 追加: コピーモードの複製方法 (MainWindowが設定から反映) ★★★
+        self._jobs = {} # job_id -> FileOperationJob (追加順)
+        self._next_job_id = 1
+
+        # Connect signals to slots in FileOperationManager
+        if self.file_op_manager: # file_op_manager が渡されていれば接続
+            for signal, slot_name in ((self.jobQueued, '_handle_job_queued'), (self.jobStarted, '_handle_job_started'),
+                                      (self.jobProgress, '_handle_job_progress'), (self.jobFinished, '_handle_job_finished')):
+                if hasattr(self.file_op_manager, slot_name):
+                    signal.connect(getattr(self.file_op_manager, slot_name))
 
     def start_operation(self, operation_type, source_paths, destination_folder, copy_selection_order=None):
-        if self._thread is not None and self._thread.isRunning():
-            logger.warning("Another file operation is already in progress.")
-            return False
+        """操作をキューに追加してジョブIDを返す。実行中の操作があっても拒否せず、順番が来たら実行する。"""
+        if operation_type == "copy" and copy_selection_order is not None:
+            # QStandardItem はワーカースレッドから参照せず、ここ (GUIスレッド) でパスに変換しておく
+            source_paths = [item.data(Qt.ItemDataRole.UserRole) for item in copy_selection_order]
+        job = FileOperationJob(self._next_job_id, operation_type, source_paths, destination_folder, self.copy_strategy, parent=self)
+        self._next_job_id += 1
+        job.progress.connect(self.jobProgress)
+        job.finished.connect(self._on_job_finished)
+        self._jobs[job.job_id] = job
+        logger.info(f"ファイル操作をキューに追加しました: #{job.job_id} {operation_type} {job.total_count}件 -> {destination_folder}")
+        self.jobQueued.emit(job.job_id)
+        self._schedule()
+        return job.job_id
 
-        # Ensure previous thread and worker are cleaned up if they exist but are not running
-        if self._thread is not None:
-            self._thread.quit() # Attempt to quit
-            self._thread.wait(100) # Wait a bit for it to finish
-            # self._thread.deleteLater() # Schedule for deletion, will be None after this
-            self._thread = None 
-        if self._worker is not None:
-            # self._worker.deleteLater()
-            self._worker = None
-
-        self._thread = QThread(self) # Set parent to FileOperations instance
-        self._worker = FileOperationsWorker(operation_type, source_paths, destination_folder, copy_selection_order)
-        self._worker.moveToThread(self._thread)
-
-        # Connect signals from worker to slots in FileOperationManager
-        if self.file_op_manager: # file_op_manager が渡されていれば接続
-            if hasattr(self.file_op_manager, '_handle_file_op_progress'):
-                self._worker.signals.progress.connect(self.file_op_manager._handle_file_op_progress)
-            if hasattr(self.file_op_manager, '_handle_file_op_finished'):
-                self._worker.signals.finished.connect(self.file_op_manager._handle_file_op_finished) # Connect to manager's finished
-            if hasattr(self.file_op_manager, '_handle_file_op_error'):
-                self._worker.signals.error.connect(self.file_op_manager._handle_file_op_error)
-        else:
-            # MainWindowへの直接接続のフォールバック（テストなどでfile_op_managerがNoneの場合）
-            # ただし、今回のリファクタリングでは常にfile_op_manager経由にするのが望ましい
-            main_window = self.parent()
-            if main_window:
-                logger.warning("FileOperations: file_op_manager not provided, attempting to connect to parent (MainWindow).")
-                if hasattr(main_window, '_handle_file_op_progress'): # Assuming MainWindow still has these for fallback
-                    self._worker.signals.progress.connect(main_window._handle_file_op_progress)
-                if hasattr(main_window, '_handle_file_op_finished'):
-                    self._worker.signals.finished.connect(main_window._handle_file_op_finished)
-                if hasattr(main_window, '_handle_file_op_error'):
-                    self._worker.signals.error.connect(main_window._handle_file_op_error)
-            else:
-                logger.error("FileOperations: Neither file_op_manager nor parent (MainWindow) is available for signal connection.")
-
-        self._thread.started.connect(self._worker.run)
-        
-        # Ensure proper cleanup
-        self._worker.signals.finished.connect(self._on_worker_finished) # Custom slot for cleanup
-        
-        self._thread.start()
-        logger.info(f"Started {operation_type} operation in a new thread.")
-        return True
+    def job(self, job_id):
+        return self._jobs.get(job_id)
 
-    def _on_worker_finished(self):
-        logger.debug("Worker has finished. Cleaning up thread and worker.")
-        if self._thread is not None:
-            self._thread.quit()
-            # self._thread.wait() # Wait for thread to finish quitting
-        
+    def active_jobs(self):
+        """待機中・実行中のジョブを追加順に返す。"""
+        return [job for job in self._jobs.values() if job.is_active()]
+
+    def has_active_operations(self):
+        return bool(self.active_jobs())
+
+    def _schedule(self):
+        """実行枠が空いていれば、先に追加された未完了ジョブと競合しない待機中ジョブを開始する。"""
+        running_count = sum(1 for job in self._jobs.values() if job.status == JOB_STATUS_RUNNING)
+        earlier_active = []
+        for job in list(self._jobs.values()):
+            if job.status == JOB_STATUS_QUEUED and running_count < self.MAX_CONCURRENT_JOBS \
+                    and not any(job.conflicts_with(other) for other in earlier_active):
+                self._start_job(job)
+                running_count += 1
+            if job.is_active():
+                earlier_active.append(job)
+
+    def _start_job(self, job):
+        job.status = JOB_STATUS_RUNNING
+        job.thread = QThread(self) # Set parent to FileOperations instance
+        job.worker = FileOperationsWorker(job.operation_type, job.source_paths, job.destination_folder, None)
+        job.worker.copy_strategy = job.copy_strategy
+        job.worker.journal_dir = self.journal_dir
+        job.worker.moveToThread(job.thread)
+        job.worker.signals.progress.connect(job._on_worker_progress)
+        job.worker.signals.finished.connect(job._on_worker_finished)
+        if self.file_op_manager and hasattr(self.file_op_manager, '_handle_file_op_error'):
+            job.worker.signals.error.connect(self.file_op_manager._handle_file_op_error)
+        job.thread.started.connect(job.worker.run)
+        job.thread.start()
+        logger.info(f"Started {job.operation_type} operation #{job.job_id} in a new thread.")
+        self.jobStarted.emit(job.job_id)
+
+    def _on_job_finished(self, job_id, result):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        logger.debug(f"Job #{job_id} has finished. Cleaning up thread and worker.")
+        job.status = JOB_STATUS_FINISHED
+        if job.thread is not None:
+            job.thread.quit()
+            job.thread.wait(1000) # run() は完了を通知した直後に戻る。実行中のQThreadを破棄しないよう終了を待つ
         # It's generally safer to let Qt's event loop handle deletion with deleteLater
-        # rather than deleting them immediately after quit/wait, especially if signals
-        # are still pending or if the finished signal itself is emitted from the thread.
-        if self._worker is not None:
-            self._worker.deleteLater()
-            self._worker = None
-        if self._thread is not None:
-            self._thread.deleteLater()
-            self._thread = None
+        if job.worker is not None:
+            job.worker.deleteLater()
+            job.worker = None
+        if job.thread is not None:
+            job.thread.deleteLater()
+            job.thread = None
+        del self._jobs[job_id]
+        job.deleteLater()
+        self.jobFinished.emit(job_id, result)
+        self._schedule() # 次のジョブを開始
 
+    def cancel_job(self, job_id):
+        """待機中のジョブはキューから外し、実行中のジョブには停止を要求する (完了は jobFinished で通知)。"""
+        job = self._jobs.get(job_id)
+        if job is None or not job.is_active():
+            logger.info(f"キャンセル対象のファイル操作 #{job_id} はありません。")
+            return False
+        job.cancel_requested = True
+        if job.status == JOB_STATUS_QUEUED:
+            logger.info(f"待機中のファイル操作 #{job_id} をキャンセルしました。")
+            job._on_worker_finished({'status': 'cancelled', 'operation_type': job.operation_type,
+                                     'errors': [], 'destination_folder': job.destination_folder})
+        else:
+            job.worker.stop() # Signal the worker to stop its loop
+            logger.info(f"Requesting file operation #{job_id} to stop...")
+        return True
 
     def stop_operation(self):
-        if self._worker and self._thread and self._thread.isRunning():
-            self._worker.stop() # Signal the worker to stop its loop
-            logger.info("Requesting file operation to stop...")
-            # Don't quit or wait here directly, let the worker finish its current iteration and emit finished.
-        else:
+        """すべての待機中・実行中の操作をキャンセルする。"""
+        active_jobs = self.active_jobs()
+        if not active_jobs:
             logger.info("No file operation currently running to stop.")
+            return
+        for job in reversed(active_jobs): # 待機中のジョブが先に始まらないよう後ろから
+            self.cancel_job(job.job_id)
 
-    # Placeholder for signal connections if FileOperations itself handles them before passing to MainWindow
-    # def handle_progress(self, processed, total):
-    #     logger.debug(f"FileOp Progress: {processed}/{total}")
-    # def handle_finished(self, result):
-    #     logger.debug(f"FileOp Finished: {result}")
-    # def handle_error(self, err_msg):
-    #     logger.error(f"FileOp Error: {err_msg}")
+    def shutdown(self, timeout_ms=1000):
+        """アプリ終了時: すべての操作を停止し、実行中のスレッドの終了を待つ。"""
+        running_threads = [job.thread for job in self.active_jobs() if job.thread is not None]
+        self.stop_operation()
+        for thread in running_threads:
+            if not thread.wait(timeout_ms):
+                logger.warning("ファイル操作スレッドの終了待機がタイムアウトしました。")
@@ -0,0 +1,153 @@
+# src/filter_terms.py
+"""フィルタ欄の語 (キーワード・"完全一致のフレーズ"・/正規表現/) の分割とマッチャーの作成。
+
+正規表現は入力時に1回だけコンパイルし、パターンから「一致するなら必ず含まれる文字列」(必須リテラル) を取り出しておく。
+行ごとの判定では、まず小文字化済みのテキストに必須リテラルが含まれるかを `in` で調べ、
+含まれる行 (候補) だけを正規表現で検索する。フレーズも同じ仕組みで、単語の途中には一致しない。
+"""
+import logging
+import re
+
+try:
+    from re import _parser as sre_parse # Python 3.11+
+except ImportError: # pragma: no cover
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
+_REPEAT_OPS = tuple(getattr(sre_parse, name) for name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT')
+                    if hasattr(sre_parse, name))
+
+
+def split_filter_terms(text):
+    """フィルタ欄の入力をカンマで語に分ける。"..." と /.../ の中のカンマでは分けない (\\ でエスケープ可)。"""
+    terms = []
+    current = []
+    closing = None # 引用の途中なら閉じ文字
+    term_start = 0
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if closing is not None:
+            current.append(char)
+            if char == '\\' and i + 1 < len(text):
+                current.append(text[i + 1])
+                i += 1
+            elif char == closing:
+                closing = None
+        elif char == ',':
+            terms.append(''.join(current).strip())
+            current = []
+            term_start = i + 1
+        else:
+            if char in '"/' and not ''.join(current).strip(' -'): # 語の先頭 (除外の "-" の後も可) でだけ引用とみなす
+                closing = char
+            current.append(char)
+        i += 1
+    if closing is not None: # 閉じられていない引用は通常の語として分け直す
+        terms.extend(part.strip() for part in text[term_start:].split(','))
+    else:
+        terms.append(''.join(current).strip())
+    return [term for term in terms if term]
+
+
+class KeywordMatcher:
+    """部分一致 (従来のキーワード)。"""
+    __slots__ = ('keyword',)
+
+    def __init__(self, keyword):
+        self.keyword = keyword.lower()
+
+    def matches(self, text_lower):
+        return self.keyword in text_lower
+
+    def __repr__(self):
+        return f"KeywordMatcher({self.keyword!r})"
+
+
+class RegexMatcher:
+    """正規表現 (大文字小文字を区別しない)。literals は一致する行に必ず含まれる小文字の文字列。"""
+    __slots__ = ('pattern', 'regex', 'literals')
+
+    def __init__(self, pattern, regex, literals):
+        self.pattern = pattern
+        self.regex = regex
+        self.literals = literals
+
+    def matches(self, text_lower):
+        for literal in self.literals: # 安い前段の絞り込み
+            if literal not in text_lower:
+                return False
+        return self.regex.search(text_lower) is not None
+
+    def __repr__(self):
+        return f"RegexMatcher({self.pattern!r}, literals={self.literals!r})"
+
+
+def _literal_runs(parsed, runs):
+    """解析済みパターンの連接部分から、必ず現れる連続したリテラルを runs に集める。"""
+    current = []
+    for op, value in parsed:
+        if op is sre_parse.LITERAL:
+            current.append(chr(value))
+            continue
+        if current:
+            runs.append(''.join(current))
+            current = []
+        if op is sre_parse.SUBPATTERN:
+            _literal_runs(value[-1], runs) # (group, add_flags, del_flags, pattern)
+        elif op in _REPEAT_OPS:
+            minimum, _, sub_pattern = value
+            if minimum >= 1:
+                _literal_runs(sub_pattern, runs)
+        # BRANCH / IN / ANY / AT など: 必須の文字列は決められないので区切りとして扱う
+    if current:
+        runs.append(''.join(current))
+
+
+def required_literals(pattern):
+    """正規表現 pattern に一致する文字列が必ず含む (小文字の) 部分文字列のリスト。長いものから並べる。"""
+    try:
+        parsed = sre_parse.parse(pattern, re.IGNORECASE)
+    except re.error:
+        return []
+    runs = []
+    _literal_runs(parsed, runs)
+    literals = sorted({run.lower() for run in runs if run.strip()}, key=len, reverse=True)
+    return literals
+
+
+def compile_term(term):
+    """語からマッチャーを作る。/.../ は正規表現、"..." はフレーズ (単語境界で一致)、それ以外は部分一致。
+    正規表現として不正な場合は部分一致として扱う。
+    """
+    if len(term) >= 2 and term[0] == '/' and term[-1] == '/':
+        pattern = term[1:-1]
+        try:
+            regex = re.compile(pattern, re.IGNORECASE)
+        except re.error as e:
+            logger.warning(f"正規表現が不正なため、文字列として検索します: {term}: {e}")
+            return KeywordMatcher(term)
+        return RegexMatcher(pattern, regex, required_literals(pattern))
+    if len(term) >= 2 and term[0] == '"' and term[-1] == '"':
+        phrase = term[1:-1].replace('\\"', '"').strip().lower()
+        if not phrase:
+            return None
+        regex = re.compile(r"(?<!\w)" + re.escape(phrase) + r"(?!\w)")
+        return RegexMatcher(term, regex, [phrase])
+    return KeywordMatcher(term)
+
+
+def compile_terms(terms):
+    """語のリストを (含むべきマッチャー, "-" で除外するマッチャー) に分けてコンパイルする。"""
+    included = []
+    excluded = []
+    for term in terms:
+        target = included
+        if term.startswith('-') and len(term) > 1:
+            term = term[1:].strip()
+            target = excluded
+        matcher = compile_term(term) if term else None
+        if matcher is not None:
+            target.append(matcher)
+    return included, excluded
@@ -0,0 +1,106 @@
+# src/folder_scanner.py
+"""フォルダ選択時の走査 (画像ファイルの列挙と空フォルダの検出) を1回のディレクトリ走査で行う。
+
+サブフォルダが空かどうかは、走査の帰りがけ (子フォルダの結果がそろった時点) に判定するため、
+同じ木を空フォルダ検出のためにもう一度たどる必要はない。
+"""
+import logging
+import os
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+SCAN_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp') # サムネイル一覧と同じ対象 (QDirIterator の名前フィルタと同じ)
+
+
+def _join(folder, name):
+    # QDirIterator と同じく区切り文字は "/" にする (既存のパスと比較できるように)
+    return f"{folder}{name}" if folder.endswith(('/', '\\')) else f"{folder}/{name}"
+
+
+def scan_folder(root_folder, recursive=True, find_empty_folders=False, is_cancelled=None):
+    """(画像ファイルのパスのリスト, 空のサブフォルダのリスト) を返す。
+
+    画像は QDirIterator(Subdirectories) と同じく見つかった順 (フォルダの中身はその場で展開) に並べる。
+    空のサブフォルダは root_folder 直下のフォルダのうち、配下にファイルが1つもないもの。
+    find_empty_folders=True の場合は recursive=False でもサブフォルダの中身を確認する (画像は列挙しない)。
+    読み込めないフォルダやシンボリックリンクは、誤って削除しないよう「空でない」として扱う。
+    """
+    image_files = []
+
+    def walk(folder, collect_images):
+        """folder の中身を走査し、folder が空 (配下にファイルがない) かどうかを返す。"""
+        if is_cancelled is not None and is_cancelled():
+            return False
+        try:
+            with os.scandir(folder) as entries:
+                is_empty = True
+                for entry in entries:
+                    try:
+                        if entry.is_symlink():
+                            is_empty = False
+                        elif entry.is_dir(follow_symlinks=False):
+                            if collect_images or find_empty_folders:
+                                is_empty = walk(_join(folder, entry.name), collect_images) and is_empty
+                            else:
+                                is_empty = False
+                        else:
+                            is_empty = False
+                            if collect_images and entry.name.lower().endswith(SCAN_IMAGE_EXTENSIONS):
+                                image_files.append(_join(folder, entry.name))
+                    except OSError as e:
+                        logger.warning(f"エントリの確認に失敗: {entry.path}: {e}")
+                        is_empty = False
+                return is_empty
+        except OSError as e:
+            logger.warning(f"フォルダの読み込みに失敗 (空でないものとして扱います): {folder}: {e}")
+            return False
+
+    empty_folders = []
+    try:
+        with os.scandir(root_folder) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_symlink():
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        sub_folder = _join(root_folder, entry.name)
+                        if not recursive and not find_empty_folders:
+                            continue
+                        if walk(sub_folder, recursive) and find_empty_folders:
+                            empty_folders.append(sub_folder)
+                    elif entry.name.lower().endswith(SCAN_IMAGE_EXTENSIONS):
+                        image_files.append(_join(root_folder, entry.name))
+                except OSError as e:
+                    logger.warning(f"エントリの確認に失敗: {entry.path}: {e}")
+    except OSError as e:
+        logger.error(f"フォルダの読み込みに失敗: {root_folder}: {e}")
+    return image_files, empty_folders
+
+
+def find_empty_subfolders(parent_folder):
+    """parent_folder 直下のサブフォルダのうち、配下にファイルが1つもないものを返す。"""
+    return scan_folder(parent_folder, recursive=False, find_empty_folders=True)[1]
+
+
+class FolderScanThread(QThread):
+    """scan_folder をバックグラウンドで実行し、結果を scanFinished で通知する。"""
+    scanFinished = pyqtSignal(str, list, list) # folder_path, image_files, empty_folders
+
+    def __init__(self, folder_path, recursive=True, find_empty_folders=False, parent=None):
+        super().__init__(parent)
+        self.folder_path = folder_path
+        self.recursive = recursive
+        self.find_empty_folders = find_empty_folders
+        self._is_running = True
+
+    def run(self):
+        image_files, empty_folders = scan_folder(self.folder_path, self.recursive, self.find_empty_folders,
+                                                 is_cancelled=lambda: not self._is_running)
+        if self._is_running:
+            logger.info(f"フォルダ走査完了: {self.folder_path} (画像 {len(image_files)}個, 空フォルダ {len(empty_folders)}個)")
+            self.scanFinished.emit(self.folder_path, image_files, empty_folders)
+
+    def stop(self):
+        self._is_running = False
@@ -14,7 +14,7 @@ class FullImageDialog(QDialog):
 
     def __init__(self, image_path_list, current_index, preview_mode=PREVIEW_MODE_FIT, parent=None, is_selected_callback=None):
         super().__init__(parent)
-        self.all_image_paths = image_path_list if image_path_list is not None else []
+        self.all_image_paths = image_path_list if image_path_list is not None else [] # list または ProxyPathSequence
         self.current_index = current_index
         self.preview_mode = preview_mode
         self.is_selected_callback = is_selected_callback
@@ -87,7 +87,15 @@ class FullImageDialog(QDialog):
         self.activateWindow()
         self.setFocus()
 
+    def _sync_current_index(self):
+        """フィルタやソートで表示順が変わっていても、現在の画像の位置を取り直す (ProxyPathSequence の場合)。"""
+        if self.image_path and hasattr(self.all_image_paths, 'position_of'):
+            position = self.all_image_paths.position_of(self.image_path)
+            if position != -1:
+                self.current_index = position
+
     def show_previous_image(self):
+        self._sync_current_index()
         if not self.all_image_paths or self.current_index <= 0:
             return
         self.current_index -= 1
@@ -96,6 +104,7 @@ class FullImageDialog(QDialog):
         self.preview_widget.update_image(self.image_path, self.current_index, len(self.all_image_paths), self._get_current_selection_state())
 
     def show_next_image(self):
+        self._sync_current_index()
         if not self.all_image_paths or self.current_index >= len(self.all_image_paths) - 1:
             return
         self.current_index += 1
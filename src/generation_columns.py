@@ -0,0 +1,170 @@
+# src/generation_columns.py
+"""generation_info から取り出した型付きの項目 (Steps, Seed, CFG scale など) と、画像のサイズ・更新日時を列ごとの配列に保持する。
+
+行ごとに辞書を持つ代わりに、項目ごとに1本の array (数値) またはコード配列 + 辞書 (文字列) を持つ。
+ソースモデルの各アイテムには GENERATION_SLOT_ROLE に配列上の位置 (スロット) を持たせるため、
+項目の参照は O(1) で、数値の比較はアイテムを介さずに列全体へまとめて行える。
+スロットはソースモデルの行削除・リセットに合わせて解放し、次に追加されるアイテムで再利用する。
+"""
+import logging
+import math
+from array import array
+
+from .constants import GENERATION_SLOT_ROLE
+from .generation_info import parse_generation_info
+
+logger = logging.getLogger(__name__)
+
+# 数値の列と array の型コード (q: 64ビット整数, d: 倍精度浮動小数点)
+GENERATION_NUMERIC_COLUMNS = {
+    'steps': 'q',
+    'seed': 'q',
+    'size_width': 'q',
+    'size_height': 'q',
+    'cfg_scale': 'd',
+    'denoising_strength': 'd',
+    'hires_upscale': 'd',
+}
+# メタデータ辞書から取る数値の列: 列名 -> (メタデータのキー, 型コード)
+FILE_NUMERIC_COLUMNS = {
+    'width': ('width', 'q'),
+    'height': ('height', 'q'),
+    'mtime': ('update_timestamp', 'd'),
+}
+# 文字列の列 (重複が多いので辞書符号化する)
+GENERATION_TEXT_COLUMNS = ('sampler', 'schedule_type', 'model', 'model_hash', 'lora_hashes')
+MISSING_INT = -2 ** 63 # 整数の列で値がないことを表す
+MISSING_CODE = -1 # 文字列の列で値がないことを表す
+
+
+class GenerationInfoColumns:
+    def __init__(self, source_model=None, slot_role=GENERATION_SLOT_ROLE):
+        self.source_model = source_model
+        self.slot_role = slot_role
+        self._numeric = {name: array(typecode) for name, typecode in GENERATION_NUMERIC_COLUMNS.items()}
+        self._numeric.update((name, array(typecode)) for name, (_, typecode) in FILE_NUMERIC_COLUMNS.items())
+        self._codes = {name: array('l') for name in GENERATION_TEXT_COLUMNS}
+        self._text_values = {name: [] for name in GENERATION_TEXT_COLUMNS} # コード -> 文字列
+        self._text_lookup = {name: {} for name in GENERATION_TEXT_COLUMNS} # 文字列 -> コード
+        self._slot_count = 0
+        self._free_slots = set()
+        self.version = 0 # 値が変わるたびに増える (フィルタ結果のキャッシュの判定用)
+        if source_model is not None:
+            source_model.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+            source_model.modelReset.connect(self.clear)
+
+    def clear(self):
+        for column in self._numeric.values():
+            del column[:]
+        for name in GENERATION_TEXT_COLUMNS:
+            del self._codes[name][:]
+            self._text_values[name].clear()
+            self._text_lookup[name].clear()
+        self._slot_count = 0
+        self._free_slots = set()
+        self.version += 1
+
+    def __len__(self):
+        """使用中のスロット数。"""
+        return self._slot_count - len(self._free_slots)
+
+    @property
+    def slot_count(self):
+        """列の長さ (解放済みのスロットを含む)。"""
+        return self._slot_count
+
+    def assign(self, item, metadata):
+        """item のメタデータから generation_info の項目を取り出して列に格納し、スロットを返す。
+        サムネイルローダーが解析済みの項目 (metadata['generation_params']) があればそれを使い、辞書からは取り除く。
+        """
+        fields = metadata.pop('generation_params', None) if isinstance(metadata, dict) else None
+        if fields is None:
+            fields = parse_generation_info(metadata.get('generation_info', '') if isinstance(metadata, dict) else '')
+        if isinstance(metadata, dict):
+            fields = dict(fields)
+            for name, (key, _) in FILE_NUMERIC_COLUMNS.items():
+                fields[name] = metadata.get(key)
+        slot = item.data(self.slot_role)
+        if slot is None or not 0 <= slot < self._slot_count:
+            slot = self._allocate_slot()
+            item.setData(slot, self.slot_role)
+        self._write(slot, fields)
+        return slot
+
+    def _allocate_slot(self):
+        if self._free_slots:
+            return self._free_slots.pop()
+        slot = self._slot_count
+        self._slot_count += 1
+        for name, column in self._numeric.items():
+            column.append(MISSING_INT if column.typecode == 'q' else math.nan)
+        for column in self._codes.values():
+            column.append(MISSING_CODE)
+        return slot
+
+    def _write(self, slot, fields):
+        self.version += 1
+        for name, column in self._numeric.items():
+            value = fields.get(name)
+            if column.typecode == 'q':
+                column[slot] = value if isinstance(value, int) and MISSING_INT < value < 2 ** 63 else MISSING_INT
+            else:
+                column[slot] = float(value) if isinstance(value, (int, float)) else math.nan
+        for name, column in self._codes.items():
+            value = fields.get(name)
+            column[slot] = self._encode(name, value) if value else MISSING_CODE
+
+    def _encode(self, name, value):
+        lookup = self._text_lookup[name]
+        code = lookup.get(value)
+        if code is None:
+            code = len(self._text_values[name])
+            self._text_values[name].append(value)
+            lookup[value] = code
+        return code
+
+    def release(self, slot):
+        """スロットを未使用に戻す (値は欠損にしておき、列全体の比較で一致しないようにする)。"""
+        if slot is None or not 0 <= slot < self._slot_count or slot in self._free_slots:
+            return
+        self._write(slot, {})
+        self._free_slots.add(slot)
+
+    def _on_rows_about_to_be_removed(self, parent, first, last):
+        for row in range(first, last + 1):
+            self.release(self.source_model.index(row, 0).data(self.slot_role))
+
+    def value(self, slot, name):
+        """スロットの項目の値を返す。値がなければ None。"""
+        if slot is None or not 0 <= slot < self._slot_count:
+            return None
+        if name in self._numeric:
+            value = self._numeric[name][slot]
+            if self._numeric[name].typecode == 'q':
+                return None if value == MISSING_INT else value
+            return None if math.isnan(value) else value
+        if name in self._codes:
+            code = self._codes[name][slot]
+            return None if code == MISSING_CODE else self._text_values[name][code]
+        raise KeyError(name)
+
+    def live_bits(self):
+        """使用中のスロットのビットが立った整数 (ビット i がスロット i)。"""
+        bits = (1 << self._slot_count) - 1
+        for slot in self._free_slots:
+            bits &= ~(1 << slot)
+        return bits
+
+    def has_column(self, name):
+        return name in self._numeric or name in self._codes
+
+    def is_text_column(self, name):
+        return name in self._codes
+
+    def numeric_column(self, name):
+        """数値の列 (array) をそのまま返す。欠損は MISSING_INT / NaN。"""
+        return self._numeric[name]
+
+    def text_column(self, name):
+        """文字列の列の (コード配列, コード -> 文字列のリスト) を返す。欠損は MISSING_CODE。"""
+        return self._codes[name], self._text_values[name]
@@ -0,0 +1,81 @@
+# src/generation_info.py
+"""A1111 形式の generation_info ("Steps: 20, Sampler: ..., Seed: ...") の解析。
+
+Pillow に依存しないので、起動時に読み込まれるモジュール (列ストアなど) からも使える。
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_size(value):
+    width, _, height = value.lower().partition('x')
+    return int(width), int(height)
+
+
+# A1111 形式の generation_info ("Key: value, Key: value, ...") のうち型付きで取り出す項目
+# 表示上のキー -> (格納するキー, 変換関数)。Size は size_width / size_height の2項目になる。
+GENERATION_INFO_FIELDS = {
+    'steps': ('steps', int),
+    'sampler': ('sampler', str),
+    'schedule type': ('schedule_type', str),
+    'cfg scale': ('cfg_scale', float),
+    'seed': ('seed', int),
+    'size': ('size', _parse_size),
+    'model': ('model', str),
+    'model hash': ('model_hash', str),
+    'denoising strength': ('denoising_strength', float),
+    'hires upscale': ('hires_upscale', float),
+    'lora hashes': ('lora_hashes', str),
+}
+
+
+def parse_generation_info(text):
+    """generation_info の "Key: value, ..." を先頭から1回だけ走査し、GENERATION_INFO_FIELDS の項目を型付きの辞書で返す。
+    値は "..." で囲まれていればカンマを含んでもよい (Lora hashes など)。変換できない値や未知のキーは無視する。
+    """
+    fields = {}
+    if not text or not isinstance(text, str):
+        return fields
+    i = 0
+    text_length = len(text)
+    while i < text_length:
+        while i < text_length and text[i] in ', \r\n\t':
+            i += 1
+        colon = text.find(':', i)
+        if colon == -1:
+            break
+        comma = text.find(',', i, colon)
+        if comma != -1: # "Key: value" の形になっていない断片は読み飛ばす
+            i = comma + 1
+            continue
+        key = text[i:colon].strip().lower()
+        i = colon + 1
+        while i < text_length and text[i] == ' ':
+            i += 1
+        if i < text_length and text[i] == '"':
+            end = i + 1
+            while end < text_length and text[end] != '"':
+                end += 2 if text[end] == '\\' else 1
+            value = text[i + 1:end].replace('\\"', '"')
+            i = end + 1
+        else:
+            end = text.find(',', i)
+            if end == -1:
+                end = text_length
+            value = text[i:end].strip()
+            i = end + 1
+        field = GENERATION_INFO_FIELDS.get(key)
+        if field is None or not value:
+            continue
+        name, convert = field
+        try:
+            converted = convert(value)
+        except (ValueError, OverflowError):
+            logger.debug(f"generation_info の値を変換できません: {key}={value!r}")
+            continue
+        if name == 'size':
+            fields['size_width'], fields['size_height'] = converted
+        else:
+            fields[name] = converted
+    return fields
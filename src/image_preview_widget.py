@@ -1,8 +1,9 @@
 import logging
 import os
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QSizePolicy, QScrollArea, QSpacerItem
-from PyQt6.QtGui import QPixmap, QMovie
-from PyQt6.QtCore import Qt, QSize, QByteArray, pyqtSignal
+from collections import OrderedDict
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QSizePolicy, QStackedWidget, QSpacerItem, QApplication
+from PyQt6.QtGui import QPixmap
+from PyQt6.QtCore import Qt, QSize, QByteArray, pyqtSignal, QTimer
 
 from PIL import Image
 try:
@@ -11,6 +12,9 @@ except ImportError:
     ImageQt = None
 
 from .constants import PREVIEW_MODE_FIT, PREVIEW_MODE_ORIGINAL_ZOOM
+from .tiled_image_view import TiledImageView
+from .animation_player import AnimationPlayer
+from .image_probe import probe_image
 
 logger = logging.getLogger(__name__)
 
@@ -21,13 +25,23 @@ class ImagePreviewWidget(QWidget):
     toggle_fullscreen_requested = pyqtSignal()
     toggle_selection_requested = pyqtSignal() # New signal
 
+    # ★★★ 追加: 表示パイプライン設定 ★★★
+    SCALED_CACHE_MAX_ENTRIES = 4 # (サイズ, 倍率) ごとのスケール済みPixmapを保持する数
+    SMOOTH_RESCALE_DELAY_MS = 150 # リサイズ/ズーム操作が止まってから高品質再スケールするまでの待機時間
+
     def __init__(self, parent=None, preview_mode=PREVIEW_MODE_FIT):
         super().__init__(parent)
         self.preview_mode = preview_mode
         self.scale_factor = 1.0 # For original_zoom mode
         self.pixmap = QPixmap()
-        self.movie = None # QMovieインスタンスを保持
+        self.movie = None # AnimationPlayerインスタンスを保持 (アニメーションWebP)
         self.image_path = None
+        # ★★★ 追加: スケール済みPixmapのLRUキャッシュと高品質再スケール用タイマー ★★★
+        self._scaled_cache = OrderedDict() # key: (width, height, scale_factor) -> QPixmap
+        self._smooth_rescale_timer = QTimer(self)
+        self._smooth_rescale_timer.setSingleShot(True)
+        self._smooth_rescale_timer.setInterval(self.SMOOTH_RESCALE_DELAY_MS)
+        self._smooth_rescale_timer.timeout.connect(self._update_image_display)
         
         self.init_ui()
 
@@ -77,25 +91,30 @@ class ImagePreviewWidget(QWidget):
         self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         
         if self.preview_mode == PREVIEW_MODE_ORIGINAL_ZOOM:
-            self.scroll_area = QScrollArea(self)
-            self.scroll_area.setWidgetResizable(False) # Important for original size + zoom
-            self.scroll_area.setWidget(self.image_label)
-            self.scroll_area.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            main_layout.addWidget(self.scroll_area, 1)
+            # ★★★ 変更: 巨大な拡大Pixmapを作らないよう、タイル描画のビューで表示する ★★★
+            # メッセージ表示用のラベルと画像ビューを切り替えて使う
+            self.tiled_view = TiledImageView(self)
+            self.display_stack = QStackedWidget(self)
+            self.display_stack.addWidget(self.image_label)
+            self.display_stack.addWidget(self.tiled_view)
+            main_layout.addWidget(self.display_stack, 1)
         else: # PREVIEW_MODE_FIT
             self.image_label.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
             main_layout.addWidget(self.image_label, 1)
 
     def update_image(self, image_path, current_index, total_count, is_selected=False):
         """Loads and sorts the image. is_selected: initial selection state."""
-        if self.movie and self.movie.state() == QMovie.MovieState.Running:
+        if self.movie:
             try:
                 self.movie.frameChanged.disconnect(self._update_movie_frame)
             except TypeError:
                 pass
-            self.movie.stop()
-        self.image_label.setMovie(None)
+            self.movie.stop() # デコードスレッドも停止し、バッファ済みフレームを解放する
         self.movie = None
+        self._smooth_rescale_timer.stop()
+        self._scaled_cache.clear()
+        if self.preview_mode == PREVIEW_MODE_ORIGINAL_ZOOM:
+            self.tiled_view.clear_image()
 
         self.image_path = image_path
         self._update_navigation_buttons(current_index, total_count)
@@ -118,21 +137,12 @@ class ImagePreviewWidget(QWidget):
 
     def _load_image_data(self):
         try:
-            pil_img_check = Image.open(self.image_path)
-            is_animated_webp = False
-            if pil_img_check.format == "WEBP":
-                try:
-                    if pil_img_check.is_animated: is_animated_webp = True
-                except AttributeError:
-                    if hasattr(pil_img_check, 'n_frames') and pil_img_check.n_frames > 1: is_animated_webp = True
-            pil_img_check.close()
-
-            if is_animated_webp:
+            # ★★★ 変更: ヘッダーだけを読んで判定し、アニメーションは上限付きバッファのプレイヤーで再生する ★★★
+            if probe_image(self.image_path).is_animated:
                 logger.info(f"アニメーションWebPを読み込みます: {self.image_path}")
-                self.movie = QMovie(self.image_path)
-                self.movie.setCacheMode(QMovie.CacheMode.CacheAll)
+                self.movie = AnimationPlayer(self.image_path, self)
                 if not self.movie.isValid():
-                    logger.error(f"QMovieの読み込みに失敗: {self.image_path}")
+                    logger.error(f"アニメーションの読み込みに失敗: {self.image_path}")
                     self.image_label.setText(f"動画の読み込みに失敗:\n{os.path.basename(self.image_path)}")
                     self.movie = None
                 else:
@@ -140,6 +150,8 @@ class ImagePreviewWidget(QWidget):
             else:
                 try:
                     pil_img = Image.open(self.image_path)
+                    if self.preview_mode == PREVIEW_MODE_FIT:
+                        pil_img = self._reduce_to_screen_resolution(pil_img)
                     if ImageQt is None:
                         if not self.pixmap.load(self.image_path):
                              self.image_label.setText(f"画像の読み込みに失敗しました (QPixmap):\n{os.path.basename(self.image_path)}")
@@ -166,38 +178,82 @@ class ImagePreviewWidget(QWidget):
                 self.movie.stop()
                 self.movie = None
 
-    def _update_image_display(self):
+    def _screen_decode_limit(self):
+        """FITモードで必要となる最大の表示ピクセルサイズ (物理ピクセル) を返す。"""
+        screen = self.screen() or QApplication.primaryScreen()
+        if screen is None:
+            return None
+        geometry = screen.availableGeometry()
+        ratio = screen.devicePixelRatio() or 1.0
+        return int(geometry.width() * ratio), int(geometry.height() * ratio)
+
+    def _reduce_to_screen_resolution(self, pil_img):
+        """FITモードでは画面より大きく表示されないため、画面解像度程度までデコード時に縮小する。"""
+        limit = self._screen_decode_limit()
+        if not limit or limit[0] <= 0 or limit[1] <= 0:
+            return pil_img
+        if pil_img.width <= limit[0] and pil_img.height <= limit[1]:
+            return pil_img
+        try:
+            # JPEG はDCTスケーリングで縮小デコードされる (他の形式では何もしない)
+            pil_img.draft(None, limit)
+            pil_img.thumbnail(limit, Image.Resampling.LANCZOS)
+            logger.debug(f"画面解像度に合わせて縮小デコード: {self.image_path} -> {pil_img.size}")
+        except Exception as e:
+            logger.warning(f"縮小デコードに失敗したため元の解像度で表示します ({self.image_path}): {e}")
+        return pil_img
+
+    def _get_scaled_pixmap(self, width, height, fast=False):
+        """(サイズ, 倍率) ごとのキャッシュを使ってスケール済みPixmapを返す。
+        fast=True の場合は高速変換で作成し、キャッシュには保存しない (後で高品質版に置き換わるため)。
+        """
+        key = (width, height, round(self.scale_factor, 4))
+        cached = self._scaled_cache.get(key)
+        if cached is not None:
+            self._scaled_cache.move_to_end(key)
+            return cached, True
+        mode = Qt.TransformationMode.FastTransformation if fast else Qt.TransformationMode.SmoothTransformation
+        scaled_pixmap = self.pixmap.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio, mode)
+        if not fast:
+            self._scaled_cache[key] = scaled_pixmap
+            while len(self._scaled_cache) > self.SCALED_CACHE_MAX_ENTRIES:
+                self._scaled_cache.popitem(last=False)
+        return scaled_pixmap, not fast
+
+    def _update_image_display(self, fast=False):
+        """現在のPixmapを表示する。fast=True はリサイズ/ズーム中の高速表示で、
+        操作が落ち着いた後にタイマーから高品質 (Smooth) な再スケールが1回だけ行われる。"""
         if self.movie and self.movie.isValid():
             self.image_label.setText("")
             self._update_movie_frame()
-            if self.movie.state() != QMovie.MovieState.Running:
+            if not self.movie.is_running():
                  self.movie.start()
             return
         
         if not self.pixmap.isNull():
             self.image_label.setText("")
             if self.preview_mode == PREVIEW_MODE_ORIGINAL_ZOOM:
-                scaled_pixmap = self.pixmap.scaled(
-                    int(self.pixmap.width() * self.scale_factor),
-                    int(self.pixmap.height() * self.scale_factor),
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                )
-                self.image_label.setPixmap(scaled_pixmap)
-                self.image_label.adjustSize() 
-            else: # PREVIEW_MODE_FIT
-                target_size = self.image_label.size()
-                # Ensure target size is valid to avoid warnings
-                if target_size.width() <= 0 or target_size.height() <= 0:
-                    return
-                scaled_pixmap = self.pixmap.scaled(
-                    target_size,
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                )
-                self.image_label.setPixmap(scaled_pixmap)
+                # ズームはビューの変換行列のみで行い、表示範囲のタイルだけが描画される
+                if self.tiled_view.tiled_item() is None:
+                    self.tiled_view.set_image(self.pixmap.toImage())
+                self.tiled_view.set_zoom(self.scale_factor)
+                self.display_stack.setCurrentWidget(self.tiled_view)
+                return
+
+            target_size = self.image_label.size() # PREVIEW_MODE_FIT
+            # Ensure target size is valid to avoid warnings
+            if target_size.width() <= 0 or target_size.height() <= 0:
+                return
+            scaled_pixmap, is_final = self._get_scaled_pixmap(target_size.width(), target_size.height(), fast=fast)
+            self.image_label.setPixmap(scaled_pixmap)
+            if is_final:
+                self._smooth_rescale_timer.stop()
+            else:
+                self._smooth_rescale_timer.start() # 操作が続く間は再スタートされ、最後に1回だけSmooth
             return
 
+        if self.preview_mode == PREVIEW_MODE_ORIGINAL_ZOOM:
+            self.display_stack.setCurrentWidget(self.image_label)
         if not self.image_label.text():
              self.image_label.setText("表示なし")
 
@@ -206,9 +262,10 @@ class ImagePreviewWidget(QWidget):
             current_frame_pixmap = self.movie.currentPixmap()
             if not current_frame_pixmap.isNull():
                 if self.preview_mode == PREVIEW_MODE_ORIGINAL_ZOOM:
-                    original_size = current_frame_pixmap.size()
-                    self.image_label.setFixedSize(original_size)
-                    self.image_label.setPixmap(current_frame_pixmap)
+                    # アニメーションは原寸表示 (フレームごとに入れ替わるためタイル化しない)
+                    self.tiled_view.set_zoom(1.0)
+                    self.tiled_view.set_frame(current_frame_pixmap)
+                    self.display_stack.setCurrentWidget(self.tiled_view)
                 else: # PREVIEW_MODE_FIT
                     target_label_size = self.image_label.size()
                     if target_label_size.width() <= 0 or target_label_size.height() <= 0:
@@ -234,7 +291,7 @@ class ImagePreviewWidget(QWidget):
     def resizeEvent(self, event):
         super().resizeEvent(event)
         if (self.movie and self.movie.isValid()) or self.preview_mode == PREVIEW_MODE_FIT:
-            self._update_image_display()
+            self._update_image_display(fast=True)
 
     def wheelEvent(self, event):
         if self.preview_mode == PREVIEW_MODE_ORIGINAL_ZOOM and event.modifiers() == Qt.KeyboardModifier.ControlModifier:
@@ -248,57 +305,13 @@ class ImagePreviewWidget(QWidget):
             else:
                 self.scale_factor /= 1.1
             self.scale_factor = max(0.1, min(self.scale_factor, 10.0)) 
-            self._update_image_display()
+            self._update_image_display(fast=True)
             event.accept()
         elif self.preview_mode == PREVIEW_MODE_ORIGINAL_ZOOM:
             super().wheelEvent(event)
         else:
             super().wheelEvent(event)
 
-    _drag_start_pos = None
-    _scroll_bar_values_on_drag_start_h = 0
-    _scroll_bar_values_on_drag_start_v = 0
-
-    def mousePressEvent(self, event):
-        if self.preview_mode == PREVIEW_MODE_ORIGINAL_ZOOM and event.button() == Qt.MouseButton.LeftButton:
-            if self.movie and self.movie.isValid():
-                super().mousePressEvent(event)
-                return
-
-            if self.scroll_area.horizontalScrollBar().isVisible() or self.scroll_area.verticalScrollBar().isVisible():
-                self._drag_start_pos = event.pos()
-                self._scroll_bar_values_on_drag_start_h = self.scroll_area.horizontalScrollBar().value()
-                self._scroll_bar_values_on_drag_start_v = self.scroll_area.verticalScrollBar().value()
-                self.image_label.setCursor(Qt.CursorShape.ClosedHandCursor)
-                event.accept()
-                return
-        super().mousePressEvent(event)
-
-    def mouseMoveEvent(self, event):
-        if self.preview_mode == PREVIEW_MODE_ORIGINAL_ZOOM and self._drag_start_pos is not None:
-            if self.movie and self.movie.isValid():
-                super().mouseMoveEvent(event)
-                return
-
-            delta = event.pos() - self._drag_start_pos
-            self.scroll_area.horizontalScrollBar().setValue(self._scroll_bar_values_on_drag_start_h - delta.x())
-            self.scroll_area.verticalScrollBar().setValue(self._scroll_bar_values_on_drag_start_v - delta.y())
-            event.accept()
-            return
-        super().mouseMoveEvent(event)
-
-    def mouseReleaseEvent(self, event):
-        if self.preview_mode == PREVIEW_MODE_ORIGINAL_ZOOM and event.button() == Qt.MouseButton.LeftButton and self._drag_start_pos is not None:
-            if self.movie and self.movie.isValid():
-                super().mouseReleaseEvent(event)
-                return
-
-            self._drag_start_pos = None
-            self.image_label.setCursor(Qt.CursorShape.ArrowCursor)
-            event.accept()
-            return
-        super().mouseReleaseEvent(event)
-
     def update_fullscreen_button_text(self, text):
         self.fullscreen_button.setText(text)
 
@@ -0,0 +1,151 @@
+# src/image_probe.py
+"""画像ファイルのヘッダーだけを読み、形式・サイズ・アニメーションの有無・向きを調べる。
+
+PNG (IHDR)、JPEG (SOFn マーカーまで。APP1 の EXIF から向きも取得)、WebP (VP8 / VP8L / VP8X) に対応する。
+画素データのデコードや Pillow でのオープンは行わないため、通常は数百バイトの読み込みで済む。
+ヘッダーが正しいことしか確認しないので、途中で切れたファイルは is_valid=True になる場合がある。
+"""
+import logging
+import struct
+
+logger = logging.getLogger(__name__)
+
+PROBE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp') # ヘッダーを解析できる形式の拡張子
+PROBE_HEADER_SIZE = 32 # PNG の IHDR と WebP の先頭チャンクのヘッダーが収まるサイズ
+JPEG_MAX_SEGMENTS = 256 # SOFn を探す際に読み飛ばすセグメント数の上限 (壊れたファイルで延々と読まないように)
+WEBP_VP8X_ANIMATION_FLAG = 0x02
+EXIF_ORIENTATION_TAG = 0x0112
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# 長さフィールドを持たないマーカー (RSTn, TEM)
+_JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xD8)) | {0x01}
+# サイズを持つフレームヘッダー (DHT=C4, JPG=C8, DAC=CC は除く)
+_JPEG_SOF_MARKERS = frozenset({0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF})
+_JPEG_SOS_MARKER = 0xDA
+_JPEG_APP1_MARKER = 0xE1
+
+
+class ImageProbe:
+    """probe_image の結果。format は 'PNG' / 'JPEG' / 'WEBP' (判別できなければ None)。
+    orientation は EXIF の Orientation (1〜8、情報がなければ 1)。
+    """
+
+    def __init__(self, format=None, width=0, height=0, is_animated=False, orientation=1, is_valid=False):
+        self.format = format
+        self.width = width
+        self.height = height
+        self.is_animated = is_animated
+        self.orientation = orientation
+        self.is_valid = is_valid
+
+    def __repr__(self):
+        return (f"ImageProbe(format={self.format!r}, width={self.width}, height={self.height}, "
+                f"is_animated={self.is_animated}, orientation={self.orientation}, is_valid={self.is_valid})")
+
+
+def probe_image(file_path):
+    """file_path のヘッダーを読んで ImageProbe を返す。読み込めない・形式が不明な場合は is_valid=False。"""
+    try:
+        with open(file_path, 'rb') as f:
+            header = f.read(PROBE_HEADER_SIZE)
+            if header.startswith(PNG_SIGNATURE):
+                return _probe_png(header)
+            if header.startswith(b"\xff\xd8"):
+                return _probe_jpeg(f)
+            if header[0:4] == b"RIFF" and header[8:12] == b"WEBP":
+                return _probe_webp(header)
+    except OSError as e:
+        logger.debug(f"画像ヘッダーの読み込みに失敗: {file_path}: {e}")
+    return ImageProbe()
+
+
+def _probe_png(header):
+    # シグネチャの直後は必ず IHDR チャンク (長さ4バイト + 種別4バイト + 幅4バイト + 高さ4バイト、ビッグエンディアン)
+    if len(header) < 24 or header[12:16] != b"IHDR":
+        return ImageProbe('PNG')
+    width, height = struct.unpack(">II", header[16:24])
+    return ImageProbe('PNG', width, height, is_valid=width > 0 and height > 0)
+
+
+def _probe_jpeg(f):
+    """SOI の直後からセグメントをたどり、最初の SOFn のサイズと APP1 (EXIF) の向きを読む。"""
+    orientation = 1
+    f.seek(2)
+    for _ in range(JPEG_MAX_SEGMENTS):
+        byte = f.read(1)
+        if byte != b"\xff":
+            break
+        marker = f.read(1)
+        while marker == b"\xff": # 詰め物の 0xFF は読み飛ばす
+            marker = f.read(1)
+        if not marker:
+            break
+        marker = marker[0]
+        if marker in _JPEG_STANDALONE_MARKERS:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            break
+        length = struct.unpack(">H", length_bytes)[0]
+        if length < 2:
+            break
+        if marker in _JPEG_SOF_MARKERS:
+            frame = f.read(5) # 精度 (1) + 高さ (2) + 幅 (2)
+            if len(frame) < 5:
+                break
+            height, width = struct.unpack(">HH", frame[1:5])
+            return ImageProbe('JPEG', width, height, orientation=orientation, is_valid=width > 0 and height > 0)
+        if marker == _JPEG_SOS_MARKER: # 画像データに入ってもフレームヘッダーがなければ不正
+            break
+        if marker == _JPEG_APP1_MARKER:
+            segment = f.read(length - 2)
+            if segment.startswith(b"Exif\x00\x00"):
+                orientation = _exif_orientation(segment[6:])
+        else:
+            f.seek(length - 2, 1)
+    return ImageProbe('JPEG', orientation=orientation)
+
+
+def _exif_orientation(tiff):
+    """EXIF (TIFF 形式) の IFD0 から Orientation を読む。見つからなければ 1。"""
+    try:
+        byte_order = {b"II": "<", b"MM": ">"}[tiff[0:2]]
+        ifd_offset = struct.unpack_from(f"{byte_order}I", tiff, 4)[0]
+        entry_count = struct.unpack_from(f"{byte_order}H", tiff, ifd_offset)[0]
+        for i in range(entry_count):
+            entry_offset = ifd_offset + 2 + i * 12
+            tag, value_type = struct.unpack_from(f"{byte_order}HH", tiff, entry_offset)
+            if tag == EXIF_ORIENTATION_TAG and value_type == 3: # SHORT
+                orientation = struct.unpack_from(f"{byte_order}H", tiff, entry_offset + 8)[0]
+                return orientation if 1 <= orientation <= 8 else 1
+    except (KeyError, struct.error):
+        pass
+    return 1
+
+
+def _probe_webp(header):
+    chunk = header[12:16]
+    if chunk == b"VP8X":
+        # フラグ (1) + 予約 (3) + キャンバス幅-1 (3) + キャンバス高さ-1 (3)、リトルエンディアン
+        if len(header) < 30:
+            return ImageProbe('WEBP')
+        flags = header[20]
+        width = int.from_bytes(header[24:27], 'little') + 1
+        height = int.from_bytes(header[27:30], 'little') + 1
+        return ImageProbe('WEBP', width, height, is_animated=bool(flags & WEBP_VP8X_ANIMATION_FLAG), is_valid=True)
+    if chunk == b"VP8 ":
+        # フレームタグ (3) + 開始コード 9D 01 2A + 幅 (14ビット) + 高さ (14ビット)
+        if len(header) < 30 or header[23:26] != b"\x9d\x01\x2a":
+            return ImageProbe('WEBP')
+        width, height = struct.unpack("<HH", header[26:30])
+        width, height = width & 0x3FFF, height & 0x3FFF
+        return ImageProbe('WEBP', width, height, is_valid=width > 0 and height > 0)
+    if chunk == b"VP8L":
+        # シグネチャ 0x2F + 幅-1 (14ビット) + 高さ-1 (14ビット)
+        if len(header) < 25 or header[20] != 0x2F:
+            return ImageProbe('WEBP')
+        bits = int.from_bytes(header[21:25], 'little')
+        width = (bits & 0x3FFF) + 1
+        height = ((bits >> 14) & 0x3FFF) + 1
+        return ImageProbe('WEBP', width, height, is_valid=True)
+    return ImageProbe('WEBP')
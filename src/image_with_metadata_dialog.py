@@ -6,7 +6,7 @@ from PyQt6.QtCore import Qt, QByteArray, pyqtSignal
 from .image_preview_widget import ImagePreviewWidget
 from .metadata_widget import MetadataWidget
 from .constants import PREVIEW_MODE_FIT, METADATA_ROLE
-from .metadata_utils import extract_image_metadata
+from .metadata_utils import extract_image_metadata, with_comfyui_json
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +18,7 @@ class ImageWithMetadataDialog(QDialog):
 
     def __init__(self, image_path_list, current_index, main_window, preview_mode=PREVIEW_MODE_FIT, parent=None):
         super().__init__(parent)
-        self.all_image_paths = image_path_list if image_path_list is not None else []
+        self.all_image_paths = image_path_list if image_path_list is not None else [] # list または ProxyPathSequence
         self.current_index = current_index
         self.main_window = main_window # To access metadata cache
         self.preview_mode = preview_mode
@@ -105,7 +105,7 @@ class ImageWithMetadataDialog(QDialog):
                 logger.error(f"Failed to extract metadata for {self.image_path}: {e}")
                 metadata = {}
         
-        self.metadata_widget.update_metadata(metadata)
+        self.metadata_widget.update_metadata(with_comfyui_json(metadata, self.image_path)) # ★★★ 変更: ComfyUI の JSON はここで読み込む ★★★
 
     def update_image(self, new_image_path_list, new_current_index):
         self.all_image_paths = new_image_path_list if new_image_path_list is not None else []
@@ -117,13 +117,22 @@ class ImageWithMetadataDialog(QDialog):
         self.raise_()
         self.activateWindow()
 
+    def _sync_current_index(self):
+        """フィルタやソートで表示順が変わっていても、現在の画像の位置を取り直す (ProxyPathSequence の場合)。"""
+        if self.image_path and hasattr(self.all_image_paths, 'position_of'):
+            position = self.all_image_paths.position_of(self.image_path)
+            if position != -1:
+                self.current_index = position
+
     def show_previous_image(self):
+        self._sync_current_index()
         if not self.all_image_paths or self.current_index <= 0:
             return
         self.current_index -= 1
         self._load_current_state()
 
     def show_next_image(self):
+        self._sync_current_index()
         if not self.all_image_paths or self.current_index >= len(self.all_image_paths) - 1:
             return
         self.current_index += 1
@@ -0,0 +1,260 @@
+# src/library_index.py
+"""ライブラリ全体のプロンプト・生成情報を SQLite (FTS5) に保存した索引と、その検索。
+
+索引はフォルダを読み込まなくても検索できるよう、画像ごとのパス・更新日時・サイズと
+positive / negative / generation_info のテキストを LIBRARY_INDEX_FILE に保存する。
+テキストは trigram トークナイザの FTS5 表に入れるので、部分一致 (LIKE '%...%') でも索引が使える。
+更新時は更新日時とサイズが変わったファイルだけメタデータを抽出し直し、消えたファイルは索引から削除する。
+
+検索は候補の絞り込みで、フィルタ欄の語をそのまま SQL にする:
+キーワードと "フレーズ" は部分一致、/正規表現/ は必須リテラルの部分一致で調べる。
+単語境界・正規表現・条件式 (steps>=30 など) は、候補を読み込んだ後にプロキシモデルのフィルタが厳密に判定する。
+"""
+import logging
+import os
+import sqlite3
+import threading
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from .filter_terms import KeywordMatcher, compile_terms, split_filter_terms
+from .folder_scanner import scan_folder
+
+logger = logging.getLogger(__name__)
+
+LIBRARY_SEARCH_FIELDS = ( # (FTS の列 = build_search_query の filters のキー, メタデータのキー)
+    ('positive', 'positive_prompt'),
+    ('negative', 'negative_prompt'),
+    ('info', 'generation_info'),
+)
+LIBRARY_SEARCH_LIMIT = 5000 # 1回の検索で読み込む件数の上限 (新しいものから)
+LIBRARY_INDEX_COMMIT_INTERVAL = 500 # 索引の更新をコミットする間隔 (件数)
+FTS_MIN_LITERAL_LENGTH = 3 # trigram の索引で検索できる最短の文字列 (これより短いものは LIKE で行ごとに調べる)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS images_mtime ON images (mtime);
+CREATE VIRTUAL TABLE IF NOT EXISTS image_text USING fts5(positive, negative, info, tokenize='trigram');
+"""
+
+
+def _fts_phrase(column, literal):
+    return f'{column} : "' + literal.replace('"', '""') + '"'
+
+
+def _like(column, literal, negated=False):
+    escaped = literal.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"image_text.{column} {'NOT LIKE' if negated else 'LIKE'} ? ESCAPE '\\'", f"%{escaped}%"
+
+
+def _term_literals(matcher):
+    """語に一致する行が必ず含む文字列。必須の文字列が決められない正規表現は空 (索引では絞り込めない)。"""
+    return [matcher.keyword] if isinstance(matcher, KeywordMatcher) else matcher.literals
+
+
+def build_search_query(filters, mode="AND", columns=None, limit=LIBRARY_SEARCH_LIMIT):
+    """フィルタ欄の入力 {'positive': ..., 'negative': ..., 'info': ...} から (SQL, パラメータ) を作る。
+    索引で絞り込める語が1つもなければ None。columns (GenerationInfoColumns) を渡すと、Info 欄の条件式は除いて扱う。
+
+    長さ FTS_MIN_LITERAL_LENGTH 以上の文字列は1つの FTS5 の MATCH 式にまとめ、短い文字列と MATCH 式にできない除外は
+    LIKE で候補の行ごとに調べる。
+    """
+    match_parts = [] # AND でつなぐ MATCH 式
+    match_exclusions = [] # MATCH 式から NOT で除く語
+    like_conditions = []
+    like_params = []
+    for column, _ in LIBRARY_SEARCH_FIELDS:
+        terms = split_filter_terms(filters.get(column, ''))
+        if column == 'info' and columns is not None:
+            from .metadata_query import parse_predicate
+            terms = [term for term in terms if parse_predicate(term, columns) is None]
+        included, excluded = compile_terms(terms)
+        term_literals = [_term_literals(matcher) for matcher in included]
+        if mode == "OR":
+            # どれか1つに一致すればよいので、索引で判定できない語があればこの欄では絞り込まない
+            if term_literals and all(term_literals):
+                long_literals = [[literal for literal in literals if len(literal) >= FTS_MIN_LITERAL_LENGTH]
+                                 for literals in term_literals]
+                if all(long_literals): # 短い文字列は省いても候補が増えるだけ
+                    match_parts.append("(" + " OR ".join(
+                        "(" + " AND ".join(_fts_phrase(column, literal) for literal in literals) + ")"
+                        for literals in long_literals) + ")")
+                else:
+                    alternatives = []
+                    for literals in term_literals:
+                        conditions = [_like(column, literal) for literal in literals]
+                        alternatives.append("(" + " AND ".join(condition for condition, _ in conditions) + ")")
+                        like_params.extend(param for _, param in conditions)
+                    like_conditions.append("(" + " OR ".join(alternatives) + ")")
+        else:
+            for literal in (literal for literals in term_literals for literal in literals):
+                if len(literal) >= FTS_MIN_LITERAL_LENGTH:
+                    match_parts.append(_fts_phrase(column, literal))
+                else:
+                    condition, param = _like(column, literal)
+                    like_conditions.append(condition)
+                    like_params.append(param)
+        for matcher in excluded:
+            # 除外は部分一致のキーワードだけ (フレーズ・正規表現は文字列を含んでいても一致しないことがある)
+            if not isinstance(matcher, KeywordMatcher):
+                continue
+            if len(matcher.keyword) >= FTS_MIN_LITERAL_LENGTH:
+                match_exclusions.append((column, matcher.keyword))
+            else:
+                condition, param = _like(column, matcher.keyword, negated=True)
+                like_conditions.append(condition)
+                like_params.append(param)
+
+    where = []
+    params = []
+    if match_parts:
+        expression = " AND ".join(match_parts)
+        if match_exclusions:
+            expression = f"({expression}) NOT (" + " OR ".join(
+                _fts_phrase(column, keyword) for column, keyword in match_exclusions) + ")"
+        where.append("image_text MATCH ?")
+        params.append(expression)
+    else: # FTS5 の NOT は二項演算子なので、含む語がなければ LIKE で除く
+        for column, keyword in match_exclusions:
+            condition, param = _like(column, keyword, negated=True)
+            like_conditions.append(condition)
+            like_params.append(param)
+    where.extend(like_conditions)
+    params.extend(like_params)
+    if not where:
+        return None
+    params.append(limit)
+    sql = ("SELECT images.path FROM images JOIN image_text ON image_text.rowid = images.id "
+           f"WHERE {' AND '.join(where)} ORDER BY images.mtime DESC LIMIT ?")
+    return sql, params
+
+
+class LibraryIndex:
+    """索引のデータベース。接続は作成したスレッドでだけ使う (別スレッドでは別の LibraryIndex を開く)。"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._connection = sqlite3.connect(db_path)
+        self._connection.execute("PRAGMA journal_mode=WAL") # 更新中も GUI 側の接続から検索できるように
+        self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT count(*) FROM images").fetchone()[0]
+
+    def _indexed_under(self, root_folder):
+        """root_folder 配下の索引済みのファイル {path: (id, mtime, size)}。"""
+        prefix = root_folder.rstrip('/\\') + '/'
+        rows = self._connection.execute(
+            "SELECT path, id, mtime, size FROM images WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))
+        return {path: (row_id, mtime, size) for path, row_id, mtime, size in rows}
+
+    def _write(self, path, stat_result, metadata, row_id=None):
+        texts = [str(metadata.get(key) or '') if isinstance(metadata, dict) else '' for _, key in LIBRARY_SEARCH_FIELDS]
+        if row_id is None:
+            cursor = self._connection.execute("INSERT INTO images (path, mtime, size) VALUES (?, ?, ?)",
+                                              (path, stat_result.st_mtime, stat_result.st_size))
+            row_id = cursor.lastrowid
+        else:
+            self._connection.execute("UPDATE images SET mtime = ?, size = ? WHERE id = ?",
+                                     (stat_result.st_mtime, stat_result.st_size, row_id))
+            self._connection.execute("DELETE FROM image_text WHERE rowid = ?", (row_id,))
+        self._connection.execute("INSERT INTO image_text (rowid, positive, negative, info) VALUES (?, ?, ?, ?)",
+                                 [row_id] + texts)
+
+    def _remove(self, row_ids):
+        for row_id in row_ids:
+            self._connection.execute("DELETE FROM images WHERE id = ?", (row_id,))
+            self._connection.execute("DELETE FROM image_text WHERE rowid = ?", (row_id,))
+
+    def update_folder(self, root_folder, recursive=True, cancel_event=None, progress_callback=None,
+                      extract_batch=None):
+        """root_folder 配下の画像を索引に反映し、{'indexed', 'unchanged', 'removed', 'cancelled'} を返す。
+        progress_callback(処理済み件数, 抽出する件数) は抽出したファイルごとに呼ばれる。
+        extract_batch は (path のリスト, cancel_event) から (path, metadata) を返す関数 (既定は extract_image_metadata_batch)。
+        """
+        is_cancelled = (lambda: cancel_event.is_set()) if cancel_event is not None else None
+        image_files, _ = scan_folder(root_folder, recursive=recursive, is_cancelled=is_cancelled)
+        if is_cancelled is not None and is_cancelled():
+            return {'indexed': 0, 'unchanged': 0, 'removed': 0, 'cancelled': True}
+        indexed = self._indexed_under(root_folder)
+        stats = {}
+        changed = []
+        unchanged = 0
+        for path in image_files:
+            try:
+                stats[path] = stat_result = os.stat(path)
+            except OSError as e:
+                logger.warning(f"ファイル情報の取得に失敗 (索引に追加しません): {path}: {e}")
+                continue
+            entry = indexed.get(path)
+            if entry is not None and entry[1] == stat_result.st_mtime and entry[2] == stat_result.st_size:
+                unchanged += 1
+            else:
+                changed.append(path)
+        removed = [entry[0] for path, entry in indexed.items() if path not in stats]
+        self._remove(removed)
+        self._connection.commit()
+
+        if extract_batch is None:
+            from .metadata_utils import extract_image_metadata_batch
+            extract_batch = lambda paths, event: extract_image_metadata_batch(paths, cancel_event=event)
+        written = 0
+        for path, metadata in extract_batch(changed, cancel_event):
+            entry = indexed.get(path)
+            self._write(path, stats[path], metadata, row_id=entry[0] if entry is not None else None)
+            written += 1
+            if written % LIBRARY_INDEX_COMMIT_INTERVAL == 0:
+                self._connection.commit()
+            if progress_callback is not None:
+                progress_callback(written, len(changed))
+            if is_cancelled is not None and is_cancelled():
+                break
+        self._connection.commit()
+        cancelled = written < len(changed)
+        logger.info(f"ライブラリの索引を更新しました: {root_folder} (更新 {written}, 変更なし {unchanged}, 削除 {len(removed)})")
+        return {'indexed': written, 'unchanged': unchanged, 'removed': len(removed), 'cancelled': cancelled}
+
+    def search(self, filters, mode="AND", columns=None, limit=LIBRARY_SEARCH_LIMIT):
+        """条件に一致する候補のパスのリスト (新しいものから)。絞り込む語がなければ None。"""
+        query = build_search_query(filters, mode, columns, limit)
+        if query is None:
+            return None
+        sql, params = query
+        return [path for (path,) in self._connection.execute(sql, params)]
+
+
+class LibraryIndexThread(QThread):
+    """索引の更新をバックグラウンドで行う。データベースにはこのスレッド専用の接続を開く。"""
+    progressUpdated = pyqtSignal(int, int) # 処理済み件数, 抽出する件数
+    indexFinished = pyqtSignal(dict) # update_folder の結果 (失敗時は {'error': メッセージ})
+
+    def __init__(self, db_path, root_folder, recursive=True, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.root_folder = root_folder
+        self.recursive = recursive
+        self._cancel_event = threading.Event()
+
+    def stop(self):
+        self._cancel_event.set()
+
+    def run(self):
+        try:
+            index = LibraryIndex(self.db_path)
+            try:
+                result = index.update_folder(self.root_folder, self.recursive, self._cancel_event,
+                                             progress_callback=self.progressUpdated.emit)
+            finally:
+                index.close()
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"ライブラリの索引の更新に失敗しました: {e}", exc_info=True)
+            result = {'error': str(e)}
+        self.indexFinished.emit(result)
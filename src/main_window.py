@@ -12,35 +12,28 @@ from PyQt6.QtCore import Qt, QDir, QSize, QTimer, QVariant, QSortFilterProxyMode
 import os # For path operations
 from pathlib import Path # For path operations
 import json # For settings / metadata parsing
+import sqlite3 # For the library index
 import time # For load time measurement
 import logging # Add logging import
+import functools
+import importlib.util
 
-# PillowのImageオブジェクトをQImageに変換するために必要
-# PIL.ImageQt が Pillow 9.0.0 以降で推奨される方法
-try:
-    from PIL import Image, ImageQt
-except ImportError:
-    logging.error("Pillow (PIL) の ImageQt モジュールが見つかりません。pip install Pillow --upgrade を試してください。")
-    ImageQt = None
-    Image = None # ImageもNoneにしておく
+# ★★★ 変更: 起動を速くするため、Pillow (thumbnail_loader 経由)・send2trash・各ダイアログは使うときに import する ★★★
 
-import send2trash # Import at module level
-
-from .thumbnail_loader import ThumbnailLoaderThread
+from .thumbnail_cache import CarriedThumbnailCache
+from .metadata_store import MetadataRecord, full_metadata
+from .folder_scanner import FolderScanThread, find_empty_subfolders
+from .library_index import LibraryIndex, LibraryIndexThread
+from .session_snapshot import SessionSnapshot, SnapshotEntry, SessionValidationThread, read_snapshot, write_snapshot
+from .progress_reporter import ETA_UNKNOWN, format_rate_and_eta
 from .thumbnail_delegate import ThumbnailDelegate
 from .metadata_filter_proxy_model import MetadataFilterProxyModel
-from .image_metadata_dialog import ImageMetadataDialog
 from .thumbnail_list_view import ToggleSelectionListView
 from .file_operations import FileOperations # Import FileOperations
-from .renamed_files_dialog import RenamedFilesDialog # Import new dialog
-from .full_image_dialog import FullImageDialog
-from .settings_dialog import SettingsDialog
-from .drop_window import DropWindow
-from .wc_creator_dialog import WCCreatorDialog
-from .metadata_utils import extract_image_metadata
 from .dialog_manager import DialogManager
 from .file_operation_manager import FileOperationManager
 from .ui_manager import UIManager
+from .startup_profiler import startup_profiler
 
 from .constants import (
     APP_SETTINGS_FILE,
@@ -51,11 +44,28 @@ from .constants import (
     INITIAL_SORT_ORDER_ON_FOLDER_SELECT, SORT_BY_LOAD_ORDER_ALWAYS, SORT_BY_LAST_SELECTED, # 初期ソート設定
     WC_COMMENT_OUTPUT_FORMAT, WC_FORMAT_HASH_COMMENT, WC_FORMAT_BRACKET_COMMENT,
     MAIN_WINDOW_GEOMETRY, METADATA_DIALOG_GEOMETRY, # ジオメトリ定数をインポート
-    DOUBLE_CLICK_ACTION, DOUBLE_CLICK_ACTION_VIEWER, DOUBLE_CLICK_ACTION_VIEWER_METADATA # ★★★ 追加 ★★★
+    DOUBLE_CLICK_ACTION, DOUBLE_CLICK_ACTION_VIEWER, DOUBLE_CLICK_ACTION_VIEWER_METADATA, # ★★★ 追加 ★★★
+    COPY_STRATEGY, COPY_STRATEGY_AUTO, # ★★★ 追加: コピーモードの複製方法 ★★★
+    FILE_OPERATION_JOURNAL_DIR, # ★★★ 追加: ファイル操作のジャーナル ★★★
+    SESSION_SNAPSHOT_FILE, # ★★★ 追加: セッションスナップショット ★★★
+    SESSION_SNAPSHOT_MAX_THUMBNAILS,
+    LIBRARY_INDEX_FILE # ★★★ 追加: ライブラリ全体の検索用の索引 ★★★
 )
 
 logger = logging.getLogger(__name__)
 
+
+@functools.lru_cache(maxsize=None)
+def _image_qt_available():
+    """Pillow の ImageQt が使えるか (PillowのImageオブジェクトをQImageに変換するために必要)。Pillow 本体は読み込まずに確認する。"""
+    try:
+        available = importlib.util.find_spec("PIL.ImageQt") is not None
+    except ImportError:
+        available = False
+    if not available:
+        logger.error("Pillow (PIL) の ImageQt モジュールが見つかりません。pip install Pillow --upgrade を試してください。")
+    return available
+
 class MainWindow(QMainWindow):
     # ----------------------------------------------------------------------
     # --------------------------------------------------------------------
@@ -63,7 +73,13 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.thumbnail_loader_thread = None
+        self.folder_scan_thread = None # ★★★ 追加: フォルダ選択時の走査 (画像の列挙と空フォルダの検出) ★★★
+        self._pending_scan_folder = None # 走査中のフォルダ (走査結果がこのフォルダのものか確認する)
+        self.library_index = None # ★★★ 追加: ライブラリ全体の検索用の索引 (初めて検索するときに開く) ★★★
+        self.library_index_thread = None # ★★★ 追加: 索引の更新スレッド ★★★
+        self.session_validation_thread = None # ★★★ 追加: 復元したセッションと実ファイルの照合 ★★★
         self.metadata_cache = {}
+        self.carried_thumbnail_cache = CarriedThumbnailCache() # ★★★ 追加: 移動/コピー先のパスで引き継いだサムネイルとメタデータ ★★★
         # self.metadata_dialog_instance = None # DialogManagerが管理
         self.drop_window_instance = None # <--- ★追加: DropWindowのインスタンスを保持
         self.dialog_manager = DialogManager(self) # DialogManagerのインスタンス化
@@ -75,7 +91,9 @@ class MainWindow(QMainWindow):
         self.available_sizes = [96, 128, 200]
         self.current_thumbnail_size = self.available_sizes[1] # Default to 128
         self.current_folder_path = None # To store the currently selected folder path
+        self._showing_library_search = False # ★★★ 追加: ライブラリ検索の結果を表示中 (表示は current_folder_path の中身ではない) ★★★
         self.is_loading_thumbnails = False # Flag to indicate loading state
+        self._last_filter_seconds = None # ★★★ 追加: 直前のフィルタ適用にかかった時間 (ステータスバーに表示) ★★★
         self.recursive_search_enabled = True # Default to ON
         self.selected_file_paths = [] # List to store paths of selected thumbnails
         self.is_copy_mode = False # Flag for copy mode state, True if copy mode is active
@@ -93,6 +111,11 @@ class MainWindow(QMainWindow):
             2: {"name": "更新日時 昇順", "key_type": 1, "order": Qt.SortOrder.AscendingOrder, "caption": "更新日時 昇順"},
             3: {"name": "更新日時 降順", "key_type": 1, "order": Qt.SortOrder.DescendingOrder, "caption": "更新日時 降順"},
             4: {"name": "読み込み順", "key_type": 2, "order": Qt.SortOrder.AscendingOrder, "caption": "読み込み順"},
+            # ★★★ 追加: generation_info の項目でのソート (key_type 3, "field" は GenerationInfoColumns の列名) ★★★
+            5: {"name": "Seed 昇順", "key_type": 3, "field": "seed", "order": Qt.SortOrder.AscendingOrder, "caption": "Seed 昇順"},
+            6: {"name": "Seed 降順", "key_type": 3, "field": "seed", "order": Qt.SortOrder.DescendingOrder, "caption": "Seed 降順"},
+            7: {"name": "Steps 昇順", "key_type": 3, "field": "steps", "order": Qt.SortOrder.AscendingOrder, "caption": "Steps 昇順"},
+            8: {"name": "Steps 降順", "key_type": 3, "field": "steps", "order": Qt.SortOrder.DescendingOrder, "caption": "Steps 降順"},
         }
         self.current_sort_button_id = 0 # デフォルトは "ファイル名 ↑" (ID: 0)
         self.load_start_time = None # For load time measurement
@@ -102,17 +125,21 @@ class MainWindow(QMainWindow):
         self.initial_folder_sort_setting = SORT_BY_LAST_SELECTED # ★★★ 追加: デフォルトは前回選択 ★★★
         self.last_move_destination_folder = None # ★★★ 追加: 最後に使用した移動先フォルダ ★★★
         self.last_copy_destination_folder = None # ★★★ 追加: 最後に使用したコピー先フォルダ ★★★
+        self.copy_strategy = COPY_STRATEGY_AUTO # ★★★ 追加: コピーモードの複製方法 ★★★
 
         self.file_operation_manager = FileOperationManager(self) # New instance
         self.file_operations = FileOperations(parent=self, file_op_manager=self.file_operation_manager) # Pass manager
+        self.file_operations.journal_dir = FILE_OPERATION_JOURNAL_DIR # ★★★ 追加: 中断された操作を再開/取り消しできるようにする ★★★
 
         # Load application-wide settings first
-        self._load_app_settings()
+        with startup_profiler.measure("設定の読み込み"):
+            self._load_app_settings()
 
         self.double_click_action = DOUBLE_CLICK_ACTION_VIEWER # ★★★ 追加: ダブルクリック動作 ★★★
 
     # --- ★★★ UIセットアップをUIManagerに委譲 ★★★ ---
-        self.ui_manager.setup_ui()
+        with startup_profiler.measure("UI構築 (setup_ui)"):
+            self.ui_manager.setup_ui()
 
         # 設定からウィンドウジオメトリを復元 (UIセットアップ後、show()の前が望ましい)
         if self.app_settings.get(MAIN_WINDOW_GEOMETRY):
@@ -127,6 +154,33 @@ class MainWindow(QMainWindow):
         # self._load_settings() # Load UI specific settings after all UI elements are initialized <=self._load_app_settings()に統合
         self._apply_initial_sort_from_settings() # Apply initial sort based on loaded or default settings
         self._update_status_bar_info() # Initial status bar update
+        # ★★★ 追加: 表示に必要ない処理 (フォルダツリーのモデル、前回のセッションの復元、中断された操作の確認) は初回描画後に行う ★★★
+        self._deferred_startup_pending = True
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._deferred_startup_pending:
+            startup_profiler.mark("初回描画")
+            QTimer.singleShot(0, self._run_deferred_startup)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._deferred_startup_pending:
+            QTimer.singleShot(1000, self._run_deferred_startup) # 描画イベントが届かない場合 (最小化して起動など) の保険
+
+    def _run_deferred_startup(self):
+        if not self._deferred_startup_pending:
+            return
+        self._deferred_startup_pending = False
+        with startup_profiler.measure("遅延UI構築"):
+            self.ui_manager.setup_deferred_ui()
+        # ★★★ 追加: 前回終了時の表示をスナップショットから復元する (フォルダの再走査・再デコードは行わない) ★★★
+        if self.initial_folder_dialog_path and self.current_folder_path is None:
+            with startup_profiler.measure("前回のセッションの復元"):
+                self._restore_session_snapshot()
+        startup_profiler.report()
+        # ★★★ 追加: 前回中断されたファイル操作があれば、再開/取り消しを確認する ★★★
+        self.file_operation_manager.check_interrupted_operations()
 
 
     def _update_status_bar_info(self):
@@ -138,7 +192,10 @@ class MainWindow(QMainWindow):
         selected_items = 0
         if self.ui_manager.thumbnail_view and self.ui_manager.thumbnail_view.selectionModel(): # ★★★ UIManager経由 ★★★
             selected_items = len(self.ui_manager.thumbnail_view.selectionModel().selectedIndexes()) # ★★★ UIManager経由 ★★★
-        self.statusBar.showMessage(f"表示アイテム数: {total_items} / 選択アイテム数: {selected_items}")
+        message = f"表示アイテム数: {total_items} / 選択アイテム数: {selected_items}"
+        if self._last_filter_seconds is not None:
+            message += f" / フィルタ: {self._last_filter_seconds * 1000:.1f} ms"
+        self.statusBar.showMessage(message)
 
     def _apply_initial_sort_from_settings(self):
         """アプリケーション起動時に設定からソートを適用する"""
@@ -190,6 +247,8 @@ class MainWindow(QMainWindow):
         QApplication.processEvents() # ボタンの無効化状態を即時反映
 
         try:
+            if key_type == 3: # ★★★ 追加: generation_info の項目を指定 ★★★
+                self.ui_manager.filter_proxy_model.set_generation_sort_field(selected_criteria["field"])
             self.ui_manager.filter_proxy_model.set_sort_key_type(key_type) # ★★★ UIManager経由 ★★★
             # QSortFilterProxyModel.sort() を呼び出すと、lessThan が使用される
             # 列インデックスは0で固定 (lessThan内で実際のキータイプを見るため)
@@ -268,6 +327,18 @@ class MainWindow(QMainWindow):
         toggle_drop_window_action.triggered.connect(self.dialog_manager.toggle_drop_window) # DialogManager経由で呼び出し
         tool_menu.addAction(toggle_drop_window_action) # 「D&Dウィンドウ」をツールメニューの一番下に追加
 
+        # ★★★ 追加: 「メモリ統計」アクション (デバッグ用) ★★★
+        memory_stats_action = QAction("メモリ統計 (&M)", self)
+        memory_stats_action.setStatusTip("プロンプト文字列の共有によるメモリの節約量を表示します")
+        memory_stats_action.triggered.connect(self.dialog_manager.show_memory_stats_dialog)
+        tool_menu.addAction(memory_stats_action)
+
+        # ★★★ 追加: 「ライブラリの索引を更新」アクション ★★★
+        update_library_index_action = QAction("ライブラリの索引を更新 (&I)", self)
+        update_library_index_action.setStatusTip("選択中のフォルダ (サブフォルダを含む) の画像をライブラリ検索の索引に追加・更新します")
+        update_library_index_action.triggered.connect(self.update_library_index)
+        tool_menu.addAction(update_library_index_action)
+
     def _save_settings(self):
         """現在の設定をJSONファイルに保存する。"""
         self.app_settings["thumbnail_size"] = self.current_thumbnail_size
@@ -283,6 +354,7 @@ class MainWindow(QMainWindow):
         self.app_settings[LAST_MOVE_DESTINATION_FOLDER] = self.last_move_destination_folder
         self.app_settings[LAST_COPY_DESTINATION_FOLDER] = self.last_copy_destination_folder
         self.app_settings[DOUBLE_CLICK_ACTION] = self.double_click_action # ★★★ 追加 ★★★
+        self.app_settings[COPY_STRATEGY] = self.copy_strategy # ★★★ 追加 ★★★
 
         # ★★★ ウィンドウジオメトリの保存 ★★★
         self.app_settings[MAIN_WINDOW_GEOMETRY] = self.saveGeometry().toBase64().data().decode('utf-8')
@@ -321,6 +393,7 @@ class MainWindow(QMainWindow):
                 MAIN_WINDOW_GEOMETRY: self.saveGeometry().toBase64().data().decode('utf-8'),
                 LAST_MOVE_DESTINATION_FOLDER: self.last_move_destination_folder,
                 LAST_COPY_DESTINATION_FOLDER: self.last_copy_destination_folder,
+                COPY_STRATEGY: self.copy_strategy, # ★★★ 追加 ★★★
             }
             if self.metadata_dialog_last_geometry and isinstance(self.metadata_dialog_last_geometry, QByteArray):
                 settings_dict[METADATA_DIALOG_GEOMETRY] = self.metadata_dialog_last_geometry.toBase64().data().decode('utf-8')
@@ -397,6 +470,11 @@ class MainWindow(QMainWindow):
         self.double_click_action = self.app_settings.get(DOUBLE_CLICK_ACTION, DOUBLE_CLICK_ACTION_VIEWER)
         logger.info(f"ダブルクリック動作設定を読み込みました: {self.double_click_action}")
 
+        # ★★★ 追加: コピーモードの複製方法 ★★★
+        self.copy_strategy = self.app_settings.get(COPY_STRATEGY, COPY_STRATEGY_AUTO)
+        self.file_operations.copy_strategy = self.copy_strategy
+        logger.info(f"コピー方式設定を読み込みました: {self.copy_strategy}")
+
         # ★★★ ウィンドウジオメトリの読み込み (適用は __init__ の最後で行う) ★★★
         if main_geom_str := self.app_settings.get(MAIN_WINDOW_GEOMETRY):
             # self.restoreGeometry(QByteArray.fromBase64(main_geom_str.encode('utf-8'))) # ここでは適用しない
@@ -442,12 +520,66 @@ class MainWindow(QMainWindow):
             self._apply_initial_sort_from_settings()
 
             # ★★★ 設定に基づいて空フォルダ削除処理を実行 ★★★
+            # ★★★ 変更: 空フォルダの検出は画像の列挙と同じ走査でバックグラウンドで行い、結果は _on_folder_scan_finished で受け取る ★★★
             if self.delete_empty_folders_enabled and os.path.isdir(folder_path):
-                self._try_delete_empty_subfolders(folder_path) 
+                self._start_folder_scan(folder_path)
+                return
             self.update_folder_tree(folder_path)
 
-    def update_folder_tree(self, folder_path):
+    def _stop_folder_scan(self):
+        self._pending_scan_folder = None
+        if self.folder_scan_thread is None:
+            return
+        try:
+            self.folder_scan_thread.scanFinished.disconnect(self._on_folder_scan_finished)
+        except TypeError:
+            pass
+        self.folder_scan_thread.stop()
+        if not self.folder_scan_thread.wait(3000):
+            logger.warning("フォルダ走査スレッドの終了待機がタイムアウトしました。")
+        self.folder_scan_thread.deleteLater()
+        self.folder_scan_thread = None
+
+    def _start_folder_scan(self, folder_path):
+        """画像ファイルの列挙と空フォルダの検出を1回の走査でバックグラウンド実行する。"""
+        self._stop_folder_scan()
+        self._pending_scan_folder = folder_path
+        self.folder_scan_thread = FolderScanThread(folder_path, self.recursive_search_enabled, find_empty_folders=True, parent=self)
+        self.folder_scan_thread.scanFinished.connect(self._on_folder_scan_finished)
+        self.statusBar.showMessage(f"フォルダを走査中... {folder_path}")
+        logger.info(f"'{folder_path}' の走査 (空サブフォルダ検索を含む) をバックグラウンドで開始します。")
+        self.folder_scan_thread.start()
+
+    def _on_folder_scan_finished(self, folder_path, image_files, empty_folders):
+        if folder_path != self._pending_scan_folder:
+            # 走査中に別のフォルダが開かれた (走査は停止済み)。古い結果で表示を置き換えない
+            logger.info(f"'{folder_path}' の走査結果は、別のフォルダが開かれたため破棄します。")
+            return
+        self._pending_scan_folder = None
+        scan_thread = self.folder_scan_thread
+        self.folder_scan_thread = None
+        if scan_thread is not None:
+            scan_thread.wait()
+            scan_thread.deleteLater()
+        if empty_folders:
+            logger.info(f"'{folder_path}' 内に {len(empty_folders)} 個の空サブフォルダが見つかりました。削除処理を開始します。")
+            self._handle_send_empty_folders_to_trash(folder_path, empty_folders, refresh_folder_tree=False)
+        else:
+            logger.info(f"'{folder_path}' 内に空のサブフォルダは見つかりませんでした。")
+        if os.path.isdir(folder_path):
+            # 削除されるのは画像を含まないフォルダだけなので、走査済みの画像一覧をそのまま使う
+            self.update_folder_tree(folder_path, scanned_image_files=image_files)
+
+    def update_folder_tree(self, folder_path, scanned_image_files=None):
         self.current_folder_path = folder_path
+        self._show_folder_in_tree(folder_path)
+        if scanned_image_files is None:
+            self.load_thumbnails_from_folder(folder_path)
+        else:
+            self.load_thumbnails_from_folder(folder_path, scanned_image_files=scanned_image_files)
+
+    def _show_folder_in_tree(self, folder_path):
+        self.ui_manager.setup_deferred_ui() # 初回描画前に呼ばれた場合
         parent_dir = QDir(folder_path)
         root_display_path = folder_path
         if parent_dir.cdUp():
@@ -463,7 +595,6 @@ class MainWindow(QMainWindow):
             self.ui_manager.folder_tree_view.setCurrentIndex(selected_folder_index) # ★★★ UIManager経由 ★★★
             self.ui_manager.folder_tree_view.scrollTo(selected_folder_index, QTreeView.ScrollHint.PositionAtCenter) # ★★★ UIManager経由 ★★★
         logger.info(f"フォルダツリーを更新しました。表示ルート: {root_display_path}, 選択中: {folder_path}")
-        self.load_thumbnails_from_folder(folder_path)
 
     def on_folder_tree_clicked(self, index):
         path = self.ui_manager.file_system_model.filePath(index) # ★★★ UIManager経由 ★★★
@@ -475,16 +606,21 @@ class MainWindow(QMainWindow):
         else:
             logger.debug(f"ファイルがクリックされました: {path}")
 
-    def load_thumbnails_from_folder(self, folder_path):
-        if ImageQt is None:
+    def load_thumbnails_from_folder(self, folder_path, scanned_image_files=None):
+        # scanned_image_files: FolderScanThread で列挙済みの画像パス (指定時はフォルダを再走査しない)
+        if not _image_qt_available():
             self.statusBar.showMessage("ImageQtモジュールが見つかりません。処理を中止します。", 5000)
             logger.error("ImageQt module not found. Cannot load thumbnails.")
             return
         logger.info(f"{folder_path} からサムネイルを読み込みます。")
+        self._stop_folder_scan() # ★★★ 追加: 走査中の別のフォルダの結果が後から表示を置き換えないようにする ★★★
+        self._showing_library_search = False # ライブラリ検索の結果はフォルダの読み込みで置き換わる (search_library が読み込み後に設定し直す)
         self.load_start_time = time.time()
         items_for_thread = [] # <--- ★items_for_thread を try の前に初期化
         image_files = []
+        files_for_thread = [] # ★★★ 追加: 引き継いだサムネイルがないファイルだけをスレッドで読み込む ★★★
         try:
+            self._stop_session_validation() # 復元したセッションの照合結果は新しい読み込みで不要になる
             # 既存のサムネイルローダースレッドを安全に停止する
             # (この処理は既存のまま)
             if self.thumbnail_loader_thread and self.thumbnail_loader_thread.isRunning():
@@ -523,13 +659,16 @@ class MainWindow(QMainWindow):
                 self.deselect_all_thumbnails() # ビューの選択もクリア
             # ★★★ コピーモードクリア処理ここまで ★★★
 
-            search_flags = QDirIterator.IteratorFlag.Subdirectories if self.recursive_search_enabled else QDirIterator.IteratorFlag.NoIteratorFlags
-            iterator = QDirIterator(folder_path,
-                                    ["*.png", "*.jpg", "*.jpeg", "*.webp"],
-                                    QDir.Filter.Files | QDir.Filter.NoSymLinks,
-                                    search_flags)
-            while iterator.hasNext():
-                image_files.append(iterator.next())
+            if scanned_image_files is not None:
+                image_files = list(scanned_image_files)
+            else:
+                search_flags = QDirIterator.IteratorFlag.Subdirectories if self.recursive_search_enabled else QDirIterator.IteratorFlag.NoIteratorFlags
+                iterator = QDirIterator(folder_path,
+                                        ["*.png", "*.jpg", "*.jpeg", "*.webp"],
+                                        QDir.Filter.Files | QDir.Filter.NoSymLinks,
+                                        search_flags)
+                while iterator.hasNext():
+                    image_files.append(iterator.next())
             logger.info(f"見つかった画像ファイル (再帰検索{'含む' if self.recursive_search_enabled else '含まない'}): {len(image_files)}個")
             
             # ★★★ UI状態変更をUIManagerに委譲 ★★★
@@ -547,35 +686,52 @@ class MainWindow(QMainWindow):
             self.selected_file_paths.clear()
             self.metadata_cache.clear() # メタデータキャッシュもクリア
             self.ui_manager.update_thumbnail_view_sizes() # ★★★ UIManager経由 ★★★
-            placeholder_pixmap = QPixmap(self.current_thumbnail_size, self.current_thumbnail_size)
-            placeholder_pixmap.fill(Qt.GlobalColor.transparent)
-            placeholder_icon = QIcon(placeholder_pixmap)
+            placeholder_icon = self._create_placeholder_icon()
             for f_path in image_files:
-                item = QStandardItem()
-                item.setIcon(placeholder_icon)
-                item.setText(QDir().toNativeSeparators(f_path).split(QDir.separator())[-1])
-                item.setEditable(False)
-                item.setData(f_path, Qt.ItemDataRole.UserRole)
+                item = self._create_thumbnail_item(f_path, placeholder_icon)
                 self.ui_manager.source_thumbnail_model.appendRow(item) # ★★★ UIManager経由 ★★★
+                # ★★★ 追加: 移動/コピーで引き継いだサムネイルがあれば再デコードしない ★★★
+                carried = self.carried_thumbnail_cache.take(f_path, self.current_thumbnail_size)
+                if carried is not None:
+                    self.update_thumbnail_item(item, *carried)
+                    continue
                 items_for_thread.append(item)
+                files_for_thread.append(f_path)
+            if len(files_for_thread) < len(image_files):
+                logger.info(f"引き継いだサムネイルを使用: {len(image_files) - len(files_for_thread)}個")
         except Exception as e:
             logger.error(f"サムネイル読み込み準備中にエラー: {e}", exc_info=True)
         
         # 新しいスレッドを作成して開始
-        self.thumbnail_loader_thread = ThumbnailLoaderThread(image_files, items_for_thread, self.current_thumbnail_size)
+        from .thumbnail_loader import ThumbnailLoaderThread
+        self.thumbnail_loader_thread = ThumbnailLoaderThread(files_for_thread, items_for_thread, self.current_thumbnail_size)
         self.thumbnail_loader_thread.thumbnailLoaded.connect(self.update_thumbnail_item)
         self.thumbnail_loader_thread.progressUpdated.connect(self.update_progress_bar)
         self.thumbnail_loader_thread.finished.connect(self.on_thumbnail_loading_finished)
-        if image_files:
-            self.statusBar.showMessage(f"サムネイル読み込み中... 0/{len(image_files)}")
+        if files_for_thread:
+            self.statusBar.showMessage(f"サムネイル読み込み中... 0/{len(files_for_thread)}")
             self.thumbnail_loader_thread.start()
         else:
-            self.statusBar.showMessage("フォルダに画像がありません", 5000)
+            if not image_files:
+                self.statusBar.showMessage("フォルダに画像がありません", 5000)
             # ★★★ UI状態変更をUIManagerに委譲 ★★★
             self.ui_manager.set_thumbnail_loading_ui_state(False)
             self.is_loading_thumbnails = False
             self.on_thumbnail_loading_finished() # UI状態をリセットするために呼ぶ
 
+    def _create_placeholder_icon(self):
+        placeholder_pixmap = QPixmap(self.current_thumbnail_size, self.current_thumbnail_size)
+        placeholder_pixmap.fill(Qt.GlobalColor.transparent)
+        return QIcon(placeholder_pixmap)
+
+    def _create_thumbnail_item(self, f_path, placeholder_icon):
+        item = QStandardItem()
+        item.setIcon(placeholder_icon)
+        item.setText(QDir().toNativeSeparators(f_path).split(QDir.separator())[-1])
+        item.setEditable(False)
+        item.setData(f_path, Qt.ItemDataRole.UserRole)
+        return item
+
     def handle_recursive_search_toggled(self, checked):
         self.recursive_search_enabled = checked
         self.ui_manager.update_recursive_button_text(checked) # ★★★ UIManager経由 ★★★
@@ -603,11 +759,12 @@ class MainWindow(QMainWindow):
             logger.info("選択されたサイズは現在のサイズと同じため、再読み込みは行いません。")
             return False
 
-    def update_progress_bar(self, processed_count, total_files):
-        self.statusBar.showMessage(f"サムネイル読み込み中... {processed_count}/{total_files}")
+    def update_progress_bar(self, processed_count, total_files, items_per_second=0.0, eta_seconds=ETA_UNKNOWN):
+        # 通知はローダー側で間引かれている (ProgressReporter)
+        self.statusBar.showMessage(f"サムネイル読み込み中... {processed_count}/{total_files}{format_rate_and_eta(items_per_second, eta_seconds)}")
 
     def update_thumbnail_item(self, item, q_image, metadata):
-        if ImageQt is None: return
+        if not _image_qt_available(): return
         try:
             # アイテムの有効性を確認
             if item is None or item.model() is None: # model() が None ならアイテムはモデルから削除されている可能性が高い
@@ -632,6 +789,15 @@ class MainWindow(QMainWindow):
             else:
                 logger.warning(f"update_thumbnail_item for {file_path}: pixmap is None. Icon not set.")
 
+            if self.ui_manager.prompt_intern_table is not None: # ★★★ 追加: 同じプロンプトは1つの文字列を共有する ★★★
+                metadata = self.ui_manager.prompt_intern_table.intern_metadata(metadata)
+            if self.ui_manager.generation_columns is not None: # ★★★ 追加: generation_info の項目を列ストアへ ★★★
+                self.ui_manager.generation_columns.assign(item, metadata)
+            if self.ui_manager.metadata_store is not None and isinstance(metadata, MetadataRecord):
+                # ★★★ 追加: 型付きの項目を取り出した後の generation_info の全文は圧縮ストアへ ★★★
+                metadata.compress_into(self.ui_manager.metadata_store)
+            for vocabulary in self.ui_manager.tag_vocabularies(): # ★★★ 追加: フィルタ欄の補完に使うタグを数える ★★★
+                vocabulary.update_metadata(metadata, previous=item.data(METADATA_ROLE))
             self.metadata_cache[file_path] = metadata
             # logger.debug(f"update_thumbnail_item: Setting METADATA_ROLE for '{file_path}' with: {metadata}")
             item.setData(metadata, METADATA_ROLE) # ここでも item が無効ならエラーの可能性
@@ -651,6 +817,8 @@ class MainWindow(QMainWindow):
 
         self.is_loading_thumbnails = False 
         self.ui_manager.set_thumbnail_loading_ui_state(False)
+        for vocabulary in self.ui_manager.tag_vocabularies(): # ★★★ 追加: 補完の候補を最初の入力までに並べておく ★★★
+            vocabulary.prepare()
 
         if self.ui_manager.filter_proxy_model: # ★★★ UIManager経由でアクセス ★★★
             # フィルタを先に適用
@@ -775,6 +943,7 @@ class MainWindow(QMainWindow):
             logger.info("apply_filters: サムネイル読み込み中のため、フィルタ適用はスキップされました。")
             return
 
+        filter_start_time = time.perf_counter() # ★★★ 追加: フィルタの適用時間を計測してステータスバーに表示する ★★★
         if preserve_selection:
             logger.info("apply_filters: 選択状態を維持してフィルタを適用します。")
             # UIManager の新しいメソッドを呼び出す
@@ -796,21 +965,113 @@ class MainWindow(QMainWindow):
                 self.ui_manager.filter_proxy_model.invalidateFilter()
             else:
                 logger.warning("Filter proxy model not yet initialized for apply_filters call.")
-            self._update_status_bar_info()
+        self._last_filter_seconds = time.perf_counter() - filter_start_time
+        logger.debug(f"apply_filters: フィルタの適用に {self._last_filter_seconds * 1000:.1f} ms かかりました。")
+        self._update_status_bar_info()
+
+    # --- ★★★ 追加: ライブラリ全体の索引と検索 ★★★ ---
+    def _get_library_index(self):
+        if self.library_index is None:
+            self.library_index = LibraryIndex(LIBRARY_INDEX_FILE)
+        return self.library_index
+
+    def search_library(self):
+        """フィルタ欄の条件でライブラリ全体の索引を検索し、一致した画像だけを読み込む。
+        索引は候補を絞り込むだけで、条件式や正規表現は読み込み後のフィルタ (apply_filters) で厳密に判定される。
+        """
+        filters = {
+            'positive': self.ui_manager.positive_prompt_filter_edit.text(),
+            'negative': self.ui_manager.negative_prompt_filter_edit.text(),
+            'info': self.ui_manager.generation_info_filter_edit.text(),
+        }
+        search_mode = "AND" if self.ui_manager.and_radio_button.isChecked() else "OR"
+        search_start_time = time.perf_counter()
+        try:
+            index = self._get_library_index()
+            if len(index) == 0:
+                QMessageBox.information(self, "ライブラリ検索",
+                                        "索引がありません。「ツール」→「ライブラリの索引を更新」で索引を作成してください。")
+                return
+            hit_paths = index.search(filters, search_mode, self.ui_manager.generation_columns)
+        except sqlite3.Error as e:
+            logger.error(f"ライブラリの検索に失敗しました: {e}", exc_info=True)
+            self.statusBar.showMessage(f"ライブラリの検索に失敗しました: {e}", 5000)
+            return
+        if hit_paths is None:
+            self.statusBar.showMessage("ライブラリ検索: 索引で絞り込める検索語を入力してください。", 5000)
+            return
+        hit_paths = [path for path in hit_paths if os.path.isfile(path)] # 索引の更新後に削除されたファイルは除く
+        logger.info(f"ライブラリ検索: {len(hit_paths)}件 ({(time.perf_counter() - search_start_time) * 1000:.1f} ms)")
+        # 一致した画像だけをサムネイル化する (フォルダは走査しない)
+        # ★★★ 変更: 結果はどのフォルダのものでもないので、フォルダのパスは渡さない (スナップショットにも保存しない) ★★★
+        self.load_thumbnails_from_folder("", scanned_image_files=hit_paths)
+        self._showing_library_search = True
+        if not hit_paths:
+            self.statusBar.showMessage("ライブラリ検索: 一致する画像はありません。", 5000)
+
+    def update_library_index(self):
+        """選択中のフォルダ (サブフォルダを含む) をバックグラウンドで索引に反映する。"""
+        if not self.current_folder_path:
+            QMessageBox.information(self, "ライブラリの索引", "索引に追加するフォルダを選択してください。")
+            return
+        if self.library_index_thread is not None:
+            self.statusBar.showMessage("ライブラリの索引は更新中です。", 3000)
+            return
+        self.library_index_thread = LibraryIndexThread(LIBRARY_INDEX_FILE, self.current_folder_path, recursive=True)
+        self.library_index_thread.progressUpdated.connect(self._on_library_index_progress)
+        self.library_index_thread.indexFinished.connect(self._on_library_index_finished)
+        self.statusBar.showMessage(f"ライブラリの索引を更新中: {self.current_folder_path}")
+        self.library_index_thread.start()
+
+    def _on_library_index_progress(self, processed, total):
+        self.statusBar.showMessage(f"ライブラリの索引を更新中... {processed}/{total}")
+
+    def _on_library_index_finished(self, result):
+        if self.library_index_thread is not None:
+            self.library_index_thread.wait()
+            self.library_index_thread.deleteLater()
+            self.library_index_thread = None
+        if 'error' in result:
+            self.statusBar.showMessage(f"ライブラリの索引の更新に失敗しました: {result['error']}", 5000)
+            return
+        message = (f"ライブラリの索引を更新しました (更新 {result['indexed']}件, 変更なし {result['unchanged']}件, "
+                   f"削除 {result['removed']}件)")
+        if result['cancelled']:
+            message += " ※中断されました"
+        self.statusBar.showMessage(message, 5000)
+
+    def _stop_library_index_update(self):
+        if self.library_index_thread is None:
+            return
+        try:
+            self.library_index_thread.indexFinished.disconnect(self._on_library_index_finished)
+        except TypeError:
+            pass
+        self.library_index_thread.stop()
+        if not self.library_index_thread.wait(5000):
+            logger.warning("ライブラリの索引の更新スレッドの終了待機がタイムアウトしました。")
+        self.library_index_thread = None
 
     # --- ★★★ START: DropWindow連携メソッド ★★★ ---
     # --- ★★★ END: DropWindow連携メソッド ★★★ ---
 
     # --- File Operation Completion Logic (called by FileOperationManager) ---
-    def _process_file_op_completion(self, result):
+    def _process_file_op_completion(self, result, clear_selection=True):
+        # clear_selection=False: キューから実行されたジョブの完了時。選択はキュー追加時に解除済みで、
+        # 現在の選択は次の操作のためのものなので維持する
         # logger.info(f"_process_file_op_completion: START - Result: {result}") # 削除
         status = result.get('status', 'unknown')
         operation_type = result.get('operation_type', 'unknown')
         destination_folder_op = result.get('destination_folder') # 操作後の実際の宛先フォルダ
+        # ★★★ 追加: 移動/コピー済みのファイルのサムネイルとメタデータを新しいパスに引き継ぐ (キャンセル時も) ★★★
+        self._carry_over_thumbnail_cache(result.get('moved_files') or result.get('copied_files') or [],
+                                         remove_source=(operation_type == "move"))
         if status == 'cancelled':
             self.statusBar.showMessage("ファイル操作がキャンセルされました。", 5000)
-            # logger.info(f"_process_file_op_completion: END - Cancelled. Total time: ... seconds.") # 削除
-            return
+            # ★★★ 変更: キャンセル前に移動済みのファイルは一覧から取り除く (以前は再読み込みまで残っていた) ★★★
+            if operation_type != "move" or not result.get('successfully_moved_src_paths'):
+                # logger.info(f"_process_file_op_completion: END - Cancelled. Total time: ... seconds.") # 削除
+                return
         errors = result.get('errors', [])
         successfully_moved_src_paths = result.get('successfully_moved_src_paths', []) # For move
         if operation_type == "move":
@@ -889,7 +1150,8 @@ class MainWindow(QMainWindow):
                  # logger.info(f"_process_file_op_completion: Calling handle_thumbnail_selection_changed manually...") # 削除
                  # モデル変更後に選択状態が自動的に更新されるが、ハンドラは呼ばれない可能性があるため手動で呼ぶ
                  self.handle_thumbnail_selection_changed(QItemSelection(), QItemSelection()) # 空の選択変更としてハンドラをトリガー
-                 self.selected_file_paths.clear()
+                 if clear_selection:
+                     self.selected_file_paths.clear()
                  # logger.info(f"_process_file_op_completion: handle_thumbnail_selection_changed finished in ... seconds.") # 削除
                  # ★★★ ファイル移動後、フィルタを再適用してビューを更新 ★★★
                  # logger.info(f"_process_file_op_completion: Processing UI events before enabling updates...") # 削除
@@ -903,11 +1165,14 @@ class MainWindow(QMainWindow):
                  # logger.info(f"_process_file_op_completion: apply_filters finished in ... seconds.") # 削除 # apply_filters の中で更新されるため、ここでは不要
                  # self._update_status_bar_info() # apply_filters の中で更新されるため、ここでは不要
             if renamed_files:
+                from .renamed_files_dialog import RenamedFilesDialog
                 dialog = RenamedFilesDialog(renamed_files, self)
                 dialog.exec()
             if errors:
                 QMessageBox.warning(self, "移動エラー", "以下のエラーが発生しました:\n" + "\n".join(errors))
-            if moved_count > 0:
+            if status == 'cancelled':
+                 self.statusBar.showMessage(f"ファイル操作がキャンセルされました ({moved_count}個は移動済み)。", 5000)
+            elif moved_count > 0:
                  self.statusBar.showMessage(f"{moved_count}個のファイルを移動しました。", 5000)
             elif not errors:
                  self.statusBar.showMessage("移動するファイルがありませんでした、または処理が完了しました。", 3000)
@@ -928,7 +1193,7 @@ class MainWindow(QMainWindow):
             # ★★★ コピー成功時に最終コピー先フォルダを更新 ★★★
             if copied_count > 0 and destination_folder_op and os.path.isdir(destination_folder_op):
                 self.last_copy_destination_folder = destination_folder_op
-        if status == 'completed' and not errors:
+        if status == 'completed' and not errors and clear_selection:
             # logger.info(f"_process_file_op_completion: Operation '{operation_type}' completed without errors. Deselecting thumbnails.") # 削除
             self.deselect_all_thumbnails()
             if operation_type == "copy":
@@ -943,6 +1208,35 @@ class MainWindow(QMainWindow):
             # ★★★ ファイル移動完了後の自動的な空フォルダ削除処理を削除 ★★★
         # logger.info(f"_process_file_op_completion: END - Total time: ... seconds.") # 削除
 
+    def _carry_over_thumbnail_cache(self, file_pairs, remove_source):
+        """移動/コピーしたファイルのサムネイルとメタデータを移動先のパスで保持する。
+        同じセッションで移動先フォルダを開いたとき、CarriedThumbnailCache から再デコードなしで表示される。
+        """
+        if not file_pairs:
+            return
+        destinations_by_source = dict(file_pairs)
+        carried_count = 0
+        source_model = self.ui_manager.source_thumbnail_model
+        path_index = self.ui_manager.source_path_index
+        # ★★★ 変更: モデル全体を走査せず、移動/コピーしたファイルの行だけをパスの索引で引く ★★★
+        for src_path, dest_path in destinations_by_source.items():
+            source_index = path_index.source_index(src_path)
+            if source_index is None:
+                continue
+            metadata = self.metadata_cache.pop(src_path, None) if remove_source else self.metadata_cache.get(src_path)
+            if metadata is None: # まだサムネイルが読み込まれていない
+                continue
+            item = source_model.itemFromIndex(source_index)
+            carried_metadata = full_metadata(metadata) # ★★★ 変更: 圧縮ストアはフォルダの読み直しで破棄されるので全文を複製する ★★★
+            carried_metadata['filename_for_sort'] = os.path.basename(dest_path).lower() # 移動先で名前が変わる場合がある
+            q_image = item.icon().pixmap(QSize(self.current_thumbnail_size, self.current_thumbnail_size)).toImage()
+            self.carried_thumbnail_cache.put(dest_path, self.current_thumbnail_size, q_image, carried_metadata)
+            carried_count += 1
+        if remove_source:
+            for src_path in destinations_by_source:
+                self.carried_thumbnail_cache.discard(src_path)
+        logger.debug(f"{carried_count}個のサムネイルとメタデータを移動/コピー先のパスに引き継ぎました。")
+
     def _try_delete_empty_subfolders(self, target_folder_path):
         if not target_folder_path or not os.path.isdir(target_folder_path):
             logger.debug(f"指定されたフォルダパス '{target_folder_path}' が無効なため、空フォルダ削除をスキップします。")
@@ -959,7 +1253,8 @@ class MainWindow(QMainWindow):
         logger.info(f"'{target_folder_path}' 内に {len(empty_folders)} 個の空サブフォルダが見つかりました。削除処理を開始します。")
         self._handle_send_empty_folders_to_trash(target_folder_path, empty_folders)
 
-    def _handle_send_empty_folders_to_trash(self, parent_folder_path_for_context, empty_folders_to_delete):
+    def _handle_send_empty_folders_to_trash(self, parent_folder_path_for_context, empty_folders_to_delete, refresh_folder_tree=True):
+        # refresh_folder_tree=False: 呼び出し側 (_on_folder_scan_finished) が走査結果でツリーとサムネイルを更新する
         logger.debug(f"_handle_send_empty_folders_to_trash called for parent '{parent_folder_path_for_context}' with {len(empty_folders_to_delete)} folders.")
         if not empty_folders_to_delete:
             logger.info("削除対象の空フォルダがありません。")
@@ -975,17 +1270,25 @@ class MainWindow(QMainWindow):
             failed_sends = []
             logger.info(f"ユーザーが '{parent_folder_path_for_context}' 内の空フォルダ削除を承認しました。")
             try:
-                for folder_path_str in empty_folders_to_delete:
-                    normalized_path = ""
-                    try:
-                        normalized_path = os.path.normpath(folder_path_str)
-                        logger.info(f"ゴミ箱へ移動 (正規化試行): {normalized_path} (元: {folder_path_str})")
-                        send2trash.send2trash(normalized_path)
-                        successful_sends.append(normalized_path)
-                    except Exception as e:
-                        path_for_error_msg = normalized_path if normalized_path else folder_path_str
-                        logger.error(f"フォルダ '{path_for_error_msg}' のゴミ箱への移動に失敗: {e}", exc_info=True)
-                        failed_sends.append(f"{path_for_error_msg}: {e}")
+                import send2trash
+                normalized_paths = [os.path.normpath(folder_path_str) for folder_path_str in empty_folders_to_delete]
+                # ★★★ 変更: まとめて1回でゴミ箱へ移動する。失敗した場合だけ1つずつ移動してエラーのフォルダを特定する ★★★
+                try:
+                    logger.info(f"ゴミ箱へ移動 ({len(normalized_paths)}個): {normalized_paths}")
+                    send2trash.send2trash(normalized_paths)
+                    successful_sends.extend(normalized_paths)
+                except Exception as e:
+                    logger.warning(f"空フォルダのまとめてのゴミ箱移動に失敗したため、1つずつ移動します: {e}")
+                    for normalized_path in normalized_paths:
+                        if not os.path.exists(normalized_path): # まとめての移動で既に移動済み
+                            successful_sends.append(normalized_path)
+                            continue
+                        try:
+                            send2trash.send2trash(normalized_path)
+                            successful_sends.append(normalized_path)
+                        except Exception as e:
+                            logger.error(f"フォルダ '{normalized_path}' のゴミ箱への移動に失敗: {e}", exc_info=True)
+                            failed_sends.append(f"{normalized_path}: {e}")
                 summary_title = f"空フォルダ削除完了 ({os.path.basename(parent_folder_path_for_context)})"
                 summary_text = f"{len(successful_sends)}個のフォルダをゴミ箱に移動しました。"
                 if failed_sends:
@@ -1001,7 +1304,7 @@ class MainWindow(QMainWindow):
                 logger.error(f"空フォルダのゴミ箱への移動中に予期せぬエラー: {e}", exc_info=True)
                 QMessageBox.critical(self, "エラー", f"処理中に予期せぬエラーが発生しました:\n{e}")
             finally:
-                if successful_sends or failed_sends:
+                if (successful_sends or failed_sends) and refresh_folder_tree:
                     if os.path.exists(parent_folder_path_for_context):
                         logger.info(f"空フォルダ削除処理試行後、フォルダツリー '{parent_folder_path_for_context}' を更新します。")
                         self.update_folder_tree(parent_folder_path_for_context)
@@ -1015,29 +1318,190 @@ class MainWindow(QMainWindow):
              logger.info(f"'{parent_folder_path_for_context}' 内の空のサブフォルダのゴミ箱への移動はキャンセルされました。")
 
     def _find_empty_subfolders(self, parent_dir):
-        empty_folders = []
-        for entry in os.scandir(parent_dir):
-            if entry.is_dir():
-                if self._is_dir_empty_recursive(entry.path):
-                    empty_folders.append(entry.path)
-        return empty_folders
-
-    def _is_dir_empty_recursive(self, dir_path):
+        # ★★★ 変更: 各サブフォルダを再帰的に list(os.scandir()) せず、1回の走査の帰りがけで判定する (folder_scanner) ★★★
+        return find_empty_subfolders(parent_dir)
+
+    # --- ★★★ 追加: セッションスナップショット (前回終了時の表示の保存と即時復元) ★★★ ---
+    def _save_session_snapshot(self):
+        """表示中のフォルダの状態 (読み込み順のパス、ソート、フィルタ、選択、スクロール位置、サムネイル) を保存する。"""
+        if not self.current_folder_path or self._showing_library_search: # ★★★ 変更: 検索結果をフォルダの表示として保存しない ★★★
+            return
         try:
-            entries = list(os.scandir(dir_path))
-        except OSError as e:
-            logger.warning(f"Could not scan directory '{dir_path}' due to OSError: {e}. Treating as non-empty for empty folder check.")
+            source_model = self.ui_manager.source_thumbnail_model
+            # ★★★ 変更: サムネイルとメタデータは表示位置の前後の行だけ保存する (残りはパスだけ保存し、復元後に読み込む) ★★★
+            thumbnail_paths = self._session_snapshot_thumbnail_paths()
+            entries = []
+            for row in range(source_model.rowCount()):
+                item = source_model.item(row)
+                if item is None:
+                    continue
+                file_path = item.data(Qt.ItemDataRole.UserRole)
+                if not file_path or file_path in self._hidden_moved_file_paths:
+                    continue
+                metadata = item.data(METADATA_ROLE)
+                if metadata is None or file_path not in thumbnail_paths: # 読み込み前のアイテムはプレースホルダー
+                    entries.append(SnapshotEntry(file_path))
+                    continue
+                thumbnail = None
+                available_sizes = item.icon().availableSizes()
+                if available_sizes:
+                    thumbnail = item.icon().pixmap(available_sizes[0]).toImage()
+                entries.append(SnapshotEntry(file_path, full_metadata(metadata) if isinstance(metadata, dict) else metadata, thumbnail))
+            filters = {
+                'positive': self.ui_manager.positive_prompt_filter_edit.text(),
+                'negative': self.ui_manager.negative_prompt_filter_edit.text(),
+                'generation_info': self.ui_manager.generation_info_filter_edit.text(),
+                'search_mode': "AND" if self.ui_manager.and_radio_button.isChecked() else "OR",
+            }
+            snapshot = SessionSnapshot(self.current_folder_path, self.recursive_search_enabled, self.current_thumbnail_size,
+                                       self.current_sort_button_id, filters, list(self.selected_file_paths),
+                                       self.ui_manager.thumbnail_view.verticalScrollBar().value(), entries)
+            write_snapshot(SESSION_SNAPSHOT_FILE, snapshot)
+        except Exception as e:
+            logger.error(f"セッションスナップショットの保存中にエラー: {e}", exc_info=True)
+
+    def _session_snapshot_thumbnail_paths(self):
+        """スナップショットにサムネイルを保存する行のパス (表示中の先頭行から最大 SESSION_SNAPSHOT_MAX_THUMBNAILS 件)。"""
+        proxy_model = self.ui_manager.filter_proxy_model
+        row_count = proxy_model.rowCount()
+        first_visible_row = self.ui_manager.thumbnail_view.indexAt(self.ui_manager.thumbnail_view.viewport().rect().topLeft()).row()
+        # 末尾付近までスクロールしていた場合は、前の行も含めて件数を満たす
+        start = max(0, min(first_visible_row, row_count - SESSION_SNAPSHOT_MAX_THUMBNAILS))
+        return {proxy_model.index(row, 0).data(Qt.ItemDataRole.UserRole)
+                for row in range(start, min(row_count, start + SESSION_SNAPSHOT_MAX_THUMBNAILS))}
+
+    def _restore_session_snapshot(self):
+        """前回終了時のスナップショットから表示を復元し、実ファイルとの照合をバックグラウンドで開始する。
+        前回のフォルダ・サムネイルサイズ・サブフォルダ検索設定と一致しない場合は何もしない。
+        """
+        snapshot = read_snapshot(SESSION_SNAPSHOT_FILE)
+        if snapshot is None:
+            return False
+        if (snapshot.folder_path != self.initial_folder_dialog_path
+                or snapshot.thumbnail_size != self.current_thumbnail_size
+                or snapshot.recursive != self.recursive_search_enabled):
+            logger.info("セッションスナップショットが現在の設定と一致しないため復元しません。")
             return False
-        if not entries:
-            return True
-        for entry in entries:
-            if entry.is_file():
-                return False
-            elif entry.is_dir():
-                if not self._is_dir_empty_recursive(entry.path):
-                    return False
+        logger.info(f"前回のセッションを復元します: {snapshot.folder_path} ({len(snapshot.entries)}件)")
+        self.load_start_time = time.time()
+        self.current_folder_path = snapshot.folder_path
+        self._show_folder_in_tree(snapshot.folder_path)
+        if snapshot.sort_button_id in self.sort_criteria_map: # モデルが空のうちにボタンを戻す (ソートは下でまとめて行う)
+            self.current_sort_button_id = snapshot.sort_button_id
+            self._apply_initial_sort_from_settings()
+
+        source_model = self.ui_manager.source_thumbnail_model
+        source_model.clear()
+        self._hidden_moved_file_paths.clear()
+        self.ui_manager.filter_proxy_model.set_hidden_paths(self._hidden_moved_file_paths)
+        self.selected_file_paths.clear()
+        self.metadata_cache.clear()
+        self.ui_manager.update_thumbnail_view_sizes()
+        placeholder_icon = self._create_placeholder_icon()
+        entry_timestamps = {} # path -> 保存時の update_timestamp (未読み込みだったものは None)
+        for entry in snapshot.entries:
+            item = self._create_thumbnail_item(entry.path, placeholder_icon)
+            source_model.appendRow(item)
+            if entry.metadata is not None:
+                self.update_thumbnail_item(item, entry.thumbnail, entry.metadata)
+                entry_timestamps[entry.path] = entry.metadata.get('update_timestamp')
+            else:
+                entry_timestamps[entry.path] = None
+
+        # フィルタを戻してから、読み込み完了時と同じ処理でフィルタとソートをビューに反映する
+        filters = snapshot.filters
+        self.ui_manager.positive_prompt_filter_edit.setText(filters.get('positive', ''))
+        self.ui_manager.negative_prompt_filter_edit.setText(filters.get('negative', ''))
+        self.ui_manager.generation_info_filter_edit.setText(filters.get('generation_info', ''))
+        if filters.get('search_mode') == "OR":
+            self.ui_manager.or_radio_button.setChecked(True)
+        else:
+            self.ui_manager.and_radio_button.setChecked(True)
+        self.on_thumbnail_loading_finished()
+
+        selected_paths = set(snapshot.selected_paths)
+        if selected_paths:
+            selection = QItemSelection()
+            for path in selected_paths:
+                source_index = self.ui_manager.source_path_index.source_index(path)
+                if source_index is None:
+                    continue
+                proxy_index = self.ui_manager.filter_proxy_model.mapFromSource(source_index)
+                if proxy_index.isValid():
+                    selection.select(proxy_index, proxy_index)
+            self.ui_manager.thumbnail_view.selectionModel().select(selection, QItemSelectionModel.SelectionFlag.Select)
+        # スクロール位置はレイアウト確定後でないと反映されない
+        scroll_value = snapshot.scroll_value
+        QTimer.singleShot(0, lambda: self.ui_manager.thumbnail_view.verticalScrollBar().setValue(scroll_value))
+        self.statusBar.showMessage(f"前回のセッションを復元しました ({len(snapshot.entries)}件)。ファイルを確認中...")
+
+        self.session_validation_thread = SessionValidationThread(snapshot.folder_path, snapshot.recursive, entry_timestamps, parent=self)
+        self.session_validation_thread.validationFinished.connect(self._on_session_validation_finished)
+        self.session_validation_thread.start()
         return True
 
+    def _stop_session_validation(self):
+        if self.session_validation_thread is None:
+            return
+        try:
+            self.session_validation_thread.validationFinished.disconnect(self._on_session_validation_finished)
+        except TypeError:
+            pass
+        self.session_validation_thread.stop()
+        if not self.session_validation_thread.wait(3000):
+            logger.warning("セッション照合スレッドの終了待機がタイムアウトしました。")
+        self.session_validation_thread.deleteLater()
+        self.session_validation_thread = None
+
+    def _on_session_validation_finished(self, folder_path, missing_paths, changed_paths, added_paths):
+        """照合結果を反映する。消えたファイルは取り除き、更新・追加されたファイルだけを読み込む。"""
+        validation_thread = self.session_validation_thread
+        self.session_validation_thread = None
+        if validation_thread is not None:
+            validation_thread.wait()
+            validation_thread.deleteLater()
+        if folder_path != self.current_folder_path or self.is_loading_thumbnails:
+            return
+        source_model = self.ui_manager.source_thumbnail_model
+        path_index = self.ui_manager.source_path_index
+        rows_to_remove = sorted((source_index.row() for path in missing_paths
+                                 if (source_index := path_index.source_index(path)) is not None), reverse=True)
+        for row in rows_to_remove:
+            source_model.removeRow(row)
+        for path in missing_paths:
+            self.metadata_cache.pop(path, None)
+
+        files_for_thread = []
+        items_for_thread = []
+        for path in changed_paths:
+            source_index = path_index.source_index(path)
+            if source_index is not None:
+                files_for_thread.append(path)
+                items_for_thread.append(source_model.itemFromIndex(source_index))
+        placeholder_icon = self._create_placeholder_icon()
+        for path in added_paths:
+            item = self._create_thumbnail_item(path, placeholder_icon)
+            source_model.appendRow(item)
+            files_for_thread.append(path)
+            items_for_thread.append(item)
+
+        if not files_for_thread:
+            if rows_to_remove:
+                self.apply_filters(preserve_selection=True)
+            self.statusBar.showMessage(f"前回のセッションを確認しました (削除 {len(rows_to_remove)}件)。", 5000)
+            return
+        logger.info(f"セッション復元後の再読み込み: 更新 {len(changed_paths)}件, 追加 {len(added_paths)}件")
+        self.ui_manager.set_thumbnail_loading_ui_state(True)
+        self.is_loading_thumbnails = True
+        self.load_start_time = time.time()
+        from .thumbnail_loader import ThumbnailLoaderThread
+        self.thumbnail_loader_thread = ThumbnailLoaderThread(files_for_thread, items_for_thread, self.current_thumbnail_size)
+        self.thumbnail_loader_thread.thumbnailLoaded.connect(self.update_thumbnail_item)
+        self.thumbnail_loader_thread.progressUpdated.connect(self.update_progress_bar)
+        self.thumbnail_loader_thread.finished.connect(self.on_thumbnail_loading_finished)
+        self.statusBar.showMessage(f"サムネイル読み込み中... 0/{len(files_for_thread)}")
+        self.thumbnail_loader_thread.start()
+
     def closeEvent(self, event: QCloseEvent):
         """ ★★★ 修正: アプリケーション終了時にDropWindowも閉じる ★★★ """
         logger.info("アプリケーション終了処理を開始します...")
@@ -1054,6 +1518,9 @@ class MainWindow(QMainWindow):
         # --- ★追加 終わり★ ---
 
         # Ensure threads are properly shut down if any are running
+        self._stop_folder_scan()
+        self._stop_session_validation()
+        self._stop_library_index_update() # ★★★ 追加 ★★★
         if self.thumbnail_loader_thread and self.thumbnail_loader_thread.isRunning():
             logger.info("サムネイル読み込みスレッドを停止します...")
             self.thumbnail_loader_thread.stop()
@@ -1061,11 +1528,11 @@ class MainWindow(QMainWindow):
             if not self.thumbnail_loader_thread.wait(3000): # Wait up to 3 seconds
                 logger.warning("サムネイル読み込みスレッドの終了待機がタイムアウトしました。")
 
-        if self.file_operations._thread and self.file_operations._thread.isRunning():
+        if self.file_operations.has_active_operations(): # ★★★ 変更: キュー内のすべての操作を停止 ★★★
             logger.info("ファイル操作スレッドに停止を要求します...")
-            self.file_operations.stop_operation()
-            if not self.file_operations._thread.wait(1000):
-                 logger.warning("ファイル操作スレッドの終了待機がタイムアウトしました。")
+            self.file_operations.shutdown(timeout_ms=1000)
+
+        self._save_session_snapshot() # ★★★ 追加: 次回起動時に表示をすぐ復元できるようにする ★★★
 
         logger.info("アプリケーションを終了します。")
         super().closeEvent(event)
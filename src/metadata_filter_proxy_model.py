@@ -2,6 +2,10 @@ import logging
 import os # Import os for os.path.basename and os.path.getmtime
 from PyQt6.QtCore import QSortFilterProxyModel, Qt, QVariant, QModelIndex # Import QModelIndex
 
+from .constants import GENERATION_SLOT_ROLE
+from .filter_terms import compile_terms, split_filter_terms
+from .metadata_query import CompiledQuery, compile_query
+
 logger = logging.getLogger(__name__)
 
 # This should match the METADATA_ROLE in main_window.py
@@ -15,21 +19,40 @@ class MetadataFilterProxyModel(QSortFilterProxyModel):
         self._generation_info_filter = ""
         self._search_mode = "AND"  # Default search mode
         # --- ★ フィルタキーワードをキャッシュするためのメンバ変数を追加 ---
+        # ★★★ 変更: キーワードは filter_terms のマッチャー (部分一致・"フレーズ"・/正規表現/) として保持する ★★★
         self._positive_keywords_cache = []
         self._negative_keywords_cache = []
         self._generation_keywords_cache = []
         # --- ★ ここまで ---
+        # ★★★ 追加: "-keyword" で指定された除外キーワードと、生成情報欄の条件式 (steps>=30 など) ★★★
+        self._positive_excluded_cache = []
+        self._negative_excluded_cache = []
+        self._generation_excluded_cache = []
+        self._generation_query = CompiledQuery([])
         self._hidden_paths = set() # Set of file paths to hide
         self.setDynamicSortFilter(False) # ソートは明示的に sort() で行う
         # Filter on all columns by default, though we use custom data roles
         self.setFilterKeyColumn(-1) 
         self.setSortRole(METADATA_ROLE) # ソートにMETADATA_ROLEを使用
         self.setSortCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
-        # カスタムソート用のキータイプ (0: ファイル名, 1: 更新日時, 2: 読み込み順)
+        # カスタムソート用のキータイプ (0: ファイル名, 1: 更新日時, 2: 読み込み順, 3: generation_info の項目)
         self._sort_key_type = 0 
+        self._generation_columns = None # ★★★ 追加: GenerationInfoColumns (ソースモデルと同じ寿命) ★★★
+        self._prompt_intern_table = None # ★★★ 追加: PromptInternTable (プロンプトの小文字化済み文字列を持つ) ★★★
+        self._generation_sort_field = 'seed'
+
+    def set_generation_columns(self, generation_columns):
+        self._generation_columns = generation_columns
+
+    def set_prompt_intern_table(self, prompt_intern_table):
+        self._prompt_intern_table = prompt_intern_table
+
+    def set_generation_sort_field(self, field_name):
+        """キータイプ 3 でソートする generation_info の項目 (steps, seed, cfg_scale, sampler など) を設定します。"""
+        self._generation_sort_field = field_name
 
     def set_sort_key_type(self, key_type: int):
-        """ソートに使用するキーのタイプを設定します (0: ファイル名, 1: 更新日時, 2: 読み込み順)。"""
+        """ソートに使用するキーのタイプを設定します (0: ファイル名, 1: 更新日時, 2: 読み込み順, 3: generation_info の項目)。"""
         logger.debug(f"MetadataFilterProxyModel.set_sort_key_type called. key_type: {key_type}")
         if self._sort_key_type != key_type:
             self._sort_key_type = key_type
@@ -79,27 +102,32 @@ class MetadataFilterProxyModel(QSortFilterProxyModel):
     def set_positive_prompt_filter(self, text):
         self._positive_prompt_filter = text.lower()
         # --- ★ キーワードをキャッシュ ---
-        self._positive_keywords_cache = [kw.strip() for kw in self._positive_prompt_filter.split(',') if kw.strip()]
+        self._positive_keywords_cache, self._positive_excluded_cache = compile_terms(split_filter_terms(text))
         # --- ★ ここまで ---
         self.invalidateFilter() # Re-apply the filter
 
     def set_negative_prompt_filter(self, text):
         self._negative_prompt_filter = text.lower()
         # --- ★ キーワードをキャッシュ ---
-        self._negative_keywords_cache = [kw.strip() for kw in self._negative_prompt_filter.split(',') if kw.strip()]
+        self._negative_keywords_cache, self._negative_excluded_cache = compile_terms(split_filter_terms(text))
         # --- ★ ここまで ---
         self.invalidateFilter()
 
     def set_generation_info_filter(self, text):
         self._generation_info_filter = text.lower()
         # --- ★ キーワードをキャッシュ ---
-        self._generation_keywords_cache = [kw.strip() for kw in self._generation_info_filter.split(',') if kw.strip()]
+        # ★★★ 変更: 条件式 (steps>=30, cfg:5..7, mtime>2026-10-01 など) は列ストアで評価し、残りをキーワードとする ★★★
+        self._generation_query, keywords = compile_query(split_filter_terms(text), self._generation_columns)
+        self._generation_keywords_cache, self._generation_excluded_cache = compile_terms(keywords)
         # --- ★ ここまで ---
         self.invalidateFilter()
 
-    def _keywords_match(self, text_to_search, filter_keywords):
+    def _keywords_match(self, text_to_search, filter_keywords, excluded_keywords=()):
         """Helper to check if keywords match text based on current search mode."""
-        # filter_keywords は既に小文字化され、リストになっている前提
+        # filter_keywords はコンパイル済みのマッチャーのリスト、text_to_search は小文字化済みの前提
+        # 除外キーワードは AND/OR に関係なく、1つでも一致すれば不一致
+        if excluded_keywords and any(matcher.matches(text_to_search) for matcher in excluded_keywords):
+            return False
         if not filter_keywords: # No keywords to filter by for this field
             return True
         
@@ -107,9 +135,9 @@ class MetadataFilterProxyModel(QSortFilterProxyModel):
         # text_to_search_lower = text_to_search.lower() 
 
         if self._search_mode == "AND":
-            return all(keyword in text_to_search for keyword in filter_keywords) # text_to_search は既に小文字
+            return all(matcher.matches(text_to_search) for matcher in filter_keywords) # text_to_search は既に小文字
         elif self._search_mode == "OR":
-            return any(keyword in text_to_search for keyword in filter_keywords) # text_to_search は既に小文字
+            return any(matcher.matches(text_to_search) for matcher in filter_keywords) # text_to_search は既に小文字
         return False # Should not happen
 
     def filterAcceptsRow(self, source_row, source_parent):
@@ -153,10 +181,20 @@ class MetadataFilterProxyModel(QSortFilterProxyModel):
             # logger.debug(f"filterAcceptsRow: END - No metadata for row {source_row}. Returning {result}.")
             return result
 
+        # ★★★ 追加: 条件式は列ストアのビット集合を1つ調べるだけ (行ごとの比較はしない) ★★★
+        if self._generation_query and not self._generation_query.accepts(
+                self._generation_columns, source_index.data(GENERATION_SLOT_ROLE)):
+            return False
+
         # --- ★ メタデータからテキストを取得し、一度だけ小文字化 ---
-        positive_text_lower = metadata.get('positive_prompt', '').lower()
-        negative_text_lower = metadata.get('negative_prompt', '').lower()
-        generation_text_lower = metadata.get('generation_info', '').lower()
+        # ★★★ 変更: プロンプトは共有テーブルが一意な文字列ごとに小文字化済みの文字列を持っている ★★★
+        # (テーブルがなければ判定のたびに小文字化する。テキストをモジュール全体のキャッシュに残さない)
+        lower_prompt = self._prompt_intern_table.lower if self._prompt_intern_table is not None else str.lower
+        positive_text_lower = lower_prompt(metadata.get('positive_prompt', ''))
+        negative_text_lower = lower_prompt(metadata.get('negative_prompt', ''))
+        # ★★★ 変更: generation_info は圧縮ストアにあるので、Info 欄に語があるときだけ読み出す ★★★
+        generation_text_lower = metadata.get('generation_info', '').lower() \
+            if self._generation_keywords_cache or self._generation_excluded_cache else ''
         # --- ★ ここまで ---
 
         # --- Apply filters for each field ---
@@ -167,9 +205,9 @@ class MetadataFilterProxyModel(QSortFilterProxyModel):
         # The _keywords_match helper itself respects the AND/OR mode for keywords *within* a single field.
         # Now we need to combine the results from different fields based on the overall search mode.
         # --- ★ キャッシュされたキーワードと小文字化済みのテキストを使用 ---
-        positive_match_field = self._keywords_match(positive_text_lower, self._positive_keywords_cache)
-        negative_match_field = self._keywords_match(negative_text_lower, self._negative_keywords_cache)
-        generation_match_field = self._keywords_match(generation_text_lower, self._generation_keywords_cache)
+        positive_match_field = self._keywords_match(positive_text_lower, self._positive_keywords_cache, self._positive_excluded_cache)
+        negative_match_field = self._keywords_match(negative_text_lower, self._negative_keywords_cache, self._negative_excluded_cache)
+        generation_match_field = self._keywords_match(generation_text_lower, self._generation_keywords_cache, self._generation_excluded_cache)
         # --- ★ ここまで ---
         # logger.debug(f"  filterAcceptsRow: Field matches for row {source_row} - P_match: {positive_match_field}, N_match: {negative_match_field}, G_match: {generation_match_field}")
         # --- ★ 項目間の関係は常に AND とする ---
@@ -227,6 +265,13 @@ class MetadataFilterProxyModel(QSortFilterProxyModel):
             logger.debug("lessThan: one or both QModelIndex invalid.")
             return False
 
+        if self._sort_key_type == 3 and self._generation_columns is not None: # generation_info の項目でソート (値がないものは先頭)
+            val_left = self._generation_columns.value(source_left.data(GENERATION_SLOT_ROLE), self._generation_sort_field)
+            val_right = self._generation_columns.value(source_right.data(GENERATION_SLOT_ROLE), self._generation_sort_field)
+            if val_left is None or val_right is None:
+                return val_left is None and val_right is not None
+            return val_left < val_right
+
         # METADATA_ROLE からキャッシュされたメタデータ辞書を取得
         left_metadata = self.sourceModel().data(source_left, METADATA_ROLE)
         right_metadata = self.sourceModel().data(source_right, METADATA_ROLE)
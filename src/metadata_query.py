@@ -0,0 +1,233 @@
+# src/metadata_query.py
+"""フィルタ欄の条件式 (steps>=30, cfg:5..7, seed=12345, width>1500, mtime>2026-10-01 など) の解析と評価。
+
+条件式は GenerationInfoColumns の列全体に対して1回ずつ評価し、結果をスロット単位のビット集合 (int) で持つ。
+filterAcceptsRow では行ごとにビットを1つ調べるだけになる。
+同じ条件式のビット集合は列の内容が変わるまでキャッシュし、複数の条件は絞り込みの強いものから AND する。
+"""
+import datetime
+import logging
+import re
+
+from .generation_columns import MISSING_CODE, MISSING_INT
+
+logger = logging.getLogger(__name__)
+
+# 条件式で使える項目名の別名
+QUERY_FIELD_ALIASES = {
+    'cfg': 'cfg_scale',
+    'denoise': 'denoising_strength',
+    'denoising': 'denoising_strength',
+    'hires': 'hires_upscale',
+    'schedule': 'schedule_type',
+    'scheduler': 'schedule_type',
+    'lora': 'lora_hashes',
+    'date': 'mtime',
+}
+QUERY_DAY_SECONDS = 24 * 60 * 60
+
+_PREDICATE_PATTERN = re.compile(r"^(-?)([a-z_]+)\s*(>=|<=|!=|>|<|=|:)\s*(.+)$")
+_RANGE_SEPARATOR = ".."
+
+# 条件ごとの絞り込みの強さの見積もり (残る行の割合)。小さいものから評価する
+_SELECTIVITY_EQUAL = 0.01
+_SELECTIVITY_TEXT = 0.1
+_SELECTIVITY_RANGE = 0.25
+_SELECTIVITY_BOUND = 0.5
+
+
+class QueryPredicate:
+    """列 field に対する1つの条件。数値は [low, high] の範囲 (片側は None で無制限)、文字列は text と一致するか。
+    low_inclusive / high_inclusive が False の端は含まない。negated は条件の否定。
+    """
+
+    def __init__(self, field, low=None, high=None, low_inclusive=True, high_inclusive=True,
+                 text=None, exact_text=False, negated=False, source=""):
+        self.field = field
+        self.low = low
+        self.high = high
+        self.low_inclusive = low_inclusive
+        self.high_inclusive = high_inclusive
+        self.text = text
+        self.exact_text = exact_text
+        self.negated = negated
+        self.source = source # 入力された条件式 (ログ用)
+
+    @property
+    def cache_key(self):
+        return (self.field, self.low, self.high, self.low_inclusive, self.high_inclusive, self.text, self.exact_text)
+
+    @property
+    def selectivity(self):
+        if self.text is not None:
+            estimate = _SELECTIVITY_EQUAL if self.exact_text else _SELECTIVITY_TEXT
+        elif self.low is not None and self.low == self.high:
+            estimate = _SELECTIVITY_EQUAL
+        elif self.low is not None and self.high is not None:
+            estimate = _SELECTIVITY_RANGE
+        else:
+            estimate = _SELECTIVITY_BOUND
+        return 1.0 - estimate if self.negated else estimate
+
+    def __repr__(self):
+        return f"QueryPredicate({self.source!r})"
+
+
+def _parse_number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _parse_time_interval(text):
+    """mtime の値 (UNIX時刻、YYYY-MM-DD、YYYY-MM-DDTHH:MM[:SS]) を [開始, 終了) の区間にする。日付のみなら1日分。"""
+    try:
+        value = float(text)
+        return value, value
+    except ValueError:
+        pass
+    if len(text) == 10:
+        start = datetime.datetime.combine(datetime.date.fromisoformat(text), datetime.time())
+        return start.timestamp(), start.timestamp() + QUERY_DAY_SECONDS
+    moment = datetime.datetime.fromisoformat(text).timestamp()
+    return moment, moment
+
+
+def _parse_interval(field, text):
+    """値を (low, high, 区間の終わりを含むか) にする。数値は1点、日付は1日の区間。"""
+    if field == 'mtime':
+        start, end = _parse_time_interval(text)
+        return start, end, start == end
+    value = _parse_number(text)
+    return value, value, True
+
+
+def parse_predicate(token, columns):
+    """token が columns の項目に対する条件式なら QueryPredicate を返す。そうでなければ None (キーワードとして扱う)。"""
+    match = _PREDICATE_PATTERN.match(token.strip().lower())
+    if not match:
+        return None
+    negated, field, operator, value_text = match.groups()
+    field = QUERY_FIELD_ALIASES.get(field, field)
+    if not columns.has_column(field):
+        return None
+    value_text = value_text.strip()
+    negated = bool(negated)
+    try:
+        if columns.is_text_column(field):
+            if operator not in (':', '=', '!='):
+                return None
+            return QueryPredicate(field, text=value_text, exact_text=operator != ':',
+                                  negated=negated != (operator == '!='), source=token)
+        if operator == ':' and _RANGE_SEPARATOR in value_text:
+            low_text, _, high_text = value_text.partition(_RANGE_SEPARATOR)
+            low = _parse_interval(field, low_text.strip())[0] if low_text.strip() else None
+            high_inclusive = True
+            high = None
+            if high_text.strip():
+                _, high, high_inclusive = _parse_interval(field, high_text.strip())
+            return QueryPredicate(field, low, high, high_inclusive=high_inclusive, negated=negated, source=token)
+        start, end, end_inclusive = _parse_interval(field, value_text)
+        if operator in (':', '=', '!='):
+            return QueryPredicate(field, start, end, high_inclusive=end_inclusive,
+                                  negated=negated != (operator == '!='), source=token)
+        if operator == '>':
+            return QueryPredicate(field, low=end, low_inclusive=not end_inclusive, negated=negated, source=token)
+        if operator == '>=':
+            return QueryPredicate(field, low=start, negated=negated, source=token)
+        if operator == '<':
+            return QueryPredicate(field, high=start, high_inclusive=False, negated=negated, source=token)
+        return QueryPredicate(field, high=end, high_inclusive=end_inclusive, negated=negated, source=token) # '<='
+    except ValueError:
+        logger.debug(f"条件式の値を解釈できません (キーワードとして扱います): {token}")
+        return None
+
+
+def _flags_to_bits(flags):
+    """'0'/'1' の並び (先頭がスロット0) をビット集合にする。"""
+    return int(flags[::-1], 2) if flags else 0
+
+
+def _evaluate_numeric(predicate, column):
+    low, high = predicate.low, predicate.high
+    low_ok = (lambda v: True) if low is None else ((lambda v: v >= low) if predicate.low_inclusive else (lambda v: v > low))
+    high_ok = (lambda v: True) if high is None else ((lambda v: v <= high) if predicate.high_inclusive else (lambda v: v < high))
+    if column.typecode == 'q':
+        flags = ''.join(['1' if v != MISSING_INT and low_ok(v) and high_ok(v) else '0' for v in column])
+    else: # NaN (欠損) はどの比較も偽になる
+        flags = ''.join(['1' if low_ok(v) and high_ok(v) else '0' for v in column])
+    return _flags_to_bits(flags)
+
+
+def _evaluate_text(predicate, codes, values):
+    if predicate.exact_text:
+        matching = {code for code, value in enumerate(values) if value.lower() == predicate.text}
+    else:
+        matching = {code for code, value in enumerate(values) if predicate.text in value.lower()}
+    if not matching:
+        return 0
+    return _flags_to_bits(''.join(['1' if code != MISSING_CODE and code in matching else '0' for code in codes]))
+
+
+class CompiledQuery:
+    """条件式のリストを評価するプラン。評価結果 (スロット単位のビット集合) は列の version が同じ間は使い回す。"""
+
+    def __init__(self, predicates):
+        self.predicates = sorted(predicates, key=lambda predicate: predicate.selectivity)
+        self._bits_cache = {} # cache_key -> ビット集合 (否定前)
+        self._cache_version = None
+        self._mask = None
+        self._mask_version = None
+
+    def __bool__(self):
+        return bool(self.predicates)
+
+    def _predicate_bits(self, predicate, columns):
+        bits = self._bits_cache.get(predicate.cache_key)
+        if bits is None:
+            if columns.is_text_column(predicate.field):
+                bits = _evaluate_text(predicate, *columns.text_column(predicate.field))
+            else:
+                bits = _evaluate_numeric(predicate, columns.numeric_column(predicate.field))
+            self._bits_cache[predicate.cache_key] = bits
+        return bits
+
+    def matching_bits(self, columns):
+        """すべての条件を満たすスロットのビット集合。"""
+        if self._cache_version != columns.version:
+            self._bits_cache.clear()
+            self._cache_version = columns.version
+        result = columns.live_bits()
+        for predicate in self.predicates:
+            if not result: # これ以上絞り込んでも空のまま
+                break
+            bits = self._predicate_bits(predicate, columns)
+            result = result & ~bits if predicate.negated else result & bits
+        return result
+
+    def accepts(self, columns, slot):
+        """スロットが条件を満たすか。ビット集合はバイト列にしておき、1行あたり O(1) で調べる。"""
+        if slot is None:
+            return False
+        if self._mask is None or self._mask_version != columns.version:
+            bits = self.matching_bits(columns)
+            self._mask = bits.to_bytes((columns.slot_count + 7) // 8, 'little')
+            self._mask_version = columns.version
+        byte_index = slot >> 3
+        return byte_index < len(self._mask) and bool(self._mask[byte_index] >> (slot & 7) & 1)
+
+
+def compile_query(tokens, columns):
+    """フィルタ欄のトークン (カンマ区切り済み) を条件式とキーワードに分ける。(CompiledQuery, キーワードのリスト) を返す。"""
+    predicates = []
+    keywords = []
+    for token in tokens:
+        predicate = parse_predicate(token, columns) if columns is not None else None
+        if predicate is None:
+            keywords.append(token)
+        else:
+            predicates.append(predicate)
+    if predicates:
+        logger.debug(f"条件式: {[predicate.source for predicate in sorted(predicates, key=lambda p: p.selectivity)]}")
+    return CompiledQuery(predicates), keywords
@@ -0,0 +1,163 @@
+# src/metadata_store.py
+"""大量の画像のメタデータのうち、画像ごとに異なる長いテキストを圧縮して保持するストア。
+
+ソート・フィルタに使う値 (ファイル名、更新日時、サイズ、generation_info の型付きの項目など) は
+アイテムの MetadataRecord と GenerationInfoColumns に非圧縮のまま置き、プロンプトは PromptInternTable で共有する。
+画像ごとに異なる generation_info の全文 (COLD_METADATA_KEYS) は、METADATA_STORE_BLOCK_SIZE 件ずつまとめて
+zstd (zstandard がインストールされていれば) または zlib で圧縮したブロックに入れ、
+展開したブロックは METADATA_STORE_HOT_BLOCKS 個まで LRU で保持する。
+全文が必要になるのはダイアログ・ワイルドカード作成・Info 欄のキーワード検索のときだけで、
+読み込み順に並んだ行を順に調べる場合、ブロックはそれぞれ1回ずつ展開される。
+"""
+import json
+import logging
+import zlib
+from collections import OrderedDict
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+COLD_METADATA_KEYS = ('generation_info',) # 圧縮して保持するキー
+METADATA_STORE_BLOCK_SIZE = 256 # 1ブロックにまとめて圧縮するレコード数
+METADATA_STORE_HOT_BLOCKS = 8 # 展開したまま保持するブロック数
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+_EPOCH_SHIFT = 32 # レコードID = (clear の回数 << 32) | 通し番号
+
+
+class CompressedMetadataStore:
+    """テキストの辞書を追加順にブロック単位で圧縮して保持する。put で得た ID で get する。
+    個別の削除はせず、ソースモデルのリセット (フォルダの読み直し) でまとめて破棄する。
+    """
+
+    def __init__(self, source_model=None, block_size=METADATA_STORE_BLOCK_SIZE, hot_blocks=METADATA_STORE_HOT_BLOCKS):
+        self.block_size = block_size
+        self.hot_blocks = hot_blocks
+        self.codec = 'zstd' if zstandard is not None else 'zlib'
+        if zstandard is not None:
+            self._compress = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress
+            self._decompress = zstandard.ZstdDecompressor().decompress
+        else:
+            self._compress = lambda data: zlib.compress(data, ZLIB_LEVEL)
+            self._decompress = zlib.decompress
+        self._epoch = 0
+        self._blocks = [] # 圧縮済みのブロック (bytes)
+        self._open_block = [] # まだ圧縮していない末尾のブロック
+        self._hot = OrderedDict() # ブロック番号 -> 展開したレコードのリスト
+        self._raw_bytes = 0
+        self._compressed_bytes = 0
+        if source_model is not None:
+            source_model.modelReset.connect(self.clear)
+
+    def clear(self):
+        """すべてのレコードを破棄する。以前の ID で get すると空の辞書が返る。"""
+        self._epoch += 1
+        self._blocks = []
+        self._open_block = []
+        self._hot.clear()
+        self._raw_bytes = 0
+        self._compressed_bytes = 0
+
+    def __len__(self):
+        return len(self._blocks) * self.block_size + len(self._open_block)
+
+    def put(self, values):
+        """values (JSON にできる辞書) を追加し、レコードID を返す。"""
+        index = len(self)
+        self._open_block.append(values)
+        if len(self._open_block) >= self.block_size:
+            self._seal_open_block()
+        return (self._epoch << _EPOCH_SHIFT) | index
+
+    def _seal_open_block(self):
+        data = json.dumps(self._open_block, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        compressed = self._compress(data)
+        self._blocks.append(compressed)
+        self._raw_bytes += len(data)
+        self._compressed_bytes += len(compressed)
+        self._open_block = []
+
+    def get(self, record_id):
+        """レコードの辞書を返す (呼び出し側で変更しないこと)。破棄済みの ID なら空の辞書。"""
+        if record_id >> _EPOCH_SHIFT != self._epoch:
+            return {}
+        index = record_id & ((1 << _EPOCH_SHIFT) - 1)
+        block_number, offset = divmod(index, self.block_size)
+        if block_number == len(self._blocks):
+            return self._open_block[offset] if offset < len(self._open_block) else {}
+        if block_number > len(self._blocks):
+            return {}
+        records = self._hot.get(block_number)
+        if records is None:
+            records = json.loads(self._decompress(self._blocks[block_number]))
+            self._hot[block_number] = records
+            if len(self._hot) > self.hot_blocks:
+                self._hot.popitem(last=False)
+        else:
+            self._hot.move_to_end(block_number)
+        return records[offset]
+
+    def stats(self):
+        """圧縮済みのブロックについての統計 (バイト数は JSON と圧縮後のサイズ)。"""
+        return {
+            'codec': self.codec,
+            'records': len(self),
+            'blocks': len(self._blocks),
+            'raw_bytes': self._raw_bytes,
+            'compressed_bytes': self._compressed_bytes,
+        }
+
+
+class MetadataRecord(dict):
+    """アイテムの METADATA_ROLE に保持するメタデータ。
+
+    素の dict を setData すると PyQt が QVariantMap に変換し、data() のたびに辞書と文字列が複製されるが、
+    dict のサブクラスは Python オブジェクトのまま保持される。
+    compress_into で COLD_METADATA_KEYS の値をストアへ移した後も、get / [] / in では元の辞書と同じように読める。
+    辞書としてまるごと複製・保存するときは full() を使う (dict(record) や json.dumps では圧縮した値が含まれない)。
+    """
+    __slots__ = ('_store', '_cold_id')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._store = None
+        self._cold_id = None
+
+    def compress_into(self, store):
+        cold_values = {key: self.pop(key) for key in COLD_METADATA_KEYS if key in self}
+        if cold_values:
+            self._cold_id = store.put(cold_values)
+            self._store = store
+
+    def _cold_values(self):
+        return self._store.get(self._cold_id) if self._store is not None else {}
+
+    def __getitem__(self, key):
+        if key in COLD_METADATA_KEYS and self._store is not None and not dict.__contains__(self, key):
+            return self._cold_values()[key]
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        if key in COLD_METADATA_KEYS and self._store is not None and not dict.__contains__(self, key):
+            return self._cold_values().get(key, default)
+        return dict.get(self, key, default)
+
+    def __contains__(self, key):
+        if key in COLD_METADATA_KEYS and self._store is not None and not dict.__contains__(self, key):
+            return key in self._cold_values()
+        return dict.__contains__(self, key)
+
+    def full(self):
+        """圧縮した値を含めた通常の dict。"""
+        metadata = dict(self)
+        metadata.update(self._cold_values())
+        return metadata
+
+
+def full_metadata(metadata):
+    """メタデータをまるごと複製した通常の dict (MetadataRecord なら圧縮した値も含める)。"""
+    return metadata.full() if isinstance(metadata, MetadataRecord) else dict(metadata)
@@ -1,8 +1,12 @@
 # src/metadata_utils.py
 import logging
 import json
+import os
 from PIL import Image
 
+from .generation_info import GENERATION_INFO_FIELDS, parse_generation_info # noqa: F401 (再公開)
+from .comfyui_graph import COMFYUI_JSON_KEYS, extract_comfyui_metadata, load_json
+
 logger = logging.getLogger(__name__)
 
 def _im_decode_exif(exif_data):
@@ -120,31 +124,24 @@ def extract_image_metadata(image_path):
     try:
         with Image.open(image_path) as img:
             # 1. Try to get ComfyUI workflow or prompt JSON
-            comfy_workflow_data = img.info.get('workflow')
-            if comfy_workflow_data and isinstance(comfy_workflow_data, str):
+            # ★★★ 変更: JSON は1回だけ解析してグラフからプロンプトと設定を取り出し、元の JSON (数百KBになる) は保持しない。
+            # 表示するときは comfyui_json_key のチャンクをファイルから読み直す (load_comfyui_json) ★★★
+            for json_key in COMFYUI_JSON_KEYS:
+                comfy_json_data = img.info.get(json_key)
+                if not comfy_json_data or not isinstance(comfy_json_data, str):
+                    continue
                 try:
-                    # Validate if it's actually JSON, though we store it as string
-                    json.loads(comfy_workflow_data)
-                    extracted_params['generation_info'] = comfy_workflow_data
-                    extracted_params['positive_prompt'] = "" # ComfyUI JSONの場合、これらは空
-                    extracted_params['negative_prompt'] = ""
-                    is_comfyui_json_loaded = True
-                    logger.debug(f"Loaded ComfyUI 'workflow' JSON for {image_path}")
-                except json.JSONDecodeError:
-                    logger.warning(f"ComfyUI 'workflow' data for {image_path} is not valid JSON. Will try other methods.")
-            
-            if not is_comfyui_json_loaded:
-                comfy_prompt_data = img.info.get('prompt')
-                if comfy_prompt_data and isinstance(comfy_prompt_data, str):
-                    try:
-                        json.loads(comfy_prompt_data)
-                        extracted_params['generation_info'] = comfy_prompt_data
-                        extracted_params['positive_prompt'] = "" # ComfyUI JSONの場合、これらは空
-                        extracted_params['negative_prompt'] = ""
-                        is_comfyui_json_loaded = True
-                        logger.debug(f"Loaded ComfyUI 'prompt' JSON for {image_path}")
-                    except json.JSONDecodeError:
-                        logger.warning(f"ComfyUI 'prompt' data for {image_path} is not valid JSON. Will try other methods.")
+                    comfy_params = extract_comfyui_metadata(load_json(comfy_json_data))
+                except ValueError:
+                    logger.warning(f"ComfyUI '{json_key}' data for {image_path} is not valid JSON. Will try other methods.")
+                    continue
+                extracted_params = comfy_params or dict(extracted_params)
+                # 表示用には従来どおり workflow を優先する
+                extracted_params['comfyui_json_key'] = 'workflow' if isinstance(img.info.get('workflow'), str) else json_key
+                is_comfyui_json_loaded = True
+                logger.debug(f"Loaded ComfyUI '{json_key}' JSON for {image_path}")
+                if comfy_params:
+                    break
 
             # 2. If no ComfyUI JSON, fall back to WebUI-style metadata
             if not is_comfyui_json_loaded:
@@ -203,4 +200,90 @@ def extract_image_metadata(image_path):
     except Exception as e:
         logger.error(f"Error extracting metadata for {image_path}: {e}", exc_info=True)
     
-    return extracted_params
\ No newline at end of file
+    return extracted_params
+
+def load_comfyui_json(image_path, json_key):
+    """画像の ComfyUI の JSON チャンク (json_key は 'workflow' / 'prompt') をファイルから読み直す。なければ空文字列。"""
+    try:
+        with Image.open(image_path) as img:
+            data = img.info.get(json_key)
+            return data if isinstance(data, str) else ''
+    except Exception as e:
+        logger.error(f"ComfyUI '{json_key}' JSON の読み込みに失敗: {image_path}: {e}")
+        return ''
+
+
+def with_comfyui_json(metadata, image_path):
+    """ComfyUI の画像なら、generation_info (取り出した設定) の後に元の JSON を付けた表示用のコピーを返す。
+    それ以外は metadata をそのまま返す (キャッシュ内の辞書は変更しない)。
+    """
+    if not isinstance(metadata, dict) or not metadata.get('comfyui_json_key') or not image_path:
+        return metadata
+    raw_json = load_comfyui_json(image_path, metadata['comfyui_json_key'])
+    summary = metadata.get('generation_info', '')
+    display_metadata = dict(metadata)
+    display_metadata['generation_info'] = f"{summary}\n\n{raw_json}" if summary and raw_json else (summary or raw_json)
+    return display_metadata
+
+
+METADATA_BATCH_BACKEND_THREAD = "thread"
+METADATA_BATCH_BACKEND_PROCESS = "process"
+METADATA_BATCH_MAX_WORKERS = 8
+METADATA_BATCH_IN_FLIGHT_PER_WORKER = 4 # ワーカーごとに先行して投入するファイル数 (paths が巨大でもメモリを一定に保つ)
+
+
+def extract_image_metadata_batch(paths, workers=None, backend=METADATA_BATCH_BACKEND_THREAD, skip_paths=None,
+                                 cancel_event=None):
+    """複数のファイルのメタデータをワーカープールで並列に抽出し、終わった順に (path, metadata) を返すジェネレータ。
+
+    skip_paths (MainWindow.metadata_cache など) に含まれるパスと重複したパスは抽出しない。
+    cancel_event (threading.Event) がセットされるか、ジェネレータが閉じられると、未着手の抽出を取り消して終了する。
+    backend="process" はプロセスプールを使う (Pillow の解析が GIL を保持する分、大量のファイルでは速いが起動は重い)。
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+    if backend == METADATA_BATCH_BACKEND_PROCESS:
+        executor_class = ProcessPoolExecutor
+    elif backend == METADATA_BATCH_BACKEND_THREAD:
+        executor_class = ThreadPoolExecutor
+    else:
+        raise ValueError(f"Unknown metadata batch backend: {backend}")
+    workers = max(1, workers or min(METADATA_BATCH_MAX_WORKERS, os.cpu_count() or 1))
+    max_in_flight = workers * METADATA_BATCH_IN_FLIGHT_PER_WORKER
+    seen_paths = set()
+
+    executor = executor_class(max_workers=workers)
+    in_flight = {} # future -> path
+    try:
+        path_iter = iter(paths)
+        exhausted = False
+        while True:
+            while not exhausted and len(in_flight) < max_in_flight:
+                if cancel_event is not None and cancel_event.is_set():
+                    exhausted = True
+                    break
+                path = next(path_iter, None)
+                if path is None:
+                    exhausted = True
+                    break
+                if path in seen_paths or (skip_paths is not None and path in skip_paths):
+                    continue
+                seen_paths.add(path)
+                in_flight[executor.submit(extract_image_metadata, path)] = path
+            if not in_flight or (cancel_event is not None and cancel_event.is_set()):
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                path = in_flight.pop(future)
+                try:
+                    metadata = future.result()
+                except Exception as e: # プロセスの異常終了など (extract_image_metadata 自体は例外を出さない)
+                    logger.error(f"メタデータの一括抽出中にエラー: {path}: {e}")
+                    continue
+                yield path, metadata
+    finally:
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,90 @@
+# src/progress_reporter.py
+"""ワーカーから GUI への進捗通知を時間で間引く共通処理。
+
+ファイルごとにシグナルを送ると、数万件の操作ではGUIスレッドのイベントキューが進捗通知で埋まる。
+ProgressReporter は一定間隔 (既定 50ms) ごとに最新の状態だけを通知し、最終状態 (全件完了) は必ず通知する。
+通知には処理速度 (件/秒) と残り時間の見込み (秒) も含める。
+"""
+import threading
+import time
+
+PROGRESS_REPORT_INTERVAL_SEC = 0.05
+ETA_UNKNOWN = -1.0
+
+
+class ProgressReporter:
+    """emit(processed_count, total_count, items_per_second, eta_seconds) を間引いて呼び出す。
+    複数スレッドから update / advance を呼んでもよい。eta_seconds が不明な場合は ETA_UNKNOWN。
+    """
+
+    def __init__(self, emit, total_count, interval=PROGRESS_REPORT_INTERVAL_SEC, clock=time.monotonic):
+        self._emit = emit
+        self.total_count = total_count
+        self.interval = interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._start_time = clock()
+        self._last_emit_time = None # 最初の更新はすぐに通知する
+        self._processed_count = 0
+        self._emitted_count = 0
+
+    @property
+    def processed_count(self):
+        return self._processed_count
+
+    def update(self, processed_count):
+        """処理済み件数を processed_count にする。前回の通知から interval 経過しているか、全件完了なら通知する。"""
+        with self._lock:
+            self._processed_count = processed_count
+            snapshot = self._take_snapshot_locked(force=False)
+        if snapshot is not None:
+            self._emit(*snapshot)
+
+    def advance(self, count=1):
+        """処理済み件数を count 件増やす (通知の条件は update と同じ)。"""
+        with self._lock:
+            self._processed_count += count
+            snapshot = self._take_snapshot_locked(force=False)
+        if snapshot is not None:
+            self._emit(*snapshot)
+
+    def finish(self):
+        """間引かれてまだ通知していない最新の状態があれば通知する (キャンセル等で途中終了した場合用)。"""
+        with self._lock:
+            snapshot = self._take_snapshot_locked(force=True)
+        if snapshot is not None:
+            self._emit(*snapshot)
+
+    def _take_snapshot_locked(self, force):
+        now = self._clock()
+        processed_count = self._processed_count
+        is_final = processed_count >= self.total_count
+        if force or is_final:
+            if processed_count == self._emitted_count and self._last_emit_time is not None:
+                return None # 同じ状態を2回通知しない
+            if force and processed_count == 0:
+                return None
+        elif self._last_emit_time is not None and now - self._last_emit_time < self.interval:
+            return None
+        self._last_emit_time = now
+        self._emitted_count = processed_count
+        elapsed = now - self._start_time
+        items_per_second = processed_count / elapsed if elapsed > 0 else 0.0
+        if is_final:
+            eta_seconds = 0.0
+        elif items_per_second > 0:
+            eta_seconds = (self.total_count - processed_count) / items_per_second
+        else:
+            eta_seconds = ETA_UNKNOWN
+        return processed_count, self.total_count, items_per_second, eta_seconds
+
+
+def format_rate_and_eta(items_per_second, eta_seconds):
+    """ステータス表示用に「 (123件/秒, 残り 1:05)」の形式の文字列を返す。速度が不明なら空文字列。"""
+    if items_per_second <= 0:
+        return ""
+    rate_text = f"{items_per_second:.0f}件/秒" if items_per_second >= 10 else f"{items_per_second:.1f}件/秒"
+    if eta_seconds is None or eta_seconds < 0:
+        return f" ({rate_text})"
+    minutes, seconds = divmod(int(round(eta_seconds)), 60)
+    return f" ({rate_text}, 残り {minutes}:{seconds:02d})"
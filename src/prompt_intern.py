@@ -0,0 +1,79 @@
+# src/prompt_intern.py
+"""プロンプト文字列の共有 (インターン) テーブル。
+
+同じバッチで生成した画像はプロンプトが同じで、長いネガティブプロンプトは数千枚で共通になることも多い。
+メタデータの positive_prompt / negative_prompt は、このテーブルを通して同じ内容なら同じ str オブジェクトを参照させ、
+フィルタ用の小文字化した文字列も一意な文字列ごとに1回だけ作って保持する。
+
+アイテムには MetadataRecord (metadata_store) として持たせる。
+"""
+import logging
+import sys
+
+from .metadata_store import MetadataRecord
+
+logger = logging.getLogger(__name__)
+
+INTERNED_METADATA_KEYS = ('positive_prompt', 'negative_prompt')
+
+
+class PromptInternTable:
+    def __init__(self, source_model=None):
+        self._strings = {} # 文字列 -> 共有する str オブジェクト
+        self._lower = {} # 共有する文字列 -> 小文字化した文字列
+        self._references = 0 # intern の呼び出し回数 (空文字列は除く)
+        self._saved_bytes = 0 # 共有したことで解放できた重複の文字列のサイズ
+        if source_model is not None:
+            source_model.modelReset.connect(self.clear)
+
+    def clear(self):
+        self._strings.clear()
+        self._lower.clear()
+        self._references = 0
+        self._saved_bytes = 0
+
+    def __len__(self):
+        return len(self._strings)
+
+    def intern(self, text):
+        """text と同じ内容の共有オブジェクトを返す。初めての文字列なら登録し、小文字化した文字列も作っておく。"""
+        if not text or not isinstance(text, str):
+            return text
+        self._references += 1
+        shared = self._strings.get(text)
+        if shared is not None:
+            if shared is not text:
+                self._saved_bytes += sys.getsizeof(text)
+            return shared
+        self._strings[text] = text
+        lowered = text.lower()
+        self._lower[text] = text if lowered == text else lowered
+        return text
+
+    def lower(self, text):
+        """小文字化した文字列。登録済みの文字列は保持している結果を返す (行ごとに作り直さない)。"""
+        lowered = self._lower.get(text)
+        return lowered if lowered is not None else text.lower()
+
+    def intern_metadata(self, metadata):
+        """metadata のプロンプトを共有オブジェクトに置き換えた MetadataRecord を返す (辞書でなければそのまま)。"""
+        if not isinstance(metadata, dict):
+            return metadata
+        record = metadata if isinstance(metadata, MetadataRecord) else MetadataRecord(metadata)
+        for key in INTERNED_METADATA_KEYS:
+            value = record.get(key)
+            if isinstance(value, str) and value:
+                record[key] = self.intern(value)
+        return record
+
+    def stats(self):
+        """デバッグ表示用の統計。バイト数は sys.getsizeof による概算。"""
+        unique_bytes = sum(sys.getsizeof(text) for text in self._strings)
+        lower_bytes = sum(sys.getsizeof(lowered) for text, lowered in self._lower.items() if lowered is not text)
+        return {
+            'unique_strings': len(self._strings),
+            'references': self._references,
+            'unique_bytes': unique_bytes,
+            'lower_bytes': lower_bytes,
+            'saved_bytes': self._saved_bytes,
+        }
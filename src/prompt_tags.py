@@ -0,0 +1,110 @@
+# src/prompt_tags.py
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# 同じプロンプトは何度表示・検索されても1回だけ解析する
+PROMPT_TAG_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=PROMPT_TAG_CACHE_SIZE)
+def tokenize_prompt(text):
+    """プロンプト文字列をタグに分割し、((start, end, tag_text), ...) のタプルを返す (ImageMover's parser logic)。
+    結果は不変のタプルなので、呼び出し側で共有してよい。
+    対応する形式: カンマ区切りの通常タグ、(...) の重み付きタグ (ネスト可)、<...> のLoRA等、\\(...\\) のエスケープ括弧。
+    """
+    if not text:
+        return ()
+
+    tag_positions = []
+    i = 0
+    text_length = len(text)
+
+    while i < text_length:
+        # 空白をスキップ
+        while i < text_length and text[i].isspace():
+            i += 1
+
+        if i >= text_length:
+            break
+
+        start = i # This is the character index in the original text string
+
+        # カッコ内のタグ処理
+        if text[i] == '(':
+            bracket_count = 1
+            i += 1
+            while i < text_length and bracket_count > 0:
+                if text[i] == '(':
+                    bracket_count += 1
+                elif text[i] == ')':
+                    bracket_count -= 1
+                i += 1
+            tag_text = text[start:i].strip()
+            tag_positions.append((start, i, tag_text))
+
+        # 角括弧内のタグ処理
+        elif text[i] == '<':
+            i += 1
+            while i < text_length and text[i] != '>':
+                i += 1
+            if i < text_length:  # '>'が見つかった場合
+                i += 1  # '>'も含める
+            tag_text = text[start:i].strip()
+            tag_positions.append((start, i, tag_text))
+
+        # エスケープされた括弧のタグ処理 \(...\)
+        elif i < text_length - 1 and text[i] == '\\' and text[i+1] == '(':
+            current_tag_segment_start = i # Store the actual start of this tag segment
+            i += 2  # \( をスキップ
+            while i < text_length:
+                if i < text_length - 1 and text[i] == '\\' and text[i+1] == ')':
+                    i += 2  # Include \) and advance PAST it
+                    break
+                i += 1
+            # Here, i is the position AFTER the closing \) or end of text
+            tag_text = text[current_tag_segment_start:i].strip()
+            if tag_text: # Ensure stripped tag is not empty
+                tag_positions.append((current_tag_segment_start, i, tag_text))
+
+        # 通常のタグ処理（カンマまで）
+        else:
+            escape_sequence_active = False
+            temp_tag_start = i
+            while i < text_length:
+                if text[i] == '\\' and i + 1 < text_length:
+                    # This is an escape character, skip next char as well
+                    i += 2
+                    escape_sequence_active = True # Mark that we just processed an escape
+                    continue
+
+                # Break if comma, or start of special tag (if not just after an escape)
+                if text[i] == ',' or \
+                   (not escape_sequence_active and (text[i] == '<' or text[i] == '(')):
+                    break
+
+                i += 1
+                escape_sequence_active = False # Reset after moving past a non-escape char
+
+            # Current segment ends at `i`
+            tag_text = text[temp_tag_start:i].strip()
+            if tag_text:
+                tag_positions.append((temp_tag_start, i, tag_text))
+
+            # If we stopped because of a comma, consume it
+            if i < text_length and text[i] == ',':
+                i += 1
+            # If we stopped because of '<' or '(', the next loop iteration will handle it.
+
+    return tuple(tag_positions)
+
+
+def get_prompt_tags(text):
+    """プロンプト中のタグ文字列だけを出現順に返す (tokenize_prompt の結果を共有)。"""
+    return tuple(tag_text for _, _, tag_text in tokenize_prompt(text))
+
+
+def prompt_tag_cache_info():
+    """デバッグ用: トークナイザのキャッシュ統計を返す。"""
+    return tokenize_prompt.cache_info()
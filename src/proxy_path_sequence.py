@@ -0,0 +1,101 @@
+# src/proxy_path_sequence.py
+import logging
+from collections.abc import Sequence
+
+from PyQt6.QtCore import Qt, QPersistentModelIndex
+
+logger = logging.getLogger(__name__)
+
+
+class ModelPathIndex:
+    """ソースモデル (QStandardItemModel) のファイルパス -> QPersistentModelIndex の索引。
+    行の追加・削除・リセットのシグナルで差分更新するため、パスからの位置検索は O(1) になる。
+    QPersistentModelIndex はソートや他の行の削除後も正しい行を指し続ける。
+    """
+
+    def __init__(self, source_model, path_role=Qt.ItemDataRole.UserRole):
+        self.source_model = source_model
+        self.path_role = path_role
+        self._index_by_path = {}
+        source_model.rowsInserted.connect(self._on_rows_inserted)
+        source_model.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        source_model.modelReset.connect(self.rebuild)
+        self.rebuild()
+
+    def rebuild(self):
+        self._index_by_path = {}
+        self._on_rows_inserted(None, 0, self.source_model.rowCount() - 1)
+
+    def _on_rows_inserted(self, parent, first, last):
+        for row in range(first, last + 1):
+            index = self.source_model.index(row, 0)
+            path = index.data(self.path_role)
+            if path:
+                self._index_by_path[path] = QPersistentModelIndex(index)
+
+    def _on_rows_about_to_be_removed(self, parent, first, last):
+        for row in range(first, last + 1):
+            path = self.source_model.index(row, 0).data(self.path_role)
+            if path:
+                self._index_by_path.pop(path, None)
+
+    def source_index(self, path):
+        """パスに対応するソースモデルのインデックスを返す。見つからない場合は None。"""
+        persistent_index = self._index_by_path.get(path)
+        if persistent_index is None or not persistent_index.isValid():
+            return None
+        return self.source_model.index(persistent_index.row(), persistent_index.column())
+
+    def __len__(self):
+        return len(self._index_by_path)
+
+
+class ProxyPathSequence(Sequence):
+    """フィルタ/ソート後の表示順に並んだファイルパスの読み取り専用シーケンス。
+    リストを作らずにプロキシモデルのマッピングを直接参照するため、フィルタ変更後も常に最新の表示順を返す。
+    len / [] は O(1)、position_of はパス索引を使って O(1)。
+    """
+
+    def __init__(self, proxy_model, source_model, path_index=None, path_role=Qt.ItemDataRole.UserRole):
+        self.proxy_model = proxy_model
+        self.source_model = source_model
+        self.path_index = path_index
+        self.path_role = path_role
+
+    def __len__(self):
+        return self.proxy_model.rowCount()
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        count = len(self)
+        if position < 0:
+            position += count
+        if not 0 <= position < count:
+            raise IndexError("ProxyPathSequence index out of range")
+        source_index = self.proxy_model.mapToSource(self.proxy_model.index(position, 0))
+        item = self.source_model.itemFromIndex(source_index)
+        return item.data(self.path_role) if item else None
+
+    def position_of(self, path):
+        """表示中の並びにおける path の位置を返す。表示されていない場合は -1。"""
+        if self.path_index is not None:
+            source_index = self.path_index.source_index(path)
+            if source_index is None:
+                return -1
+            proxy_index = self.proxy_model.mapFromSource(source_index)
+            return proxy_index.row() if proxy_index.isValid() else -1
+        # 索引がない場合は線形探索にフォールバック
+        for position, item_path in enumerate(self):
+            if item_path == path:
+                return position
+        return -1
+
+    def index(self, path, start=0, stop=None):
+        position = self.position_of(path)
+        if position == -1 or position < start or (stop is not None and position >= stop):
+            raise ValueError(f"{path} is not in sequence")
+        return position
+
+    def __contains__(self, path):
+        return self.position_of(path) != -1
@@ -0,0 +1,223 @@
+# src/session_snapshot.py
+"""終了時の表示状態 (セッションスナップショット) の保存と復元。
+
+起動時に前回のフォルダを再走査・再デコードせずにすぐ表示するため、終了時に
+読み込み済みのパス (読み込み順)、ソート、フィルタ、選択、スクロール位置、サムネイルを1ファイルに書き出す。
+
+形式 (リトルエンディアン):
+    magic (8バイト) | ヘッダー長 (uint32) | 予約 (uint32) | ヘッダー (zlib 圧縮した UTF-8 JSON) | サムネイル
+サムネイルは JPEG (透過のあるものは PNG) でエンコードしたバイト列で、ヘッダーの各エントリがオフセットと長さを持つ。
+エンコードとデコードはワーカースレッドで並列に行う。サムネイルとメタデータを保存するのは呼び出し側が選んだ
+一部の行 (MainWindow は表示位置の前後 SESSION_SNAPSHOT_MAX_THUMBNAILS 件) だけで、メタデータが
+SNAPSHOT_MAX_METADATA_CHARS 文字を超える行もパスだけを保存する。パスだけの行は復元後に通常どおり読み込まれる。
+
+復元した表示はあくまで前回の状態なので、validate_snapshot_entries で実ファイルの更新日時と照合し、
+消えたファイル・更新されたファイル・新しいファイル (とパスだけを保存した行) を読み込み直す。
+"""
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice, QThread, pyqtSignal
+from PyQt6.QtGui import QImage
+
+from .folder_scanner import scan_folder
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"IMSNAP02"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_JPEG_QUALITY = 90
+SNAPSHOT_MAX_METADATA_CHARS = 16384 # これより長いメタデータ (ComfyUI のワークフロー全文など) は保存しない
+SNAPSHOT_MAX_WORKERS = 4
+_PREAMBLE = struct.Struct("<8sII") # magic, header_length, reserved
+
+
+class SnapshotEntry:
+    """スナップショット内の1ファイル分。thumbnail は QImage (未読み込みだった場合は None)。"""
+
+    def __init__(self, path, metadata=None, thumbnail=None):
+        self.path = path
+        self.metadata = metadata
+        self.thumbnail = thumbnail
+
+
+class SessionSnapshot:
+    """終了時の表示状態。entries はソースモデルの並び (=読み込み順)。"""
+
+    def __init__(self, folder_path, recursive, thumbnail_size, sort_button_id, filters=None,
+                 selected_paths=None, scroll_value=0, entries=None, created=0.0):
+        self.folder_path = folder_path
+        self.recursive = recursive
+        self.thumbnail_size = thumbnail_size
+        self.sort_button_id = sort_button_id
+        self.filters = filters or {} # positive / negative / generation_info / search_mode
+        self.selected_paths = selected_paths or []
+        self.scroll_value = scroll_value
+        self.entries = entries or []
+        self.created = created
+
+
+def _metadata_chars(metadata):
+    return sum(len(value) for value in metadata.values() if isinstance(value, str))
+
+
+def _is_opaque(image):
+    alpha = image.convertToFormat(QImage.Format.Format_Alpha8)
+    bits = alpha.constBits()
+    bits.setsize(alpha.sizeInBytes())
+    data = bytes(bits)
+    width, bytes_per_line = alpha.width(), alpha.bytesPerLine()
+    # 行末のパディングは除いて調べる
+    return all(data.count(255, y * bytes_per_line, y * bytes_per_line + width) == width for y in range(alpha.height()))
+
+
+def _encode_thumbnail(image):
+    image_format = "JPG" if not image.hasAlphaChannel() or _is_opaque(image) else "PNG"
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, image_format, SNAPSHOT_JPEG_QUALITY if image_format == "JPG" else -1)
+    return bytes(data)
+
+
+def _decode_thumbnail(data):
+    image = QImage.fromData(data)
+    return None if image.isNull() else image
+
+
+def _map_in_workers(func, items):
+    """func を items に並列に適用した結果のリスト (QImage のエンコード・デコードは GIL を解放する)。"""
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(SNAPSHOT_MAX_WORKERS, os.cpu_count() or 1)) as executor:
+        return list(executor.map(func, items))
+
+
+def write_snapshot(path, snapshot):
+    """snapshot を path に書き出す。一時ファイルに書いてから置き換えるので、途中で終了しても古いファイルは壊れない。"""
+    entry_records = []
+    thumbnails = [] # (record, QImage)
+    for entry in snapshot.entries:
+        record = {'path': entry.path, 'metadata': None, 'thumbnail': None}
+        if isinstance(entry.metadata, dict) and _metadata_chars(entry.metadata) <= SNAPSHOT_MAX_METADATA_CHARS:
+            record['metadata'] = entry.metadata
+            if entry.thumbnail is not None and not entry.thumbnail.isNull():
+                thumbnails.append((record, entry.thumbnail))
+        entry_records.append(record)
+
+    encoded = _map_in_workers(_encode_thumbnail, [image for _, image in thumbnails])
+    offset = 0 # サムネイル領域の先頭からのオフセット
+    for (record, _), data in zip(thumbnails, encoded):
+        record['thumbnail'] = [offset, len(data)]
+        offset += len(data)
+
+    header = {
+        'version': SNAPSHOT_VERSION,
+        'created': snapshot.created or time.time(),
+        'folder_path': snapshot.folder_path,
+        'recursive': snapshot.recursive,
+        'thumbnail_size': snapshot.thumbnail_size,
+        'sort_button_id': snapshot.sort_button_id,
+        'filters': snapshot.filters,
+        'selected_paths': snapshot.selected_paths,
+        'scroll_value': snapshot.scroll_value,
+        'entries': entry_records,
+    }
+    header_bytes = zlib.compress(json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(SNAPSHOT_MAGIC, len(header_bytes), 0))
+        f.write(header_bytes)
+        for data in encoded:
+            f.write(data)
+    os.replace(temp_path, path)
+    logger.info(f"セッションスナップショットを保存しました: {path} ({len(entry_records)}件, サムネイル {len(encoded)}件, "
+                f"{_PREAMBLE.size + len(header_bytes) + offset} バイト)")
+
+
+def read_snapshot(path):
+    """path のスナップショットを読み込む。ファイルがない・壊れている・バージョンが違う場合は None。"""
+    try:
+        with open(path, 'rb') as f:
+            return _parse_snapshot(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError, struct.error, zlib.error) as e:
+        logger.warning(f"セッションスナップショットを読み込めませんでした: {path}: {e}")
+        return None
+
+
+def _parse_snapshot(data):
+    magic, header_length, _ = _PREAMBLE.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("magic が一致しません")
+    thumbnails_start = _PREAMBLE.size + header_length
+    header = json.loads(zlib.decompress(data[_PREAMBLE.size:thumbnails_start]).decode('utf-8'))
+    if header.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"未対応のバージョン: {header.get('version')}")
+    blobs = []
+    for record in header['entries']:
+        if record.get('thumbnail'):
+            offset, length = record['thumbnail']
+            start = thumbnails_start + offset
+            if start + length > len(data):
+                raise ValueError("サムネイルのデータが途中で切れています")
+            blobs.append(data[start:start + length])
+    thumbnails = iter(_map_in_workers(_decode_thumbnail, blobs))
+    entries = [SnapshotEntry(record['path'], record.get('metadata'), next(thumbnails) if record.get('thumbnail') else None)
+               for record in header['entries']]
+    return SessionSnapshot(header['folder_path'], header.get('recursive', True), header.get('thumbnail_size'),
+                           header.get('sort_button_id'), header.get('filters'), header.get('selected_paths'),
+                           header.get('scroll_value', 0), entries, header.get('created', 0.0))
+
+
+def validate_snapshot_entries(folder_path, recursive, entry_timestamps, is_cancelled=None):
+    """スナップショットの内容を現在のフォルダと照合する。
+    entry_timestamps: {path: 保存時の update_timestamp (未読み込みなら None)}
+    (missing_paths, changed_paths, added_paths) を返す。added_paths はフォルダ走査の順。
+    """
+    image_files, _ = scan_folder(folder_path, recursive, is_cancelled=is_cancelled)
+    current_paths = set(image_files)
+    missing_paths = [path for path in entry_timestamps if path not in current_paths]
+    changed_paths = []
+    for path, timestamp in entry_timestamps.items():
+        if path not in current_paths:
+            continue
+        if timestamp is None:
+            changed_paths.append(path)
+            continue
+        try:
+            if os.path.getmtime(path) != timestamp:
+                changed_paths.append(path)
+        except OSError:
+            missing_paths.append(path)
+    added_paths = [path for path in image_files if path not in entry_timestamps]
+    return missing_paths, changed_paths, added_paths
+
+
+class SessionValidationThread(QThread):
+    """復元した表示を実ファイルとバックグラウンドで照合し、結果を validationFinished で通知する。"""
+    validationFinished = pyqtSignal(str, list, list, list) # folder_path, missing_paths, changed_paths, added_paths
+
+    def __init__(self, folder_path, recursive, entry_timestamps, parent=None):
+        super().__init__(parent)
+        self.folder_path = folder_path
+        self.recursive = recursive
+        self.entry_timestamps = entry_timestamps
+        self._is_running = True
+
+    def run(self):
+        missing_paths, changed_paths, added_paths = validate_snapshot_entries(
+            self.folder_path, self.recursive, self.entry_timestamps, is_cancelled=lambda: not self._is_running)
+        if self._is_running:
+            logger.info(f"セッションの照合完了: {self.folder_path} (削除 {len(missing_paths)}件, 更新 {len(changed_paths)}件, 追加 {len(added_paths)}件)")
+            self.validationFinished.emit(self.folder_path, missing_paths, changed_paths, added_paths)
+
+    def stop(self):
+        self._is_running = False
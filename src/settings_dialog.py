@@ -17,7 +17,8 @@ from src.constants import (
     SORT_BY_LAST_SELECTED,                # 前回選択されたソート順
     DOUBLE_CLICK_ACTION,
     DOUBLE_CLICK_ACTION_VIEWER,
-    DOUBLE_CLICK_ACTION_VIEWER_METADATA
+    DOUBLE_CLICK_ACTION_VIEWER_METADATA,
+    COPY_STRATEGY_AUTO, COPY_STRATEGY_HARDLINK, COPY_STRATEGY_FULL # ★★★ 追加 ★★★
 ) 
 import json
 import os
@@ -69,6 +70,7 @@ class SettingsDialog(QDialog):
                  current_initial_folder_sort_setting, # 初期ソート設定
                  current_delete_empty_folders_setting,
                  current_double_click_action, # ★★★ 追加: ダブルクリック動作設定 ★★★
+                 current_copy_strategy=COPY_STRATEGY_AUTO, # ★★★ 追加: コピーモードの複製方法 ★★★
                  parent=None):
         super().__init__(parent)
         self.setWindowTitle("設定")
@@ -82,6 +84,7 @@ class SettingsDialog(QDialog):
         self.initial_folder_sort_setting = current_initial_folder_sort_setting
         self.initial_delete_empty_folders_setting = current_delete_empty_folders_setting
         self.initial_double_click_action = current_double_click_action # ★★★ 追加 ★★★
+        self.initial_copy_strategy = current_copy_strategy # ★★★ 追加 ★★★
 
         # アプリケーション設定ファイルからダイアログに関連する値を読み込む
         # MainWindowと責任範囲を分けるため、このダイアログは自身の表示に必要な設定のみを
@@ -187,6 +190,17 @@ class SettingsDialog(QDialog):
         self.delete_empty_folders_checkbox = QCheckBox("フォルダ選択時に空のサブフォルダを検索して削除する")
         self.delete_empty_folders_checkbox.setChecked(self.initial_delete_empty_folders_setting)
         empty_folder_layout.addWidget(self.delete_empty_folders_checkbox)
+        # ★★★ 追加: コピーモードの複製方法 ★★★
+        copy_strategy_layout = QHBoxLayout()
+        copy_strategy_layout.addWidget(QLabel("コピー方式:"))
+        self.copy_strategy_combo = QComboBox()
+        self.copy_strategy_combo.addItem("自動 (対応していれば高速複製、できなければ通常コピー)", COPY_STRATEGY_AUTO)
+        self.copy_strategy_combo.addItem("ハードリンク優先 (ディスク容量を消費しない・元ファイルと内容を共有)", COPY_STRATEGY_HARDLINK)
+        self.copy_strategy_combo.addItem("常に通常コピー", COPY_STRATEGY_FULL)
+        copy_strategy_index = self.copy_strategy_combo.findData(self.initial_copy_strategy)
+        self.copy_strategy_combo.setCurrentIndex(copy_strategy_index if copy_strategy_index >= 0 else 0)
+        copy_strategy_layout.addWidget(self.copy_strategy_combo, 1)
+        empty_folder_layout.addLayout(copy_strategy_layout)
         empty_folder_group.setLayout(empty_folder_layout)
         main_layout.addWidget(empty_folder_group)
 
@@ -281,6 +295,9 @@ class SettingsDialog(QDialog):
             return DOUBLE_CLICK_ACTION_VIEWER_METADATA
         return DOUBLE_CLICK_ACTION_VIEWER
 
+    def get_selected_copy_strategy(self):
+        return self.copy_strategy_combo.currentData()
+
 
 if __name__ == '__main__':
     import sys
@@ -0,0 +1,102 @@
+# src/startup_profiler.py
+"""起動時間の計測 (main.py の --profile-startup で有効にする)。
+
+起動からの経過時間を区間ごとに記録し、初回描画後にまとめてログへ出力する。
+有効にすると builtins.__import__ を一時的に置き換え、モジュールごとの初回 import にかかった時間
+(そのモジュールが import した他のモジュールを含む) も記録する。
+無効なときは mark / measure は何もしない。
+"""
+import builtins
+import importlib.util
+import logging
+import sys
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+SLOWEST_IMPORTS_TO_REPORT = 15
+
+
+class StartupProfiler:
+    def __init__(self, clock=time.perf_counter):
+        self.enabled = False
+        self._clock = clock
+        self._start_time = clock()
+        self._last_mark_time = self._start_time
+        self._marks = [] # (label, 開始からの経過秒, 前回の mark からの秒)
+        self._import_times = {} # module_name -> 初回 import の秒数
+        self._original_import = None
+
+    def enable(self, track_imports=True):
+        """計測を開始する。import の計測は、計測したい import より前に呼ぶ。"""
+        self.enabled = True
+        self._start_time = self._last_mark_time = self._clock()
+        if track_imports and self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        module_name = name
+        if level:
+            try:
+                module_name = importlib.util.resolve_name("." * level + name, (globals or {}).get('__package__'))
+            except (ImportError, ValueError):
+                pass
+        if module_name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        start_time = self._clock()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._import_times.setdefault(module_name, self._clock() - start_time)
+
+    def _stop_import_tracking(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def mark(self, label):
+        """起動からここまでの経過時間を label として記録する。"""
+        if not self.enabled:
+            return
+        now = self._clock()
+        self._marks.append((label, now - self._start_time, now - self._last_mark_time))
+        self._last_mark_time = now
+
+    @contextmanager
+    def measure(self, label):
+        """with ブロックの所要時間を label として記録する。"""
+        if not self.enabled:
+            yield
+            return
+        start_time = self._clock()
+        try:
+            yield
+        finally:
+            now = self._clock()
+            self._marks.append((label, now - self._start_time, now - start_time))
+            self._last_mark_time = now
+
+    def report_lines(self):
+        lines = ["起動時間の計測結果:"]
+        for label, elapsed, duration in self._marks:
+            lines.append(f"  {elapsed * 1000:8.1f} ms  (+{duration * 1000:7.1f} ms)  {label}")
+        if self._import_times:
+            lines.append(f"時間のかかった import (上位{SLOWEST_IMPORTS_TO_REPORT}件, 依存先を含む):")
+            slowest = sorted(self._import_times.items(), key=lambda pair: pair[1], reverse=True)
+            for module_name, duration in slowest[:SLOWEST_IMPORTS_TO_REPORT]:
+                lines.append(f"  {duration * 1000:8.1f} ms  {module_name}")
+        return lines
+
+    def report(self):
+        """計測結果をログに出力し、import の計測を終了する (初回描画後に1回だけ呼ぶ)。"""
+        if not self.enabled:
+            return
+        self._stop_import_tracking()
+        for line in self.report_lines():
+            logger.info(line)
+        self.enabled = False
+
+
+startup_profiler = StartupProfiler()
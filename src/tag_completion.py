@@ -0,0 +1,220 @@
+# src/tag_completion.py
+"""フィルタ欄のタグ補完。
+
+読み込んだ画像のプロンプトのタグ (小文字化し、重みや括弧を外したもの) と、そのタグを含む画像の数を
+TagVocabulary に持つ。タグはソート済みのリストにも入れておき (読み込み中に増えたタグは、次に候補を求めるときに
+まとめてソートし直す)、入力中の語で始まるタグの範囲を bisect で求め、
+その中から画像の数が多いものを上位 TAG_SUGGESTION_LIMIT 件だけ返す。
+短い入力 (1〜2文字) は範囲が広いので、上位の結果を語ごとにキャッシュし、語彙が変わったら捨てる。
+同じプロンプトの画像は多いので、プロンプトの文字列ごとのタグも語彙が持ち (その文字列の画像がなくなるか、
+モデルがリセットされたら捨てる)、同じ文字列を何度もタグに分けないようにする。
+語彙はアイテムにメタデータを設定するとき (MainWindow.update_thumbnail_item) に追加し、
+行の削除とモデルのリセットに合わせて減らす。
+"""
+import heapq
+import logging
+import re
+from bisect import bisect_left
+
+from PyQt6.QtCore import QStringListModel, Qt
+from PyQt6.QtWidgets import QCompleter
+
+from .constants import METADATA_ROLE
+from .prompt_tags import tokenize_prompt
+
+logger = logging.getLogger(__name__)
+
+TAG_SUGGESTION_LIMIT = 10 # ポップアップに出す候補の数
+TAG_SUGGESTION_CACHE_PREFIX_LENGTH = 2 # この長さ以下の入力は上位の結果をキャッシュする
+_TAG_WEIGHT_PATTERN = re.compile(r":\s*-?[\d.]+\s*$") # (tag:1.2) の重み
+_TAG_BRACKETS = {'(': ')', '[': ']', '{': '}', '<': '>'}
+_IGNORED_TAGS = {'break'}
+_MAX_CHAR = '\U0010ffff'
+
+
+def _normalize_tag(tag):
+    tag = tag.strip()
+    while len(tag) >= 2 and _TAG_BRACKETS.get(tag[0]) == tag[-1] and not tag.endswith('\\' + tag[-1]):
+        tag = tag[1:-1].strip()
+    tag = _TAG_WEIGHT_PATTERN.sub('', tag)
+    return ' '.join(tag.lower().split())
+
+
+def prompt_vocabulary(text):
+    """プロンプトに含まれる、正規化したタグのタプル (重複なし、出現順)。
+    (a, b:1.2) のような括弧内のカンマ区切りは別々のタグにする。エスケープした括弧 \\( \\) はそのまま残す
+    (フィルタはプロンプトの文字列に対する部分一致なので、補完したタグがそのまま一致するように)。
+    """
+    tags = {}
+    for _, _, tag_text in tokenize_prompt(text):
+        for part in _normalize_tag(tag_text).split(',') if tag_text.startswith(('(', '[', '{')) else (tag_text,):
+            tag = _normalize_tag(part)
+            if tag and tag not in _IGNORED_TAGS:
+                tags[tag] = None
+    return tuple(tags)
+
+
+class TagVocabulary:
+    """メタデータの1つの項目 (positive_prompt など) のタグと、それを含む画像の数。"""
+
+    def __init__(self, metadata_key, source_model=None, metadata_role=METADATA_ROLE):
+        self.metadata_key = metadata_key
+        self.source_model = source_model
+        self.metadata_role = metadata_role
+        self._counts = {} # タグ -> 含む画像の数
+        self._sorted_tags = [] # _counts のキーをソートしたもの (_pending_tags を除く)
+        self._pending_tags = [] # まだ _sorted_tags に入れていない新しいタグ
+        self._suggestion_cache = {} # (短い入力, 件数) -> 候補
+        self._text_tags = {} # プロンプトの文字列 -> [タグのタプル, その文字列を持つ画像の数]
+        if source_model is not None:
+            source_model.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+            source_model.modelReset.connect(self.clear)
+
+    def clear(self):
+        self._counts.clear()
+        self._sorted_tags = []
+        self._pending_tags = []
+        self._suggestion_cache.clear()
+        self._text_tags.clear()
+
+    def __len__(self):
+        return len(self._counts)
+
+    def count(self, tag):
+        return self._counts.get(tag, 0)
+
+    def add_text(self, text):
+        if not text or not isinstance(text, str):
+            return
+        self._suggestion_cache.clear()
+        entry = self._text_tags.get(text)
+        if entry is None:
+            entry = self._text_tags[text] = [prompt_vocabulary(text), 0]
+        entry[1] += 1
+        for tag in entry[0]:
+            count = self._counts.get(tag)
+            if count is None:
+                self._counts[tag] = 1
+                self._pending_tags.append(tag)
+            else:
+                self._counts[tag] = count + 1
+
+    def remove_text(self, text):
+        if not text or not isinstance(text, str):
+            return
+        entry = self._text_tags.get(text)
+        if entry is None: # 追加していない文字列
+            return
+        self._suggestion_cache.clear()
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._text_tags[text]
+        for tag in entry[0]:
+            count = self._counts.get(tag)
+            if count is None:
+                continue
+            if count > 1:
+                self._counts[tag] = count - 1
+                continue
+            del self._counts[tag]
+            position = bisect_left(self._sorted_tags, tag)
+            if position < len(self._sorted_tags) and self._sorted_tags[position] == tag:
+                del self._sorted_tags[position]
+            else:
+                self._pending_tags.remove(tag)
+
+    def prepare(self):
+        """増えたタグをソート済みの並びに入れておく (読み込みの完了時に呼べば、最初の入力で待たされない)。"""
+        if self._pending_tags: # ソート済みの並びと新しいタグの並びを1回のソートでまとめる
+            self._sorted_tags.extend(self._pending_tags)
+            self._sorted_tags.sort()
+            self._pending_tags = []
+        return self._sorted_tags
+
+    def update_metadata(self, metadata, previous=None):
+        """アイテムのメタデータを metadata に置き換えるときに呼ぶ (previous は置き換える前のメタデータ)。"""
+        if isinstance(previous, dict):
+            self.remove_text(previous.get(self.metadata_key))
+        if isinstance(metadata, dict):
+            self.add_text(metadata.get(self.metadata_key))
+
+    def _on_rows_about_to_be_removed(self, parent, first, last):
+        for row in range(first, last + 1):
+            metadata = self.source_model.index(row, 0, parent).data(self.metadata_role)
+            if isinstance(metadata, dict):
+                self.remove_text(metadata.get(self.metadata_key))
+
+    def suggest(self, prefix, limit=TAG_SUGGESTION_LIMIT):
+        """prefix で始まるタグを、含む画像の数が多い順に最大 limit 件返す (同数ならタグ名順)。"""
+        prefix = ' '.join(prefix.lower().split())
+        if not prefix:
+            return []
+        cache_key = (prefix, limit)
+        if len(prefix) <= TAG_SUGGESTION_CACHE_PREFIX_LENGTH:
+            cached = self._suggestion_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        sorted_tags = self.prepare()
+        start = bisect_left(sorted_tags, prefix)
+        end = bisect_left(sorted_tags, prefix + _MAX_CHAR, start)
+        # 範囲はタグ名順なので、同数のタグは nlargest の安定性によりタグ名順に並ぶ
+        suggestions = heapq.nlargest(limit, (sorted_tags[i] for i in range(start, end)), key=self._counts.__getitem__)
+        if len(prefix) <= TAG_SUGGESTION_CACHE_PREFIX_LENGTH:
+            self._suggestion_cache[cache_key] = suggestions
+        return suggestions
+
+
+def completion_prefix(text_before_cursor):
+    """カーソルまでの入力から、補完する語の (開始位置, 語) を返す。補完しない語 (引用・正規表現・空) なら None。
+    語はカンマ区切りの最後の語で、先頭の空白と除外の "-" は含めない。
+    """
+    start = text_before_cursor.rfind(',') + 1
+    while start < len(text_before_cursor) and text_before_cursor[start].isspace():
+        start += 1
+    if text_before_cursor[start:start + 1] == '-':
+        start += 1
+    term = text_before_cursor[start:]
+    if not term.strip() or term[0] in '"/':
+        return None
+    return start, term
+
+
+def apply_completion(text, cursor_position, tag):
+    """text のカーソル位置の語を tag で置き換えた (新しいテキスト, 新しいカーソル位置) を返す。"""
+    before = text[:cursor_position]
+    prefix = completion_prefix(before)
+    if prefix is None:
+        return text, cursor_position
+    new_before = before[:prefix[0]] + tag
+    return new_before + text[cursor_position:], len(new_before)
+
+
+class FilterTagCompleter(QCompleter):
+    """フィルタ欄 (QLineEdit) のカーソル位置の語を、TagVocabulary の候補で補完する。"""
+
+    def __init__(self, line_edit, vocabulary, limit=TAG_SUGGESTION_LIMIT):
+        super().__init__(line_edit)
+        self.line_edit = line_edit
+        self.vocabulary = vocabulary
+        self.limit = limit
+        self._suggestion_model = QStringListModel(self)
+        self.setModel(self._suggestion_model)
+        self.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion) # 候補は vocabulary が選ぶ
+        self.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.setWidget(line_edit)
+        line_edit.textEdited.connect(self.update_suggestions)
+        self.activated.connect(self.insert_completion)
+
+    def update_suggestions(self, text):
+        prefix = completion_prefix(text[:self.line_edit.cursorPosition()])
+        suggestions = self.vocabulary.suggest(prefix[1], self.limit) if prefix is not None else []
+        if not suggestions or suggestions == [prefix[1].lower()]:
+            self.popup().hide()
+            return
+        self._suggestion_model.setStringList(suggestions)
+        self.complete()
+
+    def insert_completion(self, tag):
+        text, cursor_position = apply_completion(self.line_edit.text(), self.line_edit.cursorPosition(), tag)
+        self.line_edit.setText(text)
+        self.line_edit.setCursorPosition(cursor_position)
@@ -3,6 +3,8 @@ from PyQt6.QtWidgets import QTextBrowser
 from PyQt6.QtGui import QTextCursor, QTextCharFormat, QColor
 from PyQt6.QtCore import Qt, pyqtSignal, QEvent
 
+from .prompt_tags import tokenize_prompt
+
 logger = logging.getLogger(__name__)
 
 class TagTextBrowser(QTextBrowser):
@@ -18,6 +20,9 @@ class TagTextBrowser(QTextBrowser):
         self.selected_tags = set()
         self.tag_positions = [] # Stores tuples of (start_pos, end_pos, tag_text)
         self.drag_start_pos = None # Store the character position of drag start
+        self._current_text = None # 表示中のプロンプト (同じテキストなら再設定しない)
+        self._spans_by_tag = {} # tag_text -> [(start, end), ...]
+        self._highlighted_tags = set() # 現在ハイライト書式が適用されているタグ
 
         # It seems viewport event filter was problematic or not standard.
         # We will rely on the browser's own mouse events.
@@ -117,37 +122,51 @@ class TagTextBrowser(QTextBrowser):
         self.update_highlight()
 
     def update_highlight(self):
+        """選択状態が変わったタグの範囲だけ書式を更新する (ドキュメント全体の再書式化はしない)。"""
+        changed_tags = self.selected_tags ^ self._highlighted_tags
+        if not changed_tags:
+            return
+
         # Save current cursor position to restore it later
         # This prevents the view from jumping after reformatting
         original_cursor = self.textCursor()
         
         # Create a new cursor for modifications
         modify_cursor = self.textCursor()
-        
-        # Clear all existing formatting (background color)
-        modify_cursor.select(QTextCursor.SelectionType.Document)
-        default_format = QTextCharFormat() # Default format (no background)
-        modify_cursor.setCharFormat(default_format)
-        modify_cursor.clearSelection()
-        
-        # Apply highlight to selected tags
+        modify_cursor.beginEditBlock()
+
         highlight_format = QTextCharFormat()
         highlight_format.setBackground(QColor("orange")) # Standard highlight color
-        
-        for start, end, tag_text in self.tag_positions:
-            if tag_text in self.selected_tags:
+        default_format = QTextCharFormat() # Default format (no background)
+
+        for tag_text in changed_tags:
+            char_format = highlight_format if tag_text in self.selected_tags else default_format
+            for start, end in self._spans_by_tag.get(tag_text, ()):
                 modify_cursor.setPosition(start)
                 modify_cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
-                modify_cursor.setCharFormat(highlight_format)
+                modify_cursor.setCharFormat(char_format)
                 modify_cursor.clearSelection() # Important to clear selection after formatting
+        modify_cursor.endEditBlock()
+        self._highlighted_tags = set(self.selected_tags)
         
         # Restore the original cursor position
         self.setTextCursor(original_cursor)
 
     def parse_and_set_text(self, text):
-        self.clear() # Clear previous content and selections
         self.selected_tags.clear()
-        self.tag_positions = []
+        if text and text == self._current_text and self.toPlainText() == text:
+            # 同じプロンプトの再表示: 解析・テキスト再設定を省き、ハイライトだけ解除する
+            self.update_highlight()
+            return
+
+        self.clear() # Clear previous content and selections
+        self._highlighted_tags = set()
+        self._current_text = text or None
+        # タグ分割は共有のメモ化トークナイザを使う (同じプロンプトは1回だけ解析される)
+        self.tag_positions = list(tokenize_prompt(text)) if text else []
+        self._spans_by_tag = {}
+        for start, end, tag_text in self.tag_positions:
+            self._spans_by_tag.setdefault(tag_text, []).append((start, end))
         
         if not text:
             self.setPlainText("")
@@ -155,88 +174,6 @@ class TagTextBrowser(QTextBrowser):
         
         # Set the plain text first, so character positions are valid
         self.setPlainText(text)
-        
-        # タグを検出するための状態変数 (ImageMover's parser logic)
-        i = 0
-        text_length = len(text)
-        
-        while i < text_length:
-            # 空白をスキップ
-            while i < text_length and text[i].isspace():
-                i += 1
-            
-            if i >= text_length:
-                break
-            
-            start = i # This is the character index in the original text string
-            
-            # カッコ内のタグ処理
-            if text[i] == '(':
-                bracket_count = 1
-                i += 1
-                while i < text_length and bracket_count > 0:
-                    if text[i] == '(':
-                        bracket_count += 1
-                    elif text[i] == ')':
-                        bracket_count -= 1
-                    i += 1
-                tag_text = text[start:i].strip()
-                self.tag_positions.append((start, i, tag_text))
-            
-            # 角括弧内のタグ処理 
-            elif text[i] == '<':
-                i += 1
-                while i < text_length and text[i] != '>':
-                    i += 1
-                if i < text_length:  # '>'が見つかった場合
-                    i += 1  # '>'も含める
-                tag_text = text[start:i].strip()
-                self.tag_positions.append((start, i, tag_text))
-            
-            # エスケープされた括弧のタグ処理 \(...\)
-            elif i < text_length - 1 and text[i] == '\\' and text[i+1] == '(':
-                current_tag_segment_start = i # Store the actual start of this tag segment
-                i += 2  # \( をスキップ
-                while i < text_length:
-                    if i < text_length - 1 and text[i] == '\\' and text[i+1] == ')':
-                        i += 2  # Include \) and advance PAST it
-                        break
-                    i += 1
-                # Here, i is the position AFTER the closing \) or end of text
-                tag_text = text[current_tag_segment_start:i].strip() 
-                if tag_text: # Ensure stripped tag is not empty
-                    self.tag_positions.append((current_tag_segment_start, i, tag_text))
-            
-            # 通常のタグ処理（カンマまで）
-            else:
-                escape_sequence_active = False
-                temp_tag_start = i
-                while i < text_length:
-                    if text[i] == '\\' and i + 1 < text_length:
-                        # This is an escape character, skip next char as well
-                        i += 2 
-                        escape_sequence_active = True # Mark that we just processed an escape
-                        continue
-                    
-                    # Break if comma, or start of special tag (if not just after an escape)
-                    if text[i] == ',' or \
-                       (not escape_sequence_active and (text[i] == '<' or text[i] == '(')):
-                        break
-                    
-                    i += 1
-                    escape_sequence_active = False # Reset after moving past a non-escape char
-                
-                # Current segment ends at `i`
-                tag_text = text[temp_tag_start:i].strip()
-                if tag_text:
-                    self.tag_positions.append((temp_tag_start, i, tag_text))
-                
-                # If we stopped because of a comma, consume it
-                if i < text_length and text[i] == ',':
-                    i += 1 
-                # If we stopped because of '<' or '(', the next loop iteration will handle it.
-        
-        self.update_highlight()
 
     def get_selected_tags(self):
         # Return tags in the order they appear in the text
@@ -0,0 +1,45 @@
+# src/thumbnail_cache.py
+# CarriedThumbnailCache は起動時に作成するため、Pillow を読み込む thumbnail_loader とは別のモジュールに置く
+import os
+from collections import OrderedDict
+
+
+class CarriedThumbnailCache:
+    """移動/コピーしたファイルのサムネイルとメタデータを新しいパスで保持するキャッシュ (GUIスレッド専用)。
+    同じセッションで移動先フォルダを開いたときに、画像の再デコードとメタデータの再抽出を省く。
+    """
+    MAX_ENTRIES = 4096
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # file_path -> (thumbnail_size, q_image, metadata)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, file_path):
+        return file_path in self._entries
+
+    def put(self, file_path, thumbnail_size, q_image, metadata):
+        self._entries[file_path] = (thumbnail_size, q_image, metadata)
+        self._entries.move_to_end(file_path)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, file_path):
+        self._entries.pop(file_path, None)
+
+    def take(self, file_path, thumbnail_size):
+        """(q_image, metadata) を取り出す。サイズ違い、またはファイルが更新されている場合は None。"""
+        entry = self._entries.pop(file_path, None)
+        if entry is None:
+            return None
+        cached_size, q_image, metadata = entry
+        if cached_size != thumbnail_size:
+            return None
+        try:
+            if os.path.getmtime(file_path) != metadata.get('update_timestamp'):
+                return None
+        except OSError:
+            return None
+        return q_image, metadata
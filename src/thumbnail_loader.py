@@ -2,7 +2,6 @@
 import logging
 import os # For os.path.getmtime and os.cpu_count()
 import concurrent.futures # For ThreadPoolExecutor
-import threading
 from PyQt6.QtCore import QThread, pyqtSignal, QRectF, Qt, QPointF # QPointF を追加
 from PIL import Image
 try:
@@ -12,13 +11,16 @@ except ImportError:
 
 from PyQt6.QtGui import QPixmap, QPainter, QColor, QFont, QImage, QPolygonF # QPolygonF を追加
 # Import shared metadata extraction logic
-from .metadata_utils import extract_image_metadata
+from .metadata_utils import extract_image_metadata, parse_generation_info
+from .image_probe import probe_image
+from .progress_reporter import ProgressReporter
 
 logger = logging.getLogger(__name__)
 
+
 class ThumbnailLoaderThread(QThread):
     thumbnailLoaded = pyqtSignal(object, object, dict) # item, q_image, metadata_dict
-    progressUpdated = pyqtSignal(int, int)
+    progressUpdated = pyqtSignal(int, int, float, float) # processed, total, items_per_second, eta_seconds (ProgressReporter で間引き)
     finished = pyqtSignal()
 
     def __init__(self, file_paths, items_to_process, target_size):
@@ -27,8 +29,7 @@ class ThumbnailLoaderThread(QThread):
         self.items_to_process = items_to_process # List of QStandardItem
         self.target_size = target_size
         self._is_running = True
-        self._processed_count = 0
-        self._lock = threading.Lock() # Lock for atomically updating _processed_count
+        self._progress = None # ProgressReporter (run() で作成。処理済み件数も保持する)
 
     def _process_single_image(self, file_path, item):
         """Processes a single image: creates thumbnail and extracts metadata."""
@@ -61,18 +62,18 @@ class ThumbnailLoaderThread(QThread):
         
         metadata_dict['filename_for_sort'] = filename_for_sort
         metadata_dict['update_timestamp'] = update_timestamp
+        # ★★★ 追加: generation_info の型付き項目はワーカーで解析しておく (GUIスレッドで列ストアに移す) ★★★
+        metadata_dict['generation_params'] = parse_generation_info(metadata_dict.get('generation_info', ''))
         # logger.debug(f"_process_single_image: Metadata after adding sort keys for {file_path}: {metadata_dict}")
+        # ★★★ 追加: ヘッダーだけでサイズとアニメーションの有無を調べ、サイズはメタデータに記録する (レイアウト・フィルタ用) ★★★
+        probe = probe_image(file_path)
+        metadata_dict['width'], metadata_dict['height'] = probe.width, probe.height # 表示は EXIF の向きを反映しないので格納されたサイズ
         
         try:
             img = Image.open(file_path)
-            is_animated_webp = False
-            if img.format == "WEBP":
-                try:
-                    if img.is_animated: # Pillow 9.1.0以降
-                        is_animated_webp = True
-                except AttributeError: # 古いPillowではis_animatedがない場合がある
-                    if hasattr(img, 'n_frames') and img.n_frames > 1:
-                        is_animated_webp = True
+            if not probe.is_valid: # ヘッダーから判別できない形式は Pillow が読み取ったサイズを使う
+                metadata_dict['width'], metadata_dict['height'] = img.size
+            is_animated_webp = probe.is_animated
             
             if is_animated_webp:
                 logger.debug(f"アニメーションWebPを検出: {file_path}。アイコンを生成します。")
@@ -152,8 +153,8 @@ class ThumbnailLoaderThread(QThread):
             self.finished.emit()
             return
         
-        with self._lock: # Ensure _processed_count is reset safely
-            self._processed_count = 0
+        # ★★★ 変更: 1枚ごとではなく一定間隔で進捗を通知する (大量の画像でGUIのイベントキューを埋めない) ★★★
+        self._progress = ProgressReporter(self.progressUpdated.emit, total_files)
 
         # Determine number of workers. os.cpu_count() can be None.
         cpu_cores = os.cpu_count()
@@ -202,12 +203,9 @@ class ThumbnailLoaderThread(QThread):
                     # And even then, emitting an error for a specific item might be complex here.
                     # _process_single_image should handle its own errors and return (item, None, metadata).
 
-                with self._lock:
-                    self._processed_count += 1
-                    current_processed_count = self._processed_count
-                
-                self.progressUpdated.emit(current_processed_count, total_files)
+                self._progress.advance()
         
+        self._progress.finish() # 停止された場合も最後の件数を通知する
         logger.info("ThumbnailLoaderThread: Processing loop finished. Emitting finished signal.")
         self.finished.emit()
 
@@ -0,0 +1,154 @@
+# src/tiled_image_view.py
+import logging
+import math
+from collections import OrderedDict
+
+from PyQt6.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsItem, QGraphicsPixmapItem, QStyleOptionGraphicsItem, QFrame
+from PyQt6.QtGui import QPixmap, QImage, QPainter, QTransform
+from PyQt6.QtCore import Qt, QRectF, QRect
+
+logger = logging.getLogger(__name__)
+
+
+class TiledImageItem(QGraphicsItem):
+    """画像をタイル単位で描画するアイテム。
+    表示中の領域 (exposedRect) と交差するタイルだけを、現在の倍率に合ったピラミッドレベルから切り出して描画する。
+    """
+    TILE_SIZE = 256
+    TILE_CACHE_MAX_BYTES = 128 * 1024 * 1024 # キャッシュするタイルPixmapの合計上限
+
+    def __init__(self, image, parent=None):
+        super().__init__(parent)
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption, True)
+        self._levels = [image] # level 0 = 原寸, level n = 1/2^n (必要になった時点で生成)
+        self._max_level = 0
+        longest_side = max(image.width(), image.height())
+        while (longest_side >> self._max_level) > self.TILE_SIZE:
+            self._max_level += 1
+        self._tile_cache = OrderedDict() # key: (level, tx, ty) -> QPixmap
+        self._tile_cache_bytes = 0
+
+    def boundingRect(self):
+        return QRectF(0, 0, self._levels[0].width(), self._levels[0].height())
+
+    def level_for_lod(self, lod):
+        """表示倍率 (lod) に対して、描画に使うピラミッドレベルを返す。"""
+        if lod >= 1.0 or lod <= 0:
+            return 0
+        return min(self._max_level, int(math.floor(math.log2(1.0 / lod))))
+
+    def _level_image(self, level):
+        while len(self._levels) <= level:
+            prev = self._levels[-1]
+            self._levels.append(prev.scaled(
+                max(1, prev.width() // 2), max(1, prev.height() // 2),
+                Qt.AspectRatioMode.IgnoreAspectRatio,
+                Qt.TransformationMode.SmoothTransformation
+            ))
+        return self._levels[level]
+
+    def _tile_pixmap(self, level, tx, ty):
+        key = (level, tx, ty)
+        pixmap = self._tile_cache.get(key)
+        if pixmap is not None:
+            self._tile_cache.move_to_end(key)
+            return pixmap
+        level_image = self._level_image(level)
+        rect = QRect(tx * self.TILE_SIZE, ty * self.TILE_SIZE, self.TILE_SIZE, self.TILE_SIZE).intersected(level_image.rect())
+        pixmap = QPixmap.fromImage(level_image.copy(rect))
+        self._tile_cache[key] = pixmap
+        self._tile_cache_bytes += pixmap.width() * pixmap.height() * 4
+        while self._tile_cache_bytes > self.TILE_CACHE_MAX_BYTES and len(self._tile_cache) > 1:
+            _, evicted = self._tile_cache.popitem(last=False)
+            self._tile_cache_bytes -= evicted.width() * evicted.height() * 4
+        return pixmap
+
+    def visible_tiles(self, exposed_rect, level):
+        """exposed_rect (原寸座標) と交差するタイルの (tx, ty) を返す。"""
+        level_image = self._level_image(level)
+        tile_span = self.TILE_SIZE * (1 << level) # 原寸座標での1タイルの幅
+        exposed = exposed_rect.intersected(self.boundingRect())
+        if exposed.isEmpty():
+            return []
+        last_tx = (level_image.width() - 1) // self.TILE_SIZE
+        last_ty = (level_image.height() - 1) // self.TILE_SIZE
+        tx0 = max(0, int(exposed.left() // tile_span))
+        ty0 = max(0, int(exposed.top() // tile_span))
+        tx1 = min(last_tx, int(math.ceil(exposed.right() / tile_span)) - 1)
+        ty1 = min(last_ty, int(math.ceil(exposed.bottom() / tile_span)) - 1)
+        return [(tx, ty) for ty in range(ty0, ty1 + 1) for tx in range(tx0, tx1 + 1)]
+
+    def paint(self, painter, option, widget=None):
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        level = self.level_for_lod(lod)
+        tile_span = self.TILE_SIZE * (1 << level)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, lod < 4.0)
+        for tx, ty in self.visible_tiles(option.exposedRect, level):
+            pixmap = self._tile_pixmap(level, tx, ty)
+            scale = 1 << level
+            target = QRectF(tx * tile_span, ty * tile_span, pixmap.width() * scale, pixmap.height() * scale)
+            painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+
+    @property
+    def tile_cache_bytes(self):
+        return self._tile_cache_bytes
+
+
+class TiledImageView(QGraphicsView):
+    """ORIGINAL_ZOOMモード用のビュー。巨大な拡大Pixmapを作らず、ビューの変換行列でズームする。
+    パン (ドラッグ) はQGraphicsViewのScrollHandDragで行い、Ctrl+ホイールは親ウィジェットに委ねる。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._scene = QGraphicsScene(self)
+        self.setScene(self._scene)
+        self._item = None
+        self.setFrameShape(QFrame.Shape.NoFrame)
+        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.SmartViewportUpdate)
+        self.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontSavePainterState, True)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+
+    def set_image(self, image):
+        """QImage (または QPixmap) を表示する。以前のタイルキャッシュは破棄される。"""
+        self.clear_image()
+        if isinstance(image, QPixmap):
+            image = image.toImage()
+        if image is None or image.isNull():
+            return
+        self._item = TiledImageItem(image)
+        self._scene.addItem(self._item)
+        self._scene.setSceneRect(self._item.boundingRect())
+
+    def set_frame(self, pixmap):
+        """アニメーションのフレームなど、毎回入れ替わる小さな画像をタイル化せずに表示する。"""
+        if not isinstance(self._item, QGraphicsPixmapItem):
+            self.clear_image()
+            self._item = QGraphicsPixmapItem()
+            self._scene.addItem(self._item)
+        self._item.setPixmap(pixmap)
+        self._scene.setSceneRect(self._item.boundingRect())
+
+    def clear_image(self):
+        if self._item is not None:
+            self._scene.removeItem(self._item)
+            self._item = None
+        self._scene.setSceneRect(QRectF())
+
+    def has_image(self):
+        return self._item is not None
+
+    def set_zoom(self, scale_factor):
+        self.setTransform(QTransform.fromScale(scale_factor, scale_factor))
+
+    def tiled_item(self):
+        return self._item if isinstance(self._item, TiledImageItem) else None
+
+    def wheelEvent(self, event):
+        if event.modifiers() == Qt.KeyboardModifier.ControlModifier:
+            event.ignore() # ズームは ImagePreviewWidget.wheelEvent で処理する
+            return
+        super().wheelEvent(event)
@@ -11,6 +11,11 @@ from PyQt6.QtCore import Qt, QSize, QDir, QItemSelection, QItemSelectionModel, Q
 from .thumbnail_list_view import ToggleSelectionListView
 from .thumbnail_delegate import ThumbnailDelegate
 from .metadata_filter_proxy_model import MetadataFilterProxyModel
+from .proxy_path_sequence import ModelPathIndex, ProxyPathSequence
+from .generation_columns import GenerationInfoColumns
+from .prompt_intern import PromptInternTable
+from .metadata_store import CompressedMetadataStore
+from .tag_completion import FilterTagCompleter, TagVocabulary
 from .constants import SELECTION_ORDER_ROLE # SELECTION_ORDER_ROLE をインポート
 
 logger = logging.getLogger(__name__)
@@ -30,6 +35,10 @@ class UIManager:
         self.sort_date_asc_button = None
         self.sort_date_desc_button = None
         self.sort_load_order_button = None # ★★★ 追加: 読み込み順ソートボタン ★★★
+        self.sort_seed_asc_button = None # ★★★ 追加: generation_info の項目でのソートボタン ★★★
+        self.sort_seed_desc_button = None
+        self.sort_steps_asc_button = None
+        self.sort_steps_desc_button = None
         self.and_radio_button = None
         self.or_radio_button = None
         self.search_mode_button_group = None
@@ -37,6 +46,7 @@ class UIManager:
         self.negative_prompt_filter_edit = None
         self.generation_info_filter_edit = None
         self.apply_filter_button = None
+        self.library_search_button = None # ★★★ 追加: ライブラリ全体の索引を検索するボタン ★★★
         self.move_files_button = None
         self.copy_mode_button = None
         self.copy_files_button = None
@@ -46,6 +56,14 @@ class UIManager:
         self.thumbnail_delegate = None
         self.source_thumbnail_model = None
         self.filter_proxy_model = None
+        self.source_path_index = None # ★★★ 追加: ファイルパス -> ソースモデル行の索引 ★★★
+        self.generation_columns = None # ★★★ 追加: generation_info の項目の列ストア ★★★
+        self.prompt_intern_table = None # ★★★ 追加: 同じプロンプト文字列を共有するテーブル ★★★
+        self.metadata_store = None # ★★★ 追加: generation_info の全文を圧縮して保持するストア ★★★
+        self.positive_tag_vocabulary = None # ★★★ 追加: フィルタ欄の補完に使うタグと画像数 ★★★
+        self.negative_tag_vocabulary = None
+        self.positive_tag_completer = None
+        self.negative_tag_completer = None
         self.left_panel_widget_ref = None # 左パネルへの参照を保持
         self.left_panel_overlay_widget = None # 左パネル専用オーバーレイ
         self.splitter = None # スプリッターへの参照を追加
@@ -87,6 +105,7 @@ class UIManager:
         # Right panel (Thumbnail view)
         right_panel = self._create_right_panel()
         self.splitter.addWidget(right_panel)
+        self._attach_tag_completers() # ★★★ 追加: フィルタ欄 (左パネル) の補完はソースモデルの作成後に設定する ★★★
 
         self.splitter.setSizes([300, 900]) # 初期サイズ
         main_layout.addWidget(self.splitter)
@@ -125,16 +144,23 @@ class UIManager:
 
         self.folder_tree_view = QTreeView()
         self.folder_tree_view.setHeaderHidden(True)
+        # ★★★ 変更: QFileSystemModel はフォルダ選択前には何も表示しないため、初回描画後に setup_deferred_ui で作成する ★★★
+        left_layout.addWidget(self.folder_tree_view)
+        self.folder_tree_view.clicked.connect(self.mw.on_folder_tree_clicked)
+
+        return left_panel
+
+    def setup_deferred_ui(self):
+        """起動時に表示されないUI (フォルダツリーのモデル) を作成する。何度呼んでもよい。"""
+        if self.file_system_model is not None:
+            return
         self.file_system_model = QFileSystemModel()
         self.file_system_model.setNameFilters(["*.png", "*.jpg", "*.jpeg", "*.webp"])
         self.file_system_model.setNameFilterDisables(False)
         self.folder_tree_view.setModel(self.file_system_model)
         for i in range(1, self.file_system_model.columnCount()):
             self.folder_tree_view.hideColumn(i)
-        left_layout.addWidget(self.folder_tree_view)
-        self.folder_tree_view.clicked.connect(self.mw.on_folder_tree_clicked)
-
-        return left_panel
+        logger.debug("フォルダツリーのモデルを作成しました。")
 
     def _create_sort_options_ui(self):
         sort_options_group_box = QFrame()
@@ -152,6 +178,10 @@ class UIManager:
             2: ("更新日時 昇順", "sort_date_asc_button"),
             3: ("更新日時 降順", "sort_date_desc_button"),
             4: ("読み込み順", "sort_load_order_button"), # ★★★ 追加 ★★★
+            5: ("Seed 昇順", "sort_seed_asc_button"), # ★★★ 追加 ★★★
+            6: ("Seed 降順", "sort_seed_desc_button"),
+            7: ("Steps 昇順", "sort_steps_asc_button"),
+            8: ("Steps 降順", "sort_steps_desc_button"),
         }
         
         row1_layout = QHBoxLayout()
@@ -185,6 +215,16 @@ class UIManager:
         self.sort_button_group.addButton(getattr(self, buttons_map[4][1]), 4)
         row3_layout.addWidget(getattr(self, buttons_map[4][1]))
         sort_options_layout.addLayout(row3_layout)
+
+        # ★★★ 追加: generation_info の項目 (Seed / Steps) でのソートボタン ★★★
+        for button_ids in ((5, 6), (7, 8)):
+            row_layout = QHBoxLayout()
+            for button_id in button_ids:
+                setattr(self, buttons_map[button_id][1], QPushButton(self.mw.sort_criteria_map[button_id]["caption"]))
+                getattr(self, buttons_map[button_id][1]).setCheckable(True)
+                self.sort_button_group.addButton(getattr(self, buttons_map[button_id][1]), button_id)
+                row_layout.addWidget(getattr(self, buttons_map[button_id][1]))
+            sort_options_layout.addLayout(row_layout)
         self.sort_button_group.idClicked.connect(self.mw._apply_sort_from_toggle_button)
         return sort_options_group_box
 
@@ -219,6 +259,12 @@ class UIManager:
         self.apply_filter_button = QPushButton("フィルタ適用")
         self.apply_filter_button.clicked.connect(lambda: self.mw.apply_filters(preserve_selection=True))
         filter_layout.addWidget(self.apply_filter_button)
+
+        # ★★★ 追加: 同じ条件でライブラリ全体の索引を検索し、一致した画像だけを読み込む ★★★
+        self.library_search_button = QPushButton("ライブラリ全体を検索")
+        self.library_search_button.setToolTip("索引済みのすべての画像から検索し、一致した画像だけを表示します (索引は「ツール」メニューで更新)")
+        self.library_search_button.clicked.connect(self.mw.search_library)
+        filter_layout.addWidget(self.library_search_button)
         return filter_group_box
 
     def _create_file_operations_ui(self, selection_button_layout):
@@ -267,10 +313,31 @@ class UIManager:
         self.source_thumbnail_model = QStandardItemModel(self.mw)
         self.filter_proxy_model = MetadataFilterProxyModel(self.mw)
         self.filter_proxy_model.setSourceModel(self.source_thumbnail_model)
+        self.source_path_index = ModelPathIndex(self.source_thumbnail_model)
+        self.generation_columns = GenerationInfoColumns(self.source_thumbnail_model)
+        self.filter_proxy_model.set_generation_columns(self.generation_columns)
+        self.prompt_intern_table = PromptInternTable(self.source_thumbnail_model)
+        self.filter_proxy_model.set_prompt_intern_table(self.prompt_intern_table)
+        self.metadata_store = CompressedMetadataStore(self.source_thumbnail_model)
         self.thumbnail_view.setModel(self.filter_proxy_model)
         self.thumbnail_view.selectionModel().selectionChanged.connect(self.mw.handle_thumbnail_selection_changed)
         return self.thumbnail_view
 
+    def _attach_tag_completers(self):
+        """読み込んだ画像のタグで Positive / Negative のフィルタ欄を補完する (Info 欄は条件式が主なので対象外)。"""
+        self.positive_tag_vocabulary = TagVocabulary('positive_prompt', self.source_thumbnail_model)
+        self.negative_tag_vocabulary = TagVocabulary('negative_prompt', self.source_thumbnail_model)
+        self.positive_tag_completer = FilterTagCompleter(self.positive_prompt_filter_edit, self.positive_tag_vocabulary)
+        self.negative_tag_completer = FilterTagCompleter(self.negative_prompt_filter_edit, self.negative_tag_vocabulary)
+
+    def tag_vocabularies(self):
+        return [vocabulary for vocabulary in (self.positive_tag_vocabulary, self.negative_tag_vocabulary)
+                if vocabulary is not None]
+
+    def visible_path_sequence(self):
+        """現在の表示順 (フィルタ・ソート後) のファイルパスを参照するシーケンスを返す。リストは作成しない。"""
+        return ProxyPathSequence(self.filter_proxy_model, self.source_thumbnail_model, self.source_path_index)
+
     def update_recursive_button_text(self, checked):
         if self.recursive_toggle_button:
             self.recursive_toggle_button.setText(f"サブフォルダ検索: {'ON' if checked else 'OFF'}")
@@ -0,0 +1,133 @@
+# src/wc_batch.py
+"""GUIを使わずにフォルダ以下の画像からワイルドカードファイルを作成する処理 (wc_cli.py から利用)。
+
+画像の列挙・メタデータ抽出・書き込みをすべてストリーム処理し、同時に保持する結果は
+ワーカー数に比例した一定数だけにする (画像枚数に関わらずメモリ使用量は一定)。
+"""
+import hashlib
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .constants import WC_FORMAT_HASH_COMMENT, WC_FORMAT_BRACKET_COMMENT
+from .metadata_utils import extract_image_metadata
+
+logger = logging.getLogger(__name__)
+
+WC_BATCH_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp') # サムネイル一覧と同じ対象
+COMMENT_MODE_NONE = "none"
+COMMENT_MODE_FILENAME = "filename"
+
+
+def format_wildcard_entry(comment, prompt_text, output_format):
+    """1画像分のワイルドカード出力を返す (出力なしの場合は空文字列)。WCCreatorの出力形式と同じ。"""
+    comment = (comment or "").strip()
+    prompt_text = (prompt_text or "").strip()
+    lines = []
+    if output_format == WC_FORMAT_HASH_COMMENT:
+        if comment: lines.append(f"# {comment}")
+        if prompt_text: lines.append(prompt_text)
+    elif output_format == WC_FORMAT_BRACKET_COMMENT:
+        if comment and prompt_text: lines.append(f"[{comment}:100]{prompt_text}")
+        elif prompt_text: lines.append(prompt_text)
+    return "\n".join(lines)
+
+
+def prompt_to_wildcard_line(positive_prompt):
+    """ポジティブプロンプトの各行を空白で連結する (WCCreatorの「全行をプレビュー」と同じ)。"""
+    if not isinstance(positive_prompt, str):
+        return ""
+    return " ".join(filter(None, (line.strip() for line in positive_prompt.split('\n'))))
+
+
+def iter_image_files(root_folder, recursive=True):
+    """画像ファイルのパスを1つずつ返す (一覧をメモリに作らない)。"""
+    pending_dirs = [root_folder]
+    while pending_dirs:
+        current_dir = pending_dirs.pop()
+        try:
+            with os.scandir(current_dir) as entries:
+                sub_dirs = []
+                for entry in sorted(entries, key=lambda e: e.name):
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                sub_dirs.append(entry.path)
+                        elif entry.name.lower().endswith(WC_BATCH_IMAGE_EXTENSIONS):
+                            yield entry.path
+                    except OSError as e:
+                        logger.warning(f"エントリの確認に失敗: {entry.path}: {e}")
+                pending_dirs.extend(reversed(sub_dirs)) # 名前順に辿る
+        except OSError as e:
+            logger.warning(f"フォルダの読み込みに失敗: {current_dir}: {e}")
+
+
+def _extract_entry(file_path, output_format, comment_mode):
+    """(ワイルドカードの行, 出力する内容) を返す。プロンプトがなければ None。"""
+    metadata = extract_image_metadata(file_path)
+    prompt_text = prompt_to_wildcard_line(metadata.get('positive_prompt', ''))
+    if not prompt_text:
+        return None
+    comment = os.path.splitext(os.path.basename(file_path))[0] if comment_mode == COMMENT_MODE_FILENAME else ""
+    return prompt_text, format_wildcard_entry(comment, prompt_text, output_format)
+
+
+def generate_wildcard_file(root_folder, output_path, output_format=WC_FORMAT_HASH_COMMENT, recursive=True,
+                           workers=None, deduplicate=False, comment_mode=COMMENT_MODE_NONE, cancel_event=None,
+                           progress_callback=None):
+    """root_folder 以下の画像のプロンプトを output_path に逐次書き出し、集計結果の辞書を返す。
+
+    出力順は画像の列挙順 (フォルダ・ファイル名順) で、ワーカー数に関わらず一定。
+    deduplicate=True の場合、同じプロンプト (ワイルドカードの行) はハッシュ値 (8バイト) の集合で判定して1回だけ書き出す
+    (ファイル名のコメントが違っても重複とする)。
+    """
+    workers = workers or min(8, os.cpu_count() or 1)
+    max_in_flight = workers * 4 # 先行して抽出する画像数の上限 (メモリを一定に保つ)
+    stats = {'scanned': 0, 'written': 0, 'skipped_no_prompt': 0, 'duplicates': 0, 'errors': 0, 'cancelled': False}
+    seen_hashes = set() if deduplicate else None
+
+    def write_result(out_file, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            stats['errors'] += 1
+            logger.error(f"プロンプト抽出中にエラー: {e}", exc_info=True)
+            return
+        if not result:
+            stats['skipped_no_prompt'] += 1
+            return
+        prompt_text, entry = result
+        if seen_hashes is not None:
+            digest = hashlib.blake2b(prompt_text.encode('utf-8'), digest_size=8).digest()
+            if digest in seen_hashes:
+                stats['duplicates'] += 1
+                return
+            seen_hashes.add(digest)
+        out_file.write(entry)
+        out_file.write("\n")
+        stats['written'] += 1
+
+    with open(output_path, 'w', encoding='utf-8', newline='\n') as out_file, \
+         ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for file_path in iter_image_files(root_folder, recursive):
+            if cancel_event is not None and cancel_event.is_set():
+                stats['cancelled'] = True
+                break
+            stats['scanned'] += 1
+            in_flight.append(executor.submit(_extract_entry, file_path, output_format, comment_mode))
+            if len(in_flight) >= max_in_flight:
+                write_result(out_file, in_flight.popleft())
+                if progress_callback: progress_callback(stats)
+        while in_flight:
+            future = in_flight.popleft()
+            if stats['cancelled']:
+                future.cancel()
+                continue
+            write_result(out_file, future)
+        if progress_callback: progress_callback(stats)
+
+    logger.info(f"ワイルドカード出力完了: {output_path} (対象 {stats['scanned']} 件, 出力 {stats['written']} 件, "
+                f"重複 {stats['duplicates']} 件, プロンプトなし {stats['skipped_no_prompt']} 件, エラー {stats['errors']} 件)")
+    return stats
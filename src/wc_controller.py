@@ -1,6 +1,8 @@
 import os
 from PyQt6.QtCore import QObject, pyqtSignal
-from PyQt6.QtGui import QImage
+from PyQt6.QtGui import QImageReader
+
+from .image_probe import probe_image
 
 class WCController(QObject):
     """ワイルドカードコントローラークラス"""
@@ -20,10 +22,13 @@ class WCController(QObject):
             bool: 読み込み成功可否
         """
         try:
-            # QImageを明示的に呼び出す
-            image = QImage()
-            loaded = image.load(file_path)
-            if not loaded or image.isNull():
+            # ★★★ 変更: 全体をデコードせず、ヘッダーだけで読み込めるかを確認する ★★★
+            probe = probe_image(file_path)
+            if probe.format is not None:
+                loaded = probe.is_valid
+            else: # PNG/JPEG/WebP 以外は Qt のプラグインにヘッダーを確認させる
+                loaded = QImageReader(file_path).canRead()
+            if not loaded:
                 self.status_updated.emit(f"画像読み込み失敗: {os.path.basename(file_path)}")
                 return False
             return True
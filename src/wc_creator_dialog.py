@@ -3,10 +3,10 @@ import os
 from PyQt6.QtWidgets import (
     QMessageBox, QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QSplitter, QLabel,
     QTextEdit, QCheckBox, QScrollArea, QWidget, QLineEdit,
-    QFileDialog, QApplication
+    QFileDialog, QApplication, QTableView, QHeaderView, QAbstractItemView
 )
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QPixmap, QImage
+from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtGui import QPixmap
 import logging
 
 # src.constantsから定数をインポート
@@ -15,10 +15,14 @@ from src.constants import (
     WC_FORMAT_HASH_COMMENT,
     WC_FORMAT_BRACKET_COMMENT
 )
+from src.wc_output_model import ReducedThumbnailLoader, WCOutputPreviewModel, PromptTextDelegate
+from src.wc_batch import format_wildcard_entry
 
 logger = logging.getLogger(__name__)
 
 class WCCreatorDialog(QDialog):
+    PREVIEW_IMAGE_SIZE = 240 # 左パネル (最小250px) に表示する画像の最大辺
+
     def __init__(self, selected_file_paths, metadata_list, output_format, parent=None): # output_format を受け取る
         super().__init__(parent)
         self.setWindowTitle("ワイルドカード作成")
@@ -38,6 +42,9 @@ class WCCreatorDialog(QDialog):
         self.checkbox_state_cache = {}
         self.prompt_checkboxes = []
         self.prompt_line_edits = []
+        # ★★★ 追加: 左パネルの画像は縮小サイズでバックグラウンド読み込み ★★★
+        self.thumbnail_loader = ReducedThumbnailLoader(self.PREVIEW_IMAGE_SIZE, self)
+        self.thumbnail_loader.thumbnailReady.connect(self._on_preview_image_ready)
 
         self.initUI()
         if self.selected_file_paths:
@@ -92,11 +99,7 @@ class WCCreatorDialog(QDialog):
             self._clear_prompt_lines_layout(); self.image_label.setText("画像なし"); self.comment_edit.clear(); self._update_navigation_buttons(); return
         self.current_index = index
         file_path, metadata = self.selected_file_paths[index], self.metadata_list[index]
-        try:
-            qimage = QImage(file_path)
-            if not qimage.isNull(): self.image_label.setPixmap(QPixmap.fromImage(qimage).scaled(self.image_label.minimumWidth() - 10, self.image_label.minimumHeight() - 10, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
-            else: self.image_label.setText(f"画像読込失敗:\n{os.path.basename(file_path)}")
-        except Exception as e: self.image_label.setText(f"画像表示エラー:\n{os.path.basename(file_path)}"); logger.error(f"サムネイル表示エラー ({file_path}): {e}", exc_info=True)
+        self.image_label.setText("読み込み中..."); self.thumbnail_loader.request(file_path) # ★★★ 変更: 原寸デコードせず縮小画像を非同期で取得 ★★★
         self._update_navigation_buttons(); self.comment_edit.setText(self.comment_cache.get(index, ""))
         self._clear_prompt_lines_layout()
         positive_prompt = metadata.get('positive_prompt', '')
@@ -115,6 +118,15 @@ class WCCreatorDialog(QDialog):
             line_layout.addWidget(le); self.prompt_line_edits.append(le)
             self.prompt_lines_layout.addWidget(line_widget)
 
+    def _on_preview_image_ready(self, file_path, qimage):
+        if not self.selected_file_paths or self.selected_file_paths[self.current_index] != file_path: return # 既に別の画像へ移動済み
+        if qimage is not None and not qimage.isNull(): self.image_label.setPixmap(QPixmap.fromImage(qimage))
+        else: self.image_label.setText(f"画像読込失敗:\n{os.path.basename(file_path)}")
+
+    def done(self, result):
+        self.thumbnail_loader.stop()
+        super().done(result)
+
     def _cache_current_view_state(self): # 変更なし
         if not self.selected_file_paths or not (0 <= self.current_index < len(self.selected_file_paths)): return
         self.comment_cache[self.current_index] = self.comment_edit.text()
@@ -172,6 +184,7 @@ class WCCreatorDialog(QDialog):
         output_dialog.exec()
 
 class OutputDialog(QDialog):
+    THUMBNAIL_SIZE = 96
     # コンストラクタで output_format を受け取るように変更
     def __init__(self, selected_file_paths, metadata_list,
                  initial_comments, initial_checkbox_states,
@@ -185,7 +198,9 @@ class OutputDialog(QDialog):
         self.initial_checkbox_states = initial_checkbox_states
         self.checked_only_mode = checked_only_mode
         self.output_format = output_format # ★★★ 受け取った output_format を保持 ★★★
-        self.item_widgets_list = []
+        # ★★★ 変更: 行ごとのウィジェットを作らず、モデル/ビューで表示する (サムネイルは表示行だけ縮小読み込み) ★★★
+        self.thumbnail_loader = ReducedThumbnailLoader(self.THUMBNAIL_SIZE, self)
+        self.preview_model = None
         self.initUI()
         self.populate_output_preview()
 
@@ -197,27 +212,21 @@ class OutputDialog(QDialog):
         replace_outer_layout.addLayout(replace_fields_layout)
         self.replace_button = QPushButton("一括置換"); self.replace_button.clicked.connect(self._perform_replace_all); replace_outer_layout.addWidget(self.replace_button)
         main_layout.addWidget(replace_gb)
-        self.scroll_area = QScrollArea(); self.scroll_area.setWidgetResizable(True); self.scroll_widget_content = QWidget(); self.preview_items_layout = QVBoxLayout(self.scroll_widget_content); self.preview_items_layout.setAlignment(Qt.AlignmentFlag.AlignTop); self.scroll_area.setWidget(self.scroll_widget_content)
-        main_layout.addWidget(self.scroll_area)
+        self.preview_view = QTableView(); self.preview_view.setWordWrap(True); self.preview_view.setIconSize(QSize(self.THUMBNAIL_SIZE, self.THUMBNAIL_SIZE))
+        self.preview_view.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.preview_view.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked | QAbstractItemView.EditTrigger.SelectedClicked | QAbstractItemView.EditTrigger.EditKeyPressed | QAbstractItemView.EditTrigger.AnyKeyPressed)
+        self.preview_view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.preview_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed); self.preview_view.verticalHeader().setDefaultSectionSize(self.THUMBNAIL_SIZE + 8)
+        self.preview_view.setItemDelegateForColumn(WCOutputPreviewModel.COLUMN_PROMPT, PromptTextDelegate(self.preview_view))
+        main_layout.addWidget(self.preview_view)
         self.save_button = QPushButton("ファイルへ出力"); self.save_button.clicked.connect(self._save_to_file)
         main_layout.addWidget(self.save_button); self.setLayout(main_layout)
 
-    def populate_output_preview(self): # 変更なし
-        self.item_widgets_list.clear()
-        for i, file_path in enumerate(self.selected_file_paths):
-            metadata, comment, cb_states = self.metadata_list[i], self.initial_comments.get(i, ""), self.initial_checkbox_states.get(i)
-            item_widget = QWidget(); item_layout = QHBoxLayout(item_widget); item_layout.setContentsMargins(5,5,5,5)
-            thumb_lbl = QLabel(); thumb_lbl.setFixedSize(100, 100); thumb_lbl.setAlignment(Qt.AlignmentFlag.AlignCenter); thumb_lbl.setStyleSheet("border: 1px solid lightgray;")
-            try:
-                qimg = QImage(file_path)
-                if not qimg.isNull(): thumb_lbl.setPixmap(QPixmap.fromImage(qimg).scaled(96,96,Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
-                else: thumb_lbl.setText("読込失敗")
-            except Exception: thumb_lbl.setText("表示エラー")
-            item_layout.addWidget(thumb_lbl)
-            text_data_widget = QWidget(); text_data_layout = QVBoxLayout(text_data_widget)
-            text_data_layout.addWidget(QLabel(f"<b>{os.path.basename(file_path)}</b>"))
-            comment_edit = QLineEdit(comment); text_data_layout.addWidget(QLabel("コメント:")); text_data_layout.addWidget(comment_edit)
-            prompt_edit = QTextEdit(); prompt_edit.setAcceptRichText(False); prompt_edit.setMinimumHeight(60)
+    def populate_output_preview(self):
+        comments, prompts = [], []
+        for i in range(len(self.selected_file_paths)):
+            metadata, cb_states = self.metadata_list[i], self.initial_checkbox_states.get(i)
+            comments.append(self.initial_comments.get(i, ""))
             positive_prompt = metadata.get('positive_prompt', '')
             if not isinstance(positive_prompt, str): positive_prompt = ""
             lines_raw = positive_prompt.split('\n')
@@ -225,33 +234,31 @@ class OutputDialog(QDialog):
             if self.checked_only_mode:
                 if cb_states: selected_lines.extend(lines_raw[j].strip() for j, line in enumerate(lines_raw) if j < len(cb_states) and cb_states[j])
             else: selected_lines.extend(line.strip() for line in lines_raw)
-            prompt_edit.setPlainText(" ".join(filter(None, selected_lines)))
-            text_data_layout.addWidget(QLabel("プロンプト:")); text_data_layout.addWidget(prompt_edit)
-            item_layout.addWidget(text_data_widget, 1); self.preview_items_layout.addWidget(item_widget)
-            self.item_widgets_list.append({'comment_edit': comment_edit, 'prompt_edit': prompt_edit})
+            prompts.append(" ".join(filter(None, selected_lines)))
+        self.preview_model = WCOutputPreviewModel(self.selected_file_paths, comments, prompts, self.thumbnail_loader, self)
+        self.preview_view.setModel(self.preview_model)
+        header = self.preview_view.horizontalHeader()
+        header.setSectionResizeMode(WCOutputPreviewModel.COLUMN_THUMBNAIL, QHeaderView.ResizeMode.Fixed); header.resizeSection(WCOutputPreviewModel.COLUMN_THUMBNAIL, self.THUMBNAIL_SIZE + 8)
+        header.setSectionResizeMode(WCOutputPreviewModel.COLUMN_FILE, QHeaderView.ResizeMode.Interactive); header.resizeSection(WCOutputPreviewModel.COLUMN_FILE, 180)
+        header.setSectionResizeMode(WCOutputPreviewModel.COLUMN_COMMENT, QHeaderView.ResizeMode.Interactive); header.resizeSection(WCOutputPreviewModel.COLUMN_COMMENT, 180)
+        header.setSectionResizeMode(WCOutputPreviewModel.COLUMN_PROMPT, QHeaderView.ResizeMode.Stretch)
 
-    def _perform_replace_all(self): # 変更なし
+    def _perform_replace_all(self):
         search, replace = self.search_edit.text(), self.replace_edit.text()
         if not search: QMessageBox.information(self, "情報", "検索文字列未入力"); return
-        count = 0
-        for widgets in self.item_widgets_list:
-            if (c_orig := widgets['comment_edit'].text()) != (c_new := c_orig.replace(search, replace)): widgets['comment_edit'].setText(c_new); count+=1
-            if (p_orig := widgets['prompt_edit'].toPlainText()) != (p_new := p_orig.replace(search, replace)): widgets['prompt_edit'].setPlainText(p_new); count+=1
+        count = self.preview_model.replace_all(search, replace)
         QMessageBox.information(self, "置換完了", f"処理完了。" + (f" 約{count}箇所置換。" if count > 0 else ""))
 
+    def done(self, result):
+        self.thumbnail_loader.stop()
+        super().done(result)
+
     def _generate_final_output_text(self): # ★★★ 修正: output_format を使用 ★★★
         output_lines = []
-        for item_widgets in self.item_widgets_list:
-            comment = item_widgets['comment_edit'].text().strip()
-            prompt_text = item_widgets['prompt_edit'].toPlainText().strip()
-
-            if self.output_format == WC_FORMAT_HASH_COMMENT:
-                if comment: output_lines.append(f"# {comment}")
-                if prompt_text: output_lines.append(prompt_text)
-            elif self.output_format == WC_FORMAT_BRACKET_COMMENT:
-                if comment and prompt_text: output_lines.append(f"[{comment}:100]{prompt_text}")
-                elif prompt_text: output_lines.append(prompt_text)
-            # 他のフォーマットがあればここに追加
+        for row in range(self.preview_model.rowCount()):
+            # ★★★ 変更: CLI (wc_cli.py) と同じ整形処理を使う ★★★
+            entry = format_wildcard_entry(self.preview_model.comment(row), self.preview_model.prompt(row), self.output_format)
+            if entry: output_lines.append(entry)
         return "\n".join(output_lines)
 
     def _save_to_file(self): # 変更なし
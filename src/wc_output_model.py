@@ -0,0 +1,211 @@
+# src/wc_output_model.py
+import logging
+import queue
+import threading
+from collections import OrderedDict
+
+from PyQt6.QtCore import Qt, QObject, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt6.QtGui import QPixmap
+from PyQt6.QtWidgets import QStyledItemDelegate, QPlainTextEdit
+
+from PIL import Image
+try:
+    from PIL import ImageQt
+except ImportError:
+    ImageQt = None
+
+logger = logging.getLogger(__name__)
+
+
+def decode_reduced_qimage(file_path, max_size):
+    """max_size 四方に収まる縮小QImageを返す。JPEGはdraftで縮小デコードされ、原寸の画像は保持しない。"""
+    if ImageQt is None:
+        return None
+    try:
+        with Image.open(file_path) as img:
+            img.draft("RGB", (max_size, max_size))
+            img.thumbnail((max_size, max_size))
+            return ImageQt.ImageQt(img.convert("RGBA")).copy()
+    except Exception as e:
+        logger.warning(f"縮小サムネイルの読み込みに失敗: {file_path}: {e}")
+        return None
+
+
+class ReducedThumbnailLoader(QObject):
+    """縮小サムネイルをバックグラウンドでデコードするローダー。
+    後から要求されたもの (=現在表示中の行) を優先するためLIFOキューを使う。
+    ワーカーは要求時に起動し、一定時間要求がなければ自動的に終了する (ダイアログ破棄時に停止漏れしない)。
+    """
+    thumbnailReady = pyqtSignal(str, object) # file_path, QImage (失敗時は None)
+    IDLE_TIMEOUT_SEC = 5.0
+
+    def __init__(self, max_size, parent=None):
+        super().__init__(parent)
+        self.max_size = max_size
+        self._queue = queue.LifoQueue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._is_running = True
+
+    def request(self, file_path):
+        with self._lock:
+            if not self._is_running or file_path in self._pending:
+                return
+            self._pending.add(file_path)
+            self._queue.put(file_path)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="ReducedThumbnailLoader", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            try:
+                file_path = self._queue.get(timeout=self.IDLE_TIMEOUT_SEC)
+            except queue.Empty:
+                with self._lock:
+                    if self._queue.empty(): # request() と競合していなければ終了
+                        self._worker = None
+                        return
+                continue
+            if file_path is None or not self._is_running:
+                return
+            q_image = decode_reduced_qimage(file_path, self.max_size)
+            with self._lock:
+                self._pending.discard(file_path)
+            try:
+                self.thumbnailReady.emit(file_path, q_image)
+            except RuntimeError: # 受信側のQObjectが既に破棄されている
+                return
+
+    def stop(self):
+        with self._lock:
+            self._is_running = False
+            self._queue.put(None)
+
+
+class WCOutputPreviewModel(QAbstractTableModel):
+    """ワイルドカード出力プレビューの行データ。
+    1行あたりファイルパス・コメント・プロンプトの文字列だけを保持し、サムネイルは表示時に要求して上限付きで保持する。
+    """
+    COLUMN_THUMBNAIL, COLUMN_FILE, COLUMN_COMMENT, COLUMN_PROMPT = range(4)
+    HEADERS = ["", "ファイル名", "コメント", "プロンプト"]
+    THUMBNAIL_CACHE_SIZE = 256
+
+    def __init__(self, file_paths, comments, prompts, thumbnail_loader=None, parent=None):
+        super().__init__(parent)
+        self._file_paths = list(file_paths)
+        self._comments = list(comments)
+        self._prompts = list(prompts)
+        self._row_by_path = {path: row for row, path in enumerate(self._file_paths)}
+        self._thumbnails = OrderedDict() # file_path -> QPixmap (LRU)
+        self._failed_thumbnails = set()
+        self.thumbnail_loader = thumbnail_loader
+        if thumbnail_loader is not None:
+            thumbnail_loader.thumbnailReady.connect(self._on_thumbnail_ready)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._file_paths)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() in (self.COLUMN_COMMENT, self.COLUMN_PROMPT):
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if column == self.COLUMN_THUMBNAIL:
+            if role == Qt.ItemDataRole.DecorationRole:
+                return self._thumbnail_for_row(row)
+            if role == Qt.ItemDataRole.DisplayRole and self._file_paths[row] in self._failed_thumbnails:
+                return "読込失敗"
+            return None
+        if role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole, Qt.ItemDataRole.ToolTipRole):
+            return None
+        if column == self.COLUMN_FILE:
+            return self._file_paths[row].replace("\\", "/").rsplit("/", 1)[-1]
+        if column == self.COLUMN_COMMENT:
+            return self._comments[row]
+        if column == self.COLUMN_PROMPT:
+            return self._prompts[row]
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        if index.column() == self.COLUMN_COMMENT:
+            self._comments[index.row()] = value or ""
+        elif index.column() == self.COLUMN_PROMPT:
+            self._prompts[index.row()] = value or ""
+        else:
+            return False
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole])
+        return True
+
+    def comment(self, row):
+        return self._comments[row]
+
+    def prompt(self, row):
+        return self._prompts[row]
+
+    def replace_all(self, search, replace):
+        """全行のコメントとプロンプトを置換し、変更されたフィールド数を返す。"""
+        count = 0
+        for values in (self._comments, self._prompts):
+            for row, original in enumerate(values):
+                replaced = original.replace(search, replace)
+                if replaced != original:
+                    values[row] = replaced
+                    count += 1
+        if count and self._file_paths:
+            self.dataChanged.emit(self.index(0, self.COLUMN_COMMENT), self.index(len(self._file_paths) - 1, self.COLUMN_PROMPT))
+        return count
+
+    def _thumbnail_for_row(self, row):
+        file_path = self._file_paths[row]
+        pixmap = self._thumbnails.get(file_path)
+        if pixmap is not None:
+            self._thumbnails.move_to_end(file_path)
+            return pixmap
+        if self.thumbnail_loader is not None and file_path not in self._failed_thumbnails:
+            self.thumbnail_loader.request(file_path) # 表示された行だけ読み込む
+        return None
+
+    def _on_thumbnail_ready(self, file_path, q_image):
+        row = self._row_by_path.get(file_path)
+        if row is None:
+            return
+        if q_image is None or q_image.isNull():
+            self._failed_thumbnails.add(file_path)
+        else:
+            self._thumbnails[file_path] = QPixmap.fromImage(q_image)
+            while len(self._thumbnails) > self.THUMBNAIL_CACHE_SIZE:
+                self._thumbnails.popitem(last=False)
+        index = self.index(row, self.COLUMN_THUMBNAIL)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole, Qt.ItemDataRole.DisplayRole])
+
+
+class PromptTextDelegate(QStyledItemDelegate):
+    """プロンプト列の編集用に複数行エディタを、編集開始時にだけ作成するデリゲート。"""
+
+    def createEditor(self, parent, option, index):
+        editor = QPlainTextEdit(parent)
+        editor.setTabChangesFocus(True)
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setPlainText(index.data(Qt.ItemDataRole.EditRole) or "")
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.toPlainText(), Qt.ItemDataRole.EditRole)
@@ -0,0 +1,74 @@
+import sys
+import os
+import tempfile
+import time
+import unittest
+
+from PyQt6.QtWidgets import QApplication
+
+# Add project root to sys.path to find src module
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from PIL import Image
+from src.animation_player import AnimationPlayer, FrameDecoderThread, is_animated_webp
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+class TestAnimationPlayer(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.animated_path = os.path.join(self.test_dir.name, "anim.webp")
+        frames = [Image.new("RGB", (32, 32), (i * 20, 0, 0)) for i in range(12)]
+        frames[0].save(self.animated_path, save_all=True, append_images=frames[1:], duration=20, loop=0)
+        self.static_path = os.path.join(self.test_dir.name, "static.webp")
+        Image.new("RGBA", (8, 8)).save(self.static_path) # VP8X (アルファ) だがアニメーションなし
+        self.png_path = os.path.join(self.test_dir.name, "image.png")
+        Image.new("RGB", (8, 8)).save(self.png_path)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_is_animated_webp_reads_vp8x_flags(self):
+        self.assertTrue(is_animated_webp(self.animated_path))
+        self.assertFalse(is_animated_webp(self.static_path))
+        self.assertFalse(is_animated_webp(self.png_path))
+        self.assertFalse(is_animated_webp(os.path.join(self.test_dir.name, "missing.webp")))
+
+    def test_decoder_buffer_is_bounded(self):
+        decoder = FrameDecoderThread(self.animated_path, buffer_size=3)
+        decoder.start()
+        deadline = time.time() + 5
+        while decoder.buffered_count() < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        self.assertEqual(decoder.buffered_count(), 3) # 12フレームあっても3つまでしか保持しない
+        first = decoder.take_frame()
+        self.assertEqual(first[0], 0)
+        self.assertEqual(first[2], 20)
+        decoder.stop()
+        self.assertTrue(decoder.wait(5000))
+
+    def test_player_emits_frames_in_order(self):
+        player = AnimationPlayer(self.animated_path, buffer_size=2)
+        self.assertTrue(player.isValid())
+        received = []
+        player.frameChanged.connect(received.append)
+        player.start()
+        deadline = time.time() + 5
+        while len(received) < 4 and time.time() < deadline:
+            app.processEvents()
+            time.sleep(0.005)
+        player.stop()
+        self.assertEqual(received[:4], [0, 1, 2, 3])
+        self.assertFalse(player.currentPixmap().isNull())
+        self.assertFalse(player.is_running())
+
+    def test_player_invalid_for_static_image(self):
+        self.assertFalse(AnimationPlayer(self.static_path).isValid())
+
+
+if __name__ == '__main__':
+    unittest.main()
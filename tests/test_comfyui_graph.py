@@ -0,0 +1,70 @@
+import unittest
+import os
+import sys
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.comfyui_graph import extract_comfyui_metadata, load_json
+
+# API 形式 ('prompt' チャンク): LoRA を挟んだモデル、Primitive の seed、Hires の2パス目
+API_GRAPH = {
+    "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "SDXL\\animagine-xl-3.1.safetensors"}},
+    "10": {"class_type": "LoraLoader", "inputs": {"lora_name": "detail_tweaker.safetensors", "model": ["4", 0], "clip": ["4", 1]}},
+    "6": {"class_type": "CLIPTextEncode", "inputs": {"text": "1girl, smile", "clip": ["10", 1]}},
+    "7": {"class_type": "CLIPTextEncode", "inputs": {"text": "lowres", "clip": ["10", 1]}},
+    "8": {"class_type": "ConditioningCombine", "inputs": {"conditioning_1": ["6", 0], "conditioning_2": ["9", 0]}},
+    "9": {"class_type": "CLIPTextEncode", "inputs": {"text": ["15", 0], "clip": ["10", 1]}},
+    "15": {"class_type": "PrimitiveString", "inputs": {"value": "outdoors"}},
+    "16": {"class_type": "PrimitiveInt", "inputs": {"value": 4242}},
+    "5": {"class_type": "EmptyLatentImage", "inputs": {"width": 832, "height": 1216, "batch_size": 1}},
+    "3": {"class_type": "KSampler", "inputs": {"seed": ["16", 0], "steps": 28, "cfg": 5.5, "sampler_name": "euler_ancestral",
+                                               "scheduler": "karras", "denoise": 1.0, "model": ["10", 0],
+                                               "positive": ["8", 0], "negative": ["7", 0], "latent_image": ["5", 0]}},
+    "12": {"class_type": "KSampler", "inputs": {"seed": 1, "steps": 10, "cfg": 5.5, "sampler_name": "euler", "scheduler": "normal",
+                                                "denoise": 0.4, "model": ["10", 0], "positive": ["8", 0],
+                                                "negative": ["7", 0], "latent_image": ["3", 0]}},
+}
+
+# UI 形式 ('workflow' チャンク): widgets_values は名前なし、入力はリンク ID
+WORKFLOW_GRAPH = {
+    "nodes": [
+        {"id": 4, "type": "CheckpointLoaderSimple", "widgets_values": ["model.ckpt"]},
+        {"id": 6, "type": "CLIPTextEncode", "inputs": [{"name": "clip", "link": 3}], "widgets_values": ["a cat"]},
+        {"id": 7, "type": "CLIPTextEncode", "inputs": [{"name": "clip", "link": 5}], "widgets_values": ["blurry"]},
+        {"id": 5, "type": "EmptyLatentImage", "widgets_values": [512, 768, 1]},
+        {"id": 3, "type": "KSampler",
+         "inputs": [{"name": "model", "link": 1}, {"name": "positive", "link": 4},
+                    {"name": "negative", "link": 6}, {"name": "latent_image", "link": 2}],
+         "widgets_values": [123, "randomize", 20, 7, "dpmpp_2m", "normal", 1]},
+    ],
+    "links": [[1, 4, 0, 3, 0, "MODEL"], [2, 5, 0, 3, 3, "LATENT"], [3, 4, 1, 6, 0, "CLIP"],
+              [4, 6, 0, 3, 1, "CONDITIONING"], [5, 4, 1, 7, 0, "CLIP"], [6, 7, 0, 3, 2, "CONDITIONING"]],
+}
+
+
+class TestComfyUIGraph(unittest.TestCase):
+    def test_api_graph(self):
+        metadata = extract_comfyui_metadata(API_GRAPH)
+        self.assertEqual(metadata['positive_prompt'], "1girl, smile, outdoors")
+        self.assertEqual(metadata['negative_prompt'], "lowres")
+        self.assertEqual(metadata['generation_info'],
+                         'Steps: 28, Sampler: euler_ancestral, Schedule type: karras, CFG scale: 5.5, Seed: 4242, '
+                         'Size: 832x1216, Model: animagine-xl-3.1, Denoising strength: 0.4, Loras: "detail_tweaker"')
+
+    def test_workflow_graph(self):
+        metadata = extract_comfyui_metadata(WORKFLOW_GRAPH)
+        self.assertEqual(metadata['positive_prompt'], "a cat")
+        self.assertEqual(metadata['negative_prompt'], "blurry")
+        self.assertEqual(metadata['generation_info'],
+                         "Steps: 20, Sampler: dpmpp_2m, Schedule type: normal, CFG scale: 7, Seed: 123, Size: 512x768, Model: model")
+
+    def test_graph_without_sampler(self):
+        self.assertIsNone(extract_comfyui_metadata({"1": {"class_type": "LoadImage", "inputs": {"image": "a.png"}}}))
+        self.assertIsNone(extract_comfyui_metadata([1, 2]))
+        with self.assertRaises(ValueError):
+            load_json("{not json")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,6 +13,7 @@ from src.full_image_dialog import FullImageDialog # To mock its methods
 from src.image_metadata_dialog import ImageMetadataDialog # To mock its methods
 from src.drop_window import DropWindow # To mock its methods
 from src.wc_creator_dialog import WCCreatorDialog # To mock its methods
+from src.proxy_path_sequence import ProxyPathSequence
 from src.constants import (
     PREVIEW_MODE_FIT, PREVIEW_MODE_ORIGINAL_ZOOM,
     RIGHT_CLICK_ACTION_METADATA, RIGHT_CLICK_ACTION_MENU,
@@ -63,7 +64,7 @@ class TestDialogManager(unittest.TestCase):
 
         self.dialog_manager = DialogManager(self.mock_main_window)
 
-    @patch('src.dialog_manager.SettingsDialog') # Patch SettingsDialog where it's imported in dialog_manager
+    @patch('src.settings_dialog.SettingsDialog') # Patch SettingsDialog where it's imported in dialog_manager
     def test_open_settings_dialog_accepted_no_changes(self, MockSettingsDialog):
         """Test opening settings dialog and accepting with no changes."""
         mock_dialog_instance = MockSettingsDialog.return_value
@@ -76,6 +77,8 @@ class TestDialogManager(unittest.TestCase):
         mock_dialog_instance.get_selected_thumbnail_size.return_value = self.mock_main_window.current_thumbnail_size
         mock_dialog_instance.get_selected_initial_folder_sort_setting.return_value = self.mock_main_window.initial_folder_sort_setting # ★★★ 追加 ★★★
         mock_dialog_instance.get_selected_delete_empty_folders_setting.return_value = self.mock_main_window.delete_empty_folders_enabled # ★★★ 追加 ★★★
+        mock_dialog_instance.get_selected_double_click_action.return_value = self.mock_main_window.double_click_action
+        mock_dialog_instance.get_selected_copy_strategy.return_value = self.mock_main_window.copy_strategy
 
         self.dialog_manager.open_settings_dialog()
 
@@ -87,13 +90,15 @@ class TestDialogManager(unittest.TestCase):
             current_wc_comment_format=self.mock_main_window.wc_creator_comment_format,
             current_initial_folder_sort_setting=self.mock_main_window.initial_folder_sort_setting, # ★★★ 追加 ★★★
             current_delete_empty_folders_setting=self.mock_main_window.delete_empty_folders_enabled, # ★★★ 追加 ★★★
+            current_double_click_action=self.mock_main_window.double_click_action,
+            current_copy_strategy=self.mock_main_window.copy_strategy,
             parent=self.mock_main_window
         )
         mock_dialog_instance.exec.assert_called_once()
         self.mock_main_window._write_app_settings_file.assert_called_once() # Settings are always written on OK
         self.mock_main_window.apply_thumbnail_size_change.assert_not_called() # Size didn't change
 
-    @patch('src.dialog_manager.SettingsDialog')
+    @patch('src.settings_dialog.SettingsDialog')
     @patch('src.dialog_manager.QMessageBox.question') # Patch QMessageBox.question directly
     def test_open_settings_dialog_accepted_thumbnail_size_changed(self, mock_qmessagebox_question, MockSettingsDialog):
         """Test changing thumbnail size and confirming."""
@@ -122,7 +127,7 @@ class TestDialogManager(unittest.TestCase):
         self.assertEqual(self.mock_main_window.app_settings[DELETE_EMPTY_FOLDERS_ENABLED], self.mock_main_window.delete_empty_folders_enabled) # ★★★ 追加 ★★★
         self.mock_main_window._write_app_settings_file.assert_called_once()
 
-    @patch('src.dialog_manager.SettingsDialog')
+    @patch('src.settings_dialog.SettingsDialog')
     def test_open_settings_dialog_accepted_initial_folder_sort_changed(self, MockSettingsDialog):
         """Test changing initial folder sort setting."""
         mock_dialog_instance = MockSettingsDialog.return_value
@@ -152,7 +157,7 @@ class TestDialogManager(unittest.TestCase):
         # Reset mock_main_window's setting for subsequent tests if necessary
         self.mock_main_window.initial_folder_sort_setting = SORT_BY_LAST_SELECTED
 
-    @patch('src.dialog_manager.SettingsDialog')
+    @patch('src.settings_dialog.SettingsDialog')
     def test_open_settings_dialog_cancelled(self, MockSettingsDialog):
         """Test cancelling the settings dialog."""
         mock_dialog_instance = MockSettingsDialog.return_value
@@ -170,9 +175,13 @@ class TestDialogManager(unittest.TestCase):
         """Helper to set up mocks for open_full_image_dialog tests."""
         mock_proxy_index = MagicMock()
         mock_proxy_index.isValid.return_value = True
+        mock_proxy_index.row.return_value = 0
 
         mock_source_index = MagicMock()
         # self.mock_ui_manager.filter_proxy_model.mapToSource.return_value = mock_source_index # Overwritten by side_effect below
+        self.mock_ui_manager.visible_path_sequence.side_effect = lambda: ProxyPathSequence(
+            self.mock_ui_manager.filter_proxy_model, self.mock_ui_manager.source_thumbnail_model
+        )
 
         if item_exists:
             mock_item = MagicMock()
@@ -212,7 +221,7 @@ class TestDialogManager(unittest.TestCase):
 
         return mock_proxy_index
 
-    @patch('src.dialog_manager.FullImageDialog')
+    @patch('src.full_image_dialog.FullImageDialog')
     def test_open_full_image_dialog_new_instance(self, MockFullImageDialog):
         """Test opening a new FullImageDialog instance."""
         mock_proxy_idx = self._prepare_mocks_for_full_image_dialog(file_path="test/img.jpg", visible_paths_count=1)
@@ -224,8 +233,8 @@ class TestDialogManager(unittest.TestCase):
         MockFullImageDialog.assert_called_once()
         call_args = MockFullImageDialog.call_args[0]
         call_kwargs = MockFullImageDialog.call_args[1] 
-        self.assertIsInstance(call_args[0], list) 
-        self.assertEqual(call_args[0], ["test/img.jpg"]) 
+        self.assertIsInstance(call_args[0], ProxyPathSequence)
+        self.assertEqual(list(call_args[0]), ["test/img.jpg"]) 
         self.assertEqual(call_args[1], 0)  
         self.assertEqual(call_kwargs['preview_mode'], self.mock_main_window.image_preview_mode) 
         self.assertIs(call_kwargs['parent'], self.mock_main_window) 
@@ -270,7 +279,7 @@ class TestDialogManager(unittest.TestCase):
 
         return mock_proxy_index
 
-    @patch('src.dialog_manager.ImageMetadataDialog')
+    @patch('src.image_metadata_dialog.ImageMetadataDialog')
     @patch('src.dialog_manager.QApplication') 
     def test_open_metadata_dialog_new_instance_from_item(self, MockQApplication, MockImageMetadataDialog):
         """Test opening a new ImageMetadataDialog using metadata from the item."""
@@ -293,7 +302,7 @@ class TestDialogManager(unittest.TestCase):
         mock_dialog_instance.show.assert_called_once()
         self.assertIs(self.dialog_manager.metadata_dialog_instance, mock_dialog_instance)
 
-    @patch('src.dialog_manager.ImageMetadataDialog')
+    @patch('src.image_metadata_dialog.ImageMetadataDialog')
     @patch('src.dialog_manager.QApplication')
     def test_open_metadata_dialog_existing_instance_update(self, MockQApplication, MockImageMetadataDialog):
         """Test updating an existing ImageMetadataDialog instance."""
@@ -328,7 +337,7 @@ class TestDialogManager(unittest.TestCase):
 
     # --- Tests for DropWindow interaction ---
 
-    @patch('src.dialog_manager.DropWindow')
+    @patch('src.drop_window.DropWindow')
     def test_toggle_drop_window_new_instance_show(self, MockDropWindow):
         """Test toggling DropWindow when it's not yet created (shows it)."""
         mock_drop_window_instance = MockDropWindow.return_value
@@ -341,7 +350,7 @@ class TestDialogManager(unittest.TestCase):
         mock_drop_window_instance.show.assert_called_once()
         self.assertIs(self.dialog_manager.drop_window_instance, mock_drop_window_instance)
 
-    @patch('src.dialog_manager.DropWindow')
+    @patch('src.drop_window.DropWindow')
     def test_toggle_drop_window_existing_instance_hide(self, MockDropWindow):
         """Test toggling DropWindow when it exists and is visible (hides it)."""
         mock_drop_window_instance = MagicMock(spec=DropWindow)
@@ -353,7 +362,7 @@ class TestDialogManager(unittest.TestCase):
         MockDropWindow.assert_not_called() # Should not create a new one
         mock_drop_window_instance.hide.assert_called_once()
 
-    @patch('src.dialog_manager.DropWindow')
+    @patch('src.drop_window.DropWindow')
     def test_toggle_drop_window_existing_instance_show(self, MockDropWindow):
         """Test toggling DropWindow when it exists and is hidden (shows it)."""
         mock_drop_window_instance = MagicMock(spec=DropWindow)
@@ -440,7 +449,7 @@ class TestDialogManager(unittest.TestCase):
         self.mock_ui_manager.source_thumbnail_model.itemFromIndex = MagicMock(side_effect=lambda s_idx: item_from_index_dict.get(s_idx))
         self.mock_ui_manager.thumbnail_view.selectionModel.return_value.selectedIndexes.return_value = mock_selected_proxy_indexes
 
-    @patch('src.dialog_manager.WCCreatorDialog')
+    @patch('src.wc_creator_dialog.WCCreatorDialog')
     @patch('src.dialog_manager.QMessageBox') 
     @patch('src.metadata_utils.extract_image_metadata') 
     def test_open_wc_creator_dialog_with_selection(self, mock_extract_metadata, MockQMessageBox, MockWCCreatorDialog):
@@ -462,7 +471,7 @@ class TestDialogManager(unittest.TestCase):
         self.assertIs(call_args[3], self.mock_main_window) 
         MockWCCreatorDialog.return_value.exec.assert_called_once()
 
-    @patch('src.dialog_manager.WCCreatorDialog') 
+    @patch('src.wc_creator_dialog.WCCreatorDialog') 
     @patch('src.dialog_manager.QMessageBox.information') 
     def test_open_wc_creator_dialog_no_selection(self, mock_qmessagebox_info, MockWCCreatorDialog):
         """Test opening WCCreatorDialog when no items are selected."""
@@ -475,7 +484,7 @@ class TestDialogManager(unittest.TestCase):
         )
         MockWCCreatorDialog.assert_not_called() 
 
-    @patch('src.dialog_manager.WCCreatorDialog')
+    @patch('src.wc_creator_dialog.WCCreatorDialog')
     @patch('src.metadata_utils.extract_image_metadata')
     def test_open_wc_creator_dialog_metadata_extraction_fallback(self, mock_extract_metadata, MockWCCreatorDialog):
         """Test that metadata is extracted if not on item or in cache."""
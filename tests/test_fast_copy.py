@@ -0,0 +1,73 @@
+import unittest
+import errno
+import os
+import sys
+import tempfile
+from unittest.mock import patch, MagicMock
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import fast_copy
+from src.fast_copy import (copy_file, methods_for_strategy, COPY_METHOD_REFLINK, COPY_METHOD_HARDLINK,
+                           COPY_METHOD_COPY_FILE_RANGE, COPY_METHOD_FULL)
+from src.constants import COPY_STRATEGY_AUTO, COPY_STRATEGY_HARDLINK, COPY_STRATEGY_FULL
+
+
+class TestFastCopy(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.src_path = os.path.join(self.test_dir.name, "image.png")
+        with open(self.src_path, "wb") as f:
+            f.write(os.urandom(200 * 1024))
+        os.utime(self.src_path, (1_600_000_000, 1_600_000_000))
+        self.dest_path = os.path.join(self.test_dir.name, "001_image.png")
+        fast_copy._unsupported_methods.clear()
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+        fast_copy._unsupported_methods.clear()
+
+    def _assert_same_content(self):
+        with open(self.src_path, "rb") as a, open(self.dest_path, "rb") as b:
+            self.assertEqual(a.read(), b.read())
+
+    def test_strategy_method_order(self):
+        self.assertEqual(methods_for_strategy(COPY_STRATEGY_AUTO), (COPY_METHOD_REFLINK, COPY_METHOD_COPY_FILE_RANGE, COPY_METHOD_FULL))
+        self.assertEqual(methods_for_strategy(COPY_STRATEGY_HARDLINK)[0], COPY_METHOD_HARDLINK)
+        self.assertEqual(methods_for_strategy(COPY_STRATEGY_FULL), (COPY_METHOD_FULL,))
+        self.assertEqual(methods_for_strategy("unknown"), methods_for_strategy(COPY_STRATEGY_AUTO))
+
+    def test_auto_copy_preserves_content_and_mtime(self):
+        method = copy_file(self.src_path, self.dest_path, COPY_STRATEGY_AUTO)
+        self.assertIn(method, methods_for_strategy(COPY_STRATEGY_AUTO))
+        self._assert_same_content()
+        self.assertEqual(int(os.stat(self.dest_path).st_mtime), 1_600_000_000)
+
+    def test_full_copy(self):
+        self.assertEqual(copy_file(self.src_path, self.dest_path, COPY_STRATEGY_FULL), COPY_METHOD_FULL)
+        self._assert_same_content()
+
+    @unittest.skipUnless(hasattr(os, "link"), "hardlinks not available")
+    def test_hardlink_replaces_existing_destination(self):
+        with open(self.dest_path, "w") as f:
+            f.write("old")
+        self.assertEqual(copy_file(self.src_path, self.dest_path, COPY_STRATEGY_HARDLINK), COPY_METHOD_HARDLINK)
+        self.assertTrue(os.path.samefile(self.src_path, self.dest_path))
+
+    def test_falls_back_and_remembers_unsupported_method(self):
+        failing_reflink = MagicMock(side_effect=OSError(errno.EOPNOTSUPP, "not supported"))
+        with patch.dict(fast_copy._METHOD_FUNCTIONS, {COPY_METHOD_REFLINK: failing_reflink,
+                                                      COPY_METHOD_COPY_FILE_RANGE: fast_copy._full_copy}):
+            self.assertEqual(copy_file(self.src_path, self.dest_path), COPY_METHOD_COPY_FILE_RANGE)
+            self.assertEqual(copy_file(self.src_path, self.dest_path), COPY_METHOD_COPY_FILE_RANGE)
+        failing_reflink.assert_called_once() # 2回目は非対応として記録済みのため試さない
+        self._assert_same_content()
+
+    def test_last_method_error_is_raised(self):
+        with self.assertRaises(OSError):
+            copy_file(os.path.join(self.test_dir.name, "missing.png"), self.dest_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
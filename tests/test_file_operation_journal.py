@@ -0,0 +1,123 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.file_operation_journal import (FileOperationJournal, load_pending_journals, read_journal,
+                                        resume_journal, rollback_journal)
+
+
+class TestFileOperationJournal(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.journal_dir = os.path.join(self.test_dir.name, "journal")
+        self.source_folder = os.path.join(self.test_dir.name, "source")
+        self.dest_folder = os.path.join(self.test_dir.name, "dest")
+        os.makedirs(self.source_folder)
+        os.makedirs(self.dest_folder)
+        self.pairs = []
+        for n in range(3):
+            src_path = os.path.join(self.source_folder, f"image{n}.png")
+            with open(src_path, "w") as f:
+                f.write(f"image{n}")
+            self.pairs.append((src_path, os.path.join(self.dest_folder, f"image{n}.png")))
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def _interrupted_move(self, completed_count):
+        """completed_count 件を移動した時点で中断されたジャーナルを作る (close されないまま残る)。"""
+        journal = FileOperationJournal.create(self.journal_dir, "move", self.dest_folder, self.pairs)
+        for index in range(completed_count):
+            os.rename(*self.pairs[index])
+            journal.mark_done(index)
+        journal._file.close()
+        return journal
+
+    def test_close_removes_journal(self):
+        journal = FileOperationJournal.create(self.journal_dir, "copy", self.dest_folder, self.pairs)
+        self.assertEqual(len(load_pending_journals(self.journal_dir)), 1)
+        journal.close()
+        self.assertEqual(load_pending_journals(self.journal_dir), [])
+
+    def test_interrupted_journal_is_loaded(self):
+        self._interrupted_move(2)
+        journals = load_pending_journals(self.journal_dir)
+        self.assertEqual(len(journals), 1)
+        self.assertEqual(journals[0].operation_type, "move")
+        self.assertEqual(journals[0].entries, self.pairs)
+        self.assertEqual(journals[0].done_indices, {0, 1})
+        self.assertEqual([src for _, src, _ in journals[0].pending_entries()], [self.pairs[2][0]])
+
+    def test_truncated_last_line_is_ignored(self):
+        journal = self._interrupted_move(1)
+        with open(journal.path, "a", encoding="utf-8") as f:
+            f.write('{"type": "done", "ind') # 書き込み途中で中断
+        self.assertEqual(read_journal(journal.path).done_indices, {0})
+
+    def test_updated_destinations_are_loaded(self):
+        journal = FileOperationJournal.create(self.journal_dir, "copy", self.dest_folder, self.pairs)
+        renamed = os.path.join(self.dest_folder, "renamed.png")
+        journal.update_destinations({2: renamed})
+        journal._file.close()
+        self.assertEqual(read_journal(journal.path).entries, self.pairs[:2] + [(self.pairs[2][0], renamed)])
+
+    def test_resume_move_completes_remaining_pairs(self):
+        self._interrupted_move(1)
+        os.rename(*self.pairs[1]) # 移動後、完了を記録する前に中断された組
+        result = resume_journal(load_pending_journals(self.journal_dir)[0])
+        self.assertEqual(result['errors'], [])
+        self.assertEqual(sorted(result['completed_files']), sorted(self.pairs))
+        self.assertEqual(os.listdir(self.source_folder), [])
+        self.assertEqual(sorted(os.listdir(self.dest_folder)), ["image0.png", "image1.png", "image2.png"])
+        self.assertFalse(os.listdir(self.journal_dir))
+
+    def test_rollback_move_restores_sources(self):
+        self._interrupted_move(2)
+        result = rollback_journal(load_pending_journals(self.journal_dir)[0])
+        self.assertEqual(result['errors'], [])
+        self.assertEqual(len(result['restored_files']), 2)
+        self.assertEqual(sorted(os.listdir(self.source_folder)), ["image0.png", "image1.png", "image2.png"])
+        self.assertEqual(os.listdir(self.dest_folder), [])
+        self.assertFalse(os.listdir(self.journal_dir))
+
+    def test_rollback_copy_removes_created_files(self):
+        journal = FileOperationJournal.create(self.journal_dir, "copy", self.dest_folder, self.pairs[:2])
+        shutil.copy2(*self.pairs[0])
+        journal.mark_done(0)
+        with open(self.pairs[1][1], "w") as f:
+            f.write("imag") # 途中まで書かれたコピーは、コピーしたファイルと確認できないので残して報告する
+        journal._file.close()
+        result = rollback_journal(load_pending_journals(self.journal_dir)[0])
+        self.assertEqual(len(result['errors']), 1)
+        self.assertEqual(os.listdir(self.dest_folder), ["image1.png"])
+        self.assertEqual(len(os.listdir(self.source_folder)), 3)
+
+    def test_resume_does_not_overwrite_unrelated_destination(self):
+        self._interrupted_move(1)
+        with open(self.pairs[2][1], "w") as f:
+            f.write("created after the crash")
+        result = resume_journal(load_pending_journals(self.journal_dir)[0])
+        self.assertEqual(len(result['errors']), 1)
+        self.assertEqual(sorted(result['completed_files']), sorted(self.pairs[:2]))
+        self.assertTrue(os.path.exists(self.pairs[2][0])) # 移動元も残す
+        with open(self.pairs[2][1]) as f:
+            self.assertEqual(f.read(), "created after the crash")
+
+    def test_rollback_move_keeps_unrelated_destination(self):
+        self._interrupted_move(1)
+        os.remove(self.pairs[1][0]) # 移動元がなく、移動先に別のファイルがある組
+        with open(self.pairs[1][1], "w") as f:
+            f.write("created after the crash")
+        result = rollback_journal(load_pending_journals(self.journal_dir)[0])
+        self.assertEqual(len(result['errors']), 1)
+        self.assertEqual(result['restored_files'], [(self.pairs[0][1], self.pairs[0][0])])
+        with open(self.pairs[1][1]) as f:
+            self.assertEqual(f.read(), "created after the crash")
+
+if __name__ == '__main__':
+    unittest.main()
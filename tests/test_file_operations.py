@@ -7,10 +7,12 @@ import tempfile
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from unittest.mock import patch, MagicMock, call
+from unittest.mock import patch, MagicMock, call, ANY
 
 # Assuming src is a sibling directory to tests, or PYTHONPATH is set up
-from src.file_operations import FileOperationsWorker, FileOperationSignals, FileOperations
+from src.file_operations import FileOperationsWorker, FileOperationSignals, FileOperations, FileOperationJob
+from src.file_operation_journal import load_pending_journals
+from src.constants import COPY_STRATEGY_HARDLINK
 # We need to mock or define Qt roles if QStandardItem is deeply involved.
 # For now, let's assume we can mock item.data() effectively.
 # If Qt is imported in file_operations, we might need to mock it at a higher level.
@@ -78,7 +80,7 @@ class TestFileOperationsWorker(unittest.TestCase):
             self.assertTrue(os.path.exists(expected_dest_file_path), "Destination file should exist after move.")
 
             # Check signals
-            mock_signals_obj.progress.emit.assert_called_once_with(1, 1)
+            mock_signals_obj.progress.emit.assert_called_once_with(1, 1, ANY, ANY)
             
             expected_finish_dict = {
                 'operation_type': 'move',
@@ -87,6 +89,7 @@ class TestFileOperationsWorker(unittest.TestCase):
                 'errors': [],
                 'status': 'completed',
                 'successfully_moved_src_paths': [self.source_file1_path],
+                'moved_files': [(self.source_file1_path, expected_dest_file_path)],
                 'destination_folder': self.dest_folder
             }
             mock_signals_obj.finished.emit.assert_called_once_with(expected_finish_dict)
@@ -113,7 +116,7 @@ class TestFileOperationsWorker(unittest.TestCase):
             expected_renamed_dest_file_path = os.path.join(self.dest_folder, "file1_1.txt")
             self.assertTrue(os.path.exists(expected_renamed_dest_file_path))
 
-            mock_signals_obj.progress.emit.assert_called_once_with(1, 1)
+            mock_signals_obj.progress.emit.assert_called_once_with(1, 1, ANY, ANY)
             expected_finish_dict = {
                 'operation_type': 'move',
                 'moved_count': 1,
@@ -121,11 +124,116 @@ class TestFileOperationsWorker(unittest.TestCase):
                 'errors': [],
                 'status': 'completed',
                 'successfully_moved_src_paths': [self.source_file1_path],
+                'moved_files': [(self.source_file1_path, expected_renamed_dest_file_path)],
                 'destination_folder': self.dest_folder
             }
             mock_signals_obj.finished.emit.assert_called_once_with(expected_finish_dict)
             mock_signals_obj.error.emit.assert_not_called()
 
+    def test_move_files_batch_collisions_resolved_from_snapshot(self):
+        """同じ名前のファイルを複数移動しても、移動先一覧のスナップショットから連番が振られる。"""
+        for name in ("file1.txt", "file1_1.txt"):
+            with open(os.path.join(self.dest_folder, name), "w") as f:
+                f.write("existing")
+        other_folder = os.path.join(self.test_dir.name, "other")
+        os.makedirs(other_folder)
+        source_file2_path = os.path.join(other_folder, "file1.txt")
+        with open(source_file2_path, "w") as f:
+            f.write("another file1")
+        missing_path = os.path.join(self.source_folder, "missing.txt")
+        source_paths = [self.source_file1_path, missing_path, source_file2_path]
+
+        with patch('src.file_operations.FileOperationSignals') as MockSignalsInstance, \
+             patch('src.file_operations.os.path.exists', side_effect=AssertionError("exists() probe should not be used")):
+            mock_signals_obj = MockSignalsInstance.return_value
+            worker = FileOperationsWorker("move", source_paths, self.dest_folder)
+            worker.run()
+
+            result = mock_signals_obj.finished.emit.call_args[0][0]
+            self.assertEqual(result['moved_count'], 2)
+            self.assertEqual(result['successfully_moved_src_paths'], [self.source_file1_path, source_file2_path])
+            self.assertEqual(result['renamed_files'], [{'original': 'file1.txt', 'new': 'file1_2.txt'},
+                                                       {'original': 'file1.txt', 'new': 'file1_3.txt'}])
+            self.assertEqual(result['errors'], ["Source file not found: missing.txt"])
+            self.assertEqual(mock_signals_obj.progress.emit.call_args_list[-1].args[:2], (3, 3)) # 最終状態は必ず通知される
+        with open(os.path.join(self.dest_folder, "file1_3.txt")) as f:
+            self.assertEqual(f.read(), "another file1")
+
+    def test_move_files_cross_device_uses_thread_pool(self):
+        """別デバイス扱いのファイルはスレッドプールの shutil.move で移動され、結果は元の順序で返る。"""
+        source_paths = [self.source_file1_path]
+        for n in range(2, 6):
+            path = os.path.join(self.source_folder, f"file{n}.txt")
+            with open(path, "w") as f:
+                f.write(f"file{n}")
+            source_paths.append(path)
+        real_stat = os.stat
+
+        class FakeStat:
+            def __init__(self, st_dev):
+                self.st_dev = st_dev
+
+        def fake_stat(path, *args, **kwargs):
+            result = real_stat(path, *args, **kwargs)
+            if os.path.dirname(path) == self.source_folder:
+                return FakeStat(result.st_dev + 1) # 移動元を別デバイスに見せる
+            return result
+
+        with patch('src.file_operations.FileOperationSignals') as MockSignalsInstance, \
+             patch('src.file_operations.os.stat', side_effect=fake_stat), \
+             patch('src.file_operations._rename_or_move', side_effect=AssertionError("rename should not be used")):
+            mock_signals_obj = MockSignalsInstance.return_value
+            worker = FileOperationsWorker("move", source_paths, self.dest_folder)
+            worker.run()
+
+            result = mock_signals_obj.finished.emit.call_args[0][0]
+            self.assertEqual(result['status'], 'completed')
+            self.assertEqual(result['moved_count'], 5)
+            self.assertEqual(result['successfully_moved_src_paths'], source_paths)
+            self.assertEqual(mock_signals_obj.progress.emit.call_args_list[-1].args[:2], (5, 5))
+        self.assertEqual(sorted(os.listdir(self.dest_folder)), [f"file{n}.txt" for n in range(1, 6)])
+        self.assertEqual(os.listdir(self.source_folder), [])
+
+    def test_move_files_journal_written_before_move_and_removed_after(self):
+        """ジャーナルには移動前に予定の組が記録され、完了後に削除される。"""
+        journal_dir = os.path.join(self.test_dir.name, "journal")
+        journal_snapshots = []
+
+        def record_journal(src_path, dest_path):
+            journal_snapshots.append(load_pending_journals(journal_dir))
+            os.rename(src_path, dest_path)
+
+        with patch('src.file_operations.FileOperationSignals') as MockSignalsInstance, \
+             patch('src.file_operations._rename_or_move', side_effect=record_journal):
+            mock_signals_obj = MockSignalsInstance.return_value
+            worker = FileOperationsWorker("move", [self.source_file1_path], self.dest_folder, journal_dir=journal_dir)
+            worker.run()
+
+        dest_path = os.path.join(self.dest_folder, "file1.txt")
+        self.assertEqual(len(journal_snapshots), 1)
+        self.assertEqual(journal_snapshots[0][0].entries, [(self.source_file1_path, dest_path)])
+        self.assertEqual(journal_snapshots[0][0].done_indices, set())
+        self.assertEqual(os.listdir(journal_dir), [])
+        self.assertEqual(mock_signals_obj.finished.emit.call_args[0][0]['moved_files'], [(self.source_file1_path, dest_path)])
+
+    def test_move_files_cancelled_reports_moved_files(self):
+        """キャンセル時も移動済みのファイルを返す (呼び出し側で一覧から取り除くため)。"""
+        source_file2_path = os.path.join(self.source_folder, "file2.txt")
+        with open(source_file2_path, "w") as f:
+            f.write("This is file2.")
+
+        with patch('src.file_operations.FileOperationSignals') as MockSignalsInstance:
+            mock_signals_obj = MockSignalsInstance.return_value
+            worker = FileOperationsWorker("move", [self.source_file1_path, source_file2_path], self.dest_folder)
+            mock_signals_obj.progress.emit.side_effect = lambda *args: worker.stop() # 1件目の完了後にキャンセル
+            worker.run()
+
+            result = mock_signals_obj.finished.emit.call_args[0][0]
+            self.assertEqual(result['status'], 'cancelled')
+            self.assertEqual(result['successfully_moved_src_paths'], [self.source_file1_path])
+            self.assertEqual(result['moved_files'], [(self.source_file1_path, os.path.join(self.dest_folder, "file1.txt"))])
+        self.assertTrue(os.path.exists(source_file2_path))
+
     # --- Tests for _copy_files ---
 
     def _create_mock_qstandard_item(self, file_path, selection_order):
@@ -160,12 +268,13 @@ class TestFileOperationsWorker(unittest.TestCase):
             self.assertTrue(os.path.exists(expected_dest_file_path), "Destination file should exist after copy.")
             self.assertTrue(os.path.exists(self.source_file1_path), "Source file should still exist after copy.")
 
-            mock_signals_obj.progress.emit.assert_called_once_with(1, 1)
+            mock_signals_obj.progress.emit.assert_called_once_with(1, 1, ANY, ANY)
             expected_finish_dict = {
                 'operation_type': 'copy',
                 'copied_count': 1,
                 'errors': [],
                 'status': 'completed',
+                'copied_files': [(self.source_file1_path, expected_dest_file_path)],
                 'destination_folder': self.dest_folder
             }
             mock_signals_obj.finished.emit.assert_called_once_with(expected_finish_dict)
@@ -197,19 +306,62 @@ class TestFileOperationsWorker(unittest.TestCase):
             self.assertTrue(os.path.exists(expected_dest_file1_path))
             self.assertTrue(os.path.exists(expected_dest_file2_path))
 
-            self.assertEqual(mock_signals_obj.progress.emit.call_count, 2)
-            mock_signals_obj.progress.emit.assert_any_call(1, 2)
-            mock_signals_obj.progress.emit.assert_any_call(2, 2)
+            mock_signals_obj.progress.emit.assert_any_call(1, 2, ANY, ANY) # 最初の通知は間引かれない
+            mock_signals_obj.progress.emit.assert_any_call(2, 2, ANY, 0.0) # 最終状態は必ず通知される
 
             expected_finish_dict = {
                 'operation_type': 'copy',
                 'copied_count': 2,
                 'errors': [],
                 'status': 'completed',
+                'copied_files': [(self.source_file1_path, expected_dest_file1_path), (source_file2_path, expected_dest_file2_path)],
                 'destination_folder': self.dest_folder
             }
             mock_signals_obj.finished.emit.assert_called_once_with(expected_finish_dict)
 
+    def test_copy_files_uses_copy_strategy(self):
+        """設定された複製方法が使われ、連番の付け方は変わらない。"""
+        mock_item1 = self._create_mock_qstandard_item(self.source_file1_path, 1)
+        with open(os.path.join(self.dest_folder, "004_existing.txt"), "w") as f:
+            f.write("Existing numbered file.")
+
+        with patch('src.file_operations.FileOperationSignals') as MockSignalsInstance, \
+             patch('src.file_operations.copy_file', return_value="hardlink") as mock_copy_file:
+            mock_signals_obj = MockSignalsInstance.return_value
+            worker = FileOperationsWorker("copy", None, self.dest_folder, [mock_item1], copy_strategy=COPY_STRATEGY_HARDLINK)
+            worker.run()
+
+            mock_copy_file.assert_called_once_with(self.source_file1_path, os.path.join(self.dest_folder, "005_file1.txt"), COPY_STRATEGY_HARDLINK)
+            self.assertEqual(mock_signals_obj.finished.emit.call_args[0][0]['copied_count'], 1)
+
+    def test_copy_files_failure_leaves_no_numbering_gap(self):
+        """コピーに失敗したファイルの番号は後続のファイルが使い、詰めた移動先はジャーナルにも記録される。"""
+        journal_dir = os.path.join(self.test_dir.name, "journal")
+        source_paths = [os.path.join(self.source_folder, name) for name in ("a.txt", "b.txt", "c.txt")]
+        for path in source_paths:
+            with open(path, "w") as f:
+                f.write(os.path.basename(path))
+        journal_snapshots = []
+
+        def copy_or_fail(src_path, dest_path, copy_strategy):
+            journal_snapshots.append(load_pending_journals(journal_dir)[0].entries)
+            if src_path == source_paths[1]:
+                raise OSError("disk error")
+            shutil.copy2(src_path, dest_path)
+            return "copy2"
+
+        with patch('src.file_operations.FileOperationSignals') as MockSignalsInstance, \
+             patch('src.file_operations.copy_file', side_effect=copy_or_fail):
+            mock_signals_obj = MockSignalsInstance.return_value
+            worker = FileOperationsWorker("copy", source_paths, self.dest_folder, journal_dir=journal_dir)
+            worker.run()
+
+        self.assertEqual(sorted(os.listdir(self.dest_folder)), ["001_a.txt", "002_c.txt"])
+        self.assertEqual(journal_snapshots[2][2], (source_paths[2], os.path.join(self.dest_folder, "002_c.txt")))
+        result = mock_signals_obj.finished.emit.call_args[0][0]
+        self.assertEqual(result['copied_count'], 2)
+        self.assertEqual(len(result['errors']), 1)
+
     def test_copy_files_empty_selection_order(self):
         """Test copy operation with an empty selection order."""
         copy_selection_order = []
@@ -224,6 +376,7 @@ class TestFileOperationsWorker(unittest.TestCase):
                 'copied_count': 0,
                 'errors': [],
                 'status': 'completed',
+                'copied_files': [],
                 'destination_folder': self.dest_folder
             }
             mock_signals_obj.finished.emit.assert_called_once_with(expected_finish_dict)
@@ -239,12 +392,13 @@ class TestFileOperationsWorker(unittest.TestCase):
             worker = FileOperationsWorker("copy", None, self.dest_folder, copy_selection_order)
             worker.run()
 
-            mock_signals_obj.progress.emit.assert_called_once_with(1, 1)
+            mock_signals_obj.progress.emit.assert_called_once_with(1, 1, ANY, ANY)
             expected_finish_dict = {
                 'operation_type': 'copy',
                 'copied_count': 0,
                 'errors': [f"Source file not found or path invalid for item: {os.path.basename(non_existent_path)}"],
                 'status': 'completed',
+                'copied_files': [],
                 'destination_folder': self.dest_folder
             }
             mock_signals_obj.finished.emit.assert_called_once_with(expected_finish_dict)
@@ -294,120 +448,130 @@ class TestFileOperations(unittest.TestCase):
         self.mock_main_window._handle_file_op_error = MagicMock()
         self.file_ops = FileOperations(parent=None) # Initialize with None parent
 
-    @patch('src.file_operations.FileOperationsWorker')
-    @patch('src.file_operations.QThread')
-    def test_start_operation_success(self, MockQThread, MockFileOperationsWorker):
+    def _patch_thread_and_worker(self):
+        """QThread / FileOperationsWorker をジョブごとに別のモックを返すようにパッチする。"""
+        thread_patcher = patch('src.file_operations.QThread', side_effect=lambda parent=None: MagicMock())
+        worker_patcher = patch('src.file_operations.FileOperationsWorker', side_effect=lambda *args: MagicMock())
+        MockQThread = thread_patcher.start()
+        MockWorker = worker_patcher.start()
+        self.addCleanup(thread_patcher.stop)
+        self.addCleanup(worker_patcher.stop)
+        return MockQThread, MockWorker
+
+    def test_start_operation_success(self):
         """Test starting a new file operation successfully."""
-        mock_thread_instance = MockQThread.return_value
-        mock_worker_instance = MockFileOperationsWorker.return_value
-        # Mock the signals object on the worker instance
-        mock_worker_instance.signals = MagicMock(spec=FileOperationSignals)
-
-        op_type = "move"
-        source_paths = ["/path/to/source"]
-        dest_folder = "/path/to/dest"
-
-        # FileOperations は file_op_manager を介して MainWindow のメソッドを呼び出す
-        # file_op_manager のモックを作成し、FileOperations に渡す
+        MockQThread, MockFileOperationsWorker = self._patch_thread_and_worker()
         mock_file_op_manager = MagicMock()
-        with patch.object(self.file_ops, 'file_op_manager', mock_file_op_manager):
-            result = self.file_ops.start_operation(op_type, source_paths, dest_folder)
-
-        self.assertTrue(result)
-        MockFileOperationsWorker.assert_called_once_with(op_type, source_paths, dest_folder, None)
-        mock_worker_instance.moveToThread.assert_called_once_with(mock_thread_instance)
-
-        # Check signal connections
-        mock_worker_instance.signals.progress.connect.assert_called_once_with(mock_file_op_manager._handle_file_op_progress)
-        mock_worker_instance.signals.finished.connect.assert_any_call(mock_file_op_manager._handle_file_op_finished)
-        mock_worker_instance.signals.error.connect.assert_called_once_with(mock_file_op_manager._handle_file_op_error)
-
-        mock_thread_instance.started.connect.assert_called_once_with(mock_worker_instance.run)
-        mock_worker_instance.signals.finished.connect.assert_any_call(self.file_ops._on_worker_finished)
-        mock_thread_instance.start.assert_called_once()
+        file_ops = FileOperations(parent=None, file_op_manager=mock_file_op_manager)
+
+        job_id = file_ops.start_operation("move", ["/path/to/source"], "/path/to/dest")
+
+        self.assertEqual(job_id, 1)
+        MockFileOperationsWorker.assert_called_once_with("move", ["/path/to/source"], "/path/to/dest", None)
+        job = file_ops.job(job_id)
+        self.assertEqual(job.status, "running")
+        job.worker.moveToThread.assert_called_once_with(job.thread)
+        job.worker.signals.progress.connect.assert_called_once_with(job._on_worker_progress)
+        job.worker.signals.finished.connect.assert_called_once_with(job._on_worker_finished)
+        job.worker.signals.error.connect.assert_called_once_with(mock_file_op_manager._handle_file_op_error)
+        job.thread.started.connect.assert_called_once_with(job.worker.run)
+        job.thread.start.assert_called_once()
+        mock_file_op_manager._handle_job_queued.assert_called_once_with(1)
+        mock_file_op_manager._handle_job_started.assert_called_once_with(1)
+
+    def test_start_operation_queues_conflicting_job(self):
+        """実行中の操作と宛先が同じ操作は拒否されずにキューで待ち、前の操作の完了後に開始される。"""
+        MockQThread, MockFileOperationsWorker = self._patch_thread_and_worker()
+        first_id = self.file_ops.start_operation("move", ["/src/a.png"], "/dest")
+        second_id = self.file_ops.start_operation("move", ["/other/b.png"], "/dest")
+
+        self.assertTrue(second_id)
+        self.assertEqual(self.file_ops.job(second_id).status, "queued")
+        self.assertEqual(MockFileOperationsWorker.call_count, 1)
+        self.assertTrue(self.file_ops.has_active_operations())
+
+        finished = []
+        self.file_ops.jobFinished.connect(lambda job_id, result: finished.append((job_id, result)))
+        self.file_ops.job(first_id)._on_worker_finished({'status': 'completed', 'moved_count': 1})
+
+        self.assertEqual(finished[0][0], first_id)
+        self.assertEqual(finished[0][1]['job_id'], first_id)
+        self.assertEqual(finished[0][1]['operation_type'], "move")
+        self.assertIsNone(self.file_ops.job(first_id))
+        self.assertEqual(self.file_ops.job(second_id).status, "running")
+        self.assertEqual(MockFileOperationsWorker.call_count, 2)
+
+    def test_non_conflicting_jobs_run_concurrently_up_to_limit(self):
+        MockQThread, MockFileOperationsWorker = self._patch_thread_and_worker()
+        job_ids = [self.file_ops.start_operation("move", [f"/src{n}/a.png"], f"/dest{n}") for n in range(3)]
+
+        statuses = [self.file_ops.job(job_id).status for job_id in job_ids]
+        self.assertEqual(statuses, ["running", "running", "queued"]) # MAX_CONCURRENT_JOBS = 2
+        self.assertEqual(FileOperations.MAX_CONCURRENT_JOBS, 2)
+
+    def test_copy_job_takes_paths_from_selection_order(self):
+        MockQThread, MockFileOperationsWorker = self._patch_thread_and_worker()
+        item = MagicMock()
+        item.data.side_effect = lambda role: "/src/a.png" if role == USER_ROLE else None
+        self.file_ops.copy_strategy = COPY_STRATEGY_HARDLINK
 
-        # Clean up to allow other tests to run without interference
-        self.file_ops._thread = None
-        self.file_ops._worker = None
+        job_id = self.file_ops.start_operation("copy", None, "/dest", copy_selection_order=[item])
 
+        MockFileOperationsWorker.assert_called_once_with("copy", ["/src/a.png"], "/dest", None)
+        self.assertEqual(self.file_ops.job(job_id).worker.copy_strategy, COPY_STRATEGY_HARDLINK)
 
-    @patch('src.file_operations.QThread')
-    def test_start_operation_already_running(self, MockQThread):
-        """Test that start_operation returns False if an operation is already running."""
-        # Simulate an already running thread
-        mock_thread_instance = MockQThread.return_value
-        mock_thread_instance.isRunning.return_value = True
-        self.file_ops._thread = mock_thread_instance
+    def test_job_conflicts(self):
+        base = FileOperationJob(1, "move", ["/src/a.png"], "/dest")
+        self.assertTrue(base.conflicts_with(FileOperationJob(2, "copy", ["/x/b.png"], "/dest")))
+        self.assertTrue(base.conflicts_with(FileOperationJob(3, "move", ["/dest/c.png"], "/other")))
+        self.assertTrue(base.conflicts_with(FileOperationJob(4, "copy", ["/src/a.png"], "/other")))
+        self.assertFalse(base.conflicts_with(FileOperationJob(5, "copy", ["/x/b.png"], "/other")))
 
-        result = self.file_ops.start_operation("move", [], "/dest")
-        self.assertFalse(result)
-        # Ensure isRunning was checked
-        mock_thread_instance.isRunning.assert_called_once()
+    def test_cancel_queued_job(self):
+        MockQThread, MockFileOperationsWorker = self._patch_thread_and_worker()
+        self.file_ops.start_operation("move", ["/src/a.png"], "/dest")
+        queued_id = self.file_ops.start_operation("move", ["/other/b.png"], "/dest")
+        finished = []
+        self.file_ops.jobFinished.connect(lambda job_id, result: finished.append((job_id, result['status'])))
 
-        # Clean up
-        self.file_ops._thread = None
+        self.assertTrue(self.file_ops.cancel_job(queued_id))
 
+        self.assertEqual(finished, [(queued_id, 'cancelled')])
+        self.assertIsNone(self.file_ops.job(queued_id))
+        self.assertEqual(MockFileOperationsWorker.call_count, 1) # 待機中のジョブは開始されない
 
-    @patch('src.file_operations.FileOperationsWorker')
-    @patch('src.file_operations.QThread')
-    def test_stop_operation_running(self, MockQThread, MockFileOperationsWorker):
+    def test_stop_operation_running(self):
         """Test stop_operation when an operation is running."""
-        mock_thread_instance = MockQThread.return_value
-        mock_worker_instance = MockFileOperationsWorker.return_value
-        
-        # Setup a running operation
-        self.file_ops._thread = mock_thread_instance
-        self.file_ops._worker = mock_worker_instance
-        mock_thread_instance.isRunning.return_value = True
+        MockQThread, MockFileOperationsWorker = self._patch_thread_and_worker()
+        job_id = self.file_ops.start_operation("move", ["/src/a.png"], "/dest")
+        worker = self.file_ops.job(job_id).worker
 
         self.file_ops.stop_operation()
 
-        mock_worker_instance.stop.assert_called_once()
-        mock_thread_instance.isRunning.assert_called_once()
-
-        # Clean up
-        self.file_ops._thread = None
-        self.file_ops._worker = None
+        worker.stop.assert_called_once()
+        self.assertTrue(self.file_ops.job(job_id).cancel_requested)
 
     def test_stop_operation_not_running(self):
         """Test stop_operation when no operation is running."""
-        # Ensure worker and thread are None or thread is not running
-        self.file_ops._thread = None
-        self.file_ops._worker = None
-        
-        # Or if thread exists but is not running
-        mock_thread_not_running = MagicMock(spec=QThread) # Use imported/mocked QThread
-        mock_thread_not_running.isRunning.return_value = False
-        self.file_ops._thread = mock_thread_not_running
-        self.file_ops._worker = None # Ensure worker is also None for this specific scenario
-        
         with patch('src.file_operations.logger') as mock_logger:
              self.file_ops.stop_operation()
-             # Check that worker.stop() was not called
-             # (difficult to assert directly if worker is None, so check logger)
              mock_logger.info.assert_any_call("No file operation currently running to stop.")
 
-
-    @patch('src.file_operations.QThread')
-    @patch('src.file_operations.FileOperationsWorker')
-    def test_on_worker_finished_cleanup(self, MockFileOperationsWorker, MockQThread):
-        """Test the _on_worker_finished cleanup mechanism."""
-        mock_thread_instance = MockQThread.return_value
-        mock_worker_instance = MockFileOperationsWorker.return_value
-
-        self.file_ops._thread = mock_thread_instance
-        self.file_ops._worker = mock_worker_instance
-        
-        # Simulate worker finishing
-        self.file_ops._on_worker_finished()
-
-        mock_thread_instance.quit.assert_called_once()
-        # mock_thread_instance.wait.assert_called_once() # wait is not called in the current _on_worker_finished
-        mock_worker_instance.deleteLater.assert_called_once()
-        mock_thread_instance.deleteLater.assert_called_once()
-
-        self.assertIsNone(self.file_ops._worker)
-        self.assertIsNone(self.file_ops._thread)
+    def test_on_job_finished_cleanup(self):
+        """Test the _on_job_finished cleanup mechanism."""
+        MockQThread, MockFileOperationsWorker = self._patch_thread_and_worker()
+        job_id = self.file_ops.start_operation("move", ["/src/a.png"], "/dest")
+        job = self.file_ops.job(job_id)
+        mock_thread, mock_worker = job.thread, job.worker
+
+        self.file_ops._on_job_finished(job_id, {'status': 'completed'})
+
+        mock_thread.quit.assert_called_once()
+        mock_worker.deleteLater.assert_called_once()
+        mock_thread.deleteLater.assert_called_once()
+        self.assertIsNone(job.worker)
+        self.assertIsNone(job.thread)
+        self.assertFalse(self.file_ops.has_active_operations())
 
 
 if __name__ == '__main__':
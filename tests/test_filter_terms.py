@@ -0,0 +1,54 @@
+import unittest
+import os
+import sys
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.filter_terms import (KeywordMatcher, RegexMatcher, compile_term, compile_terms, required_literals,
+                              split_filter_terms)
+
+
+class TestFilterTerms(unittest.TestCase):
+    def test_split_keeps_commas_inside_quotes_and_regex(self):
+        self.assertEqual(split_filter_terms('apple, "red, apple" ,/a,b/, -/x,y/ ,,'),
+                         ['apple', '"red, apple"', '/a,b/', '-/x,y/'])
+        self.assertEqual(split_filter_terms('a/b, c'), ['a/b', 'c']) # 語の途中の / は引用ではない
+        self.assertEqual(split_filter_terms('"unclosed, b'), ['"unclosed', 'b'])
+
+    def test_required_literals(self):
+        self.assertEqual(required_literals(r"lora:.*detail"), ['detail', 'lora:'])
+        self.assertEqual(required_literals(r"(?:ab)+c?x"), ['ab', 'x'])
+        self.assertEqual(required_literals(r"cat|dog"), []) # 分岐はどちらが必須か決められない
+        self.assertEqual(required_literals(r"Steps: \d+"), ['steps: '])
+
+    def test_regex_matcher_uses_literal_prefilter(self):
+        matcher = compile_term("/LoRA:.*detail/")
+        self.assertIsInstance(matcher, RegexMatcher)
+        self.assertTrue(matcher.matches("<lora:more_detail:1>"))
+        self.assertFalse(matcher.matches("detail <lora:x>"))
+        self.assertFalse(matcher.matches("no literals here"))
+
+    def test_phrase_matches_whole_words_only(self):
+        matcher = compile_term('"Cat Ears"')
+        self.assertTrue(matcher.matches("1girl, cat ears, smile"))
+        self.assertFalse(matcher.matches("cat earsx"))
+        self.assertFalse(matcher.matches("bobcat ears"))
+        self.assertIsNone(compile_term('""'))
+
+    def test_invalid_regex_falls_back_to_keyword(self):
+        with self.assertLogs("src.filter_terms", level="WARNING"):
+            matcher = compile_term("/a(b/")
+        self.assertIsInstance(matcher, KeywordMatcher)
+        self.assertTrue(matcher.matches("x /a(b/ y"))
+
+    def test_compile_terms_splits_excluded(self):
+        included, excluded = compile_terms(['apple', '-"red"', '-', '-/^x/'])
+        self.assertEqual([type(m) for m in included], [KeywordMatcher, KeywordMatcher])
+        self.assertEqual(len(excluded), 2)
+        self.assertTrue(excluded[0].matches("a red apple"))
+        self.assertTrue(excluded[1].matches("xyz"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.folder_scanner import scan_folder, find_empty_subfolders
+
+
+class TestFolderScanner(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.root = self.test_dir.name.replace(os.sep, '/')
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def _make_file(self, *parts):
+        path = '/'.join((self.root,) + parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("x")
+        return path
+
+    def _make_dir(self, *parts):
+        path = '/'.join((self.root,) + parts)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def test_detects_nested_empty_folders(self):
+        empty_leaf = self._make_dir("empty")
+        nested_empty = self._make_dir("nested_empty")
+        self._make_dir("nested_empty", "a", "b")
+        self._make_file("with_text", "deep", "note.txt")
+        self._make_file("with_image", "image.png")
+
+        image_files, empty_folders = scan_folder(self.root, recursive=True, find_empty_folders=True)
+
+        self.assertEqual(sorted(empty_folders), sorted([empty_leaf, nested_empty]))
+        self.assertEqual(image_files, [self.root + "/with_image/image.png"])
+
+    def test_non_recursive_still_checks_subfolder_contents(self):
+        self._make_dir("empty")
+        self._make_file("sub", "image.png")
+        top_image = self._make_file("top.JPG")
+
+        image_files, empty_folders = scan_folder(self.root, recursive=False, find_empty_folders=True)
+
+        self.assertEqual(image_files, [top_image])
+        self.assertEqual(empty_folders, [self.root + "/empty"])
+
+    def test_collects_only_image_extensions(self):
+        expected = {self._make_file(name) for name in ("a.png", "b.jpeg", "c.webp", "d.Jpg")}
+        self._make_file("e.txt")
+        self._make_file("f.gif")
+
+        image_files, empty_folders = scan_folder(self.root)
+
+        self.assertEqual(set(image_files), expected)
+        self.assertEqual(empty_folders, [])
+
+    @unittest.skipIf(not hasattr(os, "symlink"), "symlink not supported")
+    def test_symlinks_are_not_empty_and_not_followed(self):
+        target = self._make_file("target", "image.png")
+        link_holder = self._make_dir("link_holder")
+        try:
+            os.symlink(os.path.dirname(target), link_holder + "/link")
+        except OSError:
+            self.skipTest("symlink creation not permitted")
+
+        image_files, empty_folders = scan_folder(self.root, find_empty_folders=True)
+
+        self.assertEqual(image_files, [target])
+        self.assertEqual(empty_folders, [])
+
+    def test_find_empty_subfolders_missing_folder(self):
+        self.assertEqual(find_empty_subfolders(self.root + "/missing"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import math
+import os
+import sys
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QStandardItemModel, QStandardItem
+
+from src.constants import GENERATION_SLOT_ROLE
+from src.generation_columns import GenerationInfoColumns, MISSING_INT, MISSING_CODE
+
+
+class TestGenerationInfoColumns(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.model = QStandardItemModel()
+        self.columns = GenerationInfoColumns(self.model)
+
+    def _add_item(self, generation_info):
+        item = QStandardItem("item")
+        self.model.appendRow(item)
+        self.columns.assign(item, {'generation_info': generation_info})
+        return item
+
+    def test_values_are_stored_per_column(self):
+        item = self._add_item("Steps: 30, Sampler: Euler a, CFG scale: 6.5, Seed: 123, Size: 512x768")
+        other = self._add_item("Steps: 20, Sampler: Euler a")
+        slot = item.data(GENERATION_SLOT_ROLE)
+
+        self.assertEqual(self.columns.value(slot, 'steps'), 30)
+        self.assertEqual(self.columns.value(slot, 'cfg_scale'), 6.5)
+        self.assertEqual(self.columns.value(slot, 'size_height'), 768)
+        self.assertEqual(self.columns.value(slot, 'sampler'), "Euler a")
+        self.assertIsNone(self.columns.value(other.data(GENERATION_SLOT_ROLE), 'seed'))
+        self.assertEqual(list(self.columns.numeric_column('steps')), [30, 20])
+        codes, values = self.columns.text_column('sampler')
+        self.assertEqual(list(codes), [0, 0]) # 同じ文字列は1つのコードを共有する
+        self.assertEqual(values, ["Euler a"])
+
+    def test_preparsed_params_are_used_and_removed(self):
+        item = QStandardItem("item")
+        self.model.appendRow(item)
+        metadata = {'generation_info': "Steps: 1", 'generation_params': {'steps': 50}}
+        slot = self.columns.assign(item, metadata)
+        self.assertEqual(self.columns.value(slot, 'steps'), 50)
+        self.assertNotIn('generation_params', metadata)
+        self.assertEqual(self.columns.assign(item, {'generation_info': "Steps: 8"}), slot) # 再読み込みは同じスロットを上書き
+        self.assertEqual(self.columns.value(slot, 'steps'), 8)
+
+    def test_removed_rows_release_slots_for_reuse(self):
+        first = self._add_item("Steps: 30, Sampler: Euler")
+        slot = first.data(GENERATION_SLOT_ROLE)
+        self._add_item("Steps: 20")
+
+        self.model.removeRow(0)
+        self.assertEqual(len(self.columns), 1)
+        self.assertEqual(self.columns.numeric_column('steps')[slot], MISSING_INT)
+        self.assertEqual(self.columns.text_column('sampler')[0][slot], MISSING_CODE)
+        self.assertTrue(math.isnan(self.columns.numeric_column('cfg_scale')[slot]))
+
+        reused = self._add_item("Steps: 10")
+        self.assertEqual(reused.data(GENERATION_SLOT_ROLE), slot)
+        self.assertEqual(self.columns.slot_count, 2)
+
+        self.model.clear()
+        self.assertEqual((len(self.columns), self.columns.slot_count), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
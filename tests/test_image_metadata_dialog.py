@@ -121,6 +121,43 @@ class TestTagTextBrowser:
         assert len(browser.selected_tags) == 0
         # Also check that highlighting is removed (would need to inspect QTextCharFormat)
 
+    def _background_at(self, browser, position):
+        cursor = browser.textCursor()
+        cursor.setPosition(position + 1) # charFormat() はカーソル直前の文字の書式
+        return cursor.charFormat().background().color().name()
+
+    def test_update_highlight_only_touches_changed_tags(self, browser, mocker):
+        browser.parse_and_set_text("tagA, tagB, tagA")
+        browser.selected_tags.add("tagA")
+        browser.update_highlight()
+        assert self._background_at(browser, 0) == QColor("orange").name()
+        assert self._background_at(browser, 12) == QColor("orange").name()
+        assert self._background_at(browser, 6) != QColor("orange").name()
+
+        browser.selected_tags.add("tagB")
+        browser.update_highlight()
+        assert browser._highlighted_tags == {"tagA", "tagB"}
+        spy_text_cursor = mocker.spy(browser, 'textCursor')
+        browser.update_highlight() # 変更なしの場合はドキュメントに触れない
+        spy_text_cursor.assert_not_called()
+
+        browser.selected_tags.discard("tagA")
+        browser.update_highlight()
+        assert self._background_at(browser, 0) != QColor("orange").name()
+        assert self._background_at(browser, 6) == QColor("orange").name()
+
+    def test_reparse_same_text_reuses_tokens_and_clears_selection(self, browser, mocker):
+        text = "tag1, tag2"
+        browser.parse_and_set_text(text)
+        browser.selected_tags.add("tag1")
+        browser.update_highlight()
+        spy_set_plain = mocker.spy(browser, 'setPlainText')
+        browser.parse_and_set_text(text)
+        spy_set_plain.assert_not_called()
+        assert browser.selected_tags == set()
+        assert self._background_at(browser, 0) != QColor("orange").name()
+        assert [tag for _, _, tag in browser.tag_positions] == ["tag1", "tag2"]
+
 # --- Tests for ImageMetadataDialog ---
 # These will be more complex and might require mocking MainWindow or parts of it.
 # For now, a placeholder.
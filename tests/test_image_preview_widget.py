@@ -0,0 +1,91 @@
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from PyQt6.QtWidgets import QApplication
+
+# Add project root to sys.path to find src module
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from PIL import Image
+from src.image_preview_widget import ImagePreviewWidget
+from src.constants import PREVIEW_MODE_FIT, PREVIEW_MODE_ORIGINAL_ZOOM
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+class TestImagePreviewWidgetDisplayPipeline(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.image_path = os.path.join(self.test_dir.name, "large.png")
+        Image.new("RGB", (800, 600), (10, 20, 30)).save(self.image_path)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_fit_mode_decodes_at_screen_resolution(self):
+        widget = ImagePreviewWidget(preview_mode=PREVIEW_MODE_FIT)
+        with patch.object(widget, '_screen_decode_limit', return_value=(200, 200)):
+            widget.update_image(self.image_path, 0, 1)
+        self.assertLessEqual(widget.pixmap.width(), 200)
+        self.assertLessEqual(widget.pixmap.height(), 200)
+        self.assertEqual(widget.pixmap.width() * 3, widget.pixmap.height() * 4) # アスペクト比維持
+
+    def test_original_zoom_mode_keeps_full_resolution(self):
+        widget = ImagePreviewWidget(preview_mode=PREVIEW_MODE_ORIGINAL_ZOOM)
+        with patch.object(widget, '_screen_decode_limit', return_value=(200, 200)):
+            widget.update_image(self.image_path, 0, 1)
+        self.assertEqual((widget.pixmap.width(), widget.pixmap.height()), (800, 600))
+
+    def test_scaled_pixmap_cache_is_lru_and_skips_fast_results(self):
+        widget = ImagePreviewWidget(preview_mode=PREVIEW_MODE_ORIGINAL_ZOOM)
+        widget.update_image(self.image_path, 0, 1)
+        widget._scaled_cache.clear()
+
+        _, is_final = widget._get_scaled_pixmap(400, 300, fast=True)
+        self.assertFalse(is_final)
+        self.assertEqual(len(widget._scaled_cache), 0)
+
+        first, is_final = widget._get_scaled_pixmap(400, 300)
+        self.assertTrue(is_final)
+        again, _ = widget._get_scaled_pixmap(400, 300, fast=True)
+        self.assertIs(first, again) # キャッシュヒット時は高品質版を返す
+
+        for i in range(ImagePreviewWidget.SCALED_CACHE_MAX_ENTRIES + 2):
+            widget._get_scaled_pixmap(100 + i, 100)
+        self.assertEqual(len(widget._scaled_cache), ImagePreviewWidget.SCALED_CACHE_MAX_ENTRIES)
+
+    def test_fast_display_schedules_single_smooth_rescale(self):
+        widget = ImagePreviewWidget(preview_mode=PREVIEW_MODE_FIT)
+        widget.image_label.resize(300, 200)
+        widget.update_image(self.image_path, 0, 1)
+        widget.image_label.resize(320, 240)
+        widget._update_image_display(fast=True)
+        self.assertTrue(widget._smooth_rescale_timer.isActive())
+
+        widget._update_image_display() # タイマー満了時と同じ処理
+        self.assertFalse(widget._smooth_rescale_timer.isActive())
+        self.assertEqual(len(widget._scaled_cache), 2) # 300x200 と 320x240
+
+    def test_original_zoom_mode_uses_tiled_view(self):
+        widget = ImagePreviewWidget(preview_mode=PREVIEW_MODE_ORIGINAL_ZOOM)
+        widget.update_image(self.image_path, 0, 1)
+        self.assertIs(widget.display_stack.currentWidget(), widget.tiled_view)
+        self.assertIsNotNone(widget.tiled_view.tiled_item())
+
+        widget.scale_factor = 4.0
+        widget._update_image_display()
+        self.assertEqual(widget.tiled_view.transform().m11(), 4.0)
+        self.assertEqual(len(widget._scaled_cache), 0) # 拡大Pixmapは作られない
+
+        widget.update_image(os.path.join(self.test_dir.name, "missing.png"), 0, 1)
+        self.assertIs(widget.display_stack.currentWidget(), widget.image_label)
+        self.assertFalse(widget.tiled_view.has_image())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+
+from src.image_probe import probe_image
+
+
+class TestImageProbe(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.image = Image.new("RGB", (37, 21), (10, 20, 30))
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def _save(self, name, image=None, **params):
+        path = os.path.join(self.test_dir.name, name)
+        (image or self.image).save(path, **params)
+        return path
+
+    def _assert_probe(self, path, image_format, is_animated=False):
+        probe = probe_image(path)
+        self.assertTrue(probe.is_valid, path)
+        self.assertEqual(probe.format, image_format)
+        self.assertEqual((probe.width, probe.height), (37, 21))
+        self.assertEqual(probe.is_animated, is_animated)
+
+    def test_png_and_jpeg(self):
+        self._assert_probe(self._save("a.png"), 'PNG')
+        self._assert_probe(self._save("a.jpg"), 'JPEG')
+        self._assert_probe(self._save("progressive.jpg", progressive=True), 'JPEG')
+
+    def test_webp_variants(self):
+        self._assert_probe(self._save("lossy.webp"), 'WEBP') # VP8
+        self._assert_probe(self._save("lossless.webp", lossless=True), 'WEBP') # VP8L
+        self._assert_probe(self._save("alpha.webp", Image.new("RGBA", (37, 21))), 'WEBP') # VP8X
+        frames = [Image.new("RGB", (37, 21), (i * 80, 0, 0)) for i in range(3)]
+        animated = self._save("anim.webp", frames[0], save_all=True, append_images=frames[1:], duration=20, loop=0)
+        self._assert_probe(animated, 'WEBP', is_animated=True)
+
+    def test_jpeg_exif_orientation(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        probe = probe_image(self._save("rotated.jpg", exif=exif.tobytes()))
+        self.assertEqual(probe.orientation, 6)
+        self.assertEqual((probe.width, probe.height), (37, 21))
+
+    def test_invalid_files(self):
+        text_path = os.path.join(self.test_dir.name, "note.png")
+        with open(text_path, "w") as f:
+            f.write("not an image")
+        truncated_path = os.path.join(self.test_dir.name, "truncated.jpg")
+        with open(self._save("full.jpg"), "rb") as src, open(truncated_path, "wb") as dst:
+            dst.write(src.read(20)) # SOFn より前で切れている
+
+        self.assertFalse(probe_image(text_path).is_valid)
+        self.assertIsNone(probe_image(text_path).format)
+        self.assertFalse(probe_image(truncated_path).is_valid)
+        self.assertEqual(probe_image(truncated_path).format, 'JPEG')
+        self.assertFalse(probe_image(os.path.join(self.test_dir.name, "missing.webp")).is_valid)
+        self.assertFalse(probe_image(self._save("image.gif")).is_valid) # 解析対象外の形式
+
+
+if __name__ == '__main__':
+    unittest.main()
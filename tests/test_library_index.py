@@ -0,0 +1,107 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.library_index import LibraryIndex, build_search_query
+
+
+def _metadata(positive, negative="", info=""):
+    return {'positive_prompt': positive, 'negative_prompt': negative, 'generation_info': info}
+
+
+class TestLibraryIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.root = self.test_dir.name.replace(os.sep, '/')
+        self.index = LibraryIndex(os.path.join(self.test_dir.name, "index.sqlite3"))
+        self.metadata_by_path = {}
+        self.extracted = []
+
+    def tearDown(self):
+        self.index.close()
+        self.test_dir.cleanup()
+
+    def _make_image(self, name, metadata, mtime):
+        path = f"{self.root}/{name}"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(b"x")
+        os.utime(path, (mtime, mtime))
+        self.metadata_by_path[path] = metadata
+        return path
+
+    def _extract_batch(self, paths, cancel_event):
+        for path in paths:
+            self.extracted.append(path)
+            yield path, self.metadata_by_path[path]
+
+    def _update(self, **kwargs):
+        return self.index.update_folder(self.root, extract_batch=self._extract_batch, **kwargs)
+
+    def test_update_and_search(self):
+        cat = self._make_image("a/cat.png", _metadata("1girl, cat ears, red hair", "lowres", "Steps: 20, Seed: 1"), 100)
+        dog = self._make_image("b/dog.png", _metadata("1boy, dog, red scarf", "bad hands", "Steps: 30, Seed: 2"), 200)
+        self._make_image("c/landscape.png", _metadata("scenery, mountain", "lowres", "Steps: 20, Seed: 3"), 300)
+
+        result = self._update()
+        self.assertEqual(result, {'indexed': 3, 'unchanged': 0, 'removed': 0, 'cancelled': False})
+        self.assertEqual(len(self.index), 3)
+
+        self.assertEqual(self.index.search({'positive': "red"}), [dog, cat]) # 新しいものから
+        self.assertEqual(self.index.search({'positive': "RED HAIR"}), [cat]) # 大文字小文字を区別しない
+        self.assertEqual(self.index.search({'positive': "red, -dog"}), [cat])
+        self.assertEqual(self.index.search({'positive': "cat, dog"}, mode="OR"), [dog, cat])
+        self.assertEqual(self.index.search({'positive': "red", 'negative': "lowres"}), [cat])
+        self.assertEqual(self.index.search({'info': "Seed: 2"}), [dog])
+        self.assertEqual(self.index.search({'positive': "1b"}), [dog]) # trigram より短い語は LIKE で調べる
+        self.assertEqual(self.index.search({'positive': "/red (hair|scarf)/"}), [dog, cat]) # 必須リテラル "red " で絞り込む
+        self.assertIsNone(self.index.search({'positive': "", 'info': ""}))
+
+    def test_update_skips_unchanged_and_removes_missing(self):
+        keep = self._make_image("keep.png", _metadata("keep"), 100)
+        changed = self._make_image("changed.png", _metadata("before"), 100)
+        removed = self._make_image("removed.png", _metadata("removed"), 100)
+        self._update()
+        self.extracted.clear()
+
+        os.remove(removed)
+        self.metadata_by_path[changed] = _metadata("after")
+        os.utime(changed, (500, 500))
+        result = self._update()
+
+        self.assertEqual(self.extracted, [changed])
+        self.assertEqual(result, {'indexed': 1, 'unchanged': 1, 'removed': 1, 'cancelled': False})
+        self.assertEqual(self.index.search({'positive': "after"}), [changed])
+        self.assertEqual(self.index.search({'positive': "before"}), [])
+        self.assertEqual(self.index.search({'positive': "removed"}), [])
+        self.assertEqual(self.index.search({'positive': "keep"}), [keep])
+
+    def test_update_cancelled(self):
+        self._make_image("a.png", _metadata("a"), 100)
+        cancel_event = threading.Event()
+        cancel_event.set()
+        result = self._update(cancel_event=cancel_event)
+        self.assertTrue(result['cancelled'])
+        self.assertEqual(len(self.index), 0)
+
+
+class TestBuildSearchQuery(unittest.TestCase):
+    def test_terms_without_required_text_are_not_indexed(self):
+        # 必須の文字列がない正規表現と、フレーズ・正規表現の除外は索引では絞り込まない
+        self.assertIsNone(build_search_query({'positive': "/a|b/, -\"cat\", -/dog/"}))
+        # OR では、どれか1つでも索引で判定できない語があればその欄を絞り込まない
+        self.assertIsNone(build_search_query({'positive': "cat, /a|b/"}, mode="OR"))
+
+    def test_match_expression(self):
+        sql, params = build_search_query({'positive': 'red hair, "say \\"hi\\""', 'negative': "-lowres"})
+        self.assertIn("image_text MATCH ?", sql)
+        self.assertEqual(params[0], '(positive : "red hair" AND positive : "say ""hi""") NOT (negative : "lowres")')
+
+
+if __name__ == '__main__':
+    unittest.main()
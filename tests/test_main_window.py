@@ -22,6 +22,11 @@ from src.file_operation_manager import FileOperationManager
 from src.constants import METADATA_ROLE, SELECTION_ORDER_ROLE, PREVIEW_MODE_FIT, RIGHT_CLICK_ACTION_METADATA, WC_FORMAT_HASH_COMMENT
 from src.metadata_filter_proxy_model import MetadataFilterProxyModel # ★★★ NameError 修正: Import を追加 ★★★
 from src.file_operations import FileOperations # For mocking its instance if needed
+from src.session_snapshot import SessionSnapshot, SnapshotEntry
+from src.prompt_intern import MetadataRecord, PromptInternTable
+from src.metadata_store import CompressedMetadataStore, full_metadata
+from src.proxy_path_sequence import ModelPathIndex
+from src.generation_columns import GenerationInfoColumns
 import send2trash # For mocking send2trash
 
 # Fixture to create a QApplication instance for tests that need it
@@ -118,8 +123,8 @@ class TestMainWindowBase(unittest.TestCase):
         self.mock_file_operations_instance = MagicMock(spec=FileOperations)
         self.mock_file_operations_instance.start_operation = MagicMock(return_value=True)
         self.mock_file_operations_instance.stop_operation = MagicMock()
-        # Add _thread attribute to the mock FileOperations instance for closeEvent
-        self.mock_file_operations_instance._thread = MagicMock(spec=QThread)
+        # closeEvent ではキュー内の操作の有無を確認してから shutdown する
+        self.mock_file_operations_instance.has_active_operations = MagicMock(return_value=False)
         
         # Patch where FileOperations is instantiated by FileOperationManager
         # This assumes FileOperationManager creates its FileOperations instance like:
@@ -132,17 +137,16 @@ class TestMainWindowBase(unittest.TestCase):
         # However, the goal is for MainWindow to use FileOperationManager. Remove monkeypatch for _save_settings.
         self.window.file_operations = self.mock_file_operations_instance # Ensure MainWindow's direct ref is also mocked if used
 
-        # Mock QProgressDialog
-        self.progress_dialog_patcher = patch('src.file_operation_manager.QProgressDialog') # Patched in manager
-        self.MockQProgressDialog = self.progress_dialog_patcher.start()
-        self.mock_progress_dialog_instance = self.MockQProgressDialog.return_value
-        self.mock_progress_dialog_instance.wasCanceled.return_value = False
-        self.mock_progress_dialog_instance.close = MagicMock() # close もモック化
+        # Mock FileOperationQueueDialog (ジョブごとの進捗表示)
+        self.queue_dialog_patcher = patch('src.file_operation_manager.FileOperationQueueDialog') # Patched in manager
+        self.MockQueueDialog = self.queue_dialog_patcher.start()
+        self.mock_queue_dialog_instance = self.MockQueueDialog.return_value
+        self.mock_queue_dialog_instance.job_count.return_value = 0
 
     def tearDown(self):
         """Clean up after each test."""
         self.load_settings_patcher.stop() # パッチャーを停止
-        self.progress_dialog_patcher.stop()
+        self.queue_dialog_patcher.stop()
         self.file_op_patcher.stop()
         self.statusbar_method_patcher.stop() # ★★★ statusBar メソッドのパッチャーを停止 ★★★
         self.ui_manager_patcher.stop() # ★★★ UIManager のパッチャーを停止 ★★★
@@ -253,6 +257,7 @@ class TestMainWindowFolderSelectionAndLoading(TestMainWindowBase):
     @patch('src.main_window.QFileDialog.getExistingDirectory')
     def test_select_folder_updates_tree_and_loads_thumbnails(self, mock_get_existing_directory):
         mock_get_existing_directory.return_value = self.base_path
+        self.window.delete_empty_folders_enabled = False
         
         self.window.update_folder_tree = MagicMock()
         # load_thumbnails_from_folder is called by update_folder_tree
@@ -263,8 +268,77 @@ class TestMainWindowFolderSelectionAndLoading(TestMainWindowBase):
         self.window.update_folder_tree.assert_called_once_with(self.base_path)
         self.assertEqual(self.window.current_folder_path, self.base_path)
 
+    @patch('src.main_window.FolderScanThread')
+    @patch('src.main_window.QFileDialog.getExistingDirectory')
+    def test_select_folder_scans_in_background_when_deleting_empty_folders(self, mock_get_existing_directory, MockScanThread):
+        mock_get_existing_directory.return_value = self.base_path
+        self.window.delete_empty_folders_enabled = True
+        self.window.update_folder_tree = MagicMock()
+
+        self.window.select_folder()
+
+        MockScanThread.assert_called_once_with(self.base_path, self.window.recursive_search_enabled, find_empty_folders=True, parent=self.window)
+        MockScanThread.return_value.start.assert_called_once()
+        self.window.update_folder_tree.assert_not_called() # 走査完了後に呼ばれる
+
+    @patch('src.main_window.QMessageBox.information')
+    @patch('send2trash.send2trash')
+    @patch('src.main_window.QMessageBox.question')
+    def test_on_folder_scan_finished_trashes_empty_folders_and_loads_scanned_images(self, mock_msg_box_question, mock_send2trash, mock_information):
+        empty_sub1 = os.path.join(self.base_path, "empty_sub1")
+        empty_sub2 = os.path.join(self.base_path, "empty_sub2")
+        image_path = os.path.join(self.base_path, "a.png")
+        mock_msg_box_question.return_value = QMessageBox.StandardButton.Yes
+        self.window.update_folder_tree = MagicMock()
+        self.window._pending_scan_folder = self.base_path # _start_folder_scan で記録される
+
+        self.window._on_folder_scan_finished(self.base_path, [image_path], [empty_sub1, empty_sub2])
+
+        mock_send2trash.assert_called_once_with([os.path.normpath(empty_sub1), os.path.normpath(empty_sub2)])
+        self.window.update_folder_tree.assert_called_once_with(self.base_path, scanned_image_files=[image_path])
+
+    @patch('src.thumbnail_loader.ThumbnailLoaderThread')
     @patch('src.main_window.QDirIterator')
-    @patch('src.main_window.ThumbnailLoaderThread') # Mock the class
+    @patch('src.main_window.FolderScanThread')
+    def test_folder_clicked_during_scan_discards_stale_scan_result(self, MockScanThread, MockQDirIterator, MockThumbThread):
+        folder_a = os.path.join(self.base_path, "folder_a")
+        folder_b = os.path.join(self.base_path, "folder_b")
+        os.makedirs(folder_a, exist_ok=True)
+        os.makedirs(folder_b, exist_ok=True)
+        MockQDirIterator.return_value.hasNext.return_value = False
+        MockThumbThread.return_value.isRunning.return_value = False
+        self.window._start_folder_scan(folder_a)
+        scan_thread = MockScanThread.return_value
+
+        self.mock_ui_manager_instance.file_system_model.filePath.return_value = folder_b
+        self.mock_ui_manager_instance.file_system_model.isDir.return_value = True
+        self.window.on_folder_tree_clicked(MagicMock())
+
+        scan_thread.stop.assert_called_once()
+        self.assertIsNone(self.window.folder_scan_thread)
+        self.window.update_folder_tree = MagicMock()
+        self.window._handle_send_empty_folders_to_trash = MagicMock()
+        # 停止前に発行されていた folder_a の走査結果が後から届いても無視する
+        self.window._on_folder_scan_finished(folder_a, [], [os.path.join(folder_a, "empty")])
+
+        self.window.update_folder_tree.assert_not_called()
+        self.window._handle_send_empty_folders_to_trash.assert_not_called()
+        self.assertEqual(self.window.current_folder_path, folder_b)
+
+    @patch('src.thumbnail_loader.ThumbnailLoaderThread')
+    @patch('src.main_window.QDirIterator')
+    def test_load_thumbnails_from_folder_uses_scanned_image_files(self, MockQDirIterator, MockThread):
+        image_path = os.path.join(self.base_path, "test1.png")
+        self.create_file(image_path)
+        MockThread.return_value.isRunning = MagicMock(return_value=False)
+
+        self.window.load_thumbnails_from_folder(self.base_path, scanned_image_files=[image_path])
+
+        MockQDirIterator.assert_not_called()
+        self.assertEqual(MockThread.call_args[0][0], [image_path])
+
+    @patch('src.main_window.QDirIterator')
+    @patch('src.thumbnail_loader.ThumbnailLoaderThread') # Mock the class
     def test_load_thumbnails_from_folder_starts_thread(self, MockThread, MockQDirIterator):
         folder_path = self.base_path
         self.create_file(os.path.join(folder_path, "test1.png"))
@@ -292,6 +366,56 @@ class TestMainWindowFolderSelectionAndLoading(TestMainWindowBase):
         mock_thread_instance.start.assert_called_once()
         self.assertTrue(self.window.is_loading_thumbnails)
 
+    @patch('src.main_window.QDirIterator')
+    @patch('src.thumbnail_loader.ThumbnailLoaderThread')
+    def test_load_thumbnails_skips_carried_over_thumbnails(self, MockThread, MockQDirIterator):
+        """移動/コピーで引き継いだサムネイルがあるファイルはスレッドで読み込まない。"""
+        folder_path = self.base_path
+        carried_path = os.path.join(folder_path, "moved.png")
+        other_path = os.path.join(folder_path, "other.png")
+        self.create_file(carried_path)
+        self.create_file(other_path)
+        metadata = {'positive_prompt': 'cat', 'update_timestamp': os.path.getmtime(carried_path)}
+        self.window.carried_thumbnail_cache.put(carried_path, self.window.current_thumbnail_size, QImage(8, 8, QImage.Format.Format_ARGB32), metadata)
+
+        mock_iterator_instance = MockQDirIterator.return_value
+        mock_iterator_instance.hasNext.side_effect = [True, True, False]
+        mock_iterator_instance.next.side_effect = [carried_path, other_path]
+        MockThread.return_value.isRunning = MagicMock(return_value=False)
+
+        self.window.load_thumbnails_from_folder(folder_path)
+
+        call_args = MockThread.call_args[0]
+        self.assertEqual(call_args[0], [other_path])
+        self.assertEqual(len(call_args[1]), 1)
+        self.assertNotIn(carried_path, self.window.carried_thumbnail_cache)
+
+    def test_carry_over_thumbnail_cache_looks_up_moved_rows_by_path(self):
+        source_model = QStandardItemModel()
+        self.mock_ui_manager_instance.source_thumbnail_model = source_model
+        self.mock_ui_manager_instance.source_path_index = ModelPathIndex(source_model)
+        pixmap = QPixmap(8, 8)
+        pixmap.fill(Qt.GlobalColor.red)
+        for name in ("a.png", "b.png", "c.png"):
+            path = os.path.join(self.base_path, name)
+            item = QStandardItem(QIcon(pixmap), name)
+            item.setData(path, Qt.ItemDataRole.UserRole)
+            source_model.appendRow(item)
+            self.window.metadata_cache[path] = {'positive_prompt': name, 'filename_for_sort': name}
+        src_path = os.path.join(self.base_path, "b.png")
+        dest_path = os.path.join(self.base_path, "dest", "B.png")
+        unloaded_path = os.path.join(self.base_path, "not_in_model.png")
+
+        self.window._carry_over_thumbnail_cache([(src_path, dest_path), (unloaded_path, dest_path + ".x")], remove_source=True)
+
+        self.assertNotIn(src_path, self.window.metadata_cache)
+        self.assertIn(os.path.join(self.base_path, "a.png"), self.window.metadata_cache)
+        self.assertNotIn(dest_path + ".x", self.window.carried_thumbnail_cache)
+        thumbnail_size, q_image, metadata = self.window.carried_thumbnail_cache._entries[dest_path]
+        self.assertEqual(thumbnail_size, self.window.current_thumbnail_size)
+        self.assertFalse(q_image.isNull())
+        self.assertEqual(metadata, {'positive_prompt': 'b.png', 'filename_for_sort': 'b.png'})
+
 class TestMainWindowUISettings(TestMainWindowBase):
     def test_handle_recursive_search_toggled(self):
         # 初期状態は True であるはず (_load_app_settings がモック化されているため、__init__ のデフォルト値)
@@ -342,7 +466,9 @@ class TestMainWindowThumbnailUpdatesAndFilters(TestMainWindowBase):
         item.model = MagicMock(return_value=self.window.ui_manager.source_thumbnail_model) # item.model() がモックを返すようにする
         # Mock setIcon on the item itself
         item.setIcon = MagicMock()
-        metadata = {"positive_prompt": "test prompt"}
+        metadata = {"positive_prompt": "test prompt", "generation_info": "Steps: 20"}
+        self.window.ui_manager.prompt_intern_table = PromptInternTable()
+        self.window.ui_manager.metadata_store = CompressedMetadataStore()
         
         # FIX: Patch QPixmap.fromImage for this test (QIcon patch removed)
         with patch('src.main_window.QPixmap.fromImage', return_value=MagicMock(spec=QPixmap)) as mock_from_image, \
@@ -353,8 +479,12 @@ class TestMainWindowThumbnailUpdatesAndFilters(TestMainWindowBase):
                 # Check if QIcon was called with the result of QPixmap.fromImage
                 mock_qicon_constructor.assert_called_once_with(mock_from_image.return_value)
         self.assertIsNotNone(item.icon())
-        self.assertEqual(item.data(METADATA_ROLE), metadata)
-        self.assertEqual(self.window.metadata_cache.get("path/to/test_item.png"), metadata) # Use .get for safety
+        self.assertEqual(full_metadata(item.data(METADATA_ROLE)), metadata)
+        self.assertEqual(item.data(METADATA_ROLE).get("generation_info"), "Steps: 20") # 全文は圧縮ストアから読む
+        self.assertNotIn("generation_info", dict(item.data(METADATA_ROLE)))
+        # プロンプトを共有した MetadataRecord は、アイテムとキャッシュで同じオブジェクトになる
+        self.assertIsInstance(item.data(METADATA_ROLE), MetadataRecord)
+        self.assertIs(item.data(METADATA_ROLE), self.window.metadata_cache.get("path/to/test_item.png"))
         self.assertEqual(item.toolTip(), "場所: path/to")
 
     def test_on_thumbnail_loading_finished(self):
@@ -477,7 +607,7 @@ class TestMainWindowEmptyFolderFunctions(TestMainWindowBase):
         mock_deselect.assert_called_once()
 
 
-    @patch('src.main_window.send2trash.send2trash')
+    @patch('send2trash.send2trash')
     @patch('src.main_window.QMessageBox.question')
     @patch('src.main_window.MainWindow._find_empty_subfolders')
     def test_try_delete_empty_subfolders_user_confirms(self, mock_find_empty, mock_msg_box_question, mock_send2trash):
@@ -494,7 +624,7 @@ class TestMainWindowEmptyFolderFunctions(TestMainWindowBase):
 
         mock_find_empty.assert_called_once_with(target_folder)
         mock_msg_box_question.assert_called_once()
-        mock_send2trash.assert_called_once_with(empty_sub1)
+        mock_send2trash.assert_called_once_with([os.path.normpath(empty_sub1)]) # まとめて1回で移動
         # ★★★ 修正: _try_delete_empty_subfolders から update_folder_tree の直接呼び出しはなくなった ★★★
         # QTimer.singleShot で遅延実行されるため、直接の呼び出しは確認できない
         # self.window.update_folder_tree.assert_called_with(target_folder)
@@ -524,8 +654,10 @@ class TestMainWindowFileOperations(TestMainWindowBase):
         self.mock_file_operations_instance.start_operation.assert_called_once_with(
             "move", self.window.selected_file_paths, "/destination/folder"
         )
-        self.window.ui_manager.set_file_op_buttons_enabled_ui.assert_called_with(False) # ★★★ UIManager経由 ★★★
-        self.assertIsNotNone(self.window.file_operation_manager.progress_dialog) 
+        # キューに追加されたら選択を解除し、ボタンは無効化しない (続けて次の操作を追加できる)
+        self.window.ui_manager.thumbnail_view.clearSelection.assert_called()
+        self.window.ui_manager.set_file_op_buttons_enabled_ui.assert_not_called()
+        self.window.statusBar.showMessage.assert_called_with("ファイルの移動をキューに追加しました。", 3000)
 
     @patch('src.file_operation_manager.QFileDialog.getExistingDirectory')
     def test_handle_move_files_button_clicked_destination_cancelled(self, mock_get_existing_directory):
@@ -614,8 +746,10 @@ class TestMainWindowFileOperations(TestMainWindowBase):
         self.mock_file_operations_instance.start_operation.assert_called_once_with(
             "copy", None, "/copy_destination/folder", copy_selection_order=self.window.copy_selection_order
         )
-        self.window.ui_manager.set_file_op_buttons_enabled_ui.assert_called_with(False) # ★★★ UIManager経由 ★★★
-        self.assertIsNotNone(self.window.file_operation_manager.progress_dialog)
+        # ジョブはパスを保持しているので、選択順はキュー追加時にリセットされる
+        self.assertEqual(self.window.copy_selection_order, [])
+        self.window.ui_manager.set_file_op_buttons_enabled_ui.assert_not_called()
+        self.window.statusBar.showMessage.assert_called_with("ファイルのコピーをキューに追加しました。", 3000)
 
     @patch('src.file_operation_manager.QFileDialog.getExistingDirectory')
     def test_handle_copy_files_button_clicked_destination_cancelled(self, mock_get_existing_directory):
@@ -631,56 +765,50 @@ class TestMainWindowFileOperations(TestMainWindowBase):
         self.mock_file_operations_instance.start_operation.assert_not_called()
         # self.assertTrue(self.window.copy_files_button.isEnabled()) # ボタンの状態はUIManagerが管理
 
-    def test_set_file_op_buttons_enabled_true(self):
-        self.window.is_copy_mode = False 
-        # FileOperationManager が UIManager のメソッドを呼び出すことを確認
-        self.window.file_operation_manager._handle_file_op_finished({}) # ダミーの完了結果で呼び出しをトリガー
-        self.window.ui_manager.set_file_op_buttons_enabled_ui.assert_called_with(True)
-
-    def test_set_file_op_buttons_enabled_false(self):
-        # 前提条件を設定
-        self.window.selected_file_paths = ["/some/file.jpg"]
-        with patch('src.file_operation_manager.QFileDialog.getExistingDirectory', return_value="/some/destination"):
-        # FileOperationManager が UIManager のメソッドを呼び出すことを確認
-            self.window.file_operation_manager._handle_move_files_button_clicked() # ボタンクリックで無効化されるはず
-        self.window.ui_manager.set_file_op_buttons_enabled_ui.assert_any_call(False) # どこかでFalseで呼ばれるはず
-
-    def test_handle_file_op_progress(self):
-        self.window.file_operation_manager.progress_dialog = self.mock_progress_dialog_instance
-        self.mock_progress_dialog_instance.wasCanceled.return_value = False
-
-        self.window.file_operation_manager._handle_file_op_progress(5, 10)
-
-        self.mock_progress_dialog_instance.setMaximum.assert_called_once_with(10)
-        self.mock_progress_dialog_instance.setValue.assert_called_once_with(5)
-        self.mock_progress_dialog_instance.setLabelText.assert_called_once_with("処理中: 5/10 ファイル...")
-
-    def test_handle_file_op_progress_dialog_cancelled(self):
-        self.window.file_operation_manager.progress_dialog = self.mock_progress_dialog_instance
-        self.mock_progress_dialog_instance.wasCanceled.return_value = True
-
-        self.window.file_operation_manager._handle_file_op_progress(1, 2)
-        self.mock_progress_dialog_instance.setMaximum.assert_not_called()
-        self.mock_progress_dialog_instance.setValue.assert_not_called()
+    def test_handle_job_finished_updates_view_and_closes_empty_queue(self):
+        self.window.file_operation_manager.queue_dialog = self.mock_queue_dialog_instance
+        self.mock_queue_dialog_instance.job_count.return_value = 0
+        result = {'status': 'completed', 'operation_type': 'copy', 'copied_count': 1, 'errors': [], 'job_id': 3}
+        with patch.object(self.window, '_process_file_op_completion') as mock_process:
+            self.window.file_operation_manager._handle_job_finished(3, result)
+            mock_process.assert_called_once_with(result, clear_selection=False)
+        self.mock_queue_dialog_instance.remove_job.assert_called_once_with(3)
+        self.mock_queue_dialog_instance.close.assert_called_once()
+        self.assertIsNone(self.window.file_operation_manager.queue_dialog)
+
+    def test_handle_job_finished_keeps_queue_dialog_while_jobs_remain(self):
+        self.window.file_operation_manager.queue_dialog = self.mock_queue_dialog_instance
+        self.mock_queue_dialog_instance.job_count.return_value = 1
+        with patch.object(self.window, '_process_file_op_completion'):
+            self.window.file_operation_manager._handle_job_finished(1, {'status': 'cancelled'})
+        self.mock_queue_dialog_instance.close.assert_not_called()
+        self.assertIs(self.window.file_operation_manager.queue_dialog, self.mock_queue_dialog_instance)
+
+    def test_handle_job_queued_adds_row(self):
+        mock_job = MagicMock(operation_type="move", total_count=2, destination_folder="/dest")
+        self.mock_file_operations_instance.job = MagicMock(return_value=mock_job)
+        self.window.file_operation_manager._handle_job_queued(5)
+        self.mock_queue_dialog_instance.add_job.assert_called_once_with(5, "move", 2, "/dest")
+        self.mock_queue_dialog_instance.show.assert_called()
+        self.mock_queue_dialog_instance.cancelRequested.connect.assert_called_once_with(self.mock_file_operations_instance.cancel_job)
+
+    def test_handle_job_progress(self):
+        self.window.file_operation_manager.queue_dialog = self.mock_queue_dialog_instance
+        self.window.file_operation_manager._handle_job_progress(2, 5, 10, 25.0, 0.2)
+        self.mock_queue_dialog_instance.set_job_progress.assert_called_once_with(2, 5, 10, 25.0, 0.2)
 
     @patch('src.file_operation_manager.QMessageBox.critical') 
     def test_handle_file_op_error(self, mock_qmessagebox_critical):
-        self.window.file_operation_manager.progress_dialog = self.mock_progress_dialog_instance
-        
-        with patch.object(self.window.ui_manager, 'set_file_op_buttons_enabled_ui') as mock_set_enabled: # ★★★ UIManager経由 ★★★
-            self.window.file_operation_manager._handle_file_op_error("Test error")
-            mock_set_enabled.assert_called_once_with(True)
+        self.window.file_operation_manager._handle_file_op_error("Test error")
 
         mock_qmessagebox_critical.assert_called_once()
         self.assertIn("Test error", mock_qmessagebox_critical.call_args[0][2]) 
         self.window.statusBar.showMessage.assert_called_with("ファイル操作中にエラーが発生しました。", 5000)
-        self.mock_progress_dialog_instance.close.assert_called_once()
-        self.assertIsNone(self.window.file_operation_manager.progress_dialog)
 
-    @patch('src.main_window.RenamedFilesDialog') 
+    @patch('src.renamed_files_dialog.RenamedFilesDialog') 
     @patch('src.main_window.MainWindow._try_delete_empty_subfolders')
     def test_handle_file_op_finished_move_success_with_rename(self, mock_try_delete, MockRenamedFilesDialog):
-        self.window.file_operation_manager.progress_dialog = self.mock_progress_dialog_instance
+        self.window.file_operation_manager.queue_dialog = self.mock_queue_dialog_instance
         
         self.window.selected_file_paths = ["/original/path.txt"] 
         # self.window.source_thumbnail_model = MagicMock() # UIManagerが持つ
@@ -708,13 +836,10 @@ class TestMainWindowFileOperations(TestMainWindowBase):
         }
 
         # with ステートメントを括弧で囲む形式に変更
-        with (patch.object(self.window.ui_manager, 'set_file_op_buttons_enabled_ui') as mock_set_enabled_manager,
-              patch('src.main_window.os.path.isdir', return_value=True)):
-            
-            self.window.file_operation_manager._handle_file_op_finished(result)
-            mock_set_enabled_manager.assert_called_once_with(True)
-        self.mock_progress_dialog_instance.close.assert_called_once()
-        self.assertIsNone(self.window.file_operation_manager.progress_dialog)
+        with patch('src.main_window.os.path.isdir', return_value=True):
+            self.window.file_operation_manager._handle_job_finished(1, result)
+        self.mock_queue_dialog_instance.close.assert_called_once()
+        self.assertIsNone(self.window.file_operation_manager.queue_dialog)
         MockRenamedFilesDialog.assert_called_once_with(result['renamed_files'], self.window)
         # _process_file_op_completion から _try_delete_empty_subfolders の呼び出しは削除されたため、呼び出されないことを確認
         mock_try_delete.assert_not_called() 
@@ -818,6 +943,38 @@ class TestMainWindowSortFunctionality(TestMainWindowBase):
         self.window.ui_manager.filter_proxy_model.set_sort_key_type.assert_called_with(2) # Load Order (key_type 2)
         self.window.ui_manager.filter_proxy_model.sort.assert_called_with(0, Qt.SortOrder.AscendingOrder) # Default to Ascending for load order
 
+    def test_sort_by_generation_field_buttons(self):
+        # ★★★ 追加: Seed / Steps のボタンから generation_info の項目でソートされること ★★★
+        ui_manager = UIManager(self.window)
+        sort_options = ui_manager._create_sort_options_ui() # ボタンを実際に作ってクリックする
+        ui_manager.source_thumbnail_model = QStandardItemModel()
+        ui_manager.filter_proxy_model = MetadataFilterProxyModel()
+        ui_manager.filter_proxy_model.setSourceModel(ui_manager.source_thumbnail_model)
+        ui_manager.generation_columns = GenerationInfoColumns(ui_manager.source_thumbnail_model)
+        ui_manager.filter_proxy_model.set_generation_columns(ui_manager.generation_columns)
+        for name, generation_info in [("a.png", "Steps: 30, Seed: 7"), ("b.png", "Steps: 12"), ("c.png", "Steps: 20, Seed: 3")]:
+            item = QStandardItem(name)
+            item.setData(os.path.join(self.base_path, name), Qt.ItemDataRole.UserRole)
+            item.setData({'filename_for_sort': name, 'generation_info': generation_info}, METADATA_ROLE)
+            ui_manager.source_thumbnail_model.appendRow(item)
+            ui_manager.generation_columns.assign(item, item.data(METADATA_ROLE))
+        self.window.ui_manager = ui_manager
+        self.window._update_status_bar_info = MagicMock()
+        proxy = ui_manager.filter_proxy_model
+
+        def proxy_names():
+            return [proxy.index(row, 0).data() for row in range(proxy.rowCount())]
+
+        ui_manager.sort_steps_asc_button.click()
+        self.assertEqual(self.window.current_sort_button_id, 7)
+        self.assertEqual(proxy_names(), ["b.png", "c.png", "a.png"])
+        ui_manager.sort_seed_desc_button.click() # Seed がないものは昇順で先頭 (降順では末尾)
+        self.assertEqual(self.window.current_sort_button_id, 6)
+        self.assertEqual(proxy_names(), ["a.png", "c.png", "b.png"])
+        ui_manager.sort_filename_asc_button.click()
+        self.assertEqual(proxy_names(), ["a.png", "b.png", "c.png"])
+        self.assertIsNotNone(sort_options)
+
 class TestMainWindowSettings(TestMainWindowBase):
     def test_save_and_load_settings_for_load_order_sort(self):
         # 1. 「読み込み順」ソートを設定
@@ -868,17 +1025,144 @@ class TestMainWindowSettings(TestMainWindowBase):
             QApplication.processEvents() # UIイベントとシグナル処理
             mock_apply_sort.assert_not_called()
 
+class TestMainWindowSessionSnapshot(TestMainWindowBase):
+    @patch('src.main_window.SessionValidationThread')
+    @patch('src.main_window.read_snapshot')
+    def test_restore_skipped_when_snapshot_is_for_another_folder(self, mock_read_snapshot, MockValidationThread):
+        mock_read_snapshot.return_value = SessionSnapshot("other_folder", True, self.window.current_thumbnail_size, 4)
+        self.window.initial_folder_dialog_path = self.base_path
+
+        self.assertFalse(self.window._restore_session_snapshot())
+        MockValidationThread.assert_not_called()
+        self.mock_ui_manager_instance.source_thumbnail_model.clear.assert_not_called()
+
+    @patch('src.main_window.SessionValidationThread')
+    @patch('src.main_window.read_snapshot')
+    def test_restore_populates_model_and_starts_validation(self, mock_read_snapshot, MockValidationThread):
+        image_path = os.path.join(self.base_path, "a.png")
+        metadata = {'positive_prompt': 'cat', 'update_timestamp': 12.5}
+        mock_read_snapshot.return_value = SessionSnapshot(
+            self.base_path, self.window.recursive_search_enabled, self.window.current_thumbnail_size, 4,
+            {'positive': 'cat', 'search_mode': 'AND'}, [], 0,
+            [SnapshotEntry(image_path, metadata, QImage(8, 8, QImage.Format.Format_ARGB32)),
+             SnapshotEntry(os.path.join(self.base_path, "b.png"))])
+        self.window.initial_folder_dialog_path = self.base_path
+        self.window.update_thumbnail_item = MagicMock()
+        self.window.on_thumbnail_loading_finished = MagicMock()
+
+        self.assertTrue(self.window._restore_session_snapshot())
+
+        self.assertEqual(self.mock_ui_manager_instance.source_thumbnail_model.appendRow.call_count, 2)
+        self.window.update_thumbnail_item.assert_called_once()
+        self.assertEqual(self.window.update_thumbnail_item.call_args[0][2], metadata)
+        self.mock_ui_manager_instance.positive_prompt_filter_edit.setText.assert_called_once_with('cat')
+        self.window.on_thumbnail_loading_finished.assert_called_once()
+        MockValidationThread.assert_called_once_with(self.base_path, self.window.recursive_search_enabled,
+                                                     {image_path: 12.5, os.path.join(self.base_path, "b.png"): None},
+                                                     parent=self.window)
+        MockValidationThread.return_value.start.assert_called_once()
+
+    @patch('src.main_window.SESSION_SNAPSHOT_MAX_THUMBNAILS', 2)
+    @patch('src.main_window.write_snapshot')
+    def test_save_snapshot_keeps_thumbnails_only_near_visible_rows(self, mock_write_snapshot):
+        source_model = QStandardItemModel()
+        self.mock_ui_manager_instance.source_thumbnail_model = source_model
+        self.mock_ui_manager_instance.filter_proxy_model = source_model # 表示順 = ソースの並び
+        pixmap = QPixmap(8, 8)
+        pixmap.fill(Qt.GlobalColor.red)
+        paths = [os.path.join(self.base_path, f"{n}.png") for n in range(5)]
+        for path in paths:
+            item = QStandardItem(QIcon(pixmap), os.path.basename(path))
+            item.setData(path, Qt.ItemDataRole.UserRole)
+            item.setData({'positive_prompt': 'cat', 'update_timestamp': 1.0}, METADATA_ROLE)
+            source_model.appendRow(item)
+        self.mock_ui_manager_instance.thumbnail_view.indexAt.return_value = source_model.index(4, 0) # 最後の行までスクロール
+        self.window.current_folder_path = self.base_path
+
+        self.window._save_session_snapshot()
+
+        entries = mock_write_snapshot.call_args[0][1].entries
+        self.assertEqual([entry.path for entry in entries], paths) # パスはすべて保存する
+        # 末尾付近では前の行で件数を補い、最後の2行のサムネイルとメタデータを保存する
+        self.assertEqual([entry.metadata is not None for entry in entries], [False, False, False, True, True])
+        self.assertEqual([entry.thumbnail is not None for entry in entries], [False, False, False, True, True])
+
+
+    @patch('src.main_window.MainWindow._restore_session_snapshot')
+    def test_deferred_startup_runs_once_after_first_paint(self, mock_restore):
+        self.window.initial_folder_dialog_path = self.base_path
+        self.window.current_folder_path = None
+        mock_file_operation_manager = MagicMock()
+        self.window.file_operation_manager = mock_file_operation_manager
+        self.assertTrue(self.window._deferred_startup_pending)
+
+        self.window._run_deferred_startup()
+        self.window._run_deferred_startup()
+
+        self.mock_ui_manager_instance.setup_deferred_ui.assert_called_once()
+        mock_restore.assert_called_once()
+        mock_file_operation_manager.check_interrupted_operations.assert_called_once()
+        self.assertFalse(self.window._deferred_startup_pending)
+
+    def test_search_library_loads_only_existing_hits(self):
+        existing_path = os.path.join(self.base_path, "hit.png")
+        with open(existing_path, "wb") as f:
+            f.write(b"x")
+        self.mock_ui_manager_instance.positive_prompt_filter_edit.text.return_value = "cat"
+        self.mock_ui_manager_instance.negative_prompt_filter_edit.text.return_value = ""
+        self.mock_ui_manager_instance.generation_info_filter_edit.text.return_value = ""
+        self.mock_ui_manager_instance.and_radio_button.isChecked.return_value = False
+        mock_index = MagicMock()
+        mock_index.__len__.return_value = 2
+        mock_index.search.return_value = [existing_path, os.path.join(self.base_path, "deleted.png")]
+        self.window.library_index = mock_index
+        self.window.load_thumbnails_from_folder = MagicMock()
+
+        self.window.search_library()
+
+        mock_index.search.assert_called_once_with({'positive': 'cat', 'negative': '', 'info': ''}, "OR",
+                                                  self.mock_ui_manager_instance.generation_columns)
+        self.window.load_thumbnails_from_folder.assert_called_once_with("", scanned_image_files=[existing_path])
+
+    @patch('src.thumbnail_loader.ThumbnailLoaderThread')
+    @patch('src.main_window.write_snapshot')
+    def test_library_search_results_are_not_saved_as_folder_snapshot(self, mock_write_snapshot, MockThumbThread):
+        hit_path = os.path.join(self.base_path, "hit.png")
+        with open(hit_path, "wb") as f:
+            f.write(b"x")
+        MockThumbThread.return_value.isRunning.return_value = False
+        self.mock_ui_manager_instance.source_thumbnail_model.rowCount.return_value = 0
+        self.mock_ui_manager_instance.filter_proxy_model.rowCount.return_value = 0
+        self.mock_ui_manager_instance.thumbnail_view.indexAt.return_value = QModelIndex()
+        self.mock_ui_manager_instance.positive_prompt_filter_edit.text.return_value = "cat"
+        mock_index = MagicMock()
+        mock_index.__len__.return_value = 1
+        mock_index.search.return_value = [hit_path]
+        self.window.library_index = mock_index
+        self.window.current_folder_path = self.base_path
+
+        self.window.search_library()
+        self.assertTrue(self.window._showing_library_search)
+        self.window._save_session_snapshot()
+        mock_write_snapshot.assert_not_called() # 検索結果を base_path の表示として保存しない
+
+        self.window.load_thumbnails_from_folder(self.base_path, scanned_image_files=[]) # 次のフォルダの読み込みで解除
+        self.assertFalse(self.window._showing_library_search)
+        self.window._save_session_snapshot()
+        mock_write_snapshot.assert_called_once()
+        self.assertEqual(mock_write_snapshot.call_args[0][1].folder_path, self.base_path)
+
+
 class TestMainWindowCloseEvent(TestMainWindowBase):
+    @patch('src.main_window.MainWindow._save_session_snapshot')
     @patch('src.main_window.MainWindow._save_settings')
-    @patch('src.main_window.ThumbnailLoaderThread')
-    def test_close_event_saves_settings_and_stops_threads(self, MockThumbThread, mock_save_settings):
+    @patch('src.thumbnail_loader.ThumbnailLoaderThread')
+    def test_close_event_saves_settings_and_stops_threads(self, MockThumbThread, mock_save_settings, mock_save_snapshot):
         mock_thumb_instance = MockThumbThread.return_value
         mock_thumb_instance.isRunning.return_value = True
         self.window.thumbnail_loader_thread = mock_thumb_instance 
 
-        mock_file_op_qthread = self.mock_file_operations_instance._thread # FIX: Use the one from setUp
-        mock_file_op_qthread.isRunning.return_value = True
-        # self.mock_file_operations_instance._thread is already set in setUp
+        self.mock_file_operations_instance.has_active_operations.return_value = True
 
         mock_drop_window = MagicMock()
         self.window.dialog_manager.drop_window_instance = mock_drop_window # Ensure DialogManager has this mock
@@ -890,12 +1174,12 @@ class TestMainWindowCloseEvent(TestMainWindowBase):
             mock_super_close_event.assert_called_once_with(mock_qclose_event)
 
         mock_save_settings.assert_called_once()
+        mock_save_snapshot.assert_called_once()
         mock_thumb_instance.stop.assert_called_once()
         mock_thumb_instance.quit.assert_called_once()
         mock_thumb_instance.wait.assert_called_once_with(3000)
         
-        self.mock_file_operations_instance.stop_operation.assert_called_once()
-        mock_file_op_qthread.wait.assert_called_once_with(1000)
+        self.mock_file_operations_instance.shutdown.assert_called_once_with(timeout_ms=1000)
         
         mock_drop_window.close.assert_called_once()
         # mock_qclose_event.accept.assert_called_once() # This is called by super().closeEvent which is now mocked, so this assertion is not needed here.
@@ -925,7 +1209,7 @@ def main_window_fixture(qt_app, tmp_path, monkeypatch):
 
     mock_file_op_inst = MagicMock(spec=FileOperations)
     mock_file_op_inst.start_operation = MagicMock(return_value=True)
-    mock_file_op_inst._thread = MagicMock(spec=QThread) # FIX: Add _thread to this mock too
+    mock_file_op_inst.has_active_operations = MagicMock(return_value=False)
     monkeypatch.setattr('src.file_operations.FileOperations', lambda parent, file_op_manager: mock_file_op_inst) 
 
     # This is the mock for the MainWindow.statusBar() METHOD
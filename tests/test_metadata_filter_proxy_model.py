@@ -11,6 +11,9 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from src.metadata_filter_proxy_model import MetadataFilterProxyModel
 from src.metadata_filter_proxy_model import METADATA_ROLE # METADATA_ROLE を metadata_filter_proxy_model からインポート
+from src.generation_columns import GenerationInfoColumns
+from src.metadata_store import CompressedMetadataStore, MetadataRecord
+from unittest import mock
 
 app = None
 def setUpModule():
@@ -244,5 +247,64 @@ class TestMetadataFilterProxyModel(unittest.TestCase):
         self.proxy_model.invalidateFilter() # 明示的にフィルタを再適用
         self.assertEqual(len(self.get_proxy_item_texts()), len(self.files_info))
 
+    def test_sort_by_generation_field(self):
+        columns = GenerationInfoColumns(self.source_model)
+        self.proxy_model.set_generation_columns(columns)
+        for row, generation_info in enumerate(["Steps: 30, Seed: 7", "Steps: 12", "Steps: 20, Seed: 3"]):
+            item = self.source_model.item(row)
+            columns.assign(item, {'generation_info': generation_info})
+
+        self.proxy_model.set_sort_key_type(3)
+        self.proxy_model.set_generation_sort_field('steps')
+        self.proxy_model.sort(0, Qt.SortOrder.AscendingOrder)
+        self.assertEqual(self.get_proxy_item_texts(), ["a_new.jpg", "b_mid.webp", "c_old.png"])
+
+        self.proxy_model.set_generation_sort_field('seed') # Seed がないものは先頭
+        self.proxy_model.sort(0, Qt.SortOrder.AscendingOrder)
+        self.assertEqual(self.get_proxy_item_texts(), ["a_new.jpg", "b_mid.webp", "c_old.png"])
+
+    def test_filter_generation_query_and_excluded_keywords(self):
+        columns = GenerationInfoColumns(self.source_model)
+        self.proxy_model.set_generation_columns(columns)
+        for row in range(self.source_model.rowCount()):
+            item = self.source_model.item(row)
+            columns.assign(item, item.data(METADATA_ROLE))
+
+        self.proxy_model.set_generation_info_filter("steps 1") # 条件式でないものは従来どおりキーワード
+        self.assertEqual(self.get_proxy_item_texts(), ["c_old.png", "b_mid.webp"])
+        self.proxy_model.set_positive_prompt_filter("-apple")
+        self.assertEqual(self.get_proxy_item_texts(), ["b_mid.webp"])
+
+        for row, steps in enumerate([10, 20, 15]):
+            item = self.source_model.item(row)
+            columns.assign(item, {**item.data(METADATA_ROLE), 'generation_info': f"Steps: {steps}"})
+        self.proxy_model.set_positive_prompt_filter("")
+        self.proxy_model.set_generation_info_filter("steps>=15")
+        self.assertEqual(self.get_proxy_item_texts(), ["a_new.jpg", "b_mid.webp"])
+
+    def test_filter_regex_and_phrase(self):
+        self.proxy_model.set_positive_prompt_filter("/^APPLE$/")
+        self.assertEqual(self.get_proxy_item_texts(), ["a_new.jpg"])
+        self.proxy_model.set_positive_prompt_filter('"ban"')
+        self.assertEqual(self.get_proxy_item_texts(), [])
+        self.proxy_model.set_negative_prompt_filter('-"orange tree"')
+        self.proxy_model.set_positive_prompt_filter('"banana", /app.e/')
+        self.assertEqual(self.get_proxy_item_texts(), ["c_old.png"])
+
+    def test_filter_reads_generation_info_only_when_info_terms_are_set(self):
+        store = CompressedMetadataStore(self.source_model, block_size=1)
+        for row in range(self.source_model.rowCount()):
+            item = self.source_model.item(row)
+            record = MetadataRecord(item.data(METADATA_ROLE))
+            record.compress_into(store)
+            item.setData(record, METADATA_ROLE)
+        with mock.patch.object(store, 'get', wraps=store.get) as mock_get:
+            self.proxy_model.set_positive_prompt_filter("apple")
+            self.assertEqual(sorted(self.get_proxy_item_texts()), ["a_new.jpg", "c_old.png"])
+            mock_get.assert_not_called() # Info 欄が空なら圧縮したブロックは展開しない
+            self.proxy_model.set_generation_info_filter("-steps 20")
+            self.assertEqual(self.get_proxy_item_texts(), ["c_old.png"])
+            self.assertTrue(mock_get.called)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import datetime
+import os
+import sys
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QStandardItemModel, QStandardItem
+
+from src.constants import GENERATION_SLOT_ROLE
+from src.generation_columns import GenerationInfoColumns
+from src.metadata_query import compile_query, parse_predicate
+
+
+def _timestamp(text):
+    return datetime.datetime.fromisoformat(text).timestamp()
+
+
+class TestMetadataQuery(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.model = QStandardItemModel()
+        self.columns = GenerationInfoColumns(self.model)
+        self.items = [
+            self._add("a", "Steps: 20, Sampler: Euler a, CFG scale: 5, Seed: 12345", 1024, _timestamp("2026-09-30T12:00")),
+            self._add("b", "Steps: 30, Sampler: DPM++ 2M, CFG scale: 7, Seed: 1", 2048, _timestamp("2026-10-01T08:00")),
+            self._add("c", "Steps: 40, Sampler: DPM++ 2M SDE, CFG scale: 7.5", 512, _timestamp("2026-10-02T00:00")),
+        ]
+
+    def _add(self, name, generation_info, width, mtime):
+        item = QStandardItem(name)
+        self.model.appendRow(item)
+        self.columns.assign(item, {'generation_info': generation_info, 'width': width, 'height': 512, 'update_timestamp': mtime})
+        return item
+
+    def _matching(self, text):
+        query, keywords = compile_query([token.strip() for token in text.split(',')], self.columns)
+        self.assertEqual(keywords, [])
+        return [item.text() for item in self.items if query.accepts(self.columns, item.data(GENERATION_SLOT_ROLE))]
+
+    def test_numeric_comparisons_and_ranges(self):
+        self.assertEqual(self._matching("steps>=30"), ["b", "c"])
+        self.assertEqual(self._matching("steps>30"), ["c"])
+        self.assertEqual(self._matching("cfg:5..7"), ["a", "b"])
+        self.assertEqual(self._matching("cfg:7.."), ["b", "c"])
+        self.assertEqual(self._matching("seed=12345"), ["a"])
+        self.assertEqual(self._matching("seed<100"), ["b"]) # Seed がない c は一致しない
+        self.assertEqual(self._matching("width>1500"), ["b"])
+        self.assertEqual(self._matching("steps>=30, width<1000"), ["c"])
+
+    def test_text_fields_and_negation(self):
+        self.assertEqual(self._matching("sampler:dpm++ 2m"), ["b", "c"])
+        self.assertEqual(self._matching("sampler=dpm++ 2m"), ["b"])
+        self.assertEqual(self._matching("-sampler:sde"), ["a", "b"])
+        self.assertEqual(self._matching("steps!=30"), ["a", "c"])
+
+    def test_dates_cover_whole_days(self):
+        self.assertEqual(self._matching("mtime>2026-10-01"), ["c"])
+        self.assertEqual(self._matching("mtime>=2026-10-01"), ["b", "c"])
+        self.assertEqual(self._matching("mtime=2026-10-01"), ["b"])
+        self.assertEqual(self._matching("date:2026-09-30..2026-10-01"), ["a", "b"])
+
+    def test_non_predicates_are_keywords(self):
+        query, keywords = compile_query(["steps 10", "vae:detail", "-watermark", "steps>=x", "seed=1"], self.columns)
+        self.assertEqual(keywords, ["steps 10", "vae:detail", "-watermark", "steps>=x"])
+        self.assertEqual([predicate.field for predicate in query.predicates], ["seed"])
+        self.assertIsNone(parse_predicate("unknown>1", self.columns))
+
+    def test_predicates_are_ordered_by_selectivity_and_cached(self):
+        query, _ = compile_query(["steps>=10", "seed=1", "cfg:5..7"], self.columns)
+        self.assertEqual([predicate.field for predicate in query.predicates], ["seed", "cfg_scale", "steps"])
+
+        query.matching_bits(self.columns)
+        cached = dict(query._bits_cache)
+        self.assertEqual(query.matching_bits(self.columns), 0b010)
+        self.assertEqual(query._bits_cache, cached)
+
+        self.columns.assign(self.items[0], {'generation_info': "Steps: 20, Seed: 1, CFG scale: 5"}) # 列が変わると再評価
+        self.assertEqual(query.matching_bits(self.columns), 0b011)
+
+    def test_removed_rows_never_match(self):
+        slot = self.items[2].data(GENERATION_SLOT_ROLE)
+        self.model.removeRow(2)
+        query, _ = compile_query(["-steps>=100"], self.columns)
+        self.assertFalse(query.accepts(self.columns, slot))
+        self.assertFalse(query.accepts(self.columns, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import os
+import sys
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QStandardItemModel
+
+from src.metadata_store import CompressedMetadataStore, MetadataRecord, full_metadata
+
+
+class TestCompressedMetadataStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_records_round_trip_across_blocks(self):
+        store = CompressedMetadataStore(block_size=4, hot_blocks=1)
+        ids = [store.put({'generation_info': f"Steps: 20, Seed: {i}"}) for i in range(10)]
+
+        self.assertEqual(len(store), 10)
+        self.assertEqual(store.stats()['blocks'], 2) # 末尾の2件は未圧縮
+        for i in (0, 5, 9, 1, 4):
+            self.assertEqual(store.get(ids[i]), {'generation_info': f"Steps: 20, Seed: {i}"})
+        self.assertEqual(len(store._hot), 1)
+        self.assertLess(store.stats()['compressed_bytes'], store.stats()['raw_bytes'] * 2)
+
+    def test_clear_invalidates_old_ids(self):
+        model = QStandardItemModel()
+        store = CompressedMetadataStore(model, block_size=2)
+        old_id = store.put({'generation_info': "old"})
+        model.clear()
+        new_id = store.put({'generation_info': "new"})
+        self.assertEqual(store.get(old_id), {})
+        self.assertEqual(store.get(new_id), {'generation_info': "new"})
+
+    def test_metadata_record_reads_compressed_values(self):
+        store = CompressedMetadataStore(block_size=1)
+        record = MetadataRecord({'positive_prompt': "cat", 'generation_info': "Steps: 5", 'filename_for_sort': "a.png"})
+        record.compress_into(store)
+
+        self.assertNotIn('generation_info', dict(record)) # 非圧縮で残るのはソート・フィルタ用の値とプロンプト
+        self.assertEqual(record['generation_info'], "Steps: 5")
+        self.assertEqual(record.get('generation_info', ''), "Steps: 5")
+        self.assertIn('generation_info', record)
+        self.assertEqual(full_metadata(record),
+                         {'positive_prompt': "cat", 'generation_info': "Steps: 5", 'filename_for_sort': "a.png"})
+        self.assertEqual(full_metadata({'a': 1}), {'a': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,7 +8,8 @@ import json
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.metadata_utils import extract_image_metadata, _im_decode_exif, _im_parse_parameters
+from src.metadata_utils import (extract_image_metadata, extract_image_metadata_batch, _im_decode_exif, _im_parse_parameters,
+                                parse_generation_info, with_comfyui_json)
 from PIL import Image # For FileNotFoundError and other PIL specific exceptions
 
 class TestMetadataUtils(unittest.TestCase):
@@ -256,5 +257,78 @@ class TestMetadataUtils(unittest.TestCase):
         self.assertEqual(parsed_none['negative_prompt'], "")
         self.assertEqual(parsed_none['generation_info'], "")
 
+    def test_parse_generation_info_typed_fields(self):
+        text = ('Steps: 28, Sampler: DPM++ 2M, Schedule type: Karras, CFG scale: 5.5, Seed: 4242, Size: 832x1216, '
+                'Model hash: 1a2b3c, Model: animagine-xl, Denoising strength: 0.35, Hires upscale: 1.5, '
+                'Hires upscaler: R-ESRGAN, Lora hashes: "detail: abc123, style: def456", Version: v1.9.4')
+        self.assertEqual(parse_generation_info(text), {
+            'steps': 28, 'sampler': 'DPM++ 2M', 'schedule_type': 'Karras', 'cfg_scale': 5.5, 'seed': 4242,
+            'size_width': 832, 'size_height': 1216, 'model_hash': '1a2b3c', 'model': 'animagine-xl',
+            'denoising_strength': 0.35, 'hires_upscale': 1.5, 'lora_hashes': 'detail: abc123, style: def456',
+        })
+
+    @patch('src.metadata_utils.Image.open')
+    def test_extract_metadata_comfyui_graph(self, mock_image_open):
+        """ComfyUI の 'prompt' JSON からプロンプトと設定を取り出し、元の JSON は保持しない。"""
+        graph = {
+            "1": {"class_type": "CLIPTextEncode", "inputs": {"text": "comfy positive"}},
+            "2": {"class_type": "CLIPTextEncode", "inputs": {"text": "comfy negative"}},
+            "3": {"class_type": "KSampler", "inputs": {"steps": 12, "cfg": 6.0, "seed": 7, "model": ["9", 0],
+                                                       "positive": ["1", 0], "negative": ["2", 0]}},
+        }
+        workflow_json = json.dumps({"nodes": [], "links": []})
+        mock_image_open.return_value = self._create_mock_image(info={'prompt': json.dumps(graph), 'workflow': workflow_json})
+
+        metadata = extract_image_metadata("comfy.png")
+        self.assertEqual(metadata['positive_prompt'], "comfy positive")
+        self.assertEqual(metadata['negative_prompt'], "comfy negative")
+        self.assertEqual(metadata['generation_info'], "Steps: 12, CFG scale: 6, Seed: 7")
+        self.assertEqual(metadata['comfyui_json_key'], 'workflow')
+
+        display = with_comfyui_json(metadata, "comfy.png")
+        self.assertEqual(display['generation_info'], "Steps: 12, CFG scale: 6, Seed: 7\n\n" + workflow_json)
+        self.assertEqual(metadata['generation_info'], "Steps: 12, CFG scale: 6, Seed: 7") # キャッシュ側は変更しない
+
+    @patch('src.metadata_utils.Image.open')
+    def test_extract_metadata_comfyui_invalid_json_falls_back(self, mock_image_open):
+        mock_image_open.return_value = self._create_mock_image(
+            info={'prompt': '{broken', 'parameters': 'a cat\nSteps: 5'})
+        with self.assertLogs('src.metadata_utils', level='WARNING'):
+            metadata = extract_image_metadata("broken.png")
+        self.assertEqual(metadata['positive_prompt'], "a cat")
+        self.assertNotIn('comfyui_json_key', metadata)
+
+    @patch('src.metadata_utils.extract_image_metadata', side_effect=lambda path: {'positive_prompt': path})
+    def test_extract_image_metadata_batch_skips_cached_and_duplicates(self, mock_extract):
+        results = dict(extract_image_metadata_batch(["a", "b", "a", "c"], workers=2, skip_paths={"b"}))
+        self.assertEqual(results, {"a": {'positive_prompt': "a"}, "c": {'positive_prompt': "c"}})
+        self.assertEqual(sorted(call.args[0] for call in mock_extract.call_args_list), ["a", "c"])
+        with self.assertRaises(ValueError):
+            next(extract_image_metadata_batch(["a"], backend="gpu"))
+
+    @patch('src.metadata_utils.extract_image_metadata', side_effect=lambda path: {})
+    def test_extract_image_metadata_batch_cancel(self, mock_extract):
+        import threading
+        cancel_event = threading.Event()
+        submitted = []
+
+        def paths():
+            for i in range(1000):
+                submitted.append(i)
+                yield f"file{i}.png"
+
+        results = []
+        for path, _ in extract_image_metadata_batch(paths(), workers=1, cancel_event=cancel_event):
+            results.append(path)
+            cancel_event.set()
+        self.assertEqual(len(results), 1)
+        self.assertLess(len(submitted), 1000) # 入力は必要な分だけ先読みする
+
+    def test_parse_generation_info_skips_invalid_values(self):
+        self.assertEqual(parse_generation_info('Steps: many, Seed: -1, Size: 512, stray text, CFG scale: 7'),
+                         {'seed': -1, 'cfg_scale': 7.0})
+        self.assertEqual(parse_generation_info(''), {})
+        self.assertEqual(parse_generation_info(None), {})
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import os
+import sys
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.progress_reporter import ProgressReporter, ETA_UNKNOWN, format_rate_and_eta
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProgressReporter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.emitted = []
+
+    def _reporter(self, total_count):
+        return ProgressReporter(lambda *args: self.emitted.append(args), total_count, interval=0.05, clock=self.clock)
+
+    def test_updates_within_interval_are_coalesced(self):
+        reporter = self._reporter(1000)
+        for _ in range(10):
+            self.clock.now += 0.001
+            reporter.advance()
+        self.assertEqual([args[0] for args in self.emitted], [1]) # 最初の1件だけ通知
+        self.clock.now += 0.05
+        reporter.advance()
+        self.assertEqual([args[0] for args in self.emitted], [1, 11])
+
+    def test_final_state_is_always_emitted_once(self):
+        reporter = self._reporter(3)
+        for _ in range(3):
+            reporter.advance()
+        reporter.finish()
+        self.assertEqual([args[:2] for args in self.emitted], [(1, 3), (3, 3)])
+        self.assertEqual(self.emitted[-1][3], 0.0)
+
+    def test_finish_emits_latest_state_after_stop(self):
+        reporter = self._reporter(10)
+        reporter.update(1)
+        reporter.update(4) # 間引かれる
+        reporter.finish()
+        self.assertEqual([args[0] for args in self.emitted], [1, 4])
+
+    def test_finish_without_progress_emits_nothing(self):
+        self._reporter(0).finish()
+        self.assertEqual(self.emitted, [])
+
+    def test_throughput_and_eta(self):
+        reporter = self._reporter(100)
+        self.clock.now += 2.0
+        reporter.update(50)
+        _, _, items_per_second, eta_seconds = self.emitted[-1]
+        self.assertAlmostEqual(items_per_second, 25.0)
+        self.assertAlmostEqual(eta_seconds, 2.0)
+
+    def test_format_rate_and_eta(self):
+        self.assertEqual(format_rate_and_eta(0.0, ETA_UNKNOWN), "")
+        self.assertEqual(format_rate_and_eta(125.4, 65.2), " (125件/秒, 残り 1:05)")
+        self.assertEqual(format_rate_and_eta(2.5, ETA_UNKNOWN), " (2.5件/秒)")
+
+
+if __name__ == '__main__':
+    unittest.main()
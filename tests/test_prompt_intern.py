@@ -0,0 +1,54 @@
+import unittest
+import os
+import sys
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QStandardItem, QStandardItemModel
+
+from src.prompt_intern import MetadataRecord, PromptInternTable
+
+
+class TestPromptInternTable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_identical_prompts_share_one_string(self):
+        table = PromptInternTable()
+        negative = "".join(["Lowres, Bad Anatomy"] * 50)
+        first = table.intern_metadata({'positive_prompt': "1girl", 'negative_prompt': negative, 'seed': 1})
+        second = table.intern_metadata({'positive_prompt': "1girl", 'negative_prompt': "".join(["Lowres, Bad Anatomy"] * 50)})
+
+        self.assertIsInstance(first, MetadataRecord)
+        self.assertIs(first['negative_prompt'], second['negative_prompt'])
+        self.assertEqual(first['seed'], 1)
+        self.assertIs(table.lower(second['negative_prompt']), table.lower(first['negative_prompt']))
+        self.assertEqual(table.lower(first['negative_prompt']), negative.lower())
+        self.assertIs(table.lower("1girl"), first['positive_prompt']) # 小文字のみの文字列は複製しない
+        self.assertEqual(table.lower("Not Interned"), "not interned")
+
+        stats = table.stats()
+        self.assertEqual(stats['unique_strings'], 2)
+        self.assertEqual(stats['references'], 4)
+        self.assertEqual(stats['saved_bytes'], sys.getsizeof(negative))
+
+    def test_record_survives_item_round_trip_and_model_reset_clears(self):
+        model = QStandardItemModel()
+        table = PromptInternTable(model)
+        record = table.intern_metadata({'positive_prompt': "cat"})
+        item = QStandardItem("a.png")
+        item.setData(record, Qt.ItemDataRole.UserRole + 1)
+        model.appendRow(item)
+        self.assertIs(item.data(Qt.ItemDataRole.UserRole + 1), record) # QVariantMap に変換されない
+
+        model.clear()
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.stats()['references'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+import os
+import sys
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.prompt_tags import tokenize_prompt, get_prompt_tags, prompt_tag_cache_info
+
+
+class TestPromptTags(unittest.TestCase):
+    def setUp(self):
+        tokenize_prompt.cache_clear()
+
+    def test_tokenize_prompt_positions(self):
+        text = "masterpiece, (best quality:1.2), <lora:style:0.8>, \\(escaped\\), tag \\, comma"
+        self.assertEqual(tokenize_prompt(text), (
+            (0, 11, "masterpiece"),
+            (13, 31, "(best quality:1.2)"),
+            (33, 49, "<lora:style:0.8>"),
+            (51, 62, "\\(escaped\\)"),
+            (64, 76, "tag \\, comma"),
+        ))
+        self.assertEqual(tokenize_prompt(""), ())
+        self.assertEqual(tokenize_prompt(None), ())
+
+    def test_same_prompt_is_parsed_once(self):
+        text = "tag1, tag2, tag3"
+        first = tokenize_prompt(text)
+        self.assertEqual(get_prompt_tags(text), ("tag1", "tag2", "tag3"))
+        self.assertIs(tokenize_prompt(text), first)
+        info = prompt_tag_cache_info()
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.hits, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
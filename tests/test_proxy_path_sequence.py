@@ -0,0 +1,67 @@
+import unittest
+import os
+import sys
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QStandardItemModel, QStandardItem
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.metadata_filter_proxy_model import MetadataFilterProxyModel
+from src.proxy_path_sequence import ModelPathIndex, ProxyPathSequence
+
+app = QApplication.instance() or QApplication([])
+
+
+class TestProxyPathSequence(unittest.TestCase):
+    def setUp(self):
+        self.source_model = QStandardItemModel()
+        self.proxy_model = MetadataFilterProxyModel()
+        self.proxy_model.setSourceModel(self.source_model)
+        self.path_index = ModelPathIndex(self.source_model)
+        for name in ["a.png", "b.png", "c.png", "d.png"]:
+            self._append(f"/images/{name}")
+        self.sequence = ProxyPathSequence(self.proxy_model, self.source_model, self.path_index)
+
+    def _append(self, path):
+        item = QStandardItem(os.path.basename(path))
+        item.setData(path, Qt.ItemDataRole.UserRole)
+        item.setData({'positive_prompt': '', 'negative_prompt': '', 'generation_info': ''}, Qt.ItemDataRole.UserRole + 1)
+        self.source_model.appendRow(item)
+
+    def test_len_and_getitem_follow_proxy_order(self):
+        self.assertEqual(len(self.sequence), 4)
+        self.assertEqual(self.sequence[0], "/images/a.png")
+        self.assertEqual(self.sequence[-1], "/images/d.png")
+        self.assertEqual(self.sequence[1:3], ["/images/b.png", "/images/c.png"])
+        with self.assertRaises(IndexError):
+            self.sequence[4]
+
+    def test_position_lookup_uses_path_index(self):
+        self.assertEqual(self.sequence.position_of("/images/c.png"), 2)
+        self.assertEqual(self.sequence.index("/images/d.png"), 3)
+        self.assertNotIn("/images/missing.png", self.sequence)
+        with self.assertRaises(ValueError):
+            self.sequence.index("/images/missing.png")
+
+    def test_sequence_reflects_filter_and_model_changes(self):
+        self.proxy_model.set_hidden_paths({"/images/b.png"})
+        self.proxy_model.invalidateFilter()
+        self.assertEqual(list(self.sequence), ["/images/a.png", "/images/c.png", "/images/d.png"])
+        self.assertEqual(self.sequence.position_of("/images/d.png"), 2)
+        self.assertEqual(self.sequence.position_of("/images/b.png"), -1)
+
+        self.source_model.removeRow(0)
+        self._append("/images/e.png")
+        self.assertEqual(len(self.path_index), 4)
+        self.assertEqual(self.sequence.position_of("/images/e.png"), 2)
+        self.assertEqual(self.sequence.position_of("/images/a.png"), -1)
+
+        self.source_model.clear()
+        self.assertEqual(len(self.path_index), 0)
+        self.assertEqual(len(self.sequence), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
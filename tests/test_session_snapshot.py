@@ -0,0 +1,107 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QImage, QColor
+
+from src.session_snapshot import (SessionSnapshot, SnapshotEntry, read_snapshot, write_snapshot,
+                                  validate_snapshot_entries, SNAPSHOT_MAX_METADATA_CHARS)
+
+
+class TestSessionSnapshot(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.folder = self.test_dir.name.replace(os.sep, '/')
+        self.snapshot_path = os.path.join(self.test_dir.name, "session_snapshot.bin")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def _make_image_file(self, name):
+        path = f"{self.folder}/{name}"
+        with open(path, "wb") as f:
+            f.write(b"dummy")
+        return path
+
+    def test_round_trip_keeps_view_state_and_thumbnails(self):
+        thumbnail = QImage(37, 20, QImage.Format.Format_ARGB32)
+        thumbnail.fill(QColor(10, 200, 30))
+        metadata = {'positive_prompt': 'cat', 'update_timestamp': 1.5}
+        snapshot = SessionSnapshot(self.folder, False, 128, 2,
+                                   {'positive': 'cat', 'search_mode': 'OR'}, [f"{self.folder}/a.png"], 240,
+                                   [SnapshotEntry(f"{self.folder}/a.png", metadata, thumbnail),
+                                    SnapshotEntry(f"{self.folder}/b.png")])
+
+        write_snapshot(self.snapshot_path, snapshot)
+        restored = read_snapshot(self.snapshot_path)
+
+        self.assertEqual(restored.folder_path, self.folder)
+        self.assertFalse(restored.recursive)
+        self.assertEqual((restored.thumbnail_size, restored.sort_button_id, restored.scroll_value), (128, 2, 240))
+        self.assertEqual(restored.filters, {'positive': 'cat', 'search_mode': 'OR'})
+        self.assertEqual(restored.selected_paths, [f"{self.folder}/a.png"])
+        self.assertEqual([entry.path for entry in restored.entries], [f"{self.folder}/a.png", f"{self.folder}/b.png"])
+        self.assertEqual(restored.entries[0].metadata, metadata)
+        self.assertEqual((restored.entries[0].thumbnail.width(), restored.entries[0].thumbnail.height()), (37, 20))
+        color = restored.entries[0].thumbnail.pixelColor(5, 5) # 不透明なサムネイルは JPEG で保存する
+        for actual, expected in zip(color.getRgb()[:3], (10, 200, 30)):
+            self.assertAlmostEqual(actual, expected, delta=3)
+        self.assertIsNone(restored.entries[1].metadata)
+        self.assertIsNone(restored.entries[1].thumbnail)
+
+    def test_thumbnails_are_encoded_and_oversized_metadata_is_not_stored(self):
+        opaque = QImage(200, 150, QImage.Format.Format_ARGB32)
+        opaque.fill(QColor(120, 80, 40))
+        transparent = QImage(8, 8, QImage.Format.Format_ARGB32)
+        transparent.fill(QColor(0, 0, 255, 100))
+        workflow = {'positive_prompt': 'x', 'generation_info': 'w' * (SNAPSHOT_MAX_METADATA_CHARS + 1)}
+        entries = [SnapshotEntry(f"{self.folder}/{n}.png", {'update_timestamp': 0.0}, opaque) for n in range(20)]
+        entries.append(SnapshotEntry(f"{self.folder}/alpha.png", {'update_timestamp': 0.0}, transparent))
+        entries.append(SnapshotEntry(f"{self.folder}/comfy.png", workflow, opaque))
+        write_snapshot(self.snapshot_path, SessionSnapshot(self.folder, True, 200, 4, entries=entries))
+
+        self.assertLess(os.path.getsize(self.snapshot_path), 20 * 200 * 150) # 1件あたり生の画素データ (120KB) の 1/4 未満
+        restored = read_snapshot(self.snapshot_path)
+        self.assertEqual(len(restored.entries), 22)
+        self.assertEqual(restored.entries[20].thumbnail.pixelColor(3, 3), QColor(0, 0, 255, 100)) # 透過は PNG で保持
+        # メタデータが長すぎる行はパスだけを保存する (復元後に読み込み直される)
+        self.assertEqual(restored.entries[21].path, f"{self.folder}/comfy.png")
+        self.assertIsNone(restored.entries[21].metadata)
+        self.assertIsNone(restored.entries[21].thumbnail)
+
+    def test_missing_or_corrupt_snapshot_returns_none(self):
+        self.assertIsNone(read_snapshot(self.snapshot_path))
+        with open(self.snapshot_path, "wb") as f:
+            f.write(b"IMSNAP02broken")
+        self.assertIsNone(read_snapshot(self.snapshot_path))
+
+    def test_validate_reports_missing_changed_and_added(self):
+        kept = self._make_image_file("kept.png")
+        touched = self._make_image_file("touched.png")
+        unloaded = self._make_image_file("unloaded.png")
+        added = self._make_image_file("added.jpg")
+        entry_timestamps = {
+            kept: os.path.getmtime(kept),
+            touched: os.path.getmtime(touched) - 10,
+            unloaded: None,
+            f"{self.folder}/deleted.png": 1.0,
+        }
+
+        missing, changed, added_paths = validate_snapshot_entries(self.folder, True, entry_timestamps)
+
+        self.assertEqual(missing, [f"{self.folder}/deleted.png"])
+        self.assertEqual(sorted(changed), sorted([touched, unloaded]))
+        self.assertEqual(added_paths, [added])
+
+
+if __name__ == '__main__':
+    unittest.main()
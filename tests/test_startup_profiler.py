@@ -0,0 +1,68 @@
+import unittest
+import builtins
+import os
+import sys
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.startup_profiler import StartupProfiler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestStartupProfiler(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.profiler = StartupProfiler(clock=self.clock)
+
+    def tearDown(self):
+        self.profiler._stop_import_tracking()
+
+    def test_disabled_profiler_records_nothing(self):
+        self.profiler.mark("a")
+        with self.profiler.measure("b"):
+            self.clock.now = 1.0
+        self.assertEqual(self.profiler._marks, [])
+        self.assertIsNone(self.profiler._original_import)
+
+    def test_marks_and_measures_record_elapsed_and_duration(self):
+        self.profiler.enable(track_imports=False)
+        self.clock.now = 0.010
+        self.profiler.mark("QApplication")
+        self.clock.now = 0.015
+        with self.profiler.measure("setup_ui"):
+            self.clock.now = 0.040
+
+        self.assertEqual([label for label, _, _ in self.profiler._marks], ["QApplication", "setup_ui"])
+        self.assertAlmostEqual(self.profiler._marks[0][1], 0.010)
+        self.assertAlmostEqual(self.profiler._marks[1][1], 0.040)
+        self.assertAlmostEqual(self.profiler._marks[1][2], 0.025)
+        lines = self.profiler.report_lines()
+        self.assertIn("setup_ui", lines[2])
+        self.assertIn("25.0 ms", lines[2])
+
+    def test_import_tracking_is_restored_on_report(self):
+        original_import = builtins.__import__
+        sys.modules.pop("colorsys", None)
+        self.profiler.enable()
+        self.assertIsNot(builtins.__import__, original_import)
+
+        import colorsys  # noqa: F401 (計測対象の import)
+
+        self.assertIn("colorsys", self.profiler._import_times)
+        with self.assertLogs("src.startup_profiler", level="INFO") as logs:
+            self.profiler.report()
+        self.assertIs(builtins.__import__, original_import)
+        self.assertFalse(self.profiler.enabled)
+        self.assertTrue(any("colorsys" in message for message in logs.output))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+import os
+import sys
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt6.QtGui import QStandardItem, QStandardItemModel
+from PyQt6.QtWidgets import QApplication, QLineEdit
+
+from src.constants import METADATA_ROLE
+from src.tag_completion import (FilterTagCompleter, TagVocabulary, apply_completion, completion_prefix,
+                                prompt_vocabulary)
+
+
+class TestPromptVocabulary(unittest.TestCase):
+    def test_normalizes_weights_and_brackets(self):
+        self.assertEqual(
+            prompt_vocabulary("((Masterpiece)), (red  hair:1.2), (a:1.1, b), <lora:foo:0.8>, \\(artist\\), BREAK, "
+                              "[blue eyes], red hair"),
+            ('masterpiece', 'red hair', 'a', 'b', 'lora:foo', '\\(artist\\)', 'blue eyes'))
+
+
+class TestTagVocabulary(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_suggest_ranks_by_image_count(self):
+        vocabulary = TagVocabulary('positive_prompt')
+        vocabulary.add_text("red hair, red eyes, smile")
+        vocabulary.add_text("red eyes, (red eyes:1.2), reading")
+        vocabulary.add_text("red eyes, red hair, rain")
+
+        self.assertEqual(vocabulary.count('red eyes'), 3) # 同じ画像内の重複は1回
+        self.assertEqual(vocabulary.suggest("re"), ['red eyes', 'red hair', 'reading'])
+        self.assertEqual(vocabulary.suggest("Red  H"), ['red hair'])
+        self.assertEqual(vocabulary.suggest("r", limit=2), ['red eyes', 'red hair'])
+        self.assertEqual(vocabulary.suggest("x"), [])
+        self.assertEqual(vocabulary.suggest(""), [])
+
+    def test_incremental_updates(self):
+        vocabulary = TagVocabulary('positive_prompt')
+        vocabulary.add_text("cat, cap")
+        self.assertEqual(vocabulary.suggest("ca"), ['cap', 'cat'])
+
+        vocabulary.add_text("cat, car") # キャッシュした短い入力の結果も更新される
+        self.assertEqual(vocabulary.suggest("ca"), ['cat', 'cap', 'car'])
+
+        vocabulary.update_metadata({'positive_prompt': "dog"}, previous={'positive_prompt': "cat, cap"})
+        self.assertEqual(vocabulary.suggest("ca"), ['car', 'cat'])
+        self.assertEqual(vocabulary.suggest("d"), ['dog'])
+
+        vocabulary.add_text("cow") # ソート前に削除されるタグ
+        vocabulary.remove_text("cow")
+        self.assertEqual(vocabulary.suggest("c"), ['car', 'cat'])
+        self.assertEqual(len(vocabulary), 3)
+
+    def test_prompt_tags_are_kept_per_vocabulary(self):
+        vocabulary = TagVocabulary('positive_prompt')
+        vocabulary.add_text("cat, dog")
+        vocabulary.add_text("cat, dog") # 同じ文字列の2枚目
+        vocabulary.remove_text("cat, cow") # 追加していない文字列は無視する
+        self.assertEqual(vocabulary.count('cat'), 2)
+        self.assertEqual(list(vocabulary._text_tags), ["cat, dog"])
+
+        vocabulary.remove_text("cat, dog")
+        self.assertEqual(vocabulary.count('cat'), 1)
+        vocabulary.remove_text("cat, dog") # 最後の画像がなくなったら文字列のタグも捨てる
+        self.assertEqual(vocabulary._text_tags, {})
+        self.assertEqual(len(vocabulary), 0)
+
+        vocabulary.add_text("cat")
+        vocabulary.clear()
+        self.assertEqual(vocabulary._text_tags, {})
+
+    def test_follows_source_model(self):
+        model = QStandardItemModel()
+        vocabulary = TagVocabulary('negative_prompt', model)
+        for prompt in ("lowres, bad hands", "lowres"):
+            item = QStandardItem()
+            metadata = {'negative_prompt': prompt}
+            vocabulary.update_metadata(metadata, previous=item.data(METADATA_ROLE))
+            item.setData(metadata, METADATA_ROLE)
+            model.appendRow(item)
+        self.assertEqual(vocabulary.suggest("l"), ['lowres'])
+
+        model.removeRow(0)
+        self.assertEqual(vocabulary.count('lowres'), 1)
+        self.assertEqual(vocabulary.suggest("b"), [])
+
+        model.clear()
+        self.assertEqual(len(vocabulary), 0)
+
+
+class TestCompletionText(unittest.TestCase):
+    def test_completion_prefix(self):
+        self.assertEqual(completion_prefix("cat, red h"), (5, "red h"))
+        self.assertEqual(completion_prefix("cat,  -bl"), (7, "bl"))
+        self.assertIsNone(completion_prefix("cat, "))
+        self.assertIsNone(completion_prefix('"red h'))
+        self.assertIsNone(completion_prefix("cat, /re"))
+
+    def test_apply_completion_replaces_term_at_cursor(self):
+        self.assertEqual(apply_completion("cat, -red h", 11, "red hair"), ("cat, -red hair", 14))
+        self.assertEqual(apply_completion("ca, dog", 2, "cat ears"), ("cat ears, dog", 8))
+
+
+class TestFilterTagCompleter(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_suggestions_and_insertion(self):
+        vocabulary = TagVocabulary('positive_prompt')
+        vocabulary.add_text("red hair, red eyes")
+        vocabulary.add_text("red hair")
+        line_edit = QLineEdit()
+        completer = FilterTagCompleter(line_edit, vocabulary)
+
+        line_edit.setText("cat, re")
+        line_edit.setCursorPosition(7)
+        completer.update_suggestions(line_edit.text())
+        self.assertEqual(completer.model().stringList(), ['red hair', 'red eyes'])
+
+        completer.insert_completion('red hair')
+        self.assertEqual(line_edit.text(), "cat, red hair")
+        self.assertEqual(line_edit.cursorPosition(), 13)
+
+
+if __name__ == '__main__':
+    unittest.main()
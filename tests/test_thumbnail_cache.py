@@ -0,0 +1,43 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Adjust the import path as necessary
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.thumbnail_cache import CarriedThumbnailCache
+
+
+class TestCarriedThumbnailCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.test_dir.cleanup)
+        self.file_path = os.path.join(self.test_dir.name, "moved.png")
+        with open(self.file_path, "w") as f:
+            f.write("image")
+        self.metadata = {'positive_prompt': 'cat', 'update_timestamp': os.path.getmtime(self.file_path)}
+
+    def test_take_returns_entry_once(self):
+        cache = CarriedThumbnailCache()
+        cache.put(self.file_path, 128, "q_image", self.metadata)
+        self.assertEqual(cache.take(self.file_path, 128), ("q_image", self.metadata))
+        self.assertIsNone(cache.take(self.file_path, 128))
+
+    def test_take_rejects_other_size_or_modified_file(self):
+        cache = CarriedThumbnailCache()
+        cache.put(self.file_path, 128, "q_image", self.metadata)
+        self.assertIsNone(cache.take(self.file_path, 200))
+        cache.put(self.file_path, 128, "q_image", self.metadata)
+        os.utime(self.file_path, (0, 0))
+        self.assertIsNone(cache.take(self.file_path, 128))
+
+    def test_oldest_entries_are_evicted(self):
+        cache = CarriedThumbnailCache(max_entries=2)
+        for name in ("a.png", "b.png", "c.png"):
+            cache.put(name, 128, None, {})
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("a.png", cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -48,6 +48,7 @@ class TestThumbnailLoaderThread(unittest.TestCase):
         mock_pil_img = MagicMock()
         mock_pil_img.thumbnail = MagicMock()
         mock_pil_img.mode = "RGB" # Example mode
+        mock_pil_img.size = (64, 32) # ファイルが存在しないのでヘッダーは読めず、Pillow のサイズが使われる
         mock_pil_img.convert.return_value = mock_pil_img # For .convert("RGBA")
         mock_image_open.return_value = mock_pil_img
         
@@ -69,14 +70,15 @@ class TestThumbnailLoaderThread(unittest.TestCase):
         thread.run() # Run in the current thread for testing simplicity
 
         self.assertEqual(len(spy_thumbnail_loaded), len(self.file_paths))
-        self.assertEqual(len(spy_progress_updated), len(self.file_paths))
+        self.assertLessEqual(len(spy_progress_updated), len(self.file_paths)) # 一定間隔に間引かれる
+        self.assertEqual(spy_progress_updated[-1][:2], [len(self.file_paths), len(self.file_paths)]) # 最終状態は必ず通知される
         self.assertEqual(len(spy_finished), 1)
 
         # Verify each expected item was processed and signaled correctly, regardless of order.
         expected_results_map = {
-            self.mock_item1.text(): (False if ImageQt else True, {"positive_prompt": "meta1", 'filename_for_sort': 'item1.jpg', 'update_timestamp': 0.0}),
-            self.mock_item2.text(): (False if ImageQt else True, {"positive_prompt": "meta2", 'filename_for_sort': 'item2.png', 'update_timestamp': 0.0}),
-            self.mock_item3.text(): (False if ImageQt else True, {"positive_prompt": "meta3_error_case", 'filename_for_sort': 'error_item.gif', 'update_timestamp': 0.0}),
+            self.mock_item1.text(): (False if ImageQt else True, {"positive_prompt": "meta1", 'filename_for_sort': 'item1.jpg', 'update_timestamp': 0.0, 'width': 64, 'height': 32, 'generation_params': {}}),
+            self.mock_item2.text(): (False if ImageQt else True, {"positive_prompt": "meta2", 'filename_for_sort': 'item2.png', 'update_timestamp': 0.0, 'width': 64, 'height': 32, 'generation_params': {}}),
+            self.mock_item3.text(): (False if ImageQt else True, {"positive_prompt": "meta3_error_case", 'filename_for_sort': 'error_item.gif', 'update_timestamp': 0.0, 'width': 64, 'height': 32, 'generation_params': {}}),
         }
         
         processed_item_texts = set()
@@ -113,6 +115,7 @@ class TestThumbnailLoaderThread(unittest.TestCase):
         mock_pil_img_ok = MagicMock()
         mock_pil_img_ok.thumbnail = MagicMock()
         mock_pil_img_ok.mode = "RGB"
+        mock_pil_img_ok.size = (64, 32)
         mock_pil_img_ok.convert.return_value = mock_pil_img_ok
 
         mock_image_open.side_effect = [
@@ -138,9 +141,9 @@ class TestThumbnailLoaderThread(unittest.TestCase):
 
         # Verify each expected item was processed and signaled correctly.
         expected_results_map = {
-            self.mock_item1.text(): (False if ImageQt else True, {"positive_prompt": "meta1", 'filename_for_sort': 'item1.jpg', 'update_timestamp': 0.0}),
-            self.mock_item2.text(): (True, {'positive_prompt': '', 'negative_prompt': '', 'generation_info': '', 'filename_for_sort': 'item2.png', 'update_timestamp': 0.0}), # FileNotFoundError
-            self.mock_item3.text(): (False if ImageQt else True, {"positive_prompt": "meta3", 'filename_for_sort': 'error_item.gif', 'update_timestamp': 0.0}),
+            self.mock_item1.text(): (False if ImageQt else True, {"positive_prompt": "meta1", 'filename_for_sort': 'item1.jpg', 'update_timestamp': 0.0, 'width': 64, 'height': 32, 'generation_params': {}}),
+            self.mock_item2.text(): (True, {'positive_prompt': '', 'negative_prompt': '', 'generation_info': '', 'filename_for_sort': 'item2.png', 'update_timestamp': 0.0, 'width': 0, 'height': 0, 'generation_params': {}}), # FileNotFoundError
+            self.mock_item3.text(): (False if ImageQt else True, {"positive_prompt": "meta3", 'filename_for_sort': 'error_item.gif', 'update_timestamp': 0.0, 'width': 64, 'height': 32, 'generation_params': {}}),
         }
 
         processed_item_texts = set()
@@ -223,5 +226,6 @@ class TestThumbnailLoaderThread(unittest.TestCase):
         # Check if the logger was called with the stop message
         mock_logger.info.assert_any_call("ThumbnailLoaderThread.stop() called. Setting _is_running to False.")
 
+
 if __name__ == '__main__':
     unittest.main()
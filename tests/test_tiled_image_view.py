@@ -0,0 +1,67 @@
+import sys
+import os
+import unittest
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QImage, QColor
+from PyQt6.QtCore import QRectF
+
+# Add project root to sys.path to find src module
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.tiled_image_view import TiledImageItem, TiledImageView
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+class TestTiledImageItem(unittest.TestCase):
+    def setUp(self):
+        self.image = QImage(1000, 600, QImage.Format.Format_ARGB32)
+        self.image.fill(QColor(255, 0, 0))
+        self.item = TiledImageItem(self.image)
+
+    def test_level_selection_follows_zoom(self):
+        self.assertEqual(self.item.level_for_lod(4.0), 0)
+        self.assertEqual(self.item.level_for_lod(1.0), 0)
+        self.assertEqual(self.item.level_for_lod(0.5), 1)
+        self.assertEqual(self.item.level_for_lod(0.3), 1)
+        self.assertEqual(self.item.level_for_lod(0.01), 2) # 1000px -> 最大レベル2 (250px)
+
+    def test_only_tiles_in_exposed_rect_are_selected(self):
+        tiles = self.item.visible_tiles(QRectF(0, 0, 300, 100), 0)
+        self.assertEqual(tiles, [(0, 0), (1, 0)])
+        tiles = self.item.visible_tiles(QRectF(900, 520, 50, 50), 0)
+        self.assertEqual(tiles, [(3, 2)])
+        tiles = self.item.visible_tiles(QRectF(0, 0, 1000, 600), 1) # 500x300 のレベル画像
+        self.assertEqual(tiles, [(0, 0), (1, 0), (0, 1), (1, 1)])
+        self.assertEqual(self.item.visible_tiles(QRectF(2000, 2000, 10, 10), 0), [])
+
+    def test_tile_cache_respects_memory_cap(self):
+        tile_bytes = TiledImageItem.TILE_SIZE * TiledImageItem.TILE_SIZE * 4
+        self.item.TILE_CACHE_MAX_BYTES = tile_bytes * 2
+        for tx, ty in [(0, 0), (1, 0), (2, 0)]:
+            pixmap = self.item._tile_pixmap(0, tx, ty)
+            self.assertEqual(pixmap.width(), TiledImageItem.TILE_SIZE)
+        self.assertLessEqual(self.item.tile_cache_bytes, tile_bytes * 2)
+        self.assertNotIn((0, 0, 0), self.item._tile_cache)
+        edge = self.item._tile_pixmap(0, 3, 2) # 端のタイルは画像範囲で切り詰められる
+        self.assertEqual((edge.width(), edge.height()), (1000 - 768, 600 - 512))
+
+
+class TestTiledImageView(unittest.TestCase):
+    def test_zoom_changes_transform_without_scaling_image(self):
+        view = TiledImageView()
+        image = QImage(4096, 4096, QImage.Format.Format_ARGB32)
+        image.fill(QColor(0, 0, 255))
+        view.set_image(image)
+        view.set_zoom(4.0)
+        self.assertEqual(view.transform().m11(), 4.0)
+        self.assertEqual(view.sceneRect(), QRectF(0, 0, 4096, 4096))
+        view.clear_image()
+        self.assertFalse(view.has_image())
+
+
+if __name__ == '__main__':
+    unittest.main()
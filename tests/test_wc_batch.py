@@ -0,0 +1,100 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+# Ensure src directory is in Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.constants import WC_FORMAT_HASH_COMMENT, WC_FORMAT_BRACKET_COMMENT
+from src.wc_batch import (format_wildcard_entry, prompt_to_wildcard_line, iter_image_files,
+                          generate_wildcard_file, COMMENT_MODE_FILENAME)
+import wc_cli
+
+
+def _save_png(path, parameters=None):
+    pnginfo = None
+    if parameters is not None:
+        pnginfo = PngInfo()
+        pnginfo.add_text("parameters", parameters)
+    Image.new("RGB", (4, 4)).save(path, pnginfo=pnginfo)
+
+
+class TestWCBatch(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_path = os.path.join(self.temp_dir, "wildcard.txt")
+        self.image_dir = os.path.join(self.temp_dir, "images")
+        os.makedirs(os.path.join(self.image_dir, "sub"))
+        _save_png(os.path.join(self.image_dir, "b.png"), "tag b\nline2\nNegative prompt: bad\nSteps: 20")
+        _save_png(os.path.join(self.image_dir, "a.png"), "tag a\nSteps: 20")
+        _save_png(os.path.join(self.image_dir, "c.png"), "tag a\nSteps: 30") # a.png と同じプロンプト
+        _save_png(os.path.join(self.image_dir, "d.png")) # プロンプトなし
+        _save_png(os.path.join(self.image_dir, "sub", "e.png"), "tag e")
+        with open(os.path.join(self.image_dir, "notes.txt"), "w") as f:
+            f.write("not an image")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _read_output(self):
+        with open(self.output_path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_format_wildcard_entry_matches_dialog_formats(self):
+        self.assertEqual(format_wildcard_entry("c", "p", WC_FORMAT_HASH_COMMENT), "# c\np")
+        self.assertEqual(format_wildcard_entry("", "p", WC_FORMAT_HASH_COMMENT), "p")
+        self.assertEqual(format_wildcard_entry("c", "p", WC_FORMAT_BRACKET_COMMENT), "[c:100]p")
+        self.assertEqual(format_wildcard_entry("c", "", WC_FORMAT_BRACKET_COMMENT), "")
+        self.assertEqual(prompt_to_wildcard_line(" x \n\n y "), "x y")
+
+    def test_iter_image_files_is_ordered_and_filtered(self):
+        names = [os.path.relpath(p, self.image_dir) for p in iter_image_files(self.image_dir)]
+        self.assertEqual(names, ["a.png", "b.png", "c.png", "d.png", os.path.join("sub", "e.png")])
+        self.assertEqual(len(list(iter_image_files(self.image_dir, recursive=False))), 4)
+
+    def test_generate_keeps_enumeration_order(self):
+        stats = generate_wildcard_file(self.image_dir, self.output_path, workers=3)
+        self.assertEqual(self._read_output(), "tag a\ntag b line2\ntag a\ntag e\n")
+        self.assertEqual(stats['scanned'], 5)
+        self.assertEqual(stats['written'], 4)
+        self.assertEqual(stats['skipped_no_prompt'], 1)
+        self.assertFalse(stats['cancelled'])
+
+    def test_generate_deduplicates(self):
+        stats = generate_wildcard_file(self.image_dir, self.output_path, deduplicate=True)
+        self.assertEqual(self._read_output(), "tag a\ntag b line2\ntag e\n")
+        self.assertEqual(stats['duplicates'], 1)
+
+    def test_generate_deduplicates_prompts_with_different_filename_comments(self):
+        stats = generate_wildcard_file(self.image_dir, self.output_path, recursive=False, deduplicate=True,
+                                       comment_mode=COMMENT_MODE_FILENAME)
+        self.assertEqual(self._read_output(), "# a\ntag a\n# b\ntag b line2\n") # c.png は a.png と同じプロンプト
+        self.assertEqual(stats['duplicates'], 1)
+
+    def test_generate_filename_comment_in_bracket_format(self):
+        generate_wildcard_file(self.image_dir, self.output_path, output_format=WC_FORMAT_BRACKET_COMMENT,
+                               recursive=False, comment_mode=COMMENT_MODE_FILENAME)
+        self.assertEqual(self._read_output(), "[a:100]tag a\n[b:100]tag b line2\n[c:100]tag a\n")
+
+    def test_generate_cancelled_before_start(self):
+        cancel_event = threading.Event()
+        cancel_event.set()
+        stats = generate_wildcard_file(self.image_dir, self.output_path, cancel_event=cancel_event)
+        self.assertTrue(stats['cancelled'])
+        self.assertEqual(self._read_output(), "")
+
+    def test_cli_main(self):
+        exit_code = wc_cli.main([self.image_dir, "-o", self.output_path, "--format", "hash",
+                                 "--comment", "filename", "--no-recursive", "--dedup", "-q"])
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(self._read_output(), "# a\ntag a\n# b\ntag b line2\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
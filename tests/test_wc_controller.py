@@ -10,6 +10,7 @@ from PyQt6.QtTest import QSignalSpy
 # テスト対象のモジュールをインポート
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from src.wc_controller import WCController
+from src.image_probe import ImageProbe
 from src.wc_creator_dialog import WCCreatorDialog
 from src.constants import WC_FORMAT_HASH_COMMENT, WC_FORMAT_BRACKET_COMMENT
 
@@ -36,14 +37,18 @@ class TestWCController(unittest.TestCase):
 
     def test_load_invalid_image_path(self):
         """無効な画像パスを渡した場合のテスト"""
-        # Patch QImage where it's used in wc_controller
-        with patch('src.wc_controller.QImage') as MockQImageClass:
-            mock_qimage_instance = MockQImageClass.return_value
-            mock_qimage_instance.load.return_value = False # Simulate load failure
-            mock_qimage_instance.isNull.return_value = True
-            result = self.controller.load_image_data('invalid_path')
-            self.assertFalse(result)
-            mock_qimage_instance.load.assert_called_with('invalid_path')
+        result = self.controller.load_image_data('invalid_path')
+        self.assertFalse(result)
+
+    def test_load_image_reads_header_only(self):
+        """PNG/JPEG/WebP はヘッダーの確認だけで判定し、全体をデコードしない"""
+        with patch('src.wc_controller.probe_image', return_value=ImageProbe('PNG', 8, 8, is_valid=True)) as mock_probe, \
+             patch('src.wc_controller.QImageReader') as MockReader:
+            self.assertTrue(self.controller.load_image_data('image.png'))
+            mock_probe.assert_called_once_with('image.png')
+            MockReader.assert_not_called()
+        with patch('src.wc_controller.probe_image', return_value=ImageProbe('JPEG')):
+            self.assertFalse(self.controller.load_image_data('broken.jpg'))
 
     def test_empty_metadata_handling(self):
         """空のメタデータを渡した場合のテスト"""
@@ -67,13 +72,14 @@ class TestWCController(unittest.TestCase):
             os.path.join(self.test_data_dir, 'images', 'test.bmp')
         ]
         for img in test_images:
-            with patch('src.wc_controller.QImage') as MockQImageClass: # Patch QImage in wc_controller
-                mock_qimage_instance = MockQImageClass.return_value
-                mock_qimage_instance.load.return_value = True # Simulate successful load
-                mock_qimage_instance.isNull.return_value = False
-                result = self.controller.load_image_data(img) # Use img instead of img_path
+            probe = ImageProbe('PNG', 8, 8, is_valid=True) if img.endswith('.png') else ImageProbe() # GIF/BMP はヘッダーを解析しない
+            with patch('src.wc_controller.probe_image', return_value=probe), \
+                 patch('src.wc_controller.QImageReader') as MockReader:
+                MockReader.return_value.canRead.return_value = True
+                result = self.controller.load_image_data(img)
                 self.assertTrue(result)
-                mock_qimage_instance.load.assert_called_with(img) # Use img instead of img_path
+                if probe.format is None:
+                    MockReader.assert_called_with(img)
 
     def test_threaded_ui_updates(self):
         """マルチスレッド環境でのUI更新テスト"""
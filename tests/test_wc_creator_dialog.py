@@ -1,14 +1,17 @@
 import os
 import sys
 import unittest
+import tempfile
 from unittest.mock import MagicMock, patch
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtGui import QImage, QPixmap
 from PyQt6.QtCore import Qt
+from PIL import Image
 
 # テスト対象のモジュールをインポート
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from src.wc_creator_dialog import WCCreatorDialog, OutputDialog
+from src.wc_output_model import WCOutputPreviewModel, decode_reduced_qimage
 from src.constants import WC_FORMAT_HASH_COMMENT, WC_FORMAT_BRACKET_COMMENT
 
 class TestWCCreatorDialog(unittest.TestCase):
@@ -164,5 +167,49 @@ class TestOutputDialog(unittest.TestCase):
         expected_output = "[comment1:100]line1 line3\n[comment2:100]lineB"
         self.assertEqual(dialog._generate_final_output_text(), expected_output)
 
+    @patch('src.wc_creator_dialog.QMessageBox.information')
+    def test_edits_and_replace_all_use_row_store(self, mock_info):
+        """モデル経由の編集と一括置換が出力に反映されるかのテスト"""
+        dialog = OutputDialog(
+            selected_file_paths=self.test_file_paths,
+            metadata_list=self.test_metadata,
+            initial_comments=self.test_comments,
+            initial_checkbox_states=self.test_checkbox_states,
+            checked_only_mode=False,
+            output_format=WC_FORMAT_HASH_COMMENT,
+            parent=None
+        )
+        model = dialog.preview_model
+        self.assertEqual(model.rowCount(), 2)
+        model.setData(model.index(1, WCOutputPreviewModel.COLUMN_COMMENT), "edited")
+        dialog.search_edit.setText("line")
+        dialog.replace_edit.setText("tag")
+        dialog._perform_replace_all()
+        self.assertEqual(dialog._generate_final_output_text(), "# comment1\ntag1 tag2 tag3\n# edited\ntagA tagB tagC")
+        mock_info.assert_called_once()
+
+    def test_thumbnails_are_requested_only_for_displayed_rows(self):
+        """サムネイルはDecorationRoleが要求された行だけ読み込まれるかのテスト"""
+        loader = MagicMock()
+        model = WCOutputPreviewModel(self.test_file_paths, ["", ""], ["p1", "p2"], thumbnail_loader=loader)
+        loader.request.assert_not_called()
+        self.assertIsNone(model.data(model.index(1, WCOutputPreviewModel.COLUMN_THUMBNAIL), Qt.ItemDataRole.DecorationRole))
+        loader.request.assert_called_once_with(self.test_file_paths[1])
+
+        image = QImage(40, 30, QImage.Format.Format_ARGB32)
+        model._on_thumbnail_ready(self.test_file_paths[1], image)
+        pixmap = model.data(model.index(1, WCOutputPreviewModel.COLUMN_THUMBNAIL), Qt.ItemDataRole.DecorationRole)
+        self.assertEqual((pixmap.width(), pixmap.height()), (40, 30))
+        self.assertEqual(loader.request.call_count, 1)
+
+    def test_decode_reduced_qimage(self):
+        """縮小デコードのテスト"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "large.jpg")
+            Image.new("RGB", (1200, 800), (200, 100, 50)).save(path)
+            qimage = decode_reduced_qimage(path, 96)
+            self.assertEqual((qimage.width(), qimage.height()), (96, 64))
+            self.assertIsNone(decode_reduced_qimage(os.path.join(temp_dir, "missing.jpg"), 96))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,63 @@
+import sys
+import argparse
+import logging
+from src.constants import WC_FORMAT_HASH_COMMENT, WC_FORMAT_BRACKET_COMMENT
+from src.wc_batch import generate_wildcard_file, COMMENT_MODE_NONE, COMMENT_MODE_FILENAME
+
+FORMAT_CHOICES = {
+    "hash": WC_FORMAT_HASH_COMMENT,       # "# コメント" の行 + プロンプト
+    "bracket": WC_FORMAT_BRACKET_COMMENT, # "[コメント:100]プロンプト"
+}
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        description="フォルダ以下の画像のプロンプトからワイルドカードファイルを作成します (GUI不要)。"
+    )
+    parser.add_argument("folder", help="画像フォルダ (サブフォルダも対象)")
+    parser.add_argument("-o", "--output", required=True, help="出力するテキストファイル")
+    parser.add_argument("-f", "--format", choices=sorted(FORMAT_CHOICES), default="hash", help="コメントの出力形式 (既定: hash)")
+    parser.add_argument("-c", "--comment", choices=[COMMENT_MODE_NONE, COMMENT_MODE_FILENAME], default=COMMENT_MODE_NONE,
+                        help="各プロンプトに付けるコメント (filename: 拡張子を除いたファイル名)")
+    parser.add_argument("--no-recursive", action="store_true", help="サブフォルダを検索しない")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="メタデータ抽出のワーカー数")
+    parser.add_argument("--dedup", action="store_true", help="同じプロンプトを1回だけ書き出す (ファイル名のコメントは区別しない)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="進捗を表示しない")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.WARNING if args.quiet else logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stderr)]
+    )
+    for module_name in ['PIL', 'PIL.Image', 'PIL.PngImagePlugin', 'PIL.TiffImagePlugin', 'PIL.JpegImagePlugin', 'PIL.WebPImagePlugin']:
+        logging.getLogger(module_name).setLevel(logging.WARNING)
+    logging.getLogger('src.metadata_utils').setLevel(logging.WARNING) # 画像ごとのログは抑制
+
+    def report_progress(stats):
+        if not args.quiet:
+            print(f"\r処理済み: {stats['scanned']} 件 / 出力: {stats['written']} 件", end="", file=sys.stderr, flush=True)
+
+    try:
+        stats = generate_wildcard_file(
+            args.folder, args.output,
+            output_format=FORMAT_CHOICES[args.format],
+            recursive=not args.no_recursive,
+            workers=args.workers,
+            deduplicate=args.dedup,
+            comment_mode=args.comment,
+            progress_callback=report_progress
+        )
+    except OSError as e:
+        logging.getLogger(__name__).error(f"ワイルドカードファイルの作成に失敗しました: {e}")
+        return 1
+    if not args.quiet:
+        print(file=sys.stderr)
+    return 0 if stats['errors'] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())